@@ -7,6 +7,7 @@ import re
 from six import add_metaclass
 
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.translation import ugettext as _
 from django.core.urlresolvers import resolve
 
@@ -17,6 +18,7 @@ from eventtracking import tracker
 from search.search_engine_base import SearchEngine
 from xmodule.annotator_mixin import html_to_text
 from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.split_mongo import BlockKey
 from xmodule.library_tools import normalize_key_for_search
 
 # REINDEX_AGE is the default amount of time that we look back for changes
@@ -26,6 +28,13 @@ from xmodule.library_tools import normalize_key_for_search
 # how far back from the trigger point to look back in order to index
 REINDEX_AGE = timedelta(0, 60)  # 60 seconds
 
+# Number of items index dictionaries sent to the search engine at once
+INDEX_BATCH_SIZE = 100
+
+# How long the structure version that was last indexed is remembered, so that
+# the next index update only has to process what changed since
+INDEXED_VERSION_CACHE_TIMEOUT = 60 * 60 * 24 * 7  # a week
+
 log = logging.getLogger('edx.modulestore')
 
 
@@ -113,6 +122,27 @@ class SearchIndexerBase(object):
         result_ids = [result["data"]["id"] for result in response["results"]]
         searcher.remove(cls.DOCUMENT_TYPE, result_ids)
 
+    @classmethod
+    def _indexed_version_cache_key(cls, structure_key):
+        """ Cache key for the structure version that was last fully indexed """
+        return u"{}.indexed_version.{}".format(cls.INDEX_NAME, structure_key)
+
+    @classmethod
+    def _fetch_changes(cls, modulestore, structure_key, structure, current_version):
+        """
+        Returns the BlockKeys of the blocks changed and removed since the
+        structure version that was last indexed, and of the changed blocks'
+        ancestors, or None if they can't be determined.
+        """
+        indexed_version = cache.get(cls._indexed_version_cache_key(structure_key))
+        if indexed_version is None or current_version is None:
+            return None
+        changes = modulestore.get_blocks_changed_between(structure_key, indexed_version, current_version)
+        if changes is None or BlockKey.from_usage_key(structure.location) in changes[0]:
+            # Changes to the course (or library) itself may affect every item
+            return None
+        return changes
+
     @classmethod
     def index(cls, modulestore, structure_key, triggered_at=None, reindex_age=REINDEX_AGE):
         """
@@ -124,10 +154,13 @@ class SearchIndexerBase(object):
         structure_key (CourseKey|LibraryKey) - course or library identifier
 
         triggered_at (datetime) - provides time at which indexing was triggered;
-            useful for index updates - only things changed recently from that date
-            (within REINDEX_AGE above ^^) will have their index updated, others skip
-            updating their index but are still walked through in order to identify
-            which items may need to be removed from the index
+            useful for index updates - only things changed since the structure
+            version that was last indexed have their index updated, and only the
+            items removed since are removed from the index. If that version is not
+            known, only things changed recently from that date (within REINDEX_AGE
+            above ^^) will have their index updated, others skip updating their index
+            but are still walked through in order to identify which items may need
+            to be removed from the index
             If None, then a full reindex takes place
 
         Returns:
@@ -152,17 +185,30 @@ class SearchIndexerBase(object):
         # list - those are ready to be destroyed
         indexed_items = set()
 
-        # items_index is a list of all the items index dictionaries.
-        # it is used to collect all indexes and index them using bulk API,
-        # instead of per item index API call.
+        # items_index is a list of the items index dictionaries not sent to the
+        # search engine yet. They are sent using the bulk API, INDEX_BATCH_SIZE
+        # at a time, instead of per item index API call.
         items_index = []
 
+        # The blocks changed since the last indexed structure version, and the
+        # blocks with changes in their subtree; if known, only these are walked
+        changed_blocks = None
+        blocks_to_walk = None
+
         def get_item_location(item):
             """
             Gets the version agnostic item location
             """
             return item.location.version_agnostic().replace(branch=None)
 
+        def flush_items_index():
+            """
+            Send the collected items index dictionaries to the search engine
+            """
+            if items_index:
+                searcher.index(cls.DOCUMENT_TYPE, items_index)
+                del items_index[:]
+
         def prepare_item_index(item, skip_index=False, groups_usage_info=None):
             """
             Add this item to the items_index and indexed_items list
@@ -171,17 +217,23 @@ class SearchIndexerBase(object):
             item - item to add to index, its children will be processed recursively
 
             skip_index - simply walk the children in the tree, the content change is
-                older than the REINDEX_AGE window and would have been already indexed.
+                older than the REINDEX_AGE window, or than the last indexed structure
+                version, and would have been already indexed.
                 This should really only be passed from the recursive child calls when
                 this method has determined that it is safe to do so
 
             Returns:
             item_content_groups - content groups assigned to indexed item
             """
+            if changed_blocks is not None:
+                # an item is reindexed along with its subtree when it changes, since its
+                # children's index include e.g. its display name
+                skip_index = skip_index and BlockKey.from_usage_key(item.location) not in changed_blocks
+
             is_indexable = hasattr(item, "index_dictionary")
-            item_index_dictionary = item.index_dictionary() if is_indexable else None
+            item_index_dictionary = item.index_dictionary() if is_indexable and not skip_index else None
             # if it's not indexable and it does not have children, then ignore
-            if not item_index_dictionary and not item.has_children:
+            if not item.has_children and (not is_indexable or (not skip_index and not item_index_dictionary)):
                 return
 
             item_content_groups = None
@@ -210,18 +262,26 @@ class SearchIndexerBase(object):
             indexed_items.add(item_id)
             if item.has_children:
                 # determine if it's okay to skip adding the children herein based upon how recently any may have changed
-                skip_child_index = skip_index or \
-                    (triggered_at is not None and (triggered_at - item.subtree_edited_on) > reindex_age)
+                if changed_blocks is not None:
+                    skip_child_index = skip_index
+                else:
+                    skip_child_index = skip_index or \
+                        (triggered_at is not None and (triggered_at - item.subtree_edited_on) > reindex_age)
                 children_groups_usage = []
                 for child_item in item.get_children():
-                    if modulestore.has_published_version(child_item):
-                        children_groups_usage.append(
-                            prepare_item_index(
-                                child_item,
-                                skip_index=skip_child_index,
-                                groups_usage_info=groups_usage_info
-                            )
+                    if skip_child_index and blocks_to_walk is not None and \
+                            BlockKey.from_usage_key(child_item.location) not in blocks_to_walk:
+                        # nothing changed in the child's subtree
+                        continue
+                    if check_published and not modulestore.has_published_version(child_item):
+                        continue
+                    children_groups_usage.append(
+                        prepare_item_index(
+                            child_item,
+                            skip_index=skip_child_index,
+                            groups_usage_info=groups_usage_info
                         )
+                    )
                 if None in children_groups_usage:
                     item_content_groups = None
 
@@ -240,25 +300,55 @@ class SearchIndexerBase(object):
                 item_index.update(cls.supplemental_fields(item))
                 items_index.append(item_index)
                 indexed_count["count"] += 1
+                if len(items_index) >= INDEX_BATCH_SIZE:
+                    flush_items_index()
                 return item_content_groups
             except Exception as err:  # pylint: disable=broad-except
                 # broad exception so that index operation does not fail on one item of many
                 log.warning('Could not index item: %s - %r', item.location, err)
                 error_list.append(_('Could not index item: {}').format(item.location))
 
+        # Items of the published branch of split courses and libraries are all
+        # published, but old Mongo may list unpublished children of published items
+        check_published = modulestore.get_modulestore_type(structure_key) != ModuleStoreEnum.Type.split
+
+        structure_version = None
         try:
             with modulestore.branch_setting(ModuleStoreEnum.RevisionOption.published_only):
+                structure_version = modulestore.get_structure_version(structure_key)
                 structure = cls._fetch_top_level(modulestore, structure_key)
                 groups_usage_info = cls.fetch_group_usage(modulestore, structure)
 
                 # First perform any additional indexing from the structure object
                 cls.supplemental_index_information(modulestore, structure)
 
+                removed_blocks = None
+                if triggered_at is not None:
+                    block_changes = cls._fetch_changes(modulestore, structure_key, structure, structure_version)
+                    if block_changes is not None:
+                        changed_blocks, removed_blocks, ancestors = block_changes
+                        blocks_to_walk = changed_blocks | ancestors
+
                 # Now index the content
                 for item in structure.get_children():
-                    prepare_item_index(item, groups_usage_info=groups_usage_info)
-                searcher.index(cls.DOCUMENT_TYPE, items_index)
-                cls.remove_deleted_items(searcher, structure_key, indexed_items)
+                    if blocks_to_walk is not None and BlockKey.from_usage_key(item.location) not in blocks_to_walk:
+                        continue
+                    prepare_item_index(
+                        item,
+                        skip_index=changed_blocks is not None,
+                        groups_usage_info=groups_usage_info
+                    )
+                flush_items_index()
+
+                if removed_blocks is None:
+                    cls.remove_deleted_items(searcher, structure_key, indexed_items)
+                elif removed_blocks:
+                    searcher.remove(cls.DOCUMENT_TYPE, [
+                        unicode(cls._id_modifier(
+                            structure_key.make_usage_key(block_key.type, block_key.id).version_agnostic()
+                        ))
+                        for block_key in removed_blocks
+                    ])
         except Exception as err:  # pylint: disable=broad-except
             # broad exception so that index operation does not prevent the rest of the application from working
             log.exception(
@@ -269,8 +359,12 @@ class SearchIndexerBase(object):
             error_list.append(_('General indexing error occurred'))
 
         if error_list:
+            cache.delete(cls._indexed_version_cache_key(structure_key))
             raise SearchIndexingError('Error(s) present during indexing', error_list)
 
+        if structure_version is not None:
+            cache.set(cls._indexed_version_cache_key(structure_key), structure_version, INDEXED_VERSION_CACHE_TIMEOUT)
+
         return indexed_count["count"]
 
     @classmethod
@@ -1,26 +1,66 @@
 """
 This file contains celery tasks for contentstore views
 """
+import hashlib
 import json
 import logging
+import os
+import shutil
+import tarfile
+import tempfile
 from celery.task import task
 from celery.utils.log import get_task_logger
 from datetime import datetime
+from path import Path as path
 from pytz import UTC
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousOperation
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils.translation import ugettext as _
 
+import dogstats_wrapper as dog_stats_api
 from contentstore.courseware_index import CoursewareSearchIndexer, LibrarySearchIndexer, SearchIndexingError
 from contentstore.utils import initialize_permissions
 from course_action_state.models import CourseRerunState
 from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.locator import LibraryLocator
+from openedx.core.lib.extract_tar import safetar_extractall
+from xmodule.contentstore.django import contentstore
 from xmodule.course_module import CourseFields
+from xmodule.exceptions import SerializationError
+from xmodule.modulestore import COURSE_ROOT, LIBRARY_ROOT, ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import DuplicateCourseError, ItemNotFoundError
+from xmodule.modulestore.xml_exporter import export_course_to_tarball, export_library_to_tarball
+from xmodule.modulestore.xml_importer import import_course_from_xml, import_library_from_xml
 
 LOGGER = get_task_logger(__name__)
 FULL_COURSE_REINDEX_THRESHOLD = 1
 
+# The directory of default_storage holding the cached export archives
+EXPORT_ARTIFACT_DIR = 'course_exports'
+
+# How long the status of an import is kept, in seconds
+IMPORT_STATUS_TIMEOUT = 24 * 60 * 60
+
+# The stage shown on the import page during each phase of an import:
+#   0: uploading, 1: unpacking, 2: verifying, 3: updating, 4: success
+# A failed import reports the negated stage it failed at.
+IMPORT_PHASE_STAGES = {
+    'upload': 0,
+    'extract': 1,
+    'verify': 2,
+    'static': 3,
+    'modules': 3,
+    'drafts': 3,
+    'reindex': 3,
+    'done': 4,
+}
+
 
 @task()
 def rerun_course(source_course_key_string, destination_course_key_string, user_id, fields=None):
@@ -125,3 +165,262 @@ def push_course_update_task(course_key_string, course_subscription_id, course_di
     # TODO Use edx-notifications library instead (MA-638).
     from .push_notification import send_push_course_update
     send_push_course_update(course_key_string, course_subscription_id, course_display_name)
+
+
+def _import_status_cache_key(user_id, courselike_key_string, filename):
+    """ Cache key for the status of a user's import of `filename` """
+    return u"contentstore.import_status.{}.{}.{}".format(user_id, courselike_key_string, filename)
+
+
+def get_import_status(user_id, courselike_key_string, filename):
+    """
+    Returns the status of the user's import of the archive `filename` into
+    the course or library, as a dict with these keys:
+
+        stage: the stage shown on the import page (see IMPORT_PHASE_STAGES)
+        phase: the phase of the import in progress, or that failed
+        completed: the phases that completed, which aren't redone on resume
+        message: why the import failed, if it did
+    """
+    status = cache.get(_import_status_cache_key(user_id, courselike_key_string, filename))
+    if status is None:
+        status = {'stage': 0, 'phase': None, 'completed': [], 'message': u''}
+    return status
+
+
+def set_import_status(user_id, courselike_key_string, filename, phase, completed=(), failed=False, message=u''):
+    """
+    Records that the user's import of `filename` is in (or, if `failed`,
+    failed in) `phase`, after completing the phases in `completed`.
+    """
+    stage = IMPORT_PHASE_STAGES[phase]
+    cache.set(
+        _import_status_cache_key(user_id, courselike_key_string, filename),
+        {
+            'stage': -stage if failed else stage,
+            'phase': phase,
+            'completed': list(completed),
+            'message': message,
+        },
+        IMPORT_STATUS_TIMEOUT
+    )
+
+
+def _get_dir_for_fname(directory, filename):
+    """
+    Returns the dirpath for the first file found in the directory with the
+    given name. If there is no file in the directory with the specified name,
+    return None.
+    """
+    for dirpath, _dirnames, filenames in os.walk(directory):
+        if filename in filenames:
+            return dirpath
+    return None
+
+
+# pylint: disable=not-callable
+@task(
+    default_retry_delay=settings.COURSE_IMPORT_TASK_DEFAULT_RETRY_DELAY,
+    max_retries=settings.COURSE_IMPORT_TASK_MAX_RETRIES
+)
+def import_olx(user_id, courselike_key_string, archive_path, archive_name):
+    """
+    Imports the course or library in the .tar.gz file at `archive_path`, which
+    the user uploaded as `archive_name`, into `courselike_key_string`.
+
+    The archive is extracted next to it, so it must be in a directory of its
+    own under GITHUB_REPO_ROOT, which the workers must share with Studio. The
+    directory is removed once the import succeeds, or fails for good.
+
+    The progress of each phase (extract, verify, static, modules, drafts,
+    reindex) is recorded with set_import_status. If the import fails with an
+    unexpected error it is retried, resuming after the extraction and the
+    static asset import if those completed; the modulestore phases are redone.
+    """
+    courselike_key = CourseKey.from_string(courselike_key_string)
+    if isinstance(courselike_key, LibraryLocator):
+        root_name = LIBRARY_ROOT
+        import_func = import_library_from_xml
+        indexer = LibrarySearchIndexer
+    else:
+        root_name = COURSE_ROOT
+        import_func = import_course_from_xml
+        indexer = CoursewareSearchIndexer
+
+    data_root = path(settings.GITHUB_REPO_ROOT)
+    course_dir = path(archive_path).dirname()
+    completed = list(get_import_status(user_id, courselike_key_string, archive_name)['completed'])
+    current = {'phase': None}
+
+    def start_phase(phase):
+        """
+        Records that the previous phase completed and `phase` started.
+        """
+        if current['phase'] is not None and current['phase'] not in completed:
+            completed.append(current['phase'])
+        current['phase'] = phase
+        set_import_status(user_id, courselike_key_string, archive_name, phase, completed)
+
+    def fail(message):
+        """
+        Records that the import failed in the current phase, and cleans up.
+        """
+        set_import_status(
+            user_id, courselike_key_string, archive_name, current['phase'], completed, failed=True, message=message
+        )
+        if course_dir.isdir():
+            shutil.rmtree(course_dir)
+            LOGGER.info(u'Course import %s: Temp data cleared', courselike_key)
+
+    try:
+        start_phase('extract')
+        if 'extract' not in completed:
+            with tarfile.open(archive_path) as tar_file:
+                safetar_extractall(tar_file, (course_dir + '/').encode('utf-8'))
+            LOGGER.info(u'Course import %s: Uploaded file extracted', courselike_key)
+
+        start_phase('verify')
+        dirpath = _get_dir_for_fname(course_dir, root_name)
+        if not dirpath:
+            fail(_(u'Could not find the {0} file in the package.').format(root_name))
+            return 'invalid archive'
+        dirpath = os.path.relpath(dirpath, data_root)
+        LOGGER.info(u'Course import %s: Extracted file verified', courselike_key)
+
+        with dog_stats_api.timer(
+            'courselike_import.time',
+            tags=[u'courselike:{}'.format(courselike_key)]
+        ):
+            import_func(
+                modulestore(), user_id,
+                settings.GITHUB_REPO_ROOT, [dirpath],
+                load_error_modules=False,
+                static_content_store=contentstore(),
+                target_id=courselike_key,
+                static_content_workers=settings.COURSE_IMPORT_STATIC_CONTENT_WORKERS,
+                skip_static_import='static' in completed,
+                status_callback=start_phase,
+            )
+        LOGGER.info(u'Course import %s: Course import successful', courselike_key)
+
+        # The publish signal queues this too, but indexing here lets the import
+        # report it; the queued index then finds the structure already indexed.
+        start_phase('reindex')
+        if indexer.indexing_is_enabled():
+            try:
+                indexer.index(modulestore(), courselike_key, triggered_at=datetime.now(UTC))
+            except SearchIndexingError as exc:
+                LOGGER.error(u'Search indexing error for imported %s - %s', courselike_key, unicode(exc))
+
+        start_phase('done')
+    except SuspiciousOperation as exc:
+        fail(u'Unsafe tar file. Aborting import. SuspiciousFileOperation: {}'.format(exc.args[0]))
+        return 'unsafe archive'
+    except Exception as exc:  # pylint: disable=broad-except
+        LOGGER.exception(u'Course import %s: error in phase %s', courselike_key, current['phase'])
+        if import_olx.request.retries >= import_olx.max_retries:
+            fail(unicode(exc))
+            return u'exception: ' + unicode(exc)
+        raise import_olx.retry(args=[user_id, courselike_key_string, archive_path, archive_name], exc=exc)
+
+    if course_dir.isdir():
+        shutil.rmtree(course_dir)
+        LOGGER.info(u'Course import %s: Temp data cleared', courselike_key)
+    return 'succeeded'
+
+
+def export_tarball(courselike_key):
+    """
+    Exports the course or library to a .tar.gz archive, and returns an
+    iterator over its chunks (see xml_exporter.stream_tarball). The archive
+    holds a directory named after the course's (or library's) url_name.
+    """
+    if isinstance(courselike_key, LibraryLocator):
+        name = modulestore().get_library(courselike_key).url_name
+        return export_library_to_tarball(modulestore(), contentstore(), courselike_key, name)
+    name = modulestore().get_course(courselike_key).url_name
+    return export_course_to_tarball(modulestore(), contentstore(), courselike_key, name)
+
+
+def get_export_version(courselike_key):
+    """
+    Returns a digest of everything an export of the course or library
+    includes: its published and draft structure versions and its static
+    assets. Returns None if the modulestore doesn't version structures, in
+    which case exports can't be cached.
+    """
+    store = modulestore()
+    with store.branch_setting(ModuleStoreEnum.Branch.published_only, courselike_key):
+        published_version = store.get_structure_version(courselike_key)
+    if published_version is None:
+        return None
+    with store.branch_setting(ModuleStoreEnum.Branch.draft_preferred, courselike_key):
+        draft_version = store.get_structure_version(courselike_key)
+
+    assets, __ = contentstore().get_all_content_for_course(courselike_key)
+    digest = hashlib.md5()
+    digest.update(u'{}.{}'.format(published_version, draft_version))
+    digest.update(json.dumps(
+        [(unicode(asset['asset_key']), asset.get('md5')) for asset in assets],
+        sort_keys=True
+    ))
+    digest.update(json.dumps(contentstore().get_assets_policy(assets), sort_keys=True, default=unicode))
+    return digest.hexdigest()
+
+
+def _export_artifact_dir(courselike_key):
+    """ The directory of default_storage holding the export archives of the course or library """
+    return u'{}/{}'.format(EXPORT_ARTIFACT_DIR, hashlib.md5(unicode(courselike_key).encode('utf-8')).hexdigest())
+
+
+def get_export_artifact(courselike_key, version=None):
+    """
+    Returns the name in default_storage of the cached export archive of the
+    current version of the course or library, or None if there is none.
+    """
+    if version is None:
+        version = get_export_version(courselike_key)
+    if version is None:
+        return None
+    name = u'{}/{}.tar.gz'.format(_export_artifact_dir(courselike_key), version)
+    return name if default_storage.exists(name) else None
+
+
+@task()
+def export_olx(courselike_key_string):
+    """
+    Exports the course or library to a .tar.gz archive in default_storage,
+    cached by the version of what is exported (see get_export_version), and
+    removes the archives of older versions.
+    """
+    courselike_key = CourseKey.from_string(courselike_key_string)
+    version = get_export_version(courselike_key)
+    if version is None or get_export_artifact(courselike_key, version) is not None:
+        return None
+
+    artifact_dir = _export_artifact_dir(courselike_key)
+    name = u'{}/{}.tar.gz'.format(artifact_dir, version)
+    try:
+        with tempfile.TemporaryFile() as tarball:
+            for chunk in export_tarball(courselike_key):
+                tarball.write(chunk)
+            # An anonymous temporary file has no name that File could find
+            # its size from, and storages need the size to save it.
+            tarball_file = File(tarball)
+            tarball_file.size = tarball.tell()
+            tarball.seek(0)
+            if default_storage.exists(name):
+                # Another export of this version finished first
+                return name
+            name = default_storage.save(name, tarball_file)
+    except (SerializationError, EnvironmentError):
+        LOGGER.exception(u'Error exporting %s', courselike_key)
+        return None
+
+    __, filenames = default_storage.listdir(artifact_dir)
+    for filename in filenames:
+        old_name = u'{}/{}'.format(artifact_dir, filename)
+        if old_name != name:
+            default_storage.delete(old_name)
+    LOGGER.info(u'Export of %s cached as %s', courselike_key, name)
+    return name
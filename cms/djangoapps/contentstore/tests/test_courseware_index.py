@@ -443,13 +443,64 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
         # index based on time, will include an index of the origin sequential
         # because it is in a common subtree but not of the original vertical
         # because the original sequential's subtree is too old
+        # split courses are indexed based on what changed since the last indexed
+        # structure version instead, so only the new sequential's subtree is indexed
         new_indexed_count = self.index_recent_changes(store, before_time)
-        self.assertEqual(new_indexed_count, 5)
+        if store.get_modulestore_type(self.course.id) == ModuleStoreEnum.Type.split:
+            self.assertEqual(new_indexed_count, 3)
+        else:
+            self.assertEqual(new_indexed_count, 5)
 
         # full index again
         indexed_count = self.reindex_course(store)
         self.assertEqual(indexed_count, 7)
 
+    def _test_incremental_index(self, store):
+        """ Make sure that only what changed since the last index is indexed in split courses """
+        self.publish_item(store, self.vertical.location)
+        indexed_count = self.reindex_course(store)
+        self.assertEqual(indexed_count, 4)
+
+        # change the html content; only it is indexed, however old the change
+        self.html_unit.display_name = "Updated Html Content"
+        self.update_item(store, self.html_unit)
+        self.publish_item(store, self.vertical.location)
+        new_indexed_count = self.index_recent_changes(store, datetime.now(UTC))
+        self.assertEqual(new_indexed_count, 1)
+        response = self.search()
+        self.assertEqual(response["total"], 4)
+
+        # moving the html content to a new vertical indexes it along with the vertical
+        vertical2 = ItemFactory.create(
+            parent_location=self.sequential.location,
+            category='vertical',
+            display_name='Subsection 2',
+            modulestore=store,
+            publish_item=False,
+        )
+        with store.branch_setting(ModuleStoreEnum.Branch.draft_preferred):
+            vertical2 = store.get_item(vertical2.location)
+            vertical = store.get_item(self.vertical.location)
+        html_key = next(child for child in vertical.children if child.block_id == self.html_unit.location.block_id)
+        vertical2.children.append(html_key)
+        self.update_item(store, vertical2)
+        vertical.children.remove(html_key)
+        self.update_item(store, vertical)
+        self.publish_item(store, vertical2.location)
+        self.publish_item(store, self.vertical.location)
+        new_indexed_count = self.index_recent_changes(store, datetime.now(UTC))
+        self.assertEqual(new_indexed_count, 2)
+        response = self.search()
+        self.assertEqual(response["total"], 5)
+
+        # deleting the html content removes it from the index
+        self.delete_item(store, self.html_unit.location)
+        self.publish_item(store, vertical2.location)
+        new_indexed_count = self.index_recent_changes(store, datetime.now(UTC))
+        self.assertEqual(new_indexed_count, 0)
+        response = self.search()
+        self.assertEqual(response["total"], 4)
+
     def _test_course_about_property_index(self, store):
         """ Test that informational properties in the course object end up in the course_info index """
         display_name = "Help, I need somebody!"
@@ -582,6 +633,9 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
     def test_exception(self, store_type):
         self._perform_test_using_store(store_type, self._test_exception)
 
+    def test_incremental_index(self):
+        self._perform_test_using_store(ModuleStoreEnum.Type.split, self._test_incremental_index)
+
     @ddt.data(*WORKS_WITH_STORES)
     def test_course_about_property_index(self, store_type):
         self._perform_test_using_store(store_type, self._test_course_about_property_index)
@@ -7,37 +7,33 @@ import logging
 import os
 import re
 import shutil
-import tarfile
 from path import Path as path
-from tempfile import mkdtemp
 
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.exceptions import SuspiciousOperation, PermissionDenied
-from django.core.files.temp import NamedTemporaryFile
+from django.core.exceptions import PermissionDenied
+from django.core.files.storage import default_storage
 from django.core.servers.basehttp import FileWrapper
 from django.http import HttpResponse, HttpResponseNotFound
 from django.utils.translation import ugettext as _
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods, require_GET
 
-import dogstats_wrapper as dog_stats_api
 from edxmako.shortcuts import render_to_response
-from xmodule.contentstore.django import contentstore
 from xmodule.exceptions import SerializationError
 from xmodule.modulestore.django import modulestore
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locator import LibraryLocator
-from xmodule.modulestore.xml_importer import import_course_from_xml, import_library_from_xml
-from xmodule.modulestore.xml_exporter import export_course_to_xml, export_library_to_xml
-from xmodule.modulestore import COURSE_ROOT, LIBRARY_ROOT
 
 from student.auth import has_course_author_access
 
-from openedx.core.lib.extract_tar import safetar_extractall
 from util.json_request import JsonResponse
 from util.views import ensure_valid_course_key
 
+from contentstore.tasks import (
+    export_olx, export_tarball, get_export_artifact, get_export_version, get_import_status, import_olx,
+    set_import_status
+)
 from contentstore.utils import reverse_course_url, reverse_usage_url, reverse_library_url
 
 
@@ -72,25 +68,22 @@ def import_handler(request, course_key_string):
     courselike_key = CourseKey.from_string(course_key_string)
     library = isinstance(courselike_key, LibraryLocator)
     if library:
-        root_name = LIBRARY_ROOT
         successful_url = reverse_library_url('library_handler', courselike_key)
         context_name = 'context_library'
         courselike_module = modulestore().get_library(courselike_key)
-        import_func = import_library_from_xml
     else:
-        root_name = COURSE_ROOT
         successful_url = reverse_course_url('course_handler', courselike_key)
         context_name = 'context_course'
         courselike_module = modulestore().get_course(courselike_key)
-        import_func = import_course_from_xml
-    return _import_handler(
-        request, courselike_key, root_name, successful_url, context_name, courselike_module, import_func
-    )
+    return _import_handler(request, courselike_key, successful_url, context_name, courselike_module)
 
 
-def _import_handler(request, courselike_key, root_name, successful_url, context_name, courselike_module, import_func):
+def _import_handler(request, courselike_key, successful_url, context_name, courselike_module):
     """
     Parameterized function containing the meat of import_handler.
+
+    The uploaded chunks are written to disk here; once the last one arrives,
+    the import itself runs in the import_olx task.
     """
     if not has_course_author_access(request.user, courselike_key):
         raise PermissionDenied()
@@ -106,12 +99,10 @@ def _import_handler(request, courselike_key, root_name, successful_url, context_
                 course_dir = data_root / subdir
                 filename = request.FILES['course-data'].name
 
-                # Use sessions to keep info about import progress
-                session_status = request.session.setdefault("import_status", {})
-                courselike_string = unicode(courselike_key) + filename
-                _save_request_status(request, courselike_string, 0)
+                courselike_string = unicode(courselike_key)
+                set_import_status(request.user.id, courselike_string, filename, 'upload')
                 if not filename.endswith('.tar.gz'):
-                    _save_request_status(request, courselike_string, -1)
+                    set_import_status(request.user.id, courselike_string, filename, 'extract', failed=True)
                     return JsonResponse(
                         {
                             'ErrMsg': _('We only support uploading a .tar.gz file.'),
@@ -144,7 +135,7 @@ def _import_handler(request, courselike_key, root_name, successful_url, context_
                     # This shouldn't happen, even if different instances are handling
                     # the same session, but it's always better to catch errors earlier.
                     if size < int(content_range['start']):
-                        _save_request_status(request, courselike_string, -1)
+                        set_import_status(request.user.id, courselike_string, filename, 'extract', failed=True)
                         log.warning(
                             "Reported range %s does not match size downloaded so far %s",
                             content_range['start'],
@@ -180,9 +171,17 @@ def _import_handler(request, courselike_key, root_name, successful_url, context_
                             "thumbnailUrl": ""
                         }]
                     })
+
+                # This was the last chunk.
+                log.info("Course import %s: Upload complete", courselike_key)
+                set_import_status(request.user.id, courselike_string, filename, 'extract')
+                import_olx.delay(request.user.id, courselike_string, unicode(temp_filepath), filename)
+
             # Send errors to client with stage at which error occurred.
             except Exception as exception:  # pylint: disable=broad-except
-                _save_request_status(request, courselike_string, -1)
+                set_import_status(
+                    request.user.id, courselike_string, filename, 'extract', failed=True, message=str(exception)
+                )
                 if course_dir.isdir():
                     shutil.rmtree(course_dir)
                     log.info("Course import %s: Temp data cleared", courselike_key)
@@ -198,108 +197,6 @@ def _import_handler(request, courselike_key, root_name, successful_url, context_
                     status=400
                 )
 
-            # try-finally block for proper clean up after receiving last chunk.
-            try:
-                # This was the last chunk.
-                log.info("Course import %s: Upload complete", courselike_key)
-                _save_request_status(request, courselike_string, 1)
-
-                tar_file = tarfile.open(temp_filepath)
-                try:
-                    safetar_extractall(tar_file, (course_dir + '/').encode('utf-8'))
-                except SuspiciousOperation as exc:
-                    _save_request_status(request, courselike_string, -1)
-                    return JsonResponse(
-                        {
-                            'ErrMsg': 'Unsafe tar file. Aborting import.',
-                            'SuspiciousFileOperationMsg': exc.args[0],
-                            'Stage': -1
-                        },
-                        status=400
-                    )
-                finally:
-                    tar_file.close()
-
-                log.info("Course import %s: Uploaded file extracted", courselike_key)
-                _save_request_status(request, courselike_string, 2)
-
-                # find the 'course.xml' file
-                def get_all_files(directory):
-                    """
-                    For each file in the directory, yield a 2-tuple of (file-name,
-                    directory-path)
-                    """
-                    for dirpath, _dirnames, filenames in os.walk(directory):
-                        for filename in filenames:
-                            yield (filename, dirpath)
-
-                def get_dir_for_fname(directory, filename):
-                    """
-                    Returns the dirpath for the first file found in the directory
-                    with the given name.  If there is no file in the directory with
-                    the specified name, return None.
-                    """
-                    for fname, dirpath in get_all_files(directory):
-                        if fname == filename:
-                            return dirpath
-                    return None
-
-                dirpath = get_dir_for_fname(course_dir, root_name)
-                if not dirpath:
-                    _save_request_status(request, courselike_string, -2)
-                    return JsonResponse(
-                        {
-                            'ErrMsg': _('Could not find the {0} file in the package.').format(root_name),
-                            'Stage': -2
-                        },
-                        status=415
-                    )
-
-                dirpath = os.path.relpath(dirpath, data_root)
-                logging.debug('found %s at %s', root_name, dirpath)
-
-                log.info("Course import %s: Extracted file verified", courselike_key)
-                _save_request_status(request, courselike_string, 3)
-
-                with dog_stats_api.timer(
-                    'courselike_import.time',
-                    tags=[u"courselike:{}".format(courselike_key)]
-                ):
-                    courselike_items = import_func(
-                        modulestore(), request.user.id,
-                        settings.GITHUB_REPO_ROOT, [dirpath],
-                        load_error_modules=False,
-                        static_content_store=contentstore(),
-                        target_id=courselike_key
-                    )
-
-                new_location = courselike_items[0].location
-                logging.debug('new course at %s', new_location)
-
-                log.info("Course import %s: Course import successful", courselike_key)
-                _save_request_status(request, courselike_string, 4)
-
-            # Send errors to client with stage at which error occurred.
-            except Exception as exception:   # pylint: disable=broad-except
-                log.exception(
-                    "error importing course"
-                )
-                return JsonResponse(
-                    {
-                        'ErrMsg': str(exception),
-                        'Stage': -session_status[courselike_string]
-                    },
-                    status=400
-                )
-
-            finally:
-                if course_dir.isdir():
-                    shutil.rmtree(course_dir)
-                    log.info("Course import %s: Temp data cleared", courselike_key)
-                # set failed stage number with negative sign in case of unsuccessful import
-                if session_status[courselike_string] != 4:
-                    _save_request_status(request, courselike_string, -abs(session_status[courselike_string]))
-
             return JsonResponse({'Status': 'OK'})
     elif request.method == 'GET':  # assume html
         status_url = reverse_course_url(
@@ -315,18 +212,6 @@ def _import_handler(request, courselike_key, root_name, successful_url, context_
         return HttpResponseNotFound()
 
 
-def _save_request_status(request, key, status):
-    """
-    Save import status for a course in request session
-    """
-    session_status = request.session.get('import_status')
-    if session_status is None:
-        session_status = request.session.setdefault("import_status", {})
-
-    session_status[key] = status
-    request.session.save()
-
-
 # pylint: disable=unused-argument
 @require_GET
 @ensure_csrf_cookie
@@ -343,39 +228,31 @@ def import_status_handler(request, course_key_string, filename=None):
         3 : Importing to mongo
         4 : Import successful
 
+    Along with the phase of the import within that stage (extract, verify,
+    static, modules, drafts, reindex or done), and why it failed, if it did.
     """
     course_key = CourseKey.from_string(course_key_string)
     if not has_course_author_access(request.user, course_key):
         raise PermissionDenied()
 
-    try:
-        session_status = request.session["import_status"]
-        status = session_status[course_key_string + filename]
-    except KeyError:
-        status = 0
+    status = get_import_status(request.user.id, unicode(course_key), filename)
+    return JsonResponse({
+        "ImportStatus": status['stage'],
+        "Phase": status['phase'],
+        "Message": status['message'],
+    })
 
-    return JsonResponse({"ImportStatus": status})
 
-
-def create_export_tarball(course_module, course_key, context):
+def create_export_tarball(course_key, context):
     """
-    Generates the export tarball, or returns None if there was an error.
+    Generates the export tarball, and returns an iterator over its chunks.
+    The xml is exported right away, and the tarball is then streamed as it's
+    iterated over.
 
     Updates the context with any error information if applicable.
     """
-    name = course_module.url_name
-    export_file = NamedTemporaryFile(prefix=name + '.', suffix=".tar.gz")
-    root_dir = path(mkdtemp())
-
     try:
-        if isinstance(course_key, LibraryLocator):
-            export_library_to_xml(modulestore(), contentstore(), course_key, root_dir, name)
-        else:
-            export_course_to_xml(modulestore(), contentstore(), course_module.id, root_dir, name)
-
-        logging.debug(u'tar file being generated at %s', export_file.name)
-        with tarfile.open(name=export_file.name, mode='w:gz') as tar_file:
-            tar_file.add(root_dir / name, arcname=name)
+        return export_tarball(course_key)
 
     except SerializationError as exc:
         log.exception(u'There was an error exporting %s', course_key)
@@ -409,20 +286,20 @@ def create_export_tarball(course_module, course_key, context):
             'unit': None,
             'raw_err_msg': str(exc)})
         raise
-    finally:
-        shutil.rmtree(root_dir / name)
-
-    return export_file
 
 
-def send_tarball(tarball):
+def send_tarball(tarball, filename, size=None):
     """
     Renders a tarball to response, for use when sending a tar.gz file to the user.
+
+    `tarball` is either a file or an iterator over the tarball's chunks, of
+    unknown `size`.
     """
-    wrapper = FileWrapper(tarball)
-    response = HttpResponse(wrapper, content_type='application/x-tgz')
-    response['Content-Disposition'] = 'attachment; filename=%s' % os.path.basename(tarball.name.encode('utf-8'))
-    response['Content-Length'] = os.path.getsize(tarball.name)
+    content = FileWrapper(tarball) if hasattr(tarball, 'read') else tarball
+    response = HttpResponse(content, content_type='application/x-tgz')
+    response['Content-Disposition'] = 'attachment; filename=%s' % filename.encode('utf-8')
+    if size is not None:
+        response['Content-Length'] = size
     return response
 
 
@@ -472,13 +349,22 @@ def export_handler(request, course_key_string):
     requested_format = request.REQUEST.get('_accept', request.META.get('HTTP_ACCEPT', 'text/html'))
 
     if 'application/x-tgz' in requested_format:
+        filename = courselike_module.url_name + '.tar.gz'
+        artifact = get_export_artifact(course_key)
+        if artifact is not None:
+            return send_tarball(default_storage.open(artifact), filename, default_storage.size(artifact))
         try:
-            tarball = create_export_tarball(courselike_module, course_key, context)
+            tarball = create_export_tarball(course_key, context)
         except SerializationError:
             return render_to_response('export.html', context)
-        return send_tarball(tarball)
+        return send_tarball(tarball, filename)
 
     elif 'text/html' in requested_format:
+        # Prepare the archive in the background, so it is ready to download
+        # by the time it's asked for, unless it's cached already.
+        version = get_export_version(course_key)
+        if version is not None and get_export_artifact(course_key, version) is None:
+            export_olx.delay(unicode(course_key))
         return render_to_response('export.html', context)
 
     else:
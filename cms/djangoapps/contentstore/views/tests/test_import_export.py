@@ -9,18 +9,23 @@ import os
 import shutil
 import tarfile
 import tempfile
+from cStringIO import StringIO
+from mock import patch
 from path import Path as path
 from uuid import uuid4
 
+from django.core.files.storage import default_storage
 from django.test.utils import override_settings
 from django.conf import settings
+from xmodule.contentstore.content import StaticContent
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.xml_exporter import export_library_to_xml
 from xmodule.modulestore.xml_importer import import_library_from_xml
-from xmodule.modulestore import LIBRARY_ROOT
+from xmodule.modulestore import LIBRARY_ROOT, ModuleStoreEnum
+from contentstore.tasks import export_olx, get_export_artifact, get_export_version
 from contentstore.utils import reverse_course_url
 
-from xmodule.modulestore.tests.factories import ItemFactory, LibraryFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory, LibraryFactory
 
 from contentstore.tests.utils import CourseTestCase
 from openedx.core.lib.extract_tar import safetar_extractall
@@ -75,6 +80,19 @@ class ImportTestCase(CourseTestCase):
 
         self.unsafe_common_dir = path(tempfile.mkdtemp(dir=self.content_dir))
 
+    def get_import_status(self, tarpath):
+        """
+        Returns the response of `import_status_handler` for the archive.
+        """
+        resp_status = self.client.get(
+            reverse_course_url(
+                'import_status_handler',
+                self.course.id,
+                kwargs={'filename': os.path.split(tarpath)[1]}
+            )
+        )
+        return json.loads(resp_status.content)
+
     def test_no_coursexml(self):
         """
         Check that the response for a tar.gz import without a course.xml is
@@ -87,18 +105,14 @@ class ImportTestCase(CourseTestCase):
                     "name": self.bad_tar,
                     "course-data": [btar]
                 })
-        self.assertEquals(resp.status_code, 415)
+        # The archive is verified by the import task, after the upload succeeded
+        self.assertEquals(resp.status_code, 200)
         # Check that `import_status` returns the appropriate stage (i.e., the
         # stage at which import failed).
-        resp_status = self.client.get(
-            reverse_course_url(
-                'import_status_handler',
-                self.course.id,
-                kwargs={'filename': os.path.split(self.bad_tar)[1]}
-            )
-        )
-
-        self.assertEquals(json.loads(resp_status.content)["ImportStatus"], -2)
+        status = self.get_import_status(self.bad_tar)
+        self.assertEquals(status["ImportStatus"], -2)
+        self.assertEquals(status["Phase"], "verify")
+        self.assertIn("course.xml", status["Message"])
 
     def test_with_coursexml(self):
         """
@@ -110,6 +124,49 @@ class ImportTestCase(CourseTestCase):
             resp = self.client.post(self.url, args)
 
         self.assertEquals(resp.status_code, 200)
+        status = self.get_import_status(self.good_tar)
+        self.assertEquals(status["ImportStatus"], 4)
+        self.assertEquals(status["Phase"], "done")
+
+    @patch('contentstore.tasks.import_course_from_xml')
+    def test_import_resumes_after_failure(self, mock_import):
+        """
+        Check that an import that fails after importing the static assets is
+        retried without importing them again.
+        """
+        def import_course(*args, **kwargs):  # pylint: disable=unused-argument
+            """ Fail the first import once its static assets are imported """
+            kwargs['status_callback']('static')
+            if mock_import.call_count == 1:
+                kwargs['status_callback']('modules')
+                raise Exception('Lost the connection to the modulestore')
+            return []
+        mock_import.side_effect = import_course
+
+        with open(self.good_tar) as gtar:
+            resp = self.client.post(self.url, {"name": self.good_tar, "course-data": [gtar]})
+        self.assertEquals(resp.status_code, 200)
+
+        self.assertEquals(mock_import.call_count, 2)
+        self.assertFalse(mock_import.call_args_list[0][1]['skip_static_import'])
+        self.assertTrue(mock_import.call_args_list[1][1]['skip_static_import'])
+        status = self.get_import_status(self.good_tar)
+        self.assertEquals(status["ImportStatus"], 4)
+
+    @patch('contentstore.tasks.import_course_from_xml', side_effect=Exception('Lost the connection to the modulestore'))
+    def test_import_fails_after_retries(self, mock_import):
+        """
+        Check that an import that keeps failing is reported as failed, at the
+        stage it failed in.
+        """
+        with patch('contentstore.tasks.import_olx.max_retries', 0):
+            with open(self.good_tar) as gtar:
+                self.client.post(self.url, {"name": self.good_tar, "course-data": [gtar]})
+
+        self.assertEquals(mock_import.call_count, 1)
+        status = self.get_import_status(self.good_tar)
+        self.assertEquals(status["ImportStatus"], -2)
+        self.assertEquals(status["Message"], 'Lost the connection to the modulestore')
 
     def test_import_in_existing_course(self):
         """
@@ -231,7 +288,7 @@ class ImportTestCase(CourseTestCase):
         outside or directly in the working directory,
             'special files' (character device, block device or FIFOs),
 
-        all raise exceptions/400s.
+        all fail the import at the unpacking stage.
         """
 
         def try_tar(tarpath):
@@ -239,8 +296,10 @@ class ImportTestCase(CourseTestCase):
             with open(tarpath) as tar:
                 args = {"name": tarpath, "course-data": [tar]}
                 resp = self.client.post(self.url, args)
-            self.assertEquals(resp.status_code, 400)
-            self.assertTrue("SuspiciousFileOperation" in resp.content)
+            self.assertEquals(resp.status_code, 200)
+            status = self.get_import_status(tarpath)
+            self.assertEquals(status["ImportStatus"], -1)
+            self.assertIn("SuspiciousFileOperation", status["Message"])
 
         try_tar(self._fifo_tar())
         try_tar(self._symlink_tar())
@@ -255,14 +314,7 @@ class ImportTestCase(CourseTestCase):
         # Check that `import_status` returns the appropriate stage (i.e.,
         # either 3, indicating all previous steps are completed, or 0,
         # indicating no upload in progress)
-        resp_status = self.client.get(
-            reverse_course_url(
-                'import_status_handler',
-                self.course.id,
-                kwargs={'filename': os.path.split(self.good_tar)[1]}
-            )
-        )
-        import_status = json.loads(resp_status.content)["ImportStatus"]
+        import_status = self.get_import_status(self.good_tar)["ImportStatus"]
         self.assertIn(import_status, (0, 3))
 
     def test_library_import(self):
@@ -393,6 +445,68 @@ class ExportTestCase(CourseTestCase):
         self.assertEquals(resp.status_code, 200)
         self.assertTrue(resp.get('Content-Disposition').startswith('attachment'))
 
+    def _get_tarball_members(self, resp):
+        """ Returns the contents of the files in the exported tarball, by name. """
+        with tarfile.open(fileobj=StringIO(resp.content), mode='r:gz') as tar_file:
+            return {
+                member.name: tar_file.extractfile(member).read()
+                for member in tar_file.getmembers() if member.isfile()
+            }
+
+    def test_export_targz_contents(self):
+        """
+        The tarball holds the course xml, and the static assets streamed from the contentstore.
+        """
+        asset_key = self.course.id.make_asset_key('asset', 'handout.txt')
+        contentstore().save(StaticContent(asset_key, 'handout.txt', 'text/plain', 'Read me'))
+
+        resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
+        self._verify_export_succeeded(resp)
+        name = self.course.url_name
+        members = self._get_tarball_members(resp)
+        self.assertIn(name + '/course.xml', members)
+        self.assertEquals(members[name + '/static/handout.txt'], 'Read me')
+        self.assertIn('handout.txt', json.loads(members[name + '/policies/assets.json']))
+
+    def test_export_cached_by_version(self):
+        """
+        An export of a split course is cached until the course changes.
+        """
+        with self.store.default_store(ModuleStoreEnum.Type.split):
+            course = CourseFactory.create()
+        url = reverse_course_url('export_handler', course.id)
+
+        artifact = export_olx(unicode(course.id))
+        self.assertIsNotNone(artifact)
+        self.addCleanup(default_storage.delete, artifact)
+        self.assertEquals(get_export_artifact(course.id), artifact)
+
+        resp = self.client.get(url, HTTP_ACCEPT='application/x-tgz')
+        self._verify_export_succeeded(resp)
+        self.assertEquals(int(resp['Content-Length']), default_storage.size(artifact))
+        self.assertIn(course.url_name + '/course.xml', self._get_tarball_members(resp))
+
+        version = get_export_version(course.id)
+        ItemFactory.create(parent_location=course.location, category='chapter', user_id=self.user.id)
+        self.assertNotEqual(get_export_version(course.id), version)
+        self.assertIsNone(get_export_artifact(course.id))
+
+        # Viewing the export page prepares the new version, and drops the old one
+        self.client.get_html(url)
+        new_artifact = get_export_artifact(course.id)
+        self.addCleanup(default_storage.delete, new_artifact)
+        self.assertIsNotNone(new_artifact)
+        self.assertFalse(default_storage.exists(artifact))
+
+    def test_export_not_cached_without_versions(self):
+        """
+        Courses in a modulestore without structure versions aren't cached.
+        """
+        with self.store.default_store(ModuleStoreEnum.Type.mongo):
+            course = CourseFactory.create()
+        self.assertIsNone(get_export_version(course.id))
+        self.assertIsNone(export_olx(unicode(course.id)))
+
     def test_export_failure_top_level(self):
         """
         Export failure.
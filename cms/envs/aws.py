@@ -111,6 +111,10 @@ if STATIC_URL_BASE:
 # for course data
 GITHUB_REPO_ROOT = ENV_TOKENS.get('GITHUB_REPO_ROOT', GITHUB_REPO_ROOT)
 
+COURSE_IMPORT_STATIC_CONTENT_WORKERS = ENV_TOKENS.get(
+    'COURSE_IMPORT_STATIC_CONTENT_WORKERS', COURSE_IMPORT_STATIC_CONTENT_WORKERS
+)
+
 # STATIC_ROOT specifies the directory where static files are
 # collected
 
@@ -277,6 +281,13 @@ DATADOG.update(ENV_TOKENS.get("DATADOG", {}))
 if 'DATADOG_API' in AUTH_TOKENS:
     DATADOG['api_key'] = AUTH_TOKENS['DATADOG_API']
 
+# Sampling and aggregation of model metrics and call stack tracking,
+# see monitoring.instrumentation
+MODEL_INSTRUMENTATION = ENV_TOKENS.get('MODEL_INSTRUMENTATION', {})
+
+# Load the templates precompiled by the compile_mako_templates management command at startup
+MAKO_PRELOAD_TEMPLATES = ENV_TOKENS.get('MAKO_PRELOAD_TEMPLATES', MAKO_PRELOAD_TEMPLATES)
+
 # Celery Broker
 CELERY_ALWAYS_EAGER = ENV_TOKENS.get("CELERY_ALWAYS_EAGER", False)
 CELERY_BROKER_TRANSPORT = ENV_TOKENS.get("CELERY_BROKER_TRANSPORT", "")
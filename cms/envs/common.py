@@ -213,6 +213,9 @@ GEOIPV6_PATH = REPO_ROOT / "common/static/data/geoip/GeoIPv6.dat"
 # This is where we stick our compiled template files.
 import tempfile
 MAKO_MODULE_DIR = os.path.join(tempfile.gettempdir(), 'mako_cms')
+# Whether to load all the templates precompiled by the compile_mako_templates
+# management command at startup
+MAKO_PRELOAD_TEMPLATES = False
 MAKO_TEMPLATES = {}
 MAKO_TEMPLATES['main'] = [
     PROJECT_ROOT / 'templates',
@@ -1065,6 +1068,15 @@ XBLOCK_SETTINGS = {
     }
 }
 
+################################ Settings for Course Import ################################
+# How many threads save a course's static assets to the contentstore in parallel.
+COURSE_IMPORT_STATIC_CONTENT_WORKERS = 4
+
+# Delay in seconds before a failed course import is resumed, and how many
+# times it is resumed before giving up.
+COURSE_IMPORT_TASK_DEFAULT_RETRY_DELAY = 30
+COURSE_IMPORT_TASK_MAX_RETRIES = 3
+
 ################################ Settings for Credit Course Requirements ################################
 # Initial delay used for retrying tasks.
 # Additional retries use longer delays.
@@ -8,6 +8,7 @@ from django.conf import settings
 settings.INSTALLED_APPS  # pylint: disable=pointless-statement
 
 from openedx.core.lib.django_startup import autostartup
+import edxmako
 from monkey_patch import django_utils_translation
 
 
@@ -24,6 +25,10 @@ def run():
     if settings.FEATURES.get('USE_CUSTOM_THEME', False):
         enable_theme()
 
+    # Load the precompiled templates once all the template lookup directories are known
+    if settings.MAKO_PRELOAD_TEMPLATES:
+        edxmako.paths.preload_templates()
+
 
 def add_mimetypes():
     """
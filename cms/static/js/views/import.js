@@ -227,8 +227,9 @@ define(
              * and updates the page accordingly.
              *
              * @param {int} [stage=0] Starting stage.
+             * @param {string} [msg] Error message from the server, if the import failed.
              */
-            pollStatus: function (stage) {
+            pollStatus: function (stage, msg) {
                 if (current.state !== STATE.IN_PROGRESS) {
                     return;
                 }
@@ -238,13 +239,13 @@ define(
                 if (current.stage === STAGE.SUCCESS) {
                     success();
                 } else if (current.stage < STAGE.UPLOADING) { // Failed
-                    error(gettext("Error importing course"));
+                    error(msg || gettext("Error importing course"));
                 } else { // In progress
                     updateFeedbackList();
 
                     $.getJSON(file.url, function (data) {
                         timeout.id = setTimeout(function () {
-                            this.pollStatus(data.ImportStatus);
+                            this.pollStatus(data.ImportStatus, data.Message);
                         }.bind(this), timeout.delay);
                     }.bind(this));
                 }
@@ -280,7 +281,7 @@ define(
                     if (current.stage !== STAGE.UPLOADING) {
                         current.state = STATE.IN_PROGRESS;
 
-                        this.pollStatus(current.stage);
+                        this.pollStatus(current.stage, data.Message);
                     } else {
                         // An import in the upload stage cannot be resumed
                         error(gettext("There was an error with the upload"));
@@ -4,14 +4,22 @@ Add and create new modes for running courses on this particular LMS
 import pytz
 from datetime import datetime
 
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from collections import namedtuple, defaultdict
 from django.utils.translation import ugettext_lazy as _
-from django.db.models import Q
 
+from request_cache import get_cache, get_request
 from xmodule_django.models import CourseKeyField
 
+# Name of the request cache in which the modes of courses are memoized,
+# keyed by course id string.
+COURSE_MODES_CACHE_NAME = u"course_modes.modes"
+
 Mode = namedtuple('Mode',
                   [
                       'slug',
@@ -137,16 +145,77 @@ class CourseMode(models.Model):
 
         """
         modes_by_course = defaultdict(list)
-        for mode in cls.objects.filter(course_id__in=course_id_list):
-            modes_by_course[mode.course_id].append(mode.to_tuple())
-
-        # Assign default modes if nothing available in the database
-        missing_courses = set(course_id_list) - set(modes_by_course.keys())
-        for course_id in missing_courses:
-            modes_by_course[course_id] = [cls.DEFAULT_MODE]
+        for course_id, modes in cls._all_modes_by_course(course_id_list).iteritems():
+            # Assign default modes if nothing available in the database
+            modes_by_course[course_id] = list(modes) or [cls.DEFAULT_MODE]
 
         return modes_by_course
 
+    @classmethod
+    def cache_key_name(cls, course_id):
+        """Return the name of the key under which the modes of the course are cached."""
+        return u"course_modes/{}/modes/{}".format(cls.__name__, course_id)
+
+    @classmethod
+    def _all_modes_by_course(cls, course_id_list):
+        """Find the modes in the database for a list of course IDs, including expired modes.
+
+        The modes of each course are memoized for the request, and kept in the
+        cache for COURSE_MODE_CACHE_TIMEOUT seconds or until a mode of the
+        course is saved or deleted. The modes of the courses found in neither
+        are read with a single query.
+
+        Arguments:
+            course_id_list (list): List of `CourseKey`s
+
+        Returns:
+            dict mapping each `CourseKey` to a (possibly empty) list of `Mode`.
+            The lists are shared with the caches, so they must not be modified.
+
+        """
+        # Outside of a request (e.g. in a celery worker) the request cache is
+        # never cleared, so it isn't used there
+        request_cache = get_cache(COURSE_MODES_CACHE_NAME) if get_request() is not None else {}
+        # The caches are keyed by course id string, so course ids given as
+        # strings or as `CourseKey`s are found alike.
+        course_ids = dict((unicode(course_id), course_id) for course_id in course_id_list)
+        modes_by_course = dict((key, request_cache[key]) for key in course_ids if key in request_cache)
+
+        cache_timeout = getattr(settings, 'COURSE_MODE_CACHE_TIMEOUT', 0)
+        missing = set(course_ids).difference(modes_by_course)
+        if missing and cache_timeout:
+            cached = cache.get_many([cls.cache_key_name(key) for key in missing])
+            for key in missing:
+                if cls.cache_key_name(key) in cached:
+                    modes_by_course[key] = cached[cls.cache_key_name(key)]
+            missing.difference_update(modes_by_course)
+
+        if missing:
+            found_modes = dict((key, []) for key in missing)
+            # The database may compare course ids case-insensitively (as MySQL
+            # does by default), so rows are matched to the requested keys alike.
+            keys_by_lower_key = defaultdict(list)
+            for key in missing:
+                keys_by_lower_key[key.lower()].append(key)
+            # Reads made for the cache don't go to a read replica, which may lag behind
+            modes = cls.objects.using('default' if cache_timeout else None)
+            for mode in modes.filter(course_id__in=[course_ids[key] for key in missing]):
+                for key in keys_by_lower_key[unicode(mode.course_id).lower()]:
+                    found_modes[key].append(mode.to_tuple())
+            if cache_timeout:
+                cache.set_many(
+                    dict((cls.cache_key_name(key), modes) for key, modes in found_modes.iteritems()), cache_timeout
+                )
+            modes_by_course.update(found_modes)
+
+        request_cache.update(modes_by_course)
+        return dict((course_id, modes_by_course[key]) for key, course_id in course_ids.iteritems())
+
+    @classmethod
+    def _is_unexpired(cls, mode, now):
+        """Check whether a `Mode` has not expired at the datetime `now`."""
+        return mode.expiration_datetime is None or mode.expiration_datetime >= now
+
     @classmethod
     def all_and_unexpired_modes_for_courses(cls, course_id_list):
         """Retrieve course modes for a list of courses.
@@ -168,10 +237,7 @@ class CourseMode(models.Model):
         now = datetime.now(pytz.UTC)
         all_modes = cls.all_modes_for_courses(course_id_list)
         unexpired_modes = {
-            course_id: [
-                mode for mode in modes
-                if mode.expiration_datetime is None or mode.expiration_datetime >= now
-            ]
+            course_id: [mode for mode in modes if cls._is_unexpired(mode, now)]
             for course_id, modes in all_modes.iteritems()
         }
 
@@ -190,17 +256,26 @@ class CourseMode(models.Model):
         Returns:
             A list of CourseModes with a minimum price.
 
+        """
+        return cls.paid_modes_for_courses([course_id])[course_id]
+
+    @classmethod
+    def paid_modes_for_courses(cls, course_id_list):
+        """
+        Returns the non-expired modes with a set minimum price for each of a list of course IDs.
+
+        Args:
+            course_id_list (list of CourseKey): The courses to find paid modes for.
+
+        Returns:
+            dict mapping each `CourseKey` to a (possibly empty) list of `Mode`s with a minimum price.
+
         """
         now = datetime.now(pytz.UTC)
-        found_course_modes = cls.objects.filter(
-            Q(course_id=course_id) &
-            Q(min_price__gt=0) &
-            (
-                Q(expiration_datetime__isnull=True) |
-                Q(expiration_datetime__gte=now)
-            )
-        )
-        return [mode.to_tuple() for mode in found_course_modes]
+        return {
+            course_id: [mode for mode in modes if mode.min_price > 0 and cls._is_unexpired(mode, now)]
+            for course_id, modes in cls._all_modes_by_course(course_id_list).iteritems()
+        }
 
     @classmethod
     def modes_for_course(cls, course_id, include_expired=False, only_selectable=True):
@@ -225,28 +300,45 @@ class CourseMode(models.Model):
             list of `Mode` tuples
 
         """
-        now = datetime.now(pytz.UTC)
+        return cls.modes_for_courses(
+            [course_id], include_expired=include_expired, only_selectable=only_selectable
+        )[course_id]
+
+    @classmethod
+    def modes_for_courses(cls, course_id_list, include_expired=False, only_selectable=True):
+        """
+        Returns the non-expired modes for each of a list of course IDs.
 
-        found_course_modes = cls.objects.filter(course_id=course_id)
+        Courses with no modes set in the table are given the default mode.
 
-        # Filter out expired course modes if include_expired is not set
-        if not include_expired:
-            found_course_modes = found_course_modes.filter(
-                Q(expiration_datetime__isnull=True) | Q(expiration_datetime__gte=now)
-            )
+        Arguments:
+            course_id_list (list of CourseKey): Search for course modes for these courses.
 
-        # Credit course modes are currently not shown on the track selection page;
-        # they're available only when students complete a course.  For this reason,
-        # we exclude them from the list if we're only looking for selectable modes
-        # (e.g. on the track selection page or in the payment/verification flows).
-        if only_selectable:
-            found_course_modes = found_course_modes.exclude(mode_slug__in=cls.CREDIT_MODES)
+        Keyword Arguments:
+            include_expired (bool): If True, expired course modes will be included.
+            only_selectable (bool): If True, include only modes that are shown
+                to users on the track selection page.  See `modes_for_course`.
+
+        Returns:
+            dict mapping each `CourseKey` to a list of `Mode` tuples
 
-        modes = ([mode.to_tuple() for mode in found_course_modes])
-        if not modes:
-            modes = [cls.DEFAULT_MODE]
+        """
+        now = datetime.now(pytz.UTC)
+        modes_by_course = {}
+        for course_id, all_modes in cls._all_modes_by_course(course_id_list).iteritems():
+            modes = [
+                mode for mode in all_modes
+                # Filter out expired course modes if include_expired is not set
+                if (include_expired or cls._is_unexpired(mode, now)) and
+                # Credit course modes are currently not shown on the track selection page;
+                # they're available only when students complete a course.  For this reason,
+                # we exclude them from the list if we're only looking for selectable modes
+                # (e.g. on the track selection page or in the payment/verification flows).
+                not (only_selectable and mode.slug in cls.CREDIT_MODES)
+            ]
+            modes_by_course[course_id] = modes or [cls.DEFAULT_MODE]
 
-        return modes
+        return modes_by_course
 
     @classmethod
     def modes_for_course_dict(cls, course_id, modes=None, **kwargs):
@@ -647,6 +739,16 @@ class CourseMode(models.Model):
         )
 
 
+@receiver(post_save, sender=CourseMode)
+@receiver(post_delete, sender=CourseMode)
+def invalidate_course_mode_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Clear the cached modes of the course of a saved or deleted course mode.
+    """
+    cache.delete(CourseMode.cache_key_name(instance.course_id))
+    get_cache(COURSE_MODES_CACHE_NAME).pop(unicode(instance.course_id), None)
+
+
 class CourseModesArchive(models.Model):
     """
     Store the past values of course_mode that a course had in the past. We decided on having
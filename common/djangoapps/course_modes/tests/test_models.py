@@ -9,13 +9,18 @@ from datetime import datetime, timedelta
 import itertools
 
 import ddt
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.test import TestCase
+from django.test.utils import override_settings
+from mock import patch
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from opaque_keys.edx.locator import CourseLocator
 import pytz
 
 from course_modes.models import CourseMode, Mode
+from request_cache.middleware import RequestCache
+from util.query import ReadReplicaRouter, route_reads_to_replica
 
 
 @ddt.ddt
@@ -387,3 +392,107 @@ class CourseModeModelTest(TestCase):
             return dict(zip(dict_keys, display_values.get('verify_none')))
         else:
             return dict(zip(dict_keys, display_values.get(dict_type)))
+
+
+@override_settings(COURSE_MODE_CACHE_TIMEOUT=600)
+class CourseModeCacheTest(TestCase):
+    """
+    Tests for the caching of the modes of courses
+    """
+
+    def setUp(self):
+        super(CourseModeCacheTest, self).setUp()
+        cache.clear()
+        self.addCleanup(RequestCache.clear_request_cache)
+        self.course_key = SlashSeparatedCourseKey('Test', 'TestCourse', 'TestCourseRun')
+        self.other_course_key = CourseLocator('Test', 'OtherCourse', 'TestCourseRun')
+        self.verified = CourseMode.objects.create(
+            course_id=self.course_key, mode_slug='verified', mode_display_name='Verified', min_price=10
+        )
+        CourseMode.objects.create(course_id=self.course_key, mode_slug='honor', mode_display_name='Honor')
+
+    def test_modes_read_once(self):
+        with self.assertNumQueries(1):
+            modes = CourseMode.modes_for_course(self.course_key)
+        with self.assertNumQueries(0):
+            self.assertEqual(CourseMode.modes_for_course(self.course_key), modes)
+            self.assertEqual(CourseMode.modes_for_course(unicode(self.course_key)), modes)
+            self.assertEqual(CourseMode.paid_modes_for_course(self.course_key), [self.verified.to_tuple()])
+            self.assertEqual(CourseMode.min_course_price_for_currency(self.course_key, 'usd'), 0)
+            self.assertEqual(CourseMode.all_modes_for_courses([self.course_key])[self.course_key], modes)
+
+    def test_bulk_modes(self):
+        course_ids = [self.course_key, self.other_course_key]
+        with self.assertNumQueries(1):
+            modes = CourseMode.modes_for_courses(course_ids)
+        self.assertEqual(
+            sorted(mode.slug for mode in modes[self.course_key]), ['honor', 'verified']
+        )
+        self.assertEqual(modes[self.other_course_key], [CourseMode.DEFAULT_MODE])
+        with self.assertNumQueries(0):
+            self.assertEqual(CourseMode.modes_for_courses(course_ids), modes)
+            self.assertEqual(
+                CourseMode.paid_modes_for_courses(course_ids),
+                {self.course_key: [self.verified.to_tuple()], self.other_course_key: []}
+            )
+
+    def test_invalidated_on_save_and_delete(self):
+        CourseMode.modes_for_course(self.course_key)
+
+        self.verified.min_price = 20
+        self.verified.save()
+        self.assertEqual(CourseMode.paid_modes_for_course(self.course_key), [self.verified.to_tuple()])
+        self.assertEqual(CourseMode.paid_modes_for_course(self.course_key)[0].min_price, 20)
+
+        CourseMode.objects.filter(course_id=self.course_key).delete()
+        self.assertEqual(CourseMode.modes_for_course(self.course_key), [CourseMode.DEFAULT_MODE])
+
+    def test_expiration_filtered_after_caching(self):
+        self.verified.expiration_datetime = datetime.now(pytz.UTC) + timedelta(days=1)
+        self.verified.save()
+        self.assertEqual(len(CourseMode.modes_for_course(self.course_key)), 2)
+
+        # The cached modes are filtered by expiration on each read.
+        with patch('course_modes.models.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime.now(pytz.UTC) + timedelta(days=2)
+            with self.assertNumQueries(0):
+                self.assertEqual([mode.slug for mode in CourseMode.modes_for_course(self.course_key)], ['honor'])
+                self.assertEqual(len(CourseMode.modes_for_course(self.course_key, include_expired=True)), 2)
+
+    @patch('util.query.read_replica_is_usable', return_value=True)
+    def test_cached_modes_read_from_primary(self, _mock_usable):
+        # The cache is shared, so it isn't filled from a lagging read replica
+        with route_reads_to_replica():
+            with patch.object(ReadReplicaRouter, 'db_for_read', return_value='read_replica'):
+                modes = CourseMode.modes_for_course(self.course_key)
+        self.assertEqual(sorted(mode.slug for mode in modes), ['honor', 'verified'])
+        with self.assertNumQueries(0):
+            self.assertEqual(CourseMode.modes_for_course(self.course_key), modes)
+
+    def test_course_id_case_mismatch(self):
+        # A database comparing course ids case-insensitively may return them spelled differently
+        mode = CourseMode(
+            course_id=SlashSeparatedCourseKey('test', 'testcourse', 'testcourserun'),
+            mode_slug='verified',
+            mode_display_name='Verified',
+            min_price=10,
+        )
+        with patch.object(CourseMode.objects, 'using') as mock_using:
+            mock_using.return_value.filter.return_value = [mode]
+            self.assertEqual(CourseMode.modes_for_course(self.course_key), [mode.to_tuple()])
+
+    @override_settings(COURSE_MODE_CACHE_TIMEOUT=0)
+    def test_request_cache(self):
+        # Without a request, and with the cache turned off, nothing is cached.
+        CourseMode.modes_for_course(self.course_key)
+        with self.assertNumQueries(1):
+            CourseMode.modes_for_course(self.course_key)
+
+        with patch('course_modes.models.get_request', return_value=object()):
+            CourseMode.modes_for_course(self.course_key)
+            with self.assertNumQueries(0):
+                CourseMode.modes_for_course(self.course_key)
+
+            self.verified.delete()
+            with self.assertNumQueries(1):
+                self.assertEqual([mode.slug for mode in CourseMode.modes_for_course(self.course_key)], ['honor'])
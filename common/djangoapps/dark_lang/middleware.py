@@ -14,9 +14,8 @@ from django.conf import settings
 
 from dark_lang import DARK_LANGUAGE_KEY
 from dark_lang.models import DarkLangConfig
-from openedx.core.djangoapps.user_api.preferences.api import (
-    delete_user_preference, get_user_preference, set_user_preference
-)
+from openedx.core.djangoapps.user_api.preferences.api import delete_user_preference, set_user_preference
+from openedx.core.djangoapps.user_api.user_context import get_preference
 from lang_pref import LANGUAGE_KEY
 
 # TODO re-import this once we're on Django 1.5 or greater. [PLAT-671]
@@ -142,7 +141,7 @@ class DarkLangMiddleware(object):
                 # Reset user's dark lang preference to null
                 delete_user_preference(request.user, DARK_LANGUAGE_KEY)
                 # Get & set user's preferred language
-                user_pref = get_user_preference(request.user, LANGUAGE_KEY)
+                user_pref = get_preference(request.user, LANGUAGE_KEY)
                 if user_pref:
                     request.session[LANGUAGE_SESSION_KEY] = user_pref
             return
@@ -150,9 +149,10 @@ class DarkLangMiddleware(object):
         # Get the user's preview lang - this is either going to be set from a query
         # param `?preview-lang=xx`, or we may have one already set as a dark lang preference.
         preview_lang = request.GET.get('preview-lang', None)
-        if not preview_lang and auth_user:
-            # Get the request user's dark lang preference
-            preview_lang = get_user_preference(request.user, DARK_LANGUAGE_KEY)
+        dark_lang_pref = get_preference(request.user, DARK_LANGUAGE_KEY) if auth_user else None
+        if not preview_lang:
+            # Use the request user's dark lang preference
+            preview_lang = dark_lang_pref
 
         # User doesn't have a dark lang preference, so just return
         if not preview_lang:
@@ -163,5 +163,5 @@ class DarkLangMiddleware(object):
 
         # Make sure that we set the requested preview lang as the dark lang preference for the
         # user, so that the lang_pref middleware doesn't clobber away the dark lang preview.
-        if auth_user:
+        if auth_user and preview_lang != dark_lang_pref:
             set_user_preference(request.user, DARK_LANGUAGE_KEY, preview_lang)
@@ -0,0 +1,24 @@
+"""
+Precompile the mako templates of all the template lookup namespaces, so that
+the processes serving requests load the compiled modules rather than compile
+templates while handling their first requests. Run at deploy time, after the
+code and any theme or microsite templates are in place.
+"""
+from django.core.management.base import NoArgsCommand
+
+from edxmako.paths import precompile_lookups
+
+
+class Command(NoArgsCommand):
+    """
+    Management command to precompile mako templates.
+    """
+
+    help = "Precompile the mako templates of all the template lookup namespaces."
+
+    def handle_noargs(self, **options):
+        compiled_counts = precompile_lookups()
+        for namespace, count in sorted(compiled_counts.items()):
+            self.stdout.write("Compiled {count} templates for the '{namespace}' namespace\n".format(
+                count=count, namespace=namespace
+            ))
@@ -3,14 +3,40 @@ Set up lookup paths for mako templates.
 """
 
 import hashlib
+import json
+import logging
 import os
 import pkg_resources
+import time
 
 from django.conf import settings
 from mako.lookup import TemplateLookup
 
+import dogstats_wrapper as dog_stats_api
+
 from . import LOOKUP
 
+log = logging.getLogger(__name__)
+
+# The manifest of the templates precompiled by the compile_mako_templates
+# management command, in the MAKO_MODULE_DIR. It maps the hash of the
+# directories of each lookup to the module directory its templates were
+# compiled into, and to the uris of those templates.
+PRECOMPILED_MANIFEST = 'precompiled.json'
+
+TEMPLATE_LOAD_METRIC_NAME = 'edxmako.template.load_time'
+
+
+def _module_file_is_current(module_filename, filename):
+    """
+    Whether the compiled module `module_filename` exists and is at least as
+    recent as the template `filename`, so mako can load it without compiling.
+    """
+    try:
+        return os.path.getmtime(module_filename) >= os.path.getmtime(filename)
+    except OSError:
+        return False
+
 
 class DynamicTemplateLookup(TemplateLookup):
     """
@@ -20,6 +46,7 @@ class DynamicTemplateLookup(TemplateLookup):
     def __init__(self, *args, **kwargs):
         super(DynamicTemplateLookup, self).__init__(*args, **kwargs)
         self.__original_module_directory = self.template_args['module_directory']
+        self.directories_hash = None
 
     def add_directory(self, directory, prepend=False):
         """
@@ -35,13 +62,111 @@ class DynamicTemplateLookup(TemplateLookup):
         # and "foo.html.py" in the module directory has no way to know that.
         # Update the module_directory argument to point to a directory
         # specifically for this lookup path.
-        unique = hashlib.md5(":".join(str(d) for d in self.directories)).hexdigest()
-        self.template_args['module_directory'] = os.path.join(self.__original_module_directory, unique)
+        # If the templates of this lookup path were precompiled, load the
+        # compiled modules from where they were compiled to instead.
+        self.directories_hash = hashlib.md5(":".join(str(d) for d in self.directories)).hexdigest()
+        precompiled = self.precompiled_manifest().get(self.directories_hash)
+        if precompiled:
+            module_directory = precompiled['module_directory']
+        else:
+            module_directory = os.path.join(self.__original_module_directory, self.directories_hash)
+        self.set_module_directory(module_directory)
+
+    def set_module_directory(self, module_directory):
+        """
+        Compile templates into, and load them from, `module_directory`.
+        """
+        self.template_args['module_directory'] = module_directory
 
         # Also clear the internal caches. Ick.
         self._collection.clear()
         self._uri_cache.clear()
 
+    def precompiled_manifest(self):
+        """
+        Returns the manifest of precompiled templates written by the
+        compile_mako_templates management command, or {} if there is none.
+        """
+        manifest_filename = os.path.join(self.__original_module_directory, PRECOMPILED_MANIFEST)
+        try:
+            with open(manifest_filename) as manifest_file:
+                return json.load(manifest_file)
+        except IOError:
+            return {}
+        except ValueError:
+            log.warning("Ignoring the unreadable mako precompiled templates manifest %s", manifest_filename)
+            return {}
+
+    def template_uris(self):
+        """
+        Yields the (uri, filename) of all the files in the lookup directories,
+        skipping those hidden by a file with the same uri in a previous
+        directory, as `get_template` would.
+        """
+        seen = set()
+        for directory in self.directories:
+            for root, dirnames, filenames in os.walk(directory):
+                dirnames[:] = sorted(dirname for dirname in dirnames if not dirname.startswith('.'))
+                for filename in sorted(filenames):
+                    if filename.startswith('.') or filename.endswith(('.pyc', '.pyo')):
+                        continue
+                    uri = os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+                    if uri not in seen:
+                        seen.add(uri)
+                        yield uri, os.path.join(root, filename)
+
+    def content_hash(self):
+        """
+        Returns a hash of the lookup directories and of the contents of all
+        the templates found in them, which changes whenever any template does.
+        """
+        md5 = hashlib.md5(self.directories_hash or '')
+        for uri, filename in self.template_uris():
+            md5.update(uri.encode('utf-8'))
+            with open(filename, 'rb') as template_file:
+                md5.update(template_file.read())
+        return md5.hexdigest()
+
+    def precompile(self):
+        """
+        Compiles all the templates of the lookup into its module directory.
+
+        The lookup directories also hold files that are not mako templates
+        (e.g. underscore templates), and some that mako can't compile; these
+        are skipped.
+
+        Returns:
+            the uris of the compiled templates
+        """
+        compiled = []
+        for uri, __ in self.template_uris():
+            try:
+                self.get_template(uri)
+            except Exception as err:  # pylint: disable=broad-except
+                log.debug("Not precompiling %s, which mako can't compile: %r", uri, err)
+            else:
+                compiled.append(uri)
+        return compiled
+
+    def _load(self, filename, uri):
+        """
+        Loads the template, compiling it if there's no current compiled module
+        for it, and tracks how long that took.
+        """
+        module_directory = self.template_args.get('module_directory')
+        compiled = module_directory is None or not _module_file_is_current(
+            os.path.join(module_directory, os.path.normpath(uri.lstrip('/')) + '.py'),
+            filename,
+        )
+        start = time.time()
+        template = super(DynamicTemplateLookup, self)._load(filename, uri)
+        dog_stats_api.histogram(
+            TEMPLATE_LOAD_METRIC_NAME,
+            time.time() - start,
+            tags=[u'compiled:{}'.format(compiled)],
+        )
+        return template
+
 
 def clear_lookups(namespace):
     """
@@ -73,6 +198,62 @@ def add_lookup(namespace, directory, package=None, prepend=False):
     templates.add_directory(directory, prepend=prepend)
 
 
+def precompile_lookups(module_root=None):
+    """
+    Compiles the templates of all the lookup namespaces, each into a module
+    directory named after the hash of its templates' contents, and records
+    them in the precompiled templates manifest so that the lookups of other
+    processes load them from there.
+
+    Arguments:
+        module_root (str): where to create the module directories; defaults
+            to the 'precompiled' directory of the MAKO_MODULE_DIR
+
+    Returns:
+        a dict mapping each namespace to the number of templates compiled
+    """
+    if module_root is None:
+        module_root = os.path.join(settings.MAKO_MODULE_DIR, 'precompiled')
+    manifest = {}
+    compiled_counts = {}
+    for namespace, lookup in LOOKUP.items():
+        module_directory = os.path.join(module_root, lookup.content_hash())
+        lookup.set_module_directory(module_directory)
+        templates = lookup.precompile()
+        manifest[lookup.directories_hash] = {
+            'module_directory': module_directory,
+            'templates': templates,
+        }
+        compiled_counts[namespace] = len(templates)
+
+    # Write the manifest under a temporary name first, so that processes
+    # starting meanwhile never read a partial one.
+    manifest_filename = os.path.join(settings.MAKO_MODULE_DIR, PRECOMPILED_MANIFEST)
+    if not os.path.isdir(settings.MAKO_MODULE_DIR):
+        os.makedirs(settings.MAKO_MODULE_DIR)
+    with open(manifest_filename + '.tmp', 'w') as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.rename(manifest_filename + '.tmp', manifest_filename)
+    return compiled_counts
+
+
+def preload_templates():
+    """
+    Loads the precompiled modules of all the templates of the lookup
+    namespaces, so that requests don't have to.
+    """
+    for namespace, lookup in LOOKUP.items():
+        precompiled = lookup.precompiled_manifest().get(lookup.directories_hash)
+        if not precompiled:
+            log.info("The templates of the mako lookup namespace %s were not precompiled", namespace)
+            continue
+        for uri in precompiled['templates']:
+            try:
+                lookup.get_template(uri)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Could not preload the mako template %s", uri)
+
+
 def lookup_template(namespace, name):
     """
     Look up a Mako template by namespace and name.
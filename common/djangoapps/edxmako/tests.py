@@ -1,5 +1,6 @@
 
 from mock import patch, Mock
+import os
 import unittest
 import ddt
 
@@ -12,11 +13,13 @@ from django.core.urlresolvers import reverse
 import edxmako.middleware
 from edxmako.middleware import get_template_request_context
 from edxmako import add_lookup, LOOKUP
+from edxmako.paths import PRECOMPILED_MANIFEST, precompile_lookups, preload_templates
 from edxmako.shortcuts import (
     marketing_link,
     render_to_string,
     open_source_footer_context_processor
 )
+from openedx.core.lib.tempdir import mkdtemp_clean
 from student.tests.factories import UserFactory
 from util.testing import UrlResetMixin
 
@@ -63,6 +66,71 @@ class AddLookupTests(TestCase):
         self.assertTrue(dirs[0].endswith('management'))
 
 
+@patch.dict('edxmako.paths.LOOKUP', clear=True)
+class PrecompileTests(TestCase):
+    """
+    Test precompiling the templates of the lookups.
+    """
+    def setUp(self):
+        super(PrecompileTests, self).setUp()
+        self.template_dir = mkdtemp_clean()
+        os.mkdir(os.path.join(self.template_dir, 'sub'))
+        self.write_template('page.html', '<p>${greeting}</p>')
+        self.write_template('sub/other.html', '<%include file="/page.html"/>')
+        self.write_template('broken.html', '<%def name="unclosed()">')
+
+        module_dir = mkdtemp_clean()
+        settings_override = override_settings(MAKO_MODULE_DIR=module_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def write_template(self, uri, text):
+        """ Write a template file with the given uri """
+        with open(os.path.join(self.template_dir, uri), 'w') as template_file:
+            template_file.write(text)
+
+    def test_precompile(self):
+        add_lookup('test', self.template_dir)
+        self.assertEqual(precompile_lookups(), {'test': 2})
+        self.assertTrue(os.path.exists(os.path.join(settings.MAKO_MODULE_DIR, PRECOMPILED_MANIFEST)))
+
+        # lookups of the same directories now load the precompiled modules
+        module_directory = LOOKUP['test'].template_args['module_directory']
+        self.assertTrue(os.path.exists(os.path.join(module_directory, 'sub', 'other.html.py')))
+        del LOOKUP['test']
+        add_lookup('test', self.template_dir)
+        self.assertEqual(LOOKUP['test'].template_args['module_directory'], module_directory)
+        with patch('edxmako.paths.dog_stats_api.histogram') as mock_histogram:
+            self.assertEqual(LOOKUP['test'].get_template('page.html').render(greeting='hi'), '<p>hi</p>')
+        self.assertEqual(mock_histogram.call_args[1]['tags'], [u'compiled:False'])
+
+    def test_changed_templates_compiled_separately(self):
+        add_lookup('test', self.template_dir)
+        precompile_lookups()
+        module_directory = LOOKUP['test'].template_args['module_directory']
+
+        self.write_template('page.html', '<p>${greeting}!</p>')
+        precompile_lookups()
+        self.assertNotEqual(LOOKUP['test'].template_args['module_directory'], module_directory)
+
+    def test_preload(self):
+        add_lookup('test', self.template_dir)
+        precompile_lookups()
+        del LOOKUP['test']
+        add_lookup('test', self.template_dir)
+        preload_templates()
+        self.assertItemsEqual(LOOKUP['test']._collection, ['page.html', 'sub/other.html'])  # pylint: disable=protected-access
+
+    def test_not_precompiled(self):
+        add_lookup('test', self.template_dir)
+        self.assertTrue(LOOKUP['test'].template_args['module_directory'].startswith(settings.MAKO_MODULE_DIR))
+        preload_templates()
+        self.assertEqual(len(LOOKUP['test']._collection), 0)  # pylint: disable=protected-access
+        with patch('edxmako.paths.dog_stats_api.histogram') as mock_histogram:
+            LOOKUP['test'].get_template('page.html')
+        self.assertEqual(mock_histogram.call_args[1]['tags'], [u'compiled:True'])
+
+
 class MakoMiddlewareTest(TestCase):
     """
     Test MakoMiddleware.
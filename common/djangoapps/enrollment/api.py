@@ -244,6 +244,20 @@ def update_enrollment(user_id, course_id, mode=None, is_active=None, enrollment_
     return enrollment
 
 
+def course_enrollment_details_cache_key(course_id, include_expired):
+    """Return the key under which the enrollment details of a course are cached.
+
+    The details are cached by `get_course_enrollment_details` for
+    ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT seconds, or until a mode of the
+    course is saved or deleted.
+
+    """
+    return u'enrollment.course.details.{course_id}.{include_expired}'.format(
+        course_id=course_id,
+        include_expired=include_expired
+    )
+
+
 def get_course_enrollment_details(course_id, include_expired=False):
     """Get the course modes for course. Also get enrollment start and end date, invite only, etc.
 
@@ -282,10 +296,7 @@ def get_course_enrollment_details(course_id, include_expired=False):
         }
 
     """
-    cache_key = u'enrollment.course.details.{course_id}.{include_expired}'.format(
-        course_id=course_id,
-        include_expired=include_expired
-    )
+    cache_key = course_enrollment_details_cache_key(course_id, include_expired)
     cached_enrollment_data = None
     try:
         cached_enrollment_data = cache.get(cache_key)
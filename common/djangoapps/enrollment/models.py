@@ -2,3 +2,22 @@
 A models.py is required to make this an app (until we move to Django 1.7)
 
 """
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from course_modes.models import CourseMode
+from enrollment.api import course_enrollment_details_cache_key
+
+
+@receiver(post_save, sender=CourseMode)
+@receiver(post_delete, sender=CourseMode)
+def invalidate_course_enrollment_details(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Clear the cached enrollment details of the course of a saved or deleted
+    course mode, so that they list its modes as they are now.
+    """
+    cache.delete_many([
+        course_enrollment_details_cache_key(instance.course_id, include_expired)
+        for include_expired in (False, True)
+    ])
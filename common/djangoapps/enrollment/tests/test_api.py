@@ -8,6 +8,8 @@ import unittest
 from django.test import TestCase
 from django.test.utils import override_settings
 from django.conf import settings
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from course_modes.models import CourseMode
 from enrollment import api
 from enrollment.errors import EnrollmentApiLoadError, EnrollmentNotFoundError, CourseModeNotFoundError
 from enrollment.tests import fake_data_api
@@ -193,3 +195,16 @@ class EnrollmentTest(TestCase):
         # The data matches
         self.assertEqual(len(details['course_modes']), 3)
         self.assertEqual(details, cached_details)
+
+    def test_cache_invalidated_by_course_mode_change(self):
+        fake_data_api.add_course(self.COURSE_ID, course_modes=['honor'])
+        api.get_course_enrollment_details(self.COURSE_ID)
+
+        # Changing a mode of the course clears the cached details.
+        fake_data_api.reset()
+        fake_data_api.add_course(self.COURSE_ID, course_modes=['honor', 'verified'])
+        CourseMode.objects.create(
+            course_id=SlashSeparatedCourseKey.from_deprecated_string(self.COURSE_ID), mode_slug='verified'
+        )
+        details = api.get_course_enrollment_details(self.COURSE_ID)
+        self.assertEqual(len(details['course_modes']), 2)
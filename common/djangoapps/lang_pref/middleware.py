@@ -2,7 +2,7 @@
 Middleware for Language Preferences
 """
 
-from openedx.core.djangoapps.user_api.preferences.api import get_user_preference
+from openedx.core.djangoapps.user_api.user_context import get_preference
 from lang_pref import LANGUAGE_KEY
 # TODO PLAT-671 Import from Django 1.8
 # from django.utils.translation import LANGUAGE_SESSION_KEY
@@ -24,7 +24,7 @@ class LanguagePreferenceMiddleware(object):
         # If the user is logged in, check for their language preference
         if request.user.is_authenticated():
             # Get the user's language preference
-            user_pref = get_user_preference(request.user, LANGUAGE_KEY)
+            user_pref = get_preference(request.user, LANGUAGE_KEY)
             # Set it to the LANGUAGE_SESSION_KEY (Django-specific session setting governing language pref)
             if user_pref:
                 request.session[LANGUAGE_SESSION_KEY] = user_pref
@@ -0,0 +1,101 @@
+"""
+Settings and helpers for the low-overhead model instrumentation mode, shared
+by the model signal metrics in monitoring.signals and the call stack tracking
+of openedx.core.djangoapps.call_stack_manager.
+
+Configured with the MODEL_INSTRUMENTATION setting, a dict with these keys
+(all optional):
+
+    AGGREGATE_METRICS: If True, model metrics are counted in process and sent
+        in bulk every FLUSH_INTERVAL seconds, rather than sent one by one.
+    FLUSH_INTERVAL: How often aggregated metrics are sent, in seconds.
+    MODELS: If not None, only the models listed here are instrumented. Models
+        are named either "ModelName" or "app_label.ModelName".
+    CALL_STACK_SAMPLE_RATE: The fraction (between 0 and 1) of tracked calls
+        whose call stack is captured.
+    MAX_CALL_STACKS: The most unique call stacks remembered per tracked
+        entity. Once reached, no more new stacks are logged for it.
+"""
+import atexit
+from collections import Counter
+import threading
+import time
+
+from django.conf import settings
+
+import dogstats_wrapper as dog_stats_api
+
+
+DEFAULT_MODEL_INSTRUMENTATION = {
+    'AGGREGATE_METRICS': False,
+    'FLUSH_INTERVAL': 60,
+    'MODELS': None,
+    'CALL_STACK_SAMPLE_RATE': 1.0,
+    'MAX_CALL_STACKS': 1000,
+}
+
+
+def instrumentation_setting(name):
+    """
+    Return the value of `name` in the MODEL_INSTRUMENTATION setting, or its
+    default.
+    """
+    return getattr(settings, 'MODEL_INSTRUMENTATION', {}).get(name, DEFAULT_MODEL_INSTRUMENTATION[name])
+
+
+def is_model_instrumented(model_class):
+    """
+    Return whether `model_class` is switched on by the MODELS setting.
+    """
+    models = instrumentation_setting('MODELS')
+    if models is None:
+        return True
+    meta = model_class._meta  # pylint: disable=protected-access
+    return meta.object_name in models or u'{}.{}'.format(meta.app_label, meta.object_name) in models
+
+
+class MetricAggregator(object):
+    """
+    Counts metric increments in process, and sends the totals for each
+    (metric, tags) pair at most once per FLUSH_INTERVAL.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._last_flush = time.time()
+
+    def increment(self, metric, tags, value=1):
+        """
+        Count `value` towards `metric` with `tags`, and flush if it is time to.
+        """
+        key = (metric, tuple(tags))
+        with self._lock:
+            self._counts[key] += value
+            due = time.time() - self._last_flush >= instrumentation_setting('FLUSH_INTERVAL')
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Send all the counted metrics.
+        """
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._last_flush = time.time()
+        for (metric, tags), value in counts.iteritems():
+            dog_stats_api.increment(metric, value=value, tags=list(tags))
+
+
+METRIC_AGGREGATOR = MetricAggregator()
+atexit.register(METRIC_AGGREGATOR.flush)
+
+
+def increment_model_metric(metric, tags, value=1):
+    """
+    Increment a model metric, either right away or through the
+    METRIC_AGGREGATOR, depending on the AGGREGATE_METRICS setting.
+    """
+    if instrumentation_setting('AGGREGATE_METRICS'):
+        METRIC_AGGREGATOR.increment(metric, tags, value=value)
+    else:
+        dog_stats_api.increment(metric, value=value, tags=tags)
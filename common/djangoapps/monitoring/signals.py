@@ -4,13 +4,17 @@ Add receivers for django signals, and feed data into the monitoring system.
 If a model has a class attribute 'METRIC_TAGS' that is a list of strings,
 those fields will be retrieved from the model instance, and added as tags to
 the recorded metrics.
+
+Which models are instrumented, and whether metrics are sent right away or
+aggregated in process, is controlled by the MODEL_INSTRUMENTATION setting.
+See monitoring.instrumentation.
 """
 
 
 from django.db.models.signals import post_save, post_delete, m2m_changed, post_init
 from django.dispatch import receiver
 
-import dogstats_wrapper as dog_stats_api
+from monitoring.instrumentation import increment_model_metric, is_model_instrumented
 
 
 def _database_tags(action, sender, kwargs):
@@ -58,9 +62,11 @@ def post_init_metrics(sender, **kwargs):
         using (str): The name of the database being used for this initialization (optional).
         instance (Model instance): The instance being initialized (optional).
     """
-    tags = _database_tags('initialized', sender, kwargs)
+    if not is_model_instrumented(sender):
+        return
 
-    dog_stats_api.increment('edxapp.db.model', tags=tags)
+    tags = _database_tags('initialized', sender, kwargs)
+    increment_model_metric('edxapp.db.model', tags)
 
 
 @receiver(post_save, dispatch_uid='edxapp.monitoring.post_save_metrics')
@@ -73,10 +79,13 @@ def post_save_metrics(sender, **kwargs):
         using (str): The name of the database being used for this update (optional).
         instance (Model instance): The instance being updated (optional).
     """
+    if not is_model_instrumented(sender):
+        return
+
     action = 'created' if kwargs.pop('created', False) else 'updated'
 
     tags = _database_tags(action, sender, kwargs)
-    dog_stats_api.increment('edxapp.db.model', tags=tags)
+    increment_model_metric('edxapp.db.model', tags)
 
 
 @receiver(post_delete, dispatch_uid='edxapp.monitoring.post_delete_metrics')
@@ -89,9 +98,11 @@ def post_delete_metrics(sender, **kwargs):
         using (str): The name of the database being used for this deletion (optional).
         instance (Model instance): The instance being deleted (optional).
     """
-    tags = _database_tags('deleted', sender, kwargs)
+    if not is_model_instrumented(sender):
+        return
 
-    dog_stats_api.increment('edxapp.db.model', tags=tags)
+    tags = _database_tags('deleted', sender, kwargs)
+    increment_model_metric('edxapp.db.model', tags)
 
 
 @receiver(m2m_changed, dispatch_uid='edxapp.monitoring.m2m_changed_metrics')
@@ -109,7 +120,7 @@ def m2m_changed_metrics(sender, **kwargs):
         instance (Model instance): The instance whose many-to-many relation is being modified.
         model (Model class): The model of the class being added/removed/cleared from the relation.
     """
-    if 'action' not in kwargs:
+    if 'action' not in kwargs or not is_model_instrumented(sender):
         return
 
     action = {
@@ -128,8 +139,8 @@ def m2m_changed_metrics(sender, **kwargs):
 
     pk_set = kwargs.get('pk_set', []) or []
 
-    dog_stats_api.increment(
+    increment_model_metric(
         'edxapp.db.model',
-        value=len(pk_set),
-        tags=tags
+        tags,
+        value=len(pk_set)
     )
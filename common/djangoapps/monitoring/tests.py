@@ -0,0 +1,55 @@
+"""
+Tests for the model instrumentation helpers.
+"""
+from mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from monitoring.instrumentation import MetricAggregator, increment_model_metric, is_model_instrumented
+
+
+class ModelInstrumentationTest(TestCase):
+    """
+    Tests for monitoring.instrumentation.
+    """
+    @override_settings(MODEL_INSTRUMENTATION={'MODELS': ['auth.User']})
+    def test_is_model_instrumented(self):
+        self.assertTrue(is_model_instrumented(User))
+
+    @override_settings(MODEL_INSTRUMENTATION={'MODELS': ['StudentModule']})
+    def test_is_model_not_instrumented(self):
+        self.assertFalse(is_model_instrumented(User))
+
+    def test_all_models_instrumented_by_default(self):
+        self.assertTrue(is_model_instrumented(User))
+
+    @patch('monitoring.instrumentation.dog_stats_api.increment')
+    def test_increment_right_away(self, mock_increment):
+        increment_model_metric('edxapp.db.model', ['action:created'])
+        mock_increment.assert_called_once_with('edxapp.db.model', value=1, tags=['action:created'])
+
+    @override_settings(MODEL_INSTRUMENTATION={'AGGREGATE_METRICS': True, 'FLUSH_INTERVAL': 3600})
+    @patch('monitoring.instrumentation.dog_stats_api.increment')
+    def test_aggregate_and_flush(self, mock_increment):
+        aggregator = MetricAggregator()
+        aggregator.increment('edxapp.db.model', ['action:created'])
+        aggregator.increment('edxapp.db.model', ['action:created'], value=2)
+        aggregator.increment('edxapp.db.model', ['action:deleted'])
+        self.assertFalse(mock_increment.called)
+
+        aggregator.flush()
+        self.assertEqual(mock_increment.call_count, 2)
+        mock_increment.assert_any_call('edxapp.db.model', value=3, tags=['action:created'])
+        mock_increment.assert_any_call('edxapp.db.model', value=1, tags=['action:deleted'])
+
+        # Nothing is left to send after a flush
+        aggregator.flush()
+        self.assertEqual(mock_increment.call_count, 2)
+
+    @override_settings(MODEL_INSTRUMENTATION={'AGGREGATE_METRICS': True, 'FLUSH_INTERVAL': 0})
+    @patch('monitoring.instrumentation.dog_stats_api.increment')
+    def test_flush_when_interval_elapsed(self, mock_increment):
+        MetricAggregator().increment('edxapp.db.model', ['action:created'])
+        mock_increment.assert_called_once_with('edxapp.db.model', value=1, tags=['action:created'])
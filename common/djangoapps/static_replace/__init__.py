@@ -10,6 +10,7 @@ from xmodule.modulestore import ModuleStoreEnum
 from xmodule.contentstore.content import StaticContent
 
 from opaque_keys.edx.locator import AssetLocator
+from request_cache import get_cache, get_request
 
 log = logging.getLogger(__name__)
 
@@ -137,18 +138,23 @@ def make_static_urls_absolute(request, html):
     )
 
 
-def replace_static_urls(text, data_directory=None, course_id=None, static_asset_path=''):
+def _static_url_replacer(data_directory, course_id, static_asset_path):
     """
-    Replace /static/$stuff urls either with their correct url as generated by collectstatic,
-    (/static/$md5_hashed_stuff) or by the course-specific content static url
-    /static/$course_data_dir/$stuff, or, if course_namespace is not None, by the
-    correct url in the contentstore (/c4x/.. or /asset-loc:..)
-
-    text: The source text to do the substitution in
-    data_directory: The directory in which course data is stored
-    course_id: The course identifier used to distinguish static content for this course in studio
-    static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
+    Return a function that replaces a single static url matched by
+    `process_static_urls`, as described in `replace_static_urls`.
     """
+    # The store type of the course is only looked up once, and only if a url needs it
+    course_in_mongo = []
+
+    def is_course_in_mongo():
+        """
+        Return whether `course_id` is stored in a MongoBacked modulestore.
+        """
+        if not course_in_mongo:
+            course_in_mongo.append(
+                bool(course_id) and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml
+            )
+        return course_in_mongo[0]
 
     def replace_static_url(original, prefix, quote, rest):
         """
@@ -162,9 +168,7 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
         if settings.DEBUG and finders.find(rest, True):
             return original
         # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) \
-                and course_id \
-                and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
+        elif (not static_asset_path) and is_course_in_mongo():
             # first look in the static file pipeline and see if we are trying to reference
             # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
 
@@ -202,4 +206,127 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
 
         return "".join([quote, url, quote])
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+    return replace_static_url
+
+
+def replace_static_urls(text, data_directory=None, course_id=None, static_asset_path=''):
+    """
+    Replace /static/$stuff urls either with their correct url as generated by collectstatic,
+    (/static/$md5_hashed_stuff) or by the course-specific content static url
+    /static/$course_data_dir/$stuff, or, if course_namespace is not None, by the
+    correct url in the contentstore (/c4x/.. or /asset-loc:..)
+
+    text: The source text to do the substitution in
+    data_directory: The directory in which course data is stored
+    course_id: The course identifier used to distinguish static content for this course in studio
+    static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
+    """
+    return process_static_urls(
+        text,
+        _static_url_replacer(data_directory, course_id, static_asset_path),
+        data_dir=static_asset_path or data_directory
+    )
+
+
+# Markers placed around text that `replace_urls` has already rewritten, so
+# that rewriting the text it is later embedded in (e.g. the html of a
+# vertical containing an already rendered problem) leaves it alone.
+REWRITTEN_URLS_START = u'<!--rewritten-urls-->'
+REWRITTEN_URLS_END = u'<!--/rewritten-urls-->'
+
+_REWRITTEN_URLS_MARKERS = re.compile(u'{}|{}'.format(re.escape(REWRITTEN_URLS_START), re.escape(REWRITTEN_URLS_END)))
+
+# { (static url, data directory): compiled regex for replace_urls }
+_replace_urls_regexes = {}
+
+
+def _replace_urls_regex(data_dir):
+    """
+    Return the compiled regex matching the urls rewritten by each of
+    `replace_static_urls`, `replace_course_urls` and `replace_jump_to_id_urls`
+    in a single alternation. Which one matched is told by the `static`,
+    `course` and `jump_to_id` groups.
+    """
+    key = (settings.STATIC_URL, data_dir)
+    if key not in _replace_urls_regexes:
+        _replace_urls_regexes[key] = re.compile(_url_replace_regex(
+            u'(?P<static>(?:{static_url}|/static/)(?!{data_dir}))'
+            u'|(?P<course>/course/)'
+            u'|(?P<jump_to_id>/jump_to_id/)'.format(
+                static_url=settings.STATIC_URL,
+                data_dir=data_dir
+            )
+        ))
+    return _replace_urls_regexes[key]
+
+
+def _unrewritten_spans(text):
+    """
+    Yield the (start, end) spans of `text` that are not enclosed in
+    REWRITTEN_URLS_START/REWRITTEN_URLS_END markers.
+    """
+    start = 0
+    depth = 0
+    for marker in _REWRITTEN_URLS_MARKERS.finditer(text):
+        if marker.group() == REWRITTEN_URLS_START:
+            if depth == 0:
+                yield start, marker.start()
+            depth += 1
+        elif depth > 0:
+            depth -= 1
+            if depth == 0:
+                start = marker.end()
+    if depth == 0:
+        yield start, len(text)
+
+
+def replace_urls(text, course_id, jump_to_id_base_url, data_directory=None, static_asset_path=''):
+    """
+    Rewrite the /static/, /course/ and /jump_to_id/ urls in `text` in a
+    single pass, as `replace_static_urls`, `replace_course_urls` and
+    `replace_jump_to_id_urls` would one after another.
+
+    The result is enclosed in REWRITTEN_URLS_START/REWRITTEN_URLS_END
+    markers, and any part of `text` already enclosed in them is copied
+    without being scanned again.
+
+    Within a request, the url found for each static path is remembered for
+    the rest of the request, so that every block of a course that refers to
+    the same asset doesn't look it up again.
+    """
+    data_dir = static_asset_path or data_directory
+    regex = _replace_urls_regex(data_dir)
+    course_url = u'/courses/' + course_id.to_deprecated_string() + u'/'
+    replace_static_url = _static_url_replacer(data_directory, course_id, static_asset_path)
+    if get_request() is not None:
+        static_urls = get_cache('static_replace.static_urls').setdefault(
+            (course_id, data_directory, static_asset_path), {}
+        )
+    else:
+        static_urls = {}
+
+    def replace_url(match):
+        """
+        Replace a single matched url, of whichever kind.
+        """
+        quote = match.group('quote')
+        rest = match.group('rest')
+        if match.group('course') is not None:
+            return u''.join([quote, course_url, rest, quote])
+        elif match.group('jump_to_id') is not None:
+            return u''.join([quote, jump_to_id_base_url + rest, quote])
+
+        original = match.group(0)
+        key = (match.group('prefix'), quote, rest)
+        if key not in static_urls:
+            static_urls[key] = replace_static_url(original, match.group('prefix'), quote, rest)
+        return static_urls[key]
+
+    parts = [REWRITTEN_URLS_START]
+    position = 0
+    for start, end in _unrewritten_spans(text):
+        parts.append(text[position:start])
+        parts.append(regex.sub(replace_url, text[start:end]))
+        position = end
+    parts.append(REWRITTEN_URLS_END)
+    return u''.join(parts)
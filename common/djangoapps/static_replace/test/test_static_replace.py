@@ -4,6 +4,10 @@ from nose.tools import assert_equals, assert_true, assert_false  # pylint: disab
 from static_replace import (
     replace_static_urls,
     replace_course_urls,
+    replace_jump_to_id_urls,
+    replace_urls,
+    REWRITTEN_URLS_START,
+    REWRITTEN_URLS_END,
     _url_replace_regex,
     process_static_urls,
     make_static_urls_absolute
@@ -11,6 +15,8 @@ from static_replace import (
 from mock import patch, Mock
 
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from request_cache.middleware import RequestCache
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.mongo import MongoModuleStore
 from xmodule.modulestore.xml import XMLModuleStore
 
@@ -161,3 +167,78 @@ def test_regex():
     for s in no:
         print 'Should not match: {0!r}'.format(s)
         assert_false(re.match(regex, s))
+
+
+JUMP_TO_ID_BASE_URL = '/courses/org/course/run/jump_to_id/'
+
+
+@patch('static_replace.modulestore')
+@patch('static_replace.staticfiles_storage')
+def test_replace_urls(mock_storage, mock_modulestore):
+    """
+    Make sure replace_urls rewrites all three kinds of urls as the separate
+    replacement functions do.
+    """
+    mock_modulestore.return_value.get_modulestore_type.return_value = ModuleStoreEnum.Type.xml
+    mock_storage.exists.return_value = False
+    mock_storage.url.side_effect = lambda path: '/static/' + path
+
+    text = 'a "/static/file.png" b \'/course/info\' c "/jump_to_id/some_id" d "/static/foo.png?raw"'
+    expected = replace_jump_to_id_urls(
+        replace_course_urls(replace_static_urls(text, DATA_DIRECTORY), COURSE_KEY),
+        COURSE_KEY,
+        JUMP_TO_ID_BASE_URL
+    )
+    assert_equals(
+        REWRITTEN_URLS_START + expected + REWRITTEN_URLS_END,
+        replace_urls(text, COURSE_KEY, JUMP_TO_ID_BASE_URL, DATA_DIRECTORY)
+    )
+
+
+@patch('static_replace.modulestore')
+@patch('static_replace.staticfiles_storage')
+def test_replace_urls_skips_rewritten(mock_storage, mock_modulestore):
+    """
+    Make sure replace_urls doesn't rescan text it has already rewritten.
+    """
+    mock_modulestore.return_value.get_modulestore_type.return_value = ModuleStoreEnum.Type.xml
+    mock_storage.exists.return_value = False
+    mock_storage.url.side_effect = lambda path: '/static/' + path
+
+    child = replace_urls('"/static/child.png"', COURSE_KEY, JUMP_TO_ID_BASE_URL, DATA_DIRECTORY)
+    assert_equals(mock_storage.url.call_count, 1)
+
+    parent = replace_urls(
+        '<div>"/course/info"' + child + '"/static/parent.png"</div>',
+        COURSE_KEY,
+        JUMP_TO_ID_BASE_URL,
+        DATA_DIRECTORY
+    )
+    assert_equals(
+        REWRITTEN_URLS_START +
+        '<div>"/courses/org/course/run/info"' + child + '"/static/data_dir/parent.png"</div>' +
+        REWRITTEN_URLS_END,
+        parent
+    )
+    assert_equals(mock_storage.url.call_count, 2)
+
+
+@patch('static_replace.get_request', Mock(return_value=Mock()))
+@patch('static_replace.modulestore')
+@patch('static_replace.staticfiles_storage')
+def test_replace_urls_request_cache(mock_storage, mock_modulestore):
+    """
+    Make sure static urls are only looked up once per request.
+    """
+    mock_modulestore.return_value.get_modulestore_type.return_value = ModuleStoreEnum.Type.xml
+    mock_storage.exists.return_value = False
+    mock_storage.url.side_effect = lambda path: '/static/' + path
+
+    RequestCache.clear_request_cache()
+    for __ in range(2):
+        assert_equals(
+            REWRITTEN_URLS_START + '"/static/data_dir/file.png"' + REWRITTEN_URLS_END,
+            replace_urls(STATIC_SOURCE, COURSE_KEY, JUMP_TO_ID_BASE_URL, DATA_DIRECTORY)
+        )
+    assert_equals(mock_storage.exists.call_count, 1)
+    RequestCache.clear_request_cache()
@@ -1,9 +1,151 @@
 """ Utility functions related to database queries """
+from functools import wraps
+import logging
+import threading
+
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, DatabaseError
+
+log = logging.getLogger(__name__)
+
+READ_REPLICA = "read_replica"
+
+READ_REPLICA_LAG_CACHE_KEY = "util.query.read_replica_lag"
 
 
 def use_read_replica_if_available(queryset):
     """
     If there is a database called 'read_replica', use that database for the queryset.
     """
-    return queryset.using("read_replica") if "read_replica" in settings.DATABASES else queryset
+    return queryset.using(READ_REPLICA) if READ_REPLICA in settings.DATABASES else queryset
+
+
+def read_replica_lag():
+    """
+    Return how many seconds the 'read_replica' database is behind the primary,
+    or None if that's unknown (e.g. replication is stopped).
+
+    The lag is only checked every READ_REPLICA_LAG_CHECK_INTERVAL seconds, and
+    is otherwise read from the cache. Databases other than MySQL are assumed
+    not to lag.
+    """
+    cached = cache.get(READ_REPLICA_LAG_CACHE_KEY)
+    if cached is not None:
+        return cached['lag']
+
+    lag = 0
+    connection = connections[READ_REPLICA]
+    if connection.vendor == 'mysql':
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SHOW SLAVE STATUS")
+            row = cursor.fetchone()
+            columns = [column[0] for column in cursor.description or ()]
+        except DatabaseError:
+            log.exception("Could not check the replication lag of the read replica.")
+            lag = None
+        else:
+            lag = dict(zip(columns, row)).get('Seconds_Behind_Master') if row else 0
+
+    cache.set(READ_REPLICA_LAG_CACHE_KEY, {'lag': lag}, getattr(settings, 'READ_REPLICA_LAG_CHECK_INTERVAL', 30))
+    return lag
+
+
+def read_replica_is_usable():
+    """
+    Return whether there is a 'read_replica' database whose replication lag is
+    within READ_REPLICA_MAX_LAG seconds. If READ_REPLICA_MAX_LAG is None, the
+    lag isn't checked.
+    """
+    if READ_REPLICA not in settings.DATABASES:
+        return False
+    max_lag = getattr(settings, 'READ_REPLICA_MAX_LAG', None)
+    if max_lag is None:
+        return True
+    lag = read_replica_lag()
+    if lag is None or lag > max_lag:
+        log.warning("Read replica lag is %s seconds, reading from the primary database instead.", lag)
+        return False
+    return True
+
+
+_ROUTING = threading.local()
+
+
+class route_reads_to_replica(object):  # pylint: disable=invalid-name
+    """
+    Context manager and decorator that sends the read queries made within it
+    to the 'read_replica' database through `ReadReplicaRouter`, unless there
+    is no replica or it lags too far behind, in which case they go to the
+    primary as usual. Writes always go to the primary.
+
+    Models of the apps in READ_REPLICA_EXCLUDED_APPS are always read from the
+    primary, for bookkeeping that must see its own writes (e.g. the
+    instructor task entries).
+
+    Usage::
+
+        with route_reads_to_replica():
+            rows = list(StudentModule.objects.filter(course_id=course_key))
+
+        @route_reads_to_replica()
+        def upload_grades_csv(...):
+            ...
+    """
+    def __enter__(self):
+        if not hasattr(_ROUTING, 'databases'):
+            _ROUTING.databases = []
+        if _ROUTING.databases:
+            # Nested: stick to the database the outermost block picked.
+            database = _ROUTING.databases[-1]
+        else:
+            database = READ_REPLICA if read_replica_is_usable() else None
+        _ROUTING.databases.append(database)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _ROUTING.databases.pop()
+
+    def __call__(self, func):
+        @wraps(func)
+        def _wrapper(*args, **kwargs):  # pylint: disable=missing-docstring
+            with self:
+                return func(*args, **kwargs)
+        return _wrapper
+
+
+class ReadReplicaRouter(object):
+    """
+    Database router that sends reads made within `route_reads_to_replica` to
+    the 'read_replica' database, and all writes to the primary.
+    """
+    def db_for_read(self, model, **hints):  # pylint: disable=unused-argument
+        """
+        Read from the replica within `route_reads_to_replica`.
+        """
+        databases = getattr(_ROUTING, 'databases', None)
+        if not databases:
+            return None
+        if model._meta.app_label in getattr(settings, 'READ_REPLICA_EXCLUDED_APPS', ()):  # pylint: disable=protected-access
+            return None
+        return databases[-1]
+
+    def db_for_write(self, model, **hints):  # pylint: disable=unused-argument
+        """
+        Write objects read from the replica to the primary, rather than back
+        to the database they were read from.
+        """
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == READ_REPLICA:  # pylint: disable=protected-access
+            return 'default'
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):  # pylint: disable=unused-argument
+        """
+        The replica holds the same data as the primary, so objects read from
+        either can be related to each other.
+        """
+        databases = set([obj1._state.db, obj2._state.db])  # pylint: disable=protected-access
+        if databases <= set(['default', READ_REPLICA, None]):
+            return True
+        return None
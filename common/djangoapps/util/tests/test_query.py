@@ -0,0 +1,83 @@
+"""Tests for util.query module."""
+import ddt
+from mock import patch
+import unittest
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from openedx.core.djangoapps.credit.models import CreditEligibility, CreditRequirementStatus
+from util.query import ReadReplicaRouter, read_replica_is_usable, route_reads_to_replica
+
+DATABASES_WITH_REPLICA = dict(settings.DATABASES, read_replica=settings.DATABASES['default'])
+
+
+@ddt.ddt
+class ReadReplicaRoutingTestCase(TestCase):
+    """
+    Tests for routing reads to the read replica.
+    """
+    def setUp(self):
+        super(ReadReplicaRoutingTestCase, self).setUp()
+        self.router = ReadReplicaRouter()
+
+    @patch('util.query.read_replica_is_usable', return_value=True)
+    def test_reads_routed_within_context(self, _mock_usable):
+        self.assertIsNone(self.router.db_for_read(User))
+        with route_reads_to_replica():
+            self.assertEqual(self.router.db_for_read(User), 'read_replica')
+            with route_reads_to_replica():
+                self.assertEqual(self.router.db_for_read(User), 'read_replica')
+            self.assertEqual(self.router.db_for_read(User), 'read_replica')
+        self.assertIsNone(self.router.db_for_read(User))
+
+    @patch('util.query.read_replica_is_usable', return_value=True)
+    def test_decorator(self, _mock_usable):
+        @route_reads_to_replica()
+        def read():  # pylint: disable=missing-docstring
+            return self.router.db_for_read(User)
+
+        self.assertEqual(read(), 'read_replica')
+        self.assertIsNone(self.router.db_for_read(User))
+
+    @patch('util.query.read_replica_is_usable', return_value=False)
+    def test_replica_not_usable(self, _mock_usable):
+        with route_reads_to_replica():
+            self.assertIsNone(self.router.db_for_read(User))
+
+    @override_settings(READ_REPLICA_EXCLUDED_APPS=('auth',))
+    @patch('util.query.read_replica_is_usable', return_value=True)
+    def test_excluded_apps(self, _mock_usable):
+        with route_reads_to_replica():
+            self.assertIsNone(self.router.db_for_read(User))
+
+    @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+    @patch('util.query.read_replica_is_usable', return_value=True)
+    def test_credit_read_from_primary(self, _mock_usable):
+        # Grading in report tasks writes credit statuses and reads them back.
+        with route_reads_to_replica():
+            self.assertIsNone(self.router.db_for_read(CreditRequirementStatus))
+            self.assertIsNone(self.router.db_for_read(CreditEligibility))
+
+    def test_writes_go_to_primary(self):
+        user = User(username='replica')
+        user._state.db = 'read_replica'  # pylint: disable=protected-access
+        self.assertEqual(self.router.db_for_write(User, instance=user), 'default')
+        self.assertIsNone(self.router.db_for_write(User))
+
+    @ddt.data(
+        (None, None, True),
+        (60, 10, True),
+        (60, 100, False),
+        (60, None, False),
+    )
+    @ddt.unpack
+    def test_replica_lag(self, max_lag, lag, usable):
+        with override_settings(DATABASES=DATABASES_WITH_REPLICA, READ_REPLICA_MAX_LAG=max_lag):
+            with patch('util.query.read_replica_lag', return_value=lag):
+                self.assertEqual(read_replica_is_usable(), usable)
+
+    def test_no_replica(self):
+        self.assertFalse(read_replica_is_usable())
@@ -24,7 +24,7 @@ from capa.responsetypes import StudentInputError, \
 from capa.util import convert_files_to_filenames, get_inner_html_from_xpath
 from .progress import Progress
 from xmodule.exceptions import NotFoundError
-from xblock.fields import Scope, String, Boolean, Dict, Integer, Float
+from xblock.fields import Scope, String, Boolean, Dict, Integer, Float, List
 from .fields import Timedelta, Date
 from django.utils.timezone import UTC
 from xmodule.capa_base_constants import RANDOMIZATION, SHOWANSWER
@@ -177,6 +177,11 @@ class CapaFields(object):
         scope=Scope.settings
     )
     markdown = String(help=_("Markdown source of this module"), default=None, scope=Scope.settings)
+    indexed_problem_types = List(
+        help=_("Problem types found in the problem's XML data, kept up to date by the modulestore"),
+        default=None,
+        scope=Scope.settings
+    )
     source_code = String(
         help=_("Source code for LaTeX and Word problems. This feature is not well-supported."),
         scope=Scope.settings
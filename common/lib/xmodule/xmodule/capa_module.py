@@ -138,6 +138,10 @@ class CapaDescriptor(CapaFields, RawDescriptor):
     metadata_translations = dict(RawDescriptor.metadata_translations)
     metadata_translations['attempts'] = 'max_attempts'
 
+    # indexed_problem_types is derived from the data, so it is neither
+    # exported nor imported
+    metadata_to_strip = RawDescriptor.metadata_to_strip + ('indexed_problem_types',)
+
     @classmethod
     def filter_templates(cls, template, course):
         """
@@ -181,15 +185,38 @@ class CapaDescriptor(CapaFields, RawDescriptor):
             CapaDescriptor.markdown,
             CapaDescriptor.text_customization,
             CapaDescriptor.use_latex_compiler,
+            CapaDescriptor.indexed_problem_types,
         ])
         return non_editable_fields
 
+    @staticmethod
+    def _problem_types_in(data):
+        """ Return the set of registered response types used in the problem XML `data` """
+        tree = etree.XML(data)
+        registered_tags = responsetypes.registry.registered_tags()
+        return set([node.tag for node in tree.iter() if node.tag in registered_tags])
+
+    @classmethod
+    def settings_derived_from_content(cls, content_fields):
+        """
+        Return the settings the modulestore stores alongside the block when
+        its content fields are saved, so that they can be read without
+        loading and parsing the problem's data.
+        """
+        if 'data' not in content_fields:
+            return {}
+        try:
+            problem_types = sorted(cls._problem_types_in(content_fields['data']))
+        except etree.XMLSyntaxError:
+            problem_types = None
+        return {'indexed_problem_types': problem_types}
+
     @property
     def problem_types(self):
         """ Low-level problem type introspection for content libraries filtering by problem type """
-        tree = etree.XML(self.data)
-        registered_tags = responsetypes.registry.registered_tags()
-        return set([node.tag for node in tree.iter() if node.tag in registered_tags])
+        if self.indexed_problem_types is not None:
+            return set(self.indexed_problem_types)
+        return self._problem_types_in(self.data)
 
     def index_dictionary(self):
         """
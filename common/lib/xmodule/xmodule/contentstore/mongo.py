@@ -129,6 +129,18 @@ class MongoContentStore(ContentStore):
             else:
                 return None
 
+    @staticmethod
+    def get_export_path(content):
+        """
+        Returns the path, relative to the exported static directory, of the
+        file `content` is exported to by `export`.
+        """
+        # Escape invalid char from filename.
+        export_name = escape_invalid_characters(name=content.name, invalid_char_list=['/', '\\'])
+        if content.import_path is not None:
+            return os.path.join(os.path.dirname(content.import_path), export_name)
+        return export_name
+
     def export(self, location, output_directory):
         content = self.find(location)
 
@@ -147,6 +159,19 @@ class MongoContentStore(ContentStore):
         with disk_fs.open(export_name, 'wb') as asset_file:
             asset_file.write(content.data)
 
+    @staticmethod
+    def get_assets_policy(assets):
+        """
+        Returns the policy of the assets listed by get_all_content_for_course,
+        i.e. their attributes by name, as exported to policies/assets.json.
+        """
+        policy = {}
+        for asset in assets:
+            for attr, value in asset.iteritems():
+                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
+                    policy.setdefault(asset['asset_key'].name, {})[attr] = value
+        return policy
+
     def export_all_for_course(self, course_key, output_directory, assets_policy_file):
         """
         Export all of this course's assets to the output_directory. Export all of the assets'
@@ -158,7 +183,6 @@ class MongoContentStore(ContentStore):
             assets_policy_file: the filename for the policy file which should be in the same
                 directory as the other policy files.
         """
-        policy = {}
         assets, __ = self.get_all_content_for_course(course_key)
 
         for asset in assets:
@@ -171,12 +195,9 @@ class MongoContentStore(ContentStore):
             # When debugging course exports, this might be a good place
             # to look. -- pmitros
             self.export(asset['asset_key'], output_directory)
-            for attr, value in asset.iteritems():
-                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
-                    policy.setdefault(asset['asset_key'].name, {})[attr] = value
 
         with open(assets_policy_file, 'w') as f:
-            json.dump(policy, f, sort_keys=True, indent=4)
+            json.dump(self.get_assets_policy(assets), f, sort_keys=True, indent=4)
 
     def get_all_content_thumbnails_for_course(self, course_key):
         return self._get_all_content_for_course(course_key, get_thumbnails=True)[0]
@@ -6,6 +6,8 @@ import sys
 
 from collections import namedtuple
 
+import numpy
+
 log = logging.getLogger("edx.courseware")
 
 # This is a tuple for holding scores, either from problems or sections.
@@ -46,6 +48,65 @@ def aggregate_scores(scores, section_name="summary"):
     return all_total, graded_total
 
 
+class ScoreMatrix(object):
+    """
+    The graded section scores of many students, for grading them all at once
+    with CourseGrader.grade_matrix instead of one grade_sheet at a time.
+
+    For each section format, earned[format] and possible[format] are
+    (students x sections) arrays with each student's totaled score for each
+    section, and sections[format] is an array of the same shape with the
+    section names. A possible score of 0 means that the section is not in the
+    student's grade_sheet. Otherwise, the sections are in the same order as in
+    the grade_sheet, since the graders number and drop sections by position.
+    """
+    def __init__(self, num_students, sections=None, earned=None, possible=None):
+        self.num_students = num_students
+        self.sections = sections or {}
+        self.earned = earned or {}
+        self.possible = possible or {}
+
+    @classmethod
+    def from_grade_sheets(cls, grade_sheets):
+        """
+        Build a ScoreMatrix from a list of grade sheets, one per student.
+
+        Raises ValueError if a grade sheet holds a score with nothing possible,
+        which could not be told apart from a missing section.
+        """
+        score_matrix = cls(len(grade_sheets))
+        section_formats = set(section_format for grade_sheet in grade_sheets for section_format in grade_sheet)
+        for section_format in section_formats:
+            num_sections = max(len(grade_sheet.get(section_format, [])) for grade_sheet in grade_sheets)
+            shape = (len(grade_sheets), num_sections)
+            sections = numpy.empty(shape, dtype=object)
+            earned = numpy.zeros(shape)
+            possible = numpy.zeros(shape)
+            for student_index, grade_sheet in enumerate(grade_sheets):
+                for index, score in enumerate(grade_sheet.get(section_format, [])):
+                    if not score.possible > 0:
+                        raise ValueError(u"Section {} has no possible score.".format(score.section))
+                    sections[student_index, index] = score.section
+                    earned[student_index, index] = score.earned
+                    possible[student_index, index] = score.possible
+
+            score_matrix.sections[section_format] = sections
+            score_matrix.earned[section_format] = earned
+            score_matrix.possible[section_format] = possible
+
+        return score_matrix
+
+    def scores(self, section_format):
+        """
+        Returns a tuple (sections, earned, possible) of the arrays of the given
+        format, with no sections if there are none.
+        """
+        if section_format not in self.earned:
+            shape = (self.num_students, 0)
+            return numpy.empty(shape, dtype=object), numpy.zeros(shape), numpy.zeros(shape)
+        return self.sections[section_format], self.earned[section_format], self.possible[section_format]
+
+
 def invalid_args(func, argdict):
     """
     Given a function and a dictionary of arguments, returns a set of arguments
@@ -160,6 +221,14 @@ class CourseGrader(object):
         '''Given a grade sheet, return a dict containing grading information'''
         raise NotImplementedError
 
+    def grade_matrix(self, score_matrix):
+        '''
+        Given a ScoreMatrix, return a dict containing the grading information of all
+        its students at once. The 'percent' is an array with the same final percentage
+        that grade() returns for each student. There is no section_breakdown.
+        '''
+        raise NotImplementedError
+
 
 class WeightedSubsectionsGrader(CourseGrader):
     """
@@ -199,6 +268,19 @@ class WeightedSubsectionsGrader(CourseGrader):
                 'section_breakdown': section_breakdown,
                 'grade_breakdown': grade_breakdown}
 
+    def grade_matrix(self, score_matrix):
+        total_percent = numpy.zeros(score_matrix.num_students)
+        grade_breakdown = []
+
+        for subgrader, category, weight in self.sections:
+            weighted_percent = subgrader.grade_matrix(score_matrix)['percent'] * weight
+
+            total_percent += weighted_percent
+            grade_breakdown.append({'percent': weighted_percent, 'category': category})
+
+        return {'percent': total_percent,
+                'grade_breakdown': grade_breakdown}
+
 
 class SingleSectionGrader(CourseGrader):
     """
@@ -249,6 +331,19 @@ class SingleSectionGrader(CourseGrader):
                 #No grade_breakdown here
                 }
 
+    def grade_matrix(self, score_matrix):
+        sections, earned, possible = score_matrix.scores(self.type)
+        percent = numpy.zeros(score_matrix.num_students)
+        found = numpy.zeros(score_matrix.num_students, dtype=bool)
+
+        # Like grade(), use each student's first section with the name.
+        for index in range(sections.shape[1]):
+            matches = (sections[:, index] == self.name) & (possible[:, index] > 0) & ~found
+            percent[matches] = earned[matches, index] / possible[matches, index]
+            found |= matches
+
+        return {'percent': percent}
+
 
 class AssignmentFormatGrader(CourseGrader):
     """
@@ -390,3 +485,40 @@ class AssignmentFormatGrader(CourseGrader):
                 'section_breakdown': breakdown,
                 #No grade_breakdown here
                 }
+
+    def grade_matrix(self, score_matrix):
+        __, earned, possible = score_matrix.scores(self.type)
+        num_students, num_sections = earned.shape
+        rows = numpy.arange(num_students)[:, numpy.newaxis]
+
+        # Move each student's sections to the front, in order, as they are in their grade sheet.
+        present = possible > 0
+        order = numpy.argsort(~present, axis=1, kind='mergesort')
+        present = present[rows, order]
+        num_entries = max(self.min_count, num_sections)
+        percents = numpy.zeros((num_students, num_entries))
+        percents[:, :num_sections] = numpy.where(
+            present, earned[rows, order] / numpy.where(present, possible[rows, order], 1), 0
+        )
+
+        # Each student has max(min_count, their number of sections) entries, the
+        # missing ones at 0%. Rank them by descending percentage, ties by position,
+        # like the stable sort in grade(), and drop the last drop_count of them.
+        counts = numpy.maximum(present.sum(axis=1), self.min_count)
+        positions = numpy.arange(num_entries)
+        sort_keys = numpy.where(positions < counts[:, numpy.newaxis], -percents, numpy.inf)
+        ranks = numpy.empty((num_students, num_entries), dtype=int)
+        ranks[rows, numpy.argsort(sort_keys, axis=1, kind='mergesort')] = positions
+        kept_counts = counts - self.drop_count
+        kept = ranks < kept_counts[:, numpy.newaxis]
+
+        # Sum the kept percentages in position order with cumsum, which adds them
+        # up one after the other as grade() does, so the totals come out the same.
+        total_percent = numpy.zeros(num_students)
+        if num_entries:
+            total_percent = numpy.where(kept, percents, 0).cumsum(axis=1)[:, -1]
+        total_percent = numpy.where(
+            kept_counts > 0, total_percent / numpy.maximum(kept_counts, 1), total_percent
+        )
+
+        return {'percent': total_percent}
@@ -110,6 +110,10 @@ class LibraryToolsService(object):
     def _filter_child(self, usage_key, capa_type):
         """
         Filters children by CAPA problem type, if configured
+
+        The problem types are stored with the block in the library's structure
+        when the problem is saved, so this does not load or parse the problem's
+        XML data.
         """
         if usage_key.block_type != "problem":
             return False
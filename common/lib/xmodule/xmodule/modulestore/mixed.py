@@ -539,6 +539,31 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         except NotImplementedError:
             return None, None
 
+    def get_structure_version(self, course_key):
+        """
+        Return the version of the current structure of the course or library `course_key`,
+        according to the branch setting, or None if the modulestore doesn't version structures.
+        """
+        try:
+            store = self._verify_modulestore_support(course_key, 'get_structure_version')
+            return store.get_structure_version(course_key)
+        except NotImplementedError:
+            return None
+
+    def get_blocks_changed_between(self, course_key, old_version_guid, new_version_guid):
+        """
+        Compare two versions of the structure of the course or library `course_key`,
+        and return the BlockKeys of the blocks that were added or changed (other than
+        their children), of those
+        that were removed, and of the ancestors of the changed blocks. Returns None if
+        the modulestore doesn't version structures.
+        """
+        try:
+            store = self._verify_modulestore_support(course_key, 'get_blocks_changed_between')
+            return store.get_blocks_changed_between(course_key, old_version_guid, new_version_guid)
+        except NotImplementedError:
+            return None
+
     def get_modulestore_type(self, course_id):
         """
         Returns a type which identifies which modulestore is servicing the given course_id.
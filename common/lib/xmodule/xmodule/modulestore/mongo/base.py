@@ -15,7 +15,6 @@ structure:
 import pymongo
 import sys
 import logging
-import copy
 import re
 from uuid import uuid4
 
@@ -676,9 +675,50 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         else:
             return ParentLocationCache()
 
+    @staticmethod
+    def _inheritance_record_filter():
+        """
+        Returns the fields to fetch of the containers to compute the metadata inheritance tree
+        """
+        # we just want the Location, children, and inheritable metadata
+        record_filter = {'_id': 1, 'definition.children': 1}
+
+        # just get the inheritable metadata since that is all we need for the computation
+        # this minimizes both data pushed over the wire
+        for field_name in InheritanceMixin.fields:
+            record_filter['metadata.{0}'.format(field_name)] = 1
+        return record_filter
+
+    @staticmethod
+    def _add_inheritance_record(results_by_url, result, course_id):
+        """
+        Adds the container `result` to `results_by_url`, merging the children of its
+        draft and published revisions, and returns its location
+        """
+        # manually pick it apart b/c the db has tag and we want as_published revision regardless
+        location = as_published(Location._from_deprecated_son(result['_id'], course_id.run))
+
+        location_url = unicode(location)
+        if location_url in results_by_url:
+            # found either draft or live to complement the other revision
+            # FIXME this is wrong. If the child was moved in draft from one parent to the other, it will
+            # show up under both in this logic: https://openedx.atlassian.net/browse/TNL-1075
+            existing_children = results_by_url[location_url].get('definition', {}).get('children', [])
+            additional_children = result.get('definition', {}).get('children', [])
+            total_children = list(existing_children) + list(additional_children)
+            # use set to get rid of duplicates. We don't care about order; so, it shouldn't matter.
+            results_by_url[location_url].setdefault('definition', {})['children'] = set(total_children)
+        else:
+            results_by_url[location_url] = result
+        return location
+
     def _compute_metadata_inheritance_tree(self, course_id):
         '''
         Find all inheritable fields from all xblocks in the course which may define inheritable data
+
+        The tree maps the url of each block below the course to the metadata it inherits, plus a
+        'parent' entry. Containers' entries also include their own inheritable metadata, as that's
+        what they pass down, and so does the course's, which has no 'parent'.
         '''
         # get all collections in the course, this query should not return any leaf nodes
         course_id = self.fill_in_run(course_id)
@@ -691,16 +731,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         # if we're only dealing in the published branch, then only get published containers
         if self.get_branch_setting() == ModuleStoreEnum.Branch.published_only:
             query['_id.revision'] = None
-        # we just want the Location, children, and inheritable metadata
-        record_filter = {'_id': 1, 'definition.children': 1}
-
-        # just get the inheritable metadata since that is all we need for the computation
-        # this minimizes both data pushed over the wire
-        for field_name in InheritanceMixin.fields:
-            record_filter['metadata.{0}'.format(field_name)] = 1
 
         # call out to the DB
-        resultset = self.collection.find(query, record_filter)
+        resultset = self.collection.find(query, self._inheritance_record_filter())
 
         # it's ok to keep these as deprecated strings b/c the overall cache is indexed by course_key and this
         # is a dictionary relative to that course
@@ -709,23 +742,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
         # now go through the results and order them by the location url
         for result in resultset:
-            # manually pick it apart b/c the db has tag and we want as_published revision regardless
-            location = as_published(Location._from_deprecated_son(result['_id'], course_id.run))
-
-            location_url = unicode(location)
-            if location_url in results_by_url:
-                # found either draft or live to complement the other revision
-                # FIXME this is wrong. If the child was moved in draft from one parent to the other, it will
-                # show up under both in this logic: https://openedx.atlassian.net/browse/TNL-1075
-                existing_children = results_by_url[location_url].get('definition', {}).get('children', [])
-                additional_children = result.get('definition', {}).get('children', [])
-                total_children = existing_children + additional_children
-                # use set to get rid of duplicates. We don't care about order; so, it shouldn't matter.
-                results_by_url[location_url].setdefault('definition', {})['children'] = set(total_children)
-            else:
-                results_by_url[location_url] = result
+            location = self._add_inheritance_record(results_by_url, result, course_id)
             if location.category == 'course':
-                root = location_url
+                root = unicode(location)
 
         # now traverse the tree and compute down the inherited metadata
         metadata_to_inherit = {}
@@ -740,7 +759,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             # in the result set. Remember results will not contain leaf nodes
             for child in results_by_url[url].get('definition', {}).get('children', []):
                 if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
+                    # the metadata values are shared rather than copied, as they're never
+                    # modified in place; only the dicts holding them differ per block
+                    new_child_metadata = dict(my_metadata)
                     new_child_metadata.update(results_by_url[child].get('metadata', {}))
                     results_by_url[child]['metadata'] = new_child_metadata
                     metadata_to_inherit[child] = new_child_metadata
@@ -756,10 +777,112 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
 
         if root is not None:
+            metadata_to_inherit[root] = dict(results_by_url[root].get('metadata', {}))
             _compute_inherited_metadata(root)
 
         return metadata_to_inherit
 
+    def _update_metadata_inheritance_tree(self, course_id, xblock):
+        """
+        Updates the cached metadata inheritance tree of the course after `xblock` was
+        updated, recomputing only the entries of the blocks below it, and only if what
+        it passes down changed or it has new children. Falls back to recomputing the
+        whole tree when what `xblock` inherits isn't known.
+
+        Returns the tree.
+        """
+        tree = self._get_cached_metadata_inheritance_tree(course_id)
+        location = as_published(xblock.location)
+        location_url = unicode(location)
+        if location.category not in BLOCK_TYPES_WITH_CHILDREN or location_url not in tree:
+            # only containers pass metadata down, and those outside of the tree
+            # (e.g. still being created) have no bearing on it
+            return tree
+
+        branch = self.get_branch_setting()
+        entry = tree[location_url]
+        parents = entry.get('parent', {})
+        parent_url = parents.get(branch, next(iter(parents.values()), None))
+        if parent_url not in tree:
+            # what the block inherits isn't known, e.g. it's the course itself
+            return self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+
+        metadata = dict(
+            (name, value) for name, value in tree[parent_url].iteritems() if name != 'parent'
+        )
+        metadata.update(
+            (name, value) for name, value in self._serialize_scope(xblock, Scope.settings).iteritems()
+            if name in InheritanceMixin.fields
+        )
+        metadata_changed = metadata != dict((name, value) for name, value in entry.iteritems() if name != 'parent')
+        child_urls = [unicode(as_published(child)) for child in xblock.children] if xblock.has_children else []
+        if not metadata_changed:
+            # only the blocks newly added below this one need entries
+            child_urls = [
+                child_url for child_url in child_urls
+                if tree.get(child_url, {}).get('parent', {}).get(branch) != location_url
+            ]
+            if not child_urls:
+                return tree
+
+        tree[location_url] = dict(metadata, parent=parents)
+        self._inherit_metadata_down(course_id, tree, [(location_url, metadata, child_urls)])
+        self._cache_metadata_inheritance_tree(course_id, tree)
+        return tree
+
+    def _inherit_metadata_down(self, course_id, tree, containers):
+        """
+        Recomputes the metadata inheritance tree entries of the children of `containers`, a
+        list of (location url, metadata it passes down, its children urls), and of all their
+        descendants. It makes one query per level of containers below them.
+        """
+        branch = self.get_branch_setting()
+        course_id = self.fill_in_run(course_id)
+        while containers:
+            child_metadata = {}
+            for url, metadata, child_urls in containers:
+                for child_url in child_urls:
+                    parents = dict(tree.get(child_url, {}).get('parent', {}))
+                    parents[branch] = url
+                    tree[child_url] = dict(metadata, parent=parents)
+                    child_metadata[child_url] = metadata
+
+            child_locations = [
+                course_id.make_usage_key_from_deprecated_string(child_url) for child_url in child_metadata
+            ]
+            child_locations = [
+                location for location in child_locations if location.category in BLOCK_TYPES_WITH_CHILDREN
+            ]
+            if not child_locations:
+                break
+
+            # get the child containers; those that aren't found are treated as leaves, as when
+            # computing the whole tree
+            son_ids = [as_published(location).to_deprecated_son() for location in child_locations]
+            if branch != ModuleStoreEnum.Branch.published_only:
+                son_ids.extend(as_draft(location).to_deprecated_son() for location in child_locations)
+            results_by_url = {}
+            for result in self.collection.find({'_id': {'$in': son_ids}}, self._inheritance_record_filter()):
+                self._add_inheritance_record(results_by_url, result, course_id)
+
+            containers = []
+            for child_url, result in results_by_url.iteritems():
+                metadata = dict(child_metadata[child_url])
+                metadata.update(result.get('metadata', {}))
+                tree[child_url].update(result.get('metadata', {}))
+                containers.append((child_url, metadata, result.get('definition', {}).get('children', [])))
+
+    def _cache_metadata_inheritance_tree(self, course_id, tree):
+        """
+        Writes the metadata inheritance tree of the course to the caching subsystem
+        (e.g. memcached) and the request cache, if available.
+        """
+        course_id = self.fill_in_run(course_id)
+        if self.metadata_inheritance_cache_subsystem is not None:
+            self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
+        if self.request_cache is not None:
+            self.request_cache.data.setdefault('metadata_inheritance', {})[unicode(course_id)] = tree
+
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
         Compute the metadata inheritance for the course.
@@ -801,18 +924,24 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
         return tree
 
-    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
+    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None, xblock=None):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
         for location
 
         If given a runtime, it replaces the cached_metadata in that runtime. NOTE: failure to provide
         a runtime may mean that some objects report old values for inherited data.
+
+        If given the `xblock` whose update requires the refresh, only the part of the tree
+        below it is recomputed, if anything.
         """
         course_id = course_id.for_branch(None)
         if not self._is_in_bulk_operation(course_id):
             # below is done for side effects when runtime is None
-            cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+            if xblock is not None:
+                cached_metadata = self._update_metadata_inheritance_tree(course_id, xblock)
+            else:
+                cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
             if runtime:
                 runtime.cached_metadata = cached_metadata
 
@@ -1474,7 +1603,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             xblock._edit_info = payload['edit_info']
 
             # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            self.refresh_cached_metadata_inheritance_tree(
+                xblock.scope_ids.usage_id.course_key, xblock.runtime, xblock=xblock
+            )
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
@@ -1268,6 +1268,85 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                     CourseLocator(version_guid=struct['_id']))
         return VersionTree(course_locator, result)
 
+    def get_structure_version(self, course_key):
+        """
+        Return the version guid of the current structure of the course or library `course_key`.
+        """
+        return self._lookup_course(course_key).structure['_id']
+
+    def get_blocks_changed_between(self, course_key, old_version_guid, new_version_guid):
+        """
+        Compare two versions of the structure of the course or library `course_key`.
+
+        Returns a tuple of three sets of BlockKeys: the blocks that were added, moved
+        to another parent (along with their descendants) or whose fields (other than
+        their children) or definition changed in `new_version_guid`, the blocks that
+        were removed, and the ancestors of the changed blocks in `new_version_guid`.
+        Blocks whose only change is to their children are thus either ancestors of
+        changed blocks or parents of removed ones.
+        Returns None if either version can't be found or they are not versions of
+        the same course.
+        """
+        structures = dict(
+            (structure['_id'], structure)
+            for structure in self.find_structures_by_id([old_version_guid, new_version_guid])
+        )
+        old_structure = structures.get(old_version_guid)
+        new_structure = structures.get(new_version_guid)
+        if old_structure is None or new_structure is None:
+            return None
+        if old_structure['original_version'] != new_structure['original_version']:
+            return None
+
+        def settings_of(block_data):
+            """ The fields of the block other than its children """
+            return dict((name, value) for name, value in block_data.fields.iteritems() if name != 'children')
+
+        def parents_of(blocks):
+            """ Map each block in `blocks` that has a parent to its parent """
+            parents = {}
+            for block_key, block_data in blocks.iteritems():
+                for child_key in block_data.fields.get('children', []):
+                    parents[child_key] = block_key
+            return parents
+
+        old_blocks = old_structure['blocks']
+        new_blocks = new_structure['blocks']
+        old_parents = parents_of(old_blocks)
+        parents = parents_of(new_blocks)
+        changed = set()
+        moved = []
+        for block_key, block_data in new_blocks.iteritems():
+            old_block_data = old_blocks.get(block_key)
+            if (
+                    old_block_data is None or
+                    old_block_data.definition != block_data.definition or
+                    old_block_data.defaults != block_data.defaults or
+                    settings_of(old_block_data) != settings_of(block_data)
+            ):
+                changed.add(block_key)
+            elif old_parents.get(block_key) != parents.get(block_key):
+                moved.append(block_key)
+        removed = set(old_blocks) - set(new_blocks)
+
+        # The index of a moved block and of its descendants depends on where it is
+        while moved:
+            block_key = moved.pop()
+            changed.add(block_key)
+            block_data = new_blocks.get(block_key)
+            if block_data is not None:
+                moved.extend(
+                    child_key for child_key in block_data.fields.get('children', []) if child_key not in changed
+                )
+
+        ancestors = set()
+        for block_key in changed:
+            parent_key = parents.get(block_key)
+            while parent_key is not None and parent_key not in ancestors:
+                ancestors.add(parent_key)
+                parent_key = parents.get(parent_key)
+        return changed, removed, ancestors
+
     def get_block_generations(self, block_locator):
         """
         Find the history of this block. Return as a VersionTree of each place the block changed (except
@@ -1493,6 +1572,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             structure = self._lookup_course(course_key).structure
 
             partitioned_fields = self.partition_fields_by_scope(block_type, fields)
+            self._add_derived_settings(block_type, partitioned_fields)
             new_def_data = partitioned_fields.get(Scope.content, {})
             # persist the definition if persisted != passed
             if definition_locator is None or isinstance(definition_locator.definition_id, LocalId):
@@ -1845,6 +1925,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                     raise ItemNotFoundError(course_key.make_usage_key(block_key.type, block_key.id))
 
             is_updated = False
+            self._add_derived_settings(block_key.type, partitioned_fields)
             definition_fields = partitioned_fields[Scope.content]
             if definition_locator is None:
                 definition_locator = DefinitionLocator(original_entry.block_type, original_entry.definition)
@@ -2009,6 +2090,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
     def _persist_subdag(self, course_key, xblock, user_id, structure_blocks, new_id):
         # persist the definition if persisted != passed
         partitioned_fields = self.partition_xblock_fields_by_scope(xblock)
+        self._add_derived_settings(xblock.category, partitioned_fields)
         new_def_data = self._serialize_fields(xblock.category, partitioned_fields[Scope.content])
         is_updated = False
         if xblock.definition_locator is None or isinstance(xblock.definition_locator.definition_id, LocalId):
@@ -2813,6 +2895,21 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         index_entry['versions'][branch] = new_id
         self.update_course_index(course_key, index_entry)
 
+    def _add_derived_settings(self, category, partitioned_fields):
+        """
+        Add to the Scope.settings fields in `partitioned_fields` any settings
+        the xblock class derives from the Scope.content fields being saved
+        (see `CapaDescriptor.settings_derived_from_content`), so that they are
+        stored in the structure and can be read without loading the definition.
+        """
+        content_fields = partitioned_fields.get(Scope.content)
+        if not content_fields:
+            return
+        xblock_class = self.mixologist.mix(XBlock.load_class(category, self.default_class))
+        derive_settings = getattr(xblock_class, 'settings_derived_from_content', None)
+        if derive_settings is not None:
+            partitioned_fields.setdefault(Scope.settings, {}).update(derive_settings(content_fields))
+
     def partition_xblock_fields_by_scope(self, xblock):
         """
         Return a dictionary of scopes mapped to this xblock's explicitly set fields w/o any conversions
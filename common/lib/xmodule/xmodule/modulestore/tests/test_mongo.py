@@ -758,6 +758,53 @@ class TestMongoModuleStore(TestMongoModuleStoreBase):
         # Clean up the data so we don't break other tests which apparently expect a particular state
         self.draft_store.delete_course(course.id, self.dummy_user)
 
+    def test_update_metadata_inheritance_tree(self):
+        """
+        Test that updates only recompute the part of the cached metadata inheritance tree below
+        the updated block, and leave it alone when what's inherited doesn't change
+        """
+        inheritance_cache = DictCache()
+        with patch.object(self.draft_store, 'metadata_inheritance_cache_subsystem', inheritance_cache):
+            course = self.draft_store.create_course("TestX", "InheritanceTest", "2015", self.dummy_user)
+            chapter = self.draft_store.create_child(self.dummy_user, course.location, 'chapter')
+            sequential = self.draft_store.create_child(self.dummy_user, chapter.location, 'sequential')
+            vertical = self.draft_store.create_child(self.dummy_user, sequential.location, 'vertical')
+            problem = self.draft_store.create_child(self.dummy_user, vertical.location, 'problem')
+            self.assertEqual(
+                inheritance_cache[unicode(course.id)],
+                self.draft_store._compute_metadata_inheritance_tree(course.id)  # pylint: disable=protected-access
+            )
+
+            with patch.object(self.draft_store, '_compute_metadata_inheritance_tree') as mock_compute:
+                chapter = self.draft_store.get_item(chapter.location)
+                chapter.due = datetime(2015, 1, 1, tzinfo=UTC)
+                self.draft_store.update_item(chapter, self.dummy_user)
+
+                problem = self.draft_store.get_item(problem.location)
+                problem.display_name = "Updated problem"
+                self.draft_store.update_item(problem, self.dummy_user)
+            self.assertFalse(mock_compute.called)
+
+            tree = inheritance_cache[unicode(course.id)]
+            self.assertEqual(
+                tree,
+                self.draft_store._compute_metadata_inheritance_tree(course.id)  # pylint: disable=protected-access
+            )
+            chapter_due = tree[unicode(chapter.location)].get('due')
+            self.assertIsNotNone(chapter_due)
+            self.assertEqual(tree[unicode(problem.location.replace(revision=None))]['due'], chapter_due)
+
+        self.draft_store.delete_course(course.id, self.dummy_user)
+
+
+class DictCache(dict):
+    """
+    A dict that can stand in for a django cache.
+    """
+    def set(self, key, value):
+        """ Set the value of key """
+        self[key] = value
+
 
 class TestMongoModuleStoreWithNoAssetCollection(TestMongoModuleStore):
     '''
@@ -4,6 +4,9 @@ Methods for exporting course data to XML
 
 import logging
 from abc import abstractmethod
+from cStringIO import StringIO
+import tarfile
+import time
 import lxml.etree
 from xblock.fields import Scope, Reference, ReferenceList, ReferenceValueDict
 from xmodule.contentstore.content import StaticContent
@@ -13,6 +16,7 @@ from xmodule.modulestore import EdxJSONEncoder, ModuleStoreEnum
 from xmodule.modulestore.inheritance import own_metadata
 from xmodule.modulestore.store_utilities import draft_node_constructor, get_draft_subtree_roots
 from xmodule.modulestore import LIBRARY_ROOT
+from fs.memoryfs import MemoryFS
 from fs.osfs import OSFS
 from json import dumps
 import json
@@ -107,7 +111,7 @@ class ExportManager(object):
     """
     Manages XML exporting for courselike objects.
     """
-    def __init__(self, modulestore, contentstore, courselike_key, root_dir, target_dir):
+    def __init__(self, modulestore, contentstore, courselike_key, root_dir, target_dir, root_fs=None):
         """
         Export all modules from `modulestore` and content from `contentstore` as xml to `root_dir`.
 
@@ -116,12 +120,16 @@ class ExportManager(object):
         `courselike_key`: The Locator of the Descriptor to export
         `root_dir`: The directory to write the exported xml to
         `target_dir`: The name of the directory inside `root_dir` to write the content to
+        `root_fs`: If given, the filesystem to write the exported xml to instead of `root_dir`. The
+            static assets aren't copied into it: they are listed in `static_assets` for the caller to copy.
         """
         self.modulestore = modulestore
         self.contentstore = contentstore
         self.courselike_key = courselike_key
         self.root_dir = root_dir
         self.target_dir = target_dir
+        self.root_fs = root_fs
+        self.static_assets = []
 
     @abstractmethod
     def get_key(self):
@@ -135,7 +143,7 @@ class ExportManager(object):
         Perform any additional tasks to the root XML node.
         """
 
-    def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
+    def process_extra(self, root, courselike, xml_centric_courselike_key, export_fs):
         """
         Process additional content, like static assets.
         """
@@ -151,13 +159,31 @@ class ExportManager(object):
         Get the target courselike object for this export.
         """
 
+    def export_static_assets(self, export_fs):
+        """
+        Export the static assets into the static directory, and their attributes to policies/assets.json.
+
+        When exporting to `root_fs`, only the policy is written, and the assets are listed in `static_assets`.
+        """
+        if self.root_fs is None:
+            root_courselike_dir = self.root_dir + '/' + self.target_dir
+            self.contentstore.export_all_for_course(
+                self.courselike_key,
+                root_courselike_dir + '/static/',
+                root_courselike_dir + '/policies/assets.json',
+            )
+        else:
+            self.static_assets, __ = self.contentstore.get_all_content_for_course(self.courselike_key)
+            with export_fs.makeopendir('policies', recursive=True).open('assets.json', 'w') as assets_policy:
+                json.dump(self.contentstore.get_assets_policy(self.static_assets), assets_policy, sort_keys=True, indent=4)
+
     def export(self):
         """
         Perform the export given the parameters handed to this class at init.
         """
         with self.modulestore.bulk_operations(self.courselike_key):
 
-            fsm = OSFS(self.root_dir)
+            fsm = OSFS(self.root_dir) if self.root_fs is None else self.root_fs
             root = lxml.etree.Element('unknown')  # pylint: disable=no-member
 
             # export only the published content
@@ -174,8 +200,7 @@ class ExportManager(object):
             self.process_root(root, export_fs)
 
             # Process extra items-- drafts, assets, etc
-            root_courselike_dir = self.root_dir + '/' + self.target_dir
-            self.process_extra(root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs)
+            self.process_extra(root, courselike, xml_centric_courselike_key, export_fs)
 
             # Any last pass adjustments
             self.post_process(root, export_fs)
@@ -202,28 +227,22 @@ class CourseExportManager(ExportManager):
         with export_fs.open('course.xml', 'w') as course_xml:
             lxml.etree.ElementTree(root).write(course_xml)  # pylint: disable=no-member
 
-    def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
+    def process_extra(self, root, courselike, xml_centric_courselike_key, export_fs):
         # Export the modulestore's asset metadata.
-        asset_dir = root_courselike_dir + '/' + AssetMetadata.EXPORTED_ASSET_DIR + '/'
-        if not os.path.isdir(asset_dir):
-            os.makedirs(asset_dir)
+        asset_dir = export_fs.makeopendir(AssetMetadata.EXPORTED_ASSET_DIR, recursive=True)
         asset_root = lxml.etree.Element(AssetMetadata.ALL_ASSETS_XML_TAG)
         course_assets = self.modulestore.get_all_asset_metadata(self.courselike_key, None)
         for asset_md in course_assets:
             # All asset types are exported using the "asset" tag - but their asset type is specified in each asset key.
             asset = lxml.etree.SubElement(asset_root, AssetMetadata.ASSET_XML_TAG)  # pylint: disable=no-member
             asset_md.to_xml(asset)
-        with OSFS(asset_dir).open(AssetMetadata.EXPORTED_ASSET_FILENAME, 'w') as asset_xml_file:
+        with asset_dir.open(AssetMetadata.EXPORTED_ASSET_FILENAME, 'w') as asset_xml_file:
             lxml.etree.ElementTree(asset_root).write(asset_xml_file)  # pylint: disable=no-member
 
         # export the static assets
         policies_dir = export_fs.makeopendir('policies')
         if self.contentstore:
-            self.contentstore.export_all_for_course(
-                self.courselike_key,
-                root_courselike_dir + '/static/',
-                root_courselike_dir + '/policies/assets.json',
-            )
+            self.export_static_assets(export_fs)
 
             # If we are using the default course image, export it to the
             # legacy location to support backwards compatibility.
@@ -238,10 +257,8 @@ class CourseExportManager(ExportManager):
                 except NotFoundError:
                     pass
                 else:
-                    output_dir = root_courselike_dir + '/static/images/'
-                    if not os.path.isdir(output_dir):
-                        os.makedirs(output_dir)
-                    with OSFS(output_dir).open('course_image.jpg', 'wb') as course_image_file:
+                    output_dir = export_fs.makeopendir('static/images', recursive=True)
+                    with output_dir.open('course_image.jpg', 'wb') as course_image_file:
                         course_image_file.write(course_image.data)
 
         # export the static tabs
@@ -314,7 +331,7 @@ class LibraryExportManager(ExportManager):
         root.set('org', self.courselike_key.org)
         root.set('library', self.courselike_key.library)
 
-    def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
+    def process_extra(self, root, courselike, xml_centric_courselike_key, export_fs):
         """
         Notionally, libraries may have assets. This is currently unsupported, but the structure is here
         to ease in duck typing during import. This may be expanded as a useful feature eventually.
@@ -323,11 +340,7 @@ class LibraryExportManager(ExportManager):
         export_fs.makeopendir('policies')
 
         if self.contentstore:
-            self.contentstore.export_all_for_course(
-                self.courselike_key,
-                self.root_dir + '/' + self.target_dir + '/static/',
-                self.root_dir + '/' + self.target_dir + '/policies/assets.json',
-            )
+            self.export_static_assets(export_fs)
 
     def post_process(self, root, export_fs):
         """
@@ -357,6 +370,102 @@ def export_library_to_xml(modulestore, contentstore, library_key, root_dir, libr
     LibraryExportManager(modulestore, contentstore, library_key, root_dir, library_dir).export()
 
 
+def export_course_to_tarball(modulestore, contentstore, course_key, course_dir):
+    """
+    Export the course like `export_course_to_xml`, but into a .tar.gz archive holding `course_dir`.
+    See `stream_tarball` for details.
+    """
+    return stream_tarball(CourseExportManager(modulestore, contentstore, course_key, None, course_dir, MemoryFS()))
+
+
+def export_library_to_tarball(modulestore, contentstore, library_key, library_dir):
+    """
+    Export the library like `export_library_to_xml`, but into a .tar.gz archive holding `library_dir`.
+    See `stream_tarball` for details.
+    """
+    return stream_tarball(LibraryExportManager(modulestore, contentstore, library_key, None, library_dir, MemoryFS()))
+
+
+class _TarballBuffer(object):
+    """
+    Collects what is written to it, until it is drained.
+    """
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        """
+        Collect `data`.
+        """
+        self.chunks.append(data)
+
+    def drain(self):
+        """
+        Return all that was written since the last drain.
+        """
+        data = ''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_tarball(export_manager):
+    """
+    Run `export_manager`, which must export to a `root_fs` in memory, and return an iterator
+    over the chunks of a .tar.gz archive of its export.
+
+    The xml is exported before this returns, so export errors (e.g. `SerializationError`) are
+    raised right away. The iterator then writes the tar members straight from memory, and streams
+    the static assets' bytes from the contentstore into the archive, so no temporary files are
+    used, and at most about a chunk of each asset is held in memory.
+    """
+    export_manager.export()
+
+    def tarball_chunks():
+        """
+        Yield the compressed archive as it's written.
+        """
+        buf = _TarballBuffer()
+        mtime = time.time()
+        tar_file = tarfile.open(mode='w|gz', fileobj=buf)
+
+        # Assets go first, so that files written by the export to the static directory (like
+        # the default course image) override them when extracted, as when exporting to disk.
+        static_dir = export_manager.target_dir + '/static/'
+        for asset in export_manager.static_assets:
+            content = export_manager.contentstore.find(asset['asset_key'], as_stream=True)
+            try:
+                tarinfo = tarfile.TarInfo(static_dir + export_manager.contentstore.get_export_path(content))
+                tarinfo.size = content.length
+                tarinfo.mtime = mtime
+                # Write the header, then the data a chunk at a time, padded to a whole block like
+                # `TarFile.addfile` does, so each chunk can be sent on before the next is read.
+                tar_file.addfile(tarinfo)
+                for chunk in content.stream_data():
+                    tar_file.fileobj.write(chunk)
+                    yield buf.drain()
+                blocks, remainder = divmod(tarinfo.size, tarfile.BLOCKSIZE)
+                if remainder > 0:
+                    tar_file.fileobj.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+                    blocks += 1
+                tar_file.offset += blocks * tarfile.BLOCKSIZE
+            finally:
+                content.close()
+
+        root_fs = export_manager.root_fs
+        for file_path in root_fs.walkfiles(export_manager.target_dir):
+            data = root_fs.getcontents(file_path)
+            tarinfo = tarfile.TarInfo(file_path.lstrip('/'))
+            tarinfo.size = len(data)
+            tarinfo.mtime = mtime
+            tar_file.addfile(tarinfo, StringIO(data))
+            yield buf.drain()
+
+        tar_file.close()
+        yield buf.drain()
+
+    return tarball_chunks()
+
+
 def adapt_references(subtree, destination_course_key, export_fs):
     """
     Map every reference in the subtree into destination_course_key and set it back into the xblock fields
@@ -25,6 +25,7 @@ from abc import abstractmethod
 from opaque_keys.edx.locator import LibraryLocator
 import os
 import mimetypes
+from multiprocessing.pool import ThreadPool
 from path import Path as path
 import json
 import re
@@ -56,8 +57,15 @@ log = logging.getLogger(__name__)
 
 def import_static_content(
         course_data_path, static_content_store,
-        target_id, subpath='static', verbose=False):
+        target_id, subpath='static', verbose=False, workers=1):
+    """
+    Import the files in `course_data_path`/`subpath` into `static_content_store`
+    as assets of `target_id`, and return a dict mapping their paths to their
+    asset keys.
 
+    If `workers` is more than 1, that many threads save the assets (and their
+    thumbnails) to the contentstore in parallel.
+    """
     remap_dict = {}
 
     # now import all static assets
@@ -65,7 +73,7 @@ def import_static_content(
     try:
         with open(course_data_path / 'policies/assets.json') as f:
             policy = json.load(f)
-    except (IOError, ValueError) as err:
+    except (IOError, ValueError):
         # xml backed courses won't have this file, only exported courses;
         # so, its absence is not really an exception.
         policy = {}
@@ -76,70 +84,98 @@ def import_static_content(
     mimetypes.add_type('application/octet-stream', '.srt')
     mimetypes_list = mimetypes.types_map.values()
 
-    for dirname, _, filenames in os.walk(static_dir):
-        for filename in filenames:
+    def static_files():
+        """
+        Yield the path of each file to import.
+        """
+        for dirname, _, filenames in os.walk(static_dir):
+            for filename in filenames:
 
-            content_path = os.path.join(dirname, filename)
+                content_path = os.path.join(dirname, filename)
 
-            if re.match(ASSET_IGNORE_REGEX, filename):
-                if verbose:
-                    log.debug('skipping static content %s...', content_path)
-                continue
+                if re.match(ASSET_IGNORE_REGEX, filename):
+                    if verbose:
+                        log.debug('skipping static content %s...', content_path)
+                    continue
 
-            if verbose:
-                log.debug('importing static content %s...', content_path)
+                yield content_path
 
-            try:
-                with open(content_path, 'rb') as f:
-                    data = f.read()
-            except IOError:
-                if filename.startswith('._'):
-                    # OS X "companion files". See
-                    # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
-                    continue
-                # Not a 'hidden file', then re-raise exception
-                raise
+    def import_static_file(content_path):
+        """
+        Save the file at `content_path` to the contentstore, and return its
+        (path relative to `static_dir`, asset key), or None if it was skipped.
+        """
+        filename = os.path.basename(content_path)
+        if verbose:
+            log.debug('importing static content %s...', content_path)
+
+        try:
+            with open(content_path, 'rb') as f:
+                data = f.read()
+        except IOError:
+            if filename.startswith('._'):
+                # OS X "companion files". See
+                # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
+                return None
+            # Not a 'hidden file', then re-raise exception
+            raise
+
+        # strip away leading path from the name
+        fullname_with_subpath = content_path.replace(static_dir, '')
+        if fullname_with_subpath.startswith('/'):
+            fullname_with_subpath = fullname_with_subpath[1:]
+        asset_key = StaticContent.compute_location(target_id, fullname_with_subpath)
+
+        policy_ele = policy.get(asset_key.path, {})
+
+        # During export display name is used to create files, strip away slashes from name
+        displayname = escape_invalid_characters(
+            name=policy_ele.get('displayname', filename),
+            invalid_char_list=['/', '\\']
+        )
+        locked = policy_ele.get('locked', False)
+        mime_type = policy_ele.get('contentType')
+
+        # Check extracted contentType in list of all valid mimetypes
+        if not mime_type or mime_type not in mimetypes_list:
+            mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
+        content = StaticContent(
+            asset_key, displayname, mime_type, data,
+            import_path=fullname_with_subpath, locked=locked
+        )
 
-            # strip away leading path from the name
-            fullname_with_subpath = content_path.replace(static_dir, '')
-            if fullname_with_subpath.startswith('/'):
-                fullname_with_subpath = fullname_with_subpath[1:]
-            asset_key = StaticContent.compute_location(target_id, fullname_with_subpath)
+        # first let's save a thumbnail so we can get back a thumbnail location
+        thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
 
-            policy_ele = policy.get(asset_key.path, {})
+        if thumbnail_content is not None:
+            content.thumbnail_location = thumbnail_location
 
-            # During export display name is used to create files, strip away slashes from name
-            displayname = escape_invalid_characters(
-                name=policy_ele.get('displayname', filename),
-                invalid_char_list=['/', '\\']
-            )
-            locked = policy_ele.get('locked', False)
-            mime_type = policy_ele.get('contentType')
-
-            # Check extracted contentType in list of all valid mimetypes
-            if not mime_type or mime_type not in mimetypes_list:
-                mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
-            content = StaticContent(
-                asset_key, displayname, mime_type, data,
-                import_path=fullname_with_subpath, locked=locked
-            )
+        # then commit the content
+        try:
+            static_content_store.save(content)
+        except Exception as err:
+            log.exception(u'Error importing {0}, error={1}'.format(
+                fullname_with_subpath, err
+            ))
 
-            # first let's save a thumbnail so we can get back a thumbnail location
-            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
+        return fullname_with_subpath, asset_key
 
-            if thumbnail_content is not None:
-                content.thumbnail_location = thumbnail_location
+    if workers > 1:
+        pool = ThreadPool(workers)
+        try:
+            # Files are read by the workers, so only those being saved are held in memory
+            imported = list(pool.imap_unordered(import_static_file, static_files()))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        imported = [import_static_file(content_path) for content_path in static_files()]
 
-            # then commit the content
-            try:
-                static_content_store.save(content)
-            except Exception as err:
-                log.exception(u'Error importing {0}, error={1}'.format(
-                    fullname_with_subpath, err
-                ))
-
-            # store the remapping information which will be needed
-            # to subsitute in the module data
+    # store the remapping information which will be needed
+    # to subsitute in the module data
+    for item in imported:
+        if item is not None:
+            fullname_with_subpath, asset_key = item
             remap_dict[fullname_with_subpath] = asset_key
 
     return remap_dict
@@ -176,6 +212,14 @@ class ImportManager(object):
         create_if_not_present: If True, then a new courselike is created if it doesn't already exist.
             Otherwise, it throws an InvalidLocationError if the courselike does not exist.
 
+        static_content_workers: how many threads save static files to static_content_store in parallel.
+
+        skip_static_import: if True, the static files are not imported again, e.g. because an earlier
+            attempt at this import already saved them before failing.
+
+        status_callback: if given, called with the name of each import phase ('static', 'modules',
+            'drafts') as it starts.
+
         default_class, load_error_modules: are arguments for constructing the XMLModuleStore (see its doc)
     """
     store_class = XMLModuleStore
@@ -186,7 +230,8 @@ class ImportManager(object):
             load_error_modules=True, static_content_store=None,
             target_id=None, verbose=False,
             do_import_static=True, create_if_not_present=False,
-            raise_on_failure=False
+            raise_on_failure=False, static_content_workers=1,
+            skip_static_import=False, status_callback=None,
     ):
         self.store = store
         self.user_id = user_id
@@ -199,6 +244,9 @@ class ImportManager(object):
         self.do_import_static = do_import_static
         self.create_if_not_present = create_if_not_present
         self.raise_on_failure = raise_on_failure
+        self.static_content_workers = static_content_workers
+        self.skip_static_import = skip_static_import
+        self.status_callback = status_callback
         self.xml_module_store = self.store_class(
             data_dir,
             default_class=default_class,
@@ -223,11 +271,16 @@ class ImportManager(object):
         """
         Import all static items into the content store.
         """
+        if self.skip_static_import:
+            log.debug("Skipping import of static content, since it was already imported")
+            return
+
         if self.static_content_store is not None and self.do_import_static:
             # first pass to find everything in /static/
             import_static_content(
                 data_path, self.static_content_store,
-                dest_id, subpath='static', verbose=self.verbose
+                dest_id, subpath='static', verbose=self.verbose,
+                workers=self.static_content_workers
             )
 
         elif self.verbose and not self.do_import_static:
@@ -250,7 +303,8 @@ class ImportManager(object):
         if os.path.exists(data_path / simport):
             import_static_content(
                 data_path, self.static_content_store,
-                dest_id, subpath=simport, verbose=self.verbose
+                dest_id, subpath=simport, verbose=self.verbose,
+                workers=self.static_content_workers
             )
 
     def import_asset_metadata(self, data_dir, course_id):
@@ -371,6 +425,13 @@ class ImportManager(object):
         """
         raise NotImplementedError
 
+    def report_status(self, phase):
+        """
+        Tell the status_callback, if any, that `phase` of the import has started.
+        """
+        if self.status_callback is not None:
+            self.status_callback(phase)
+
     def recursive_build(self, source_courselike, courselike, courselike_key, dest_id):
         """
         Recursively imports all child blocks from the temporary modulestore into the
@@ -439,9 +500,11 @@ class ImportManager(object):
                 source_courselike, courselike, data_path = self.get_courselike(courselike_key, runtime, dest_id)
 
                 # Import all static pieces.
+                self.report_status('static')
                 self.import_static(data_path, dest_id)
 
                 # Import asset metadata stored in XML.
+                self.report_status('modules')
                 self.import_asset_metadata(data_path, dest_id)
 
                 # Import all children
@@ -452,6 +515,7 @@ class ImportManager(object):
             # Drafts must be imported in a separate bulk operation from published items to import properly,
             # due to the recursive_build() above creating a draft item for each course block
             # and then publishing it.
+            self.report_status('drafts')
             with self.store.bulk_operations(dest_id):
                 # Import all draft items into the courselike.
                 courselike = self.import_drafts(courselike, courselike_key, data_path, dest_id)
@@ -2072,6 +2072,24 @@ class CapaDescriptorTest(unittest.TestCase):
             descriptor.display_name = name
         return descriptor
 
+    def test_settings_derived_from_content(self):
+        xml = "<problem><optionresponse></optionresponse><choiceresponse></choiceresponse></problem>"
+        self.assertEqual(
+            CapaDescriptor.settings_derived_from_content({'data': xml}),
+            {'indexed_problem_types': ['choiceresponse', 'optionresponse']}
+        )
+        self.assertEqual(CapaDescriptor.settings_derived_from_content({}), {})
+        self.assertEqual(
+            CapaDescriptor.settings_derived_from_content({'data': '<problem>'}),
+            {'indexed_problem_types': None}
+        )
+
+    def test_indexed_problem_types(self):
+        """ Tests that the problem types stored with the block are used instead of parsing the data """
+        descriptor = self._create_descriptor("<problem><optionresponse></optionresponse></problem>")
+        descriptor.indexed_problem_types = ['choiceresponse']
+        self.assertEquals(descriptor.problem_types, {'choiceresponse'})
+
     @ddt.data(*responsetypes.registry.registered_tags())
     def test_all_response_types(self, response_tag):
         """ Tests that every registered response tag is correctly returned """
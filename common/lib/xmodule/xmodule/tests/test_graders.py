@@ -1,8 +1,11 @@
 """Grading tests"""
+import random
 import unittest
 
+import numpy
+
 from xmodule import graders
-from xmodule.graders import Score, aggregate_scores
+from xmodule.graders import Score, ScoreMatrix, aggregate_scores
 
 
 class GradesheetTest(unittest.TestCase):
@@ -240,3 +243,104 @@ class GraderTest(unittest.TestCase):
 
         # TODO: How do we test failure cases? The parser only logs an error when
         # it can't parse something. Maybe it should throw exceptions?
+
+
+class GradeMatrixTest(unittest.TestCase):
+    '''Tests that grading a ScoreMatrix gives the same percentages as grading each grade sheet'''
+
+    grader = graders.grader_from_conf([
+        {'type': "Homework", 'min_count': 12, 'drop_count': 2, 'weight': 0.15},
+        {'type': "Lab", 'min_count': 3, 'drop_count': 5, 'weight': 0.15},
+        {'type': "Quiz", 'min_count': 0, 'drop_count': 1, 'weight': 0.1},
+        {'type': "Midterm", 'name': "Midterm Exam", 'weight': 0.3},
+        {'type': "Final", 'min_count': 1, 'drop_count': 0, 'weight': 0.3},
+    ])
+
+    sections = {
+        'Homework': ['hw{}'.format(index) for index in range(14)],
+        'Lab': ['lab1', 'lab1', 'lab2', 'lab3'],
+        'Quiz': ['quiz1', 'quiz2', 'quiz3'],
+        'Midterm': ['Review', 'Midterm Exam', 'Midterm Exam'],
+        'Final': ['Final Exam'],
+    }
+
+    def random_grade_sheets(self, count):
+        '''Returns count grade sheets, with random scores and missing sections'''
+        randomizer = random.Random(count)
+        grade_sheets = []
+        for __ in range(count):
+            grade_sheet = {}
+            for section_format, names in self.sections.iteritems():
+                if randomizer.random() < 0.1:
+                    continue
+                grade_sheet[section_format] = []
+                for name in names:
+                    if randomizer.random() < 0.3:
+                        continue
+                    possible = randomizer.choice([1, 3, 7, 0.1, 13.0])
+                    earned = randomizer.choice([0, 1, possible, randomizer.randint(0, 13) * possible / 13.0])
+                    grade_sheet[section_format].append(Score(earned, possible, True, name, None))
+            grade_sheets.append(grade_sheet)
+        return grade_sheets
+
+    def assert_same_grades(self, grader, grade_sheets, score_matrix=None):
+        '''Asserts that grader grades the matrix of grade_sheets exactly like each grade sheet'''
+        graded = grader.grade_matrix(score_matrix or ScoreMatrix.from_grade_sheets(grade_sheets))
+        self.assertEqual(len(graded['percent']), len(grade_sheets))
+        for index, grade_sheet in enumerate(grade_sheets):
+            self.assertEqual(graded['percent'][index], grader.grade(grade_sheet)['percent'])
+
+    def test_graders(self):
+        grade_sheets = [GraderTest.empty_gradesheet, GraderTest.incomplete_gradesheet, GraderTest.test_gradesheet]
+        for grader in [graders.SingleSectionGrader("Midterm", "Midterm Exam"),
+                       graders.SingleSectionGrader("Lab", "lab4"),
+                       graders.AssignmentFormatGrader("Homework", 12, 2),
+                       graders.AssignmentFormatGrader("Lab", 3, 2),
+                       graders.AssignmentFormatGrader("Lab", 7, 3),
+                       graders.AssignmentFormatGrader("Midterm", 1, 0),
+                       graders.AssignmentFormatGrader("Lab", 0, 10),
+                       graders.WeightedSubsectionsGrader([]),
+                       self.grader]:
+            self.assert_same_grades(grader, grade_sheets)
+
+    def test_random_grade_sheets(self):
+        grade_sheets = self.random_grade_sheets(500)
+        self.assert_same_grades(self.grader, grade_sheets)
+
+        graded = self.grader.grade_matrix(ScoreMatrix.from_grade_sheets(grade_sheets))
+        for index, grade_sheet in enumerate(grade_sheets):
+            expected = self.grader.grade(grade_sheet)['grade_breakdown']
+            self.assertEqual(
+                [breakdown['percent'][index] for breakdown in graded['grade_breakdown']],
+                [breakdown['percent'] for breakdown in expected]
+            )
+
+    def test_missing_sections_between(self):
+        # Sections missing from a grade sheet may be anywhere in the matrix.
+        grade_sheets = self.random_grade_sheets(100)
+        score_matrix = ScoreMatrix.from_grade_sheets(grade_sheets)
+        randomizer = random.Random(0)
+        for section_format, earned in score_matrix.earned.items():
+            num_students, num_sections = earned.shape
+            shape = (num_students, 2 * num_sections)
+            sections = numpy.empty(shape, dtype=object)
+            spread_earned, spread_possible = numpy.zeros(shape), numpy.zeros(shape)
+            for index in range(num_students):
+                columns = sorted(randomizer.sample(range(shape[1]), num_sections))
+                sections[index, columns] = score_matrix.sections[section_format][index]
+                spread_earned[index, columns] = earned[index]
+                spread_possible[index, columns] = score_matrix.possible[section_format][index]
+            score_matrix.sections[section_format] = sections
+            score_matrix.earned[section_format] = spread_earned
+            score_matrix.possible[section_format] = spread_possible
+
+        self.assert_same_grades(self.grader, grade_sheets, score_matrix)
+
+    def test_no_students(self):
+        graded = self.grader.grade_matrix(ScoreMatrix.from_grade_sheets([]))
+        self.assertEqual(len(graded['percent']), 0)
+
+    def test_no_possible_score(self):
+        grade_sheet = {'Homework': [Score(earned=0, possible=0, graded=True, section='hw1', module_id=None)]}
+        with self.assertRaises(ValueError):
+            ScoreMatrix.from_grade_sheets([grade_sheet])
@@ -10,6 +10,7 @@ from mock import Mock, patch
 from xblock.fragment import Fragment
 from xblock.runtime import Runtime as VanillaRuntime
 
+from xmodule.capa_module import CapaDescriptor
 from xmodule.library_content_module import ANY_CAPA_TYPE_VALUE, LibraryContentDescriptor
 from xmodule.library_tools import LibraryToolsService
 from xmodule.modulestore import ModuleStoreEnum
@@ -248,7 +249,17 @@ class TestLibraryContentModuleNoSearchIndex(LibraryContentModuleTestMixin, Libra
     Tests for library container when no search index is available.
     Tests fallback low-level CAPA problem introspection
     """
-    pass
+    def test_capa_type_filtering_reads_indexed_problem_types(self):
+        """
+        Test that filtering by capa type reads the problem types stored with
+        the library blocks, rather than parsing the problems' XML.
+        """
+        self._create_capa_problems()
+        self.lc_block.capa_type = "optionresponse"
+        with patch.object(CapaDescriptor, '_problem_types_in') as mock_problem_types_in:
+            self.lc_block.refresh_children()
+        self.assertEqual(len(self.lc_block.children), 3)
+        self.assertFalse(mock_problem_types_in.called)
 
 
 search_index_mock = Mock(spec=SearchEngine)  # pylint: disable=invalid-name
@@ -10,6 +10,7 @@ from django.db import transaction, IntegrityError
 import request_cache
 
 from courseware.field_overrides import FieldOverrideProvider  # pylint: disable=import-error
+from courseware.models import chunks  # pylint: disable=import-error
 from opaque_keys.edx.keys import CourseKey, UsageKey
 from ccx_keys.locator import CCXLocator, CCXBlockUsageLocator
 
@@ -18,6 +19,10 @@ from .models import CcxFieldOverride, CustomCourseForEdX
 
 log = logging.getLogger(__name__)
 
+# How many overrides are written or deleted by a single query of a bulk
+# update. Keeps the number of query parameters below what SQLite allows.
+BULK_WRITE_BATCH_SIZE = 100
+
 
 class CustomCoursesForEdxOverrideProvider(FieldOverrideProvider):
     """
@@ -166,3 +171,65 @@ def clear_override_for_ccx(ccx, block, name):
 
     except CcxFieldOverride.DoesNotExist:
         pass
+
+
+@transaction.commit_on_success
+def bulk_override_fields_for_ccx(ccx, overrides, clears=()):
+    """
+    Sets many field overrides for the `ccx` at once. `overrides` is an
+    iterable of `(block, name, value)` tuples to override and `clears` an
+    iterable of `(block, name)` tuples to clear.
+
+    The requested overrides are compared with the existing ones, and only
+    those that change are written: new ones are inserted, and changed or
+    cleared ones deleted, in batches rather than one query each. Changed
+    overrides are deleted and inserted again with their new value. If some
+    of the overrides were written concurrently in the meantime, the batch is
+    retried one field at a time, through `override_field_for_ccx` and
+    `clear_override_for_ccx`. The cached overrides of the `ccx` are reloaded
+    once everything is written.
+    """
+    overrides = list(overrides)
+    clears = list(clears)
+    requested = {}
+    for block, name, value in overrides:
+        value_json = block.fields[name].to_json(value)
+        requested[(block.location, name)] = json.dumps(value_json)
+    for block, name in clears:
+        requested[(block.location, name)] = None
+
+    existing = {
+        (override.location, override.field): override
+        for override in CcxFieldOverride.objects.filter(ccx=ccx)
+    }
+    to_delete = []
+    to_create = []
+    for (location, name), serialized_value in requested.iteritems():
+        override = existing.get((location, name))
+        if override is not None:
+            if override.value == serialized_value:
+                continue
+            to_delete.append(override.id)
+        if serialized_value is not None:
+            to_create.append(CcxFieldOverride(
+                ccx=ccx,
+                location=location,
+                field=name,
+                value=serialized_value
+            ))
+
+    try:
+        for ids in chunks(to_delete, BULK_WRITE_BATCH_SIZE):
+            CcxFieldOverride.objects.filter(id__in=ids).delete()
+        for batch in chunks(to_create, BULK_WRITE_BATCH_SIZE):
+            CcxFieldOverride.objects.bulk_create(batch)
+    except IntegrityError:
+        transaction.rollback()
+        request_cache.get_cache('ccx-overrides').pop(ccx, None)
+        for block, name, value in overrides:
+            override_field_for_ccx(ccx, block, name, value)
+        for block, name in clears:
+            clear_override_for_ccx(ccx, block, name)
+
+    request_cache.get_cache('ccx-overrides').pop(ccx, None)
+    _get_overrides_for_ccx(ccx)
@@ -2,19 +2,43 @@
 Asynchronous tasks for the CCX app.
 """
 
+from datetime import datetime
+from functools import partial
+from time import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
 from django.dispatch import receiver
+from django.utils.translation import ugettext_noop
 import logging
+from pytz import UTC
 
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import CourseLocator
 from ccx_keys.locator import CCXLocator
+from courseware.courses import get_course_by_id
+from courseware.grades import iterate_grades_for
+from courseware.models import OfflineComputedGradeLog, chunks
+from instructor.offline_gradecalc import save_offline_grade  # pylint: disable=import-error
+from instructor_task.api_helper import submit_task  # pylint: disable=import-error
+from instructor_task.tasks_helper import (  # pylint: disable=import-error
+    BaseInstructorTask,
+    TaskProgress,
+    run_main_task,
+    upload_csv_to_report_store,
+)
+from student.models import CourseEnrollment
 from xmodule.modulestore.django import SignalHandler
 from lms import CELERY_APP
 
 from .models import CustomCourseForEdX
+from .overrides import get_override_for_ccx
 
 log = logging.getLogger("edx.ccx")
 
+# How many CCX members are graded between two updates of the task progress.
+GRADES_CHUNK_SIZE = 100
+
 
 @receiver(SignalHandler.course_published)
 def course_published_handler(sender, course_key, **kwargs):  # pylint: disable=unused-argument
@@ -43,3 +67,88 @@ def send_ccx_course_published(course_key):
         )
         for rec, response in responses:
             log.info('Signal fired when course is published. Receiver: %s. Response: %s', rec, response)
+
+
+def submit_calculate_ccx_grades(request, ccx_key):
+    """
+    Submit a task to grade the members of the CCX `ccx_key`, for the gradebook
+    and the grade report.
+
+    AlreadyRunningError is raised if the CCX's grades are already being
+    calculated.
+    """
+    return submit_task(request, 'ccx_grades', calculate_ccx_grades, ccx_key, {}, "")
+
+
+@CELERY_APP.task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_ccx_grades(entry_id, xmodule_instance_args):
+    """
+    Grade the members of a CCX, and push the grade report to an S3 bucket for
+    download.
+    """
+    # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
+    action_name = ugettext_noop('graded')
+    task_fn = partial(compute_ccx_grades, xmodule_instance_args)
+    return run_main_task(entry_id, task_fn, action_name)
+
+
+def compute_ccx_grades(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+    """
+    Grade the members of the CCX `course_id`, GRADES_CHUNK_SIZE at a time.
+
+    Each member's gradeset is saved as their offline computed grade, which the
+    CCX gradebook pages through, and their row of the grade report is written
+    to the `ReportStore` buffer as soon as they are graded rather than once
+    everybody is.
+    """
+    start_time = time()
+    start_date = datetime.now(UTC)
+    ccx = CustomCourseForEdX.objects.get(pk=course_id.ccx)
+    course = get_course_by_id(course_id)
+    course.set_grading_policy(get_override_for_ccx(ccx, course, 'grading_policy', course.grading_policy))
+
+    student_ids = list(
+        CourseEnrollment.objects.users_enrolled_in(course_id).order_by('username').values_list('id', flat=True)
+    )
+    task_progress = TaskProgress(action_name, len(student_ids), start_time)
+    current_step = {'step': 'Calculating Grades'}
+    err_rows = [["id", "username", "error_msg"]]
+
+    def grade_rows():
+        """
+        Grade the members and yield the rows of the grade report.
+        """
+        header = None
+        for chunk in chunks(student_ids, GRADES_CHUNK_SIZE):
+            task_progress.update_task_state(extra_meta=current_step)
+            students = User.objects.filter(id__in=chunk).order_by('username')
+            for student, gradeset, err_msg in iterate_grades_for(course, students, keep_raw_scores=True):
+                task_progress.attempted += 1
+                if not gradeset:
+                    # An empty gradeset means we failed to grade a student.
+                    task_progress.failed += 1
+                    err_rows.append([student.id, student.username, err_msg])
+                    continue
+
+                task_progress.succeeded += 1
+                save_offline_grade(student, course_id, gradeset)
+                if header is None:
+                    header = [section['label'] for section in gradeset[u'section_breakdown']]
+                    yield ["id", "email", "username", "grade"] + header
+
+                percents = {
+                    section['label']: section.get('percent', 0.0)
+                    for section in gradeset[u'section_breakdown']
+                    if 'label' in section
+                }
+                row_percents = [percents.get(label, 0.0) for label in header]
+                yield [student.id, student.email, student.username, gradeset['percent']] + row_percents
+
+    upload_csv_to_report_store(grade_rows(), 'grade_report', course_id, start_date)
+    if len(err_rows) > 1:
+        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+
+    OfflineComputedGradeLog.objects.create(
+        course_id=course_id, seconds=int(time() - start_time), nstudents=len(student_ids)
+    )
+    return task_progress.update_task_state(extra_meta=current_step)
@@ -16,8 +16,8 @@ from xmodule.modulestore.tests.django_utils import (
     TEST_DATA_SPLIT_MODULESTORE)
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
-from ..models import CustomCourseForEdX
-from ..overrides import override_field_for_ccx
+from ..models import CcxFieldOverride, CustomCourseForEdX
+from ..overrides import bulk_override_fields_for_ccx, override_field_for_ccx
 
 from .test_views import flatten, iter_blocks
 
@@ -138,3 +138,67 @@ class TestFieldOverrides(ModuleStoreTestCase):
         override_field_for_ccx(self.ccx, chapter, 'due', ccx_due)
         vertical = chapter.get_children()[0].get_children()[0]
         self.assertEqual(vertical.due, ccx_due)
+
+    def test_bulk_override(self):
+        """
+        Test that bulk overrides are set, cleared and visible right away.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapters = self.ccx.course.get_children()
+        override_field_for_ccx(self.ccx, chapters[1], 'due', self.mooc_due)
+        bulk_override_fields_for_ccx(
+            self.ccx,
+            [(chapter, 'start', ccx_start) for chapter in chapters],
+            [(chapters[1], 'due')]
+        )
+        self.assertEqual([chapter.start for chapter in chapters], [ccx_start, ccx_start])
+        self.assertEqual(chapters[1].due, self.mooc_due)
+        self.assertFalse(CcxFieldOverride.objects.filter(ccx=self.ccx, field='due').exists())
+
+    def test_bulk_override_writes_only_changes(self):
+        """
+        Test that a bulk override only writes the overrides that changed, and
+        in a fixed number of queries.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        ccx_due = datetime.datetime(2015, 1, 1, 00, 00, tzinfo=pytz.UTC)
+        chapters = self.ccx.course.get_children()
+        bulk_override_fields_for_ccx(self.ccx, [(chapter, 'start', ccx_start) for chapter in chapters])
+        unchanged = CcxFieldOverride.objects.get(ccx=self.ccx, location=chapters[0].location, field='start')
+
+        # Read the overrides, delete the changed one (select and delete),
+        # insert the changed and new ones, and reload the cache.
+        with self.assertNumQueries(5):
+            bulk_override_fields_for_ccx(self.ccx, [
+                (chapters[0], 'start', ccx_start),
+                (chapters[1], 'start', ccx_due),
+                (chapters[1], 'due', ccx_due),
+            ])
+        self.assertEqual(
+            CcxFieldOverride.objects.get(ccx=self.ccx, location=chapters[0].location, field='start').id,
+            unchanged.id
+        )
+        self.assertEqual(chapters[1].start, ccx_due)
+        self.assertEqual(chapters[1].due, ccx_due)
+
+        with self.assertNumQueries(2):
+            bulk_override_fields_for_ccx(self.ccx, [(chapters[1], 'due', ccx_due)])
+
+    def test_bulk_override_written_concurrently(self):
+        """
+        Test that a bulk override falls back to writing one field at a time
+        when some of its overrides were created in the meantime.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapters = self.ccx.course.get_children()
+        bulk_create = CcxFieldOverride.objects.bulk_create
+
+        def create_concurrently(batch):
+            """ Another process overrides the first chapter's start just before the batch is written """
+            override_field_for_ccx(self.ccx, chapters[0], 'start', self.mooc_start)
+            return bulk_create(batch)
+
+        with mock.patch.object(CcxFieldOverride.objects, 'bulk_create', side_effect=create_concurrently):
+            bulk_override_fields_for_ccx(self.ccx, [(chapter, 'start', ccx_start) for chapter in chapters])
+        self.assertEqual([chapter.start for chapter in chapters], [ccx_start, ccx_start])
+        self.assertEqual(CcxFieldOverride.objects.filter(ccx=self.ccx, field='start').count(), 2)
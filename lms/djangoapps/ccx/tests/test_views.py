@@ -20,6 +20,8 @@ from django.utils.timezone import UTC
 from django.test.utils import override_settings
 from django.test import RequestFactory
 from edxmako.shortcuts import render_to_response  # pylint: disable=import-error
+from instructor_task.models import ReportStore  # pylint: disable=import-error
+from instructor_task.tests.test_base import TestReportMixin  # pylint: disable=import-error
 from request_cache.middleware import RequestCache
 from student.roles import CourseCcxCoachRole  # pylint: disable=import-error
 from student.models import (
@@ -464,7 +466,7 @@ def patched_get_children(self, usage_key_filter=None):
 @override_settings(FIELD_OVERRIDE_PROVIDERS=(
     'ccx.overrides.CustomCoursesForEdxOverrideProvider',))
 @patch('xmodule.x_module.XModuleMixin.get_children', patched_get_children, spec=True)
-class TestCCXGrades(SharedModuleStoreTestCase, LoginEnrollmentTestCase):
+class TestCCXGrades(TestReportMixin, SharedModuleStoreTestCase, LoginEnrollmentTestCase):
     """
     Tests for Custom Courses views.
     """
@@ -555,10 +557,22 @@ class TestCCXGrades(SharedModuleStoreTestCase, LoginEnrollmentTestCase):
 
         self.addCleanup(RequestCache.clear_request_cache)
 
+    def calculate_grades(self):
+        """
+        Run the grades task of the CCX.
+        """
+        url = reverse(
+            'ccx_grades_csv',
+            kwargs={'course_id': self.ccx_key}
+        )
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 302)
+
     @patch('ccx.views.render_to_response', intercept_renderer)
     def test_gradebook(self):
         self.course.enable_ccx = True
         RequestCache.clear_request_cache()
+        self.calculate_grades()
 
         url = reverse(
             'ccx_gradebook',
@@ -566,6 +580,7 @@ class TestCCXGrades(SharedModuleStoreTestCase, LoginEnrollmentTestCase):
         )
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.mako_context['grades_computed'])  # pylint: disable=no-member
         student_info = response.mako_context['students'][0]  # pylint: disable=no-member
         self.assertEqual(student_info['grade_summary']['percent'], 0.5)
         self.assertEqual(
@@ -574,20 +589,39 @@ class TestCCXGrades(SharedModuleStoreTestCase, LoginEnrollmentTestCase):
         self.assertEqual(
             len(student_info['grade_summary']['section_breakdown']), 4)
 
-    def test_grades_csv(self):
-        self.course.enable_ccx = True
-        RequestCache.clear_request_cache()
-
+    @patch('ccx.views.render_to_response', intercept_renderer)
+    def test_gradebook_not_calculated(self):
         url = reverse(
-            'ccx_grades_csv',
+            'ccx_gradebook',
             kwargs={'course_id': self.ccx_key}
         )
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
-        headers, row = (
-            row.strip().split(',') for row in
-            response.content.strip().split('\n')
+        self.assertFalse(response.mako_context['grades_computed'])  # pylint: disable=no-member
+        self.assertEqual(response.mako_context['students'], [])  # pylint: disable=no-member
+
+    @patch('ccx.views.GRADEBOOK_PAGE_SIZE', 1)
+    def test_gradebook_pages(self):
+        self.calculate_grades()
+        url = reverse(
+            'ccx_gradebook',
+            kwargs={'course_id': self.ccx_key}
         )
+        self.assertEqual(self.client.get(url, {'page': 1}).status_code, 200)
+        self.assertEqual(self.client.get(url, {'page': 2}).status_code, 404)
+
+    def test_grades_csv(self):
+        self.course.enable_ccx = True
+        RequestCache.clear_request_cache()
+        self.calculate_grades()
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        filename = report_store.links_for(self.ccx_key)[0][0]
+        with open(report_store.path_to(self.ccx_key, filename)) as csv_file:
+            headers, row = (
+                row.strip().split(',') for row in
+                csv_file.read().strip().split('\n')
+            )
         data = dict(zip(headers, row))
         self.assertTrue('HW 04' not in data)
         self.assertEqual(data['HW 01'], '0.75')
@@ -595,6 +629,13 @@ class TestCCXGrades(SharedModuleStoreTestCase, LoginEnrollmentTestCase):
         self.assertEqual(data['HW 03'], '0.25')
         self.assertEqual(data['HW Avg'], '0.5')
 
+    def test_grades_csv_get_not_allowed(self):
+        url = reverse(
+            'ccx_grades_csv',
+            kwargs={'course_id': self.ccx_key}
+        )
+        self.assertEqual(self.client.get(url).status_code, 405)
+
     @patch('courseware.views.render_to_response', intercept_renderer)
     def test_student_progress(self):
         self.course.enable_ccx = True
@@ -1,7 +1,6 @@
 """
 Views related to the Custom Courses feature.
 """
-import csv
 import datetime
 import functools
 import json
@@ -10,8 +9,8 @@ import pytz
 
 from contextlib import contextmanager
 from copy import deepcopy
-from cStringIO import StringIO
 
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.core.urlresolvers import reverse
 from django.http import (
     HttpResponse,
@@ -25,23 +24,27 @@ from django.shortcuts import redirect
 from django.utils.translation import ugettext as _
 from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import require_POST
 from django.contrib.auth.models import User
 
 from courseware.courses import get_course_by_id
 
 from courseware.field_overrides import disable_overrides
-from courseware.grades import iterate_grades_for
-from courseware.model_data import FieldDataCache
-from courseware.module_render import get_module_for_descriptor
 from edxmako.shortcuts import render_to_response
 from opaque_keys.edx.keys import CourseKey
 from ccx_keys.locator import CCXLocator
 from student.roles import CourseCcxCoachRole  # pylint: disable=import-error
 from student.models import CourseEnrollment
 
-from instructor.offline_gradecalc import student_grades  # pylint: disable=import-error
+from instructor.offline_gradecalc import (  # pylint: disable=import-error
+    offline_grades_available,
+    offline_student_grades,
+)
 from instructor.views.api import _split_input_list  # pylint: disable=import-error
 from instructor.views.tools import get_student_from_identifier  # pylint: disable=import-error
+from instructor_task.api import get_running_instructor_tasks  # pylint: disable=import-error
+from instructor_task.api_helper import AlreadyRunningError  # pylint: disable=import-error
+from instructor_task.models import ReportStore  # pylint: disable=import-error
 from instructor.enrollment import (
     enroll_email,
     unenroll_email,
@@ -50,15 +53,21 @@ from instructor.enrollment import (
 
 from .models import CustomCourseForEdX
 from .overrides import (
-    clear_override_for_ccx,
+    bulk_override_fields_for_ccx,
     get_override_for_ccx,
     override_field_for_ccx,
 )
+from .tasks import submit_calculate_ccx_grades
 
 
 log = logging.getLogger(__name__)
 TODAY = datetime.datetime.today  # for patching in tests
 
+# How many students are shown on a page of the CCX gradebook.
+GRADEBOOK_PAGE_SIZE = 50
+# How many of the latest grade reports are listed on the coach dashboard.
+GRADE_REPORT_LINKS = 5
+
 
 def coach_dashboard(view):
     """
@@ -134,6 +143,8 @@ def dashboard(request, course, ccx=None):
             'ccx_gradebook', kwargs={'course_id': ccx_locator})
         context['grades_csv_url'] = reverse(
             'ccx_grades_csv', kwargs={'course_id': ccx_locator})
+        context['grade_report_links'] = ReportStore.from_config('GRADES_DOWNLOAD').links_for(
+            ccx_locator, limit=GRADE_REPORT_LINKS)
         context['grading_policy'] = json.dumps(grading_policy, indent=4)
         context['grading_policy_url'] = reverse(
             'ccx_set_grading_policy', kwargs={'course_id': ccx_locator})
@@ -169,17 +180,17 @@ def create_ccx(request, course, ccx=None):
 
     # Make sure start/due are overridden for entire course
     start = TODAY().replace(tzinfo=pytz.UTC)
-    override_field_for_ccx(ccx, course, 'start', start)
-    override_field_for_ccx(ccx, course, 'due', None)
+    overrides = [(course, 'start', start), (course, 'due', None)]
 
     # Hide anything that can show up in the schedule
     hidden = 'visible_to_staff_only'
     for chapter in course.get_children():
-        override_field_for_ccx(ccx, chapter, hidden, True)
+        overrides.append((chapter, hidden, True))
         for sequential in chapter.get_children():
-            override_field_for_ccx(ccx, sequential, hidden, True)
+            overrides.append((sequential, hidden, True))
             for vertical in sequential.get_children():
-                override_field_for_ccx(ccx, vertical, hidden, True)
+                overrides.append((vertical, hidden, True))
+    bulk_override_fields_for_ccx(ccx, overrides)
 
     ccx_id = CCXLocator.from_course_locator(course.id, ccx.id)  # pylint: disable=no-member
     url = reverse('ccx_coach_dashboard', kwargs={'course_id': ccx_id})
@@ -196,31 +207,33 @@ def save_ccx(request, course, ccx=None):
     if not ccx:
         raise Http404
 
+    overrides = []
+    clears = []
+
     def override_fields(parent, data, graded, earliest=None):
         """
-        Recursively apply CCX schedule data to CCX by overriding the
-        `visible_to_staff_only`, `start` and `due` fields for units in the
-        course.
+        Recursively collect the overrides of the `visible_to_staff_only`,
+        `start` and `due` fields for units in the course that apply the CCX
+        schedule data.
         """
         blocks = {
             str(child.location): child
             for child in parent.get_children()}
         for unit in data:
             block = blocks[unit['location']]
-            override_field_for_ccx(
-                ccx, block, 'visible_to_staff_only', unit['hidden'])
+            overrides.append((block, 'visible_to_staff_only', unit['hidden']))
             start = parse_date(unit['start'])
             if start:
                 if not earliest or start < earliest:
                     earliest = start
-                override_field_for_ccx(ccx, block, 'start', start)
+                overrides.append((block, 'start', start))
             else:
-                clear_override_for_ccx(ccx, block, 'start')
+                clears.append((block, 'start'))
             due = parse_date(unit['due'])
             if due:
-                override_field_for_ccx(ccx, block, 'due', due)
+                overrides.append((block, 'due', due))
             else:
-                clear_override_for_ccx(ccx, block, 'due')
+                clears.append((block, 'due'))
 
             if not unit['hidden'] and block.graded:
                 graded[block.format] = graded.get(block.format, 0) + 1
@@ -233,7 +246,7 @@ def save_ccx(request, course, ccx=None):
     graded = {}
     earliest = override_fields(course, json.loads(request.body), graded)
     if earliest:
-        override_field_for_ccx(ccx, course, 'start', earliest)
+        overrides.append((course, 'start', earliest))
 
     # Attempt to automatically adjust grading policy
     changed = False
@@ -248,7 +261,10 @@ def save_ccx(request, course, ccx=None):
             changed = True
             section['min_count'] = count
     if changed:
-        override_field_for_ccx(ccx, course, 'grading_policy', policy)
+        overrides.append((course, 'grading_policy', policy))
+
+    # Only the overrides that differ from the saved ones are written.
+    bulk_override_fields_for_ccx(ccx, overrides, clears)
 
     return HttpResponse(
         json.dumps({
@@ -476,45 +492,42 @@ def ccx_course(ccx_locator):
     yield course
 
 
-def prep_course_for_grading(course, request):
-    """Set up course module for overrides to function properly"""
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
-        course.id, request.user, course, depth=2)
-    course = get_module_for_descriptor(
-        request.user, request, course, field_data_cache, course.id, course=course
-    )
-
-    course._field_data_cache = {}  # pylint: disable=protected-access
-    course.set_grading_policy(course.grading_policy)
-
-
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
 @coach_dashboard
 def ccx_gradebook(request, course, ccx=None):
     """
-    Show the gradebook for this CCX.
+    Show a page of the gradebook for this CCX, from the grades last computed
+    by the grades task.
     """
     if not ccx:
         raise Http404
 
     ccx_key = CCXLocator.from_course_locator(course.id, ccx.id)
     with ccx_course(ccx_key) as course:
-        prep_course_for_grading(course, request)
+        course.set_grading_policy(get_override_for_ccx(ccx, course, 'grading_policy', course.grading_policy))
 
-        enrolled_students = User.objects.filter(
+        graded_students = User.objects.filter(
             courseenrollment__course_id=ccx_key,
-            courseenrollment__is_active=1
+            courseenrollment__is_active=1,
+            offlinecomputedgrade__course_id=ccx_key,
         ).order_by('username').select_related("profile")
+        paginator = Paginator(graded_students, GRADEBOOK_PAGE_SIZE)
+        try:
+            page = paginator.page(request.GET.get('page', 1))
+        except (EmptyPage, PageNotAnInteger):
+            raise Http404
 
+        students = list(page.object_list)
+        grades = offline_student_grades(students, ccx_key)
         student_info = [
             {
                 'username': student.username,
                 'id': student.id,
                 'email': student.email,
-                'grade_summary': student_grades(student, request, course),
+                'grade_summary': grades[student.id],
                 'realname': student.profile.name,
             }
-            for student in enrolled_students
+            for student in students
         ]
 
         return render_to_response('courseware/gradebook.html', {
@@ -524,54 +537,44 @@ def ccx_gradebook(request, course, ccx=None):
             'staff_access': request.user.is_staff,
             'ordered_grades': sorted(
                 course.grade_cutoffs.items(), key=lambda i: i[1], reverse=True),
+            'page': page,
+            'grades_computed': offline_grades_available(ccx_key),
+            'grades_task_running': _grades_task_running(ccx_key),
+            'calculate_grades_url': reverse('ccx_grades_csv', kwargs={'course_id': ccx_key}),
         })
 
 
+def _grades_task_running(ccx_key):
+    """
+    Return whether the grades of the CCX are being calculated.
+    """
+    return any(
+        task.task_type == 'ccx_grades'
+        for task in get_running_instructor_tasks(ccx_key)
+    )
+
+
+@ensure_csrf_cookie
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
+@require_POST
 @coach_dashboard
 def ccx_grades_csv(request, course, ccx=None):
     """
-    Download grades as CSV.
+    Start grading the CCX members in the background, for the gradebook and
+    the grade report, which is listed on the dashboard once it is done.
     """
     if not ccx:
         raise Http404
 
     ccx_key = CCXLocator.from_course_locator(course.id, ccx.id)
-    with ccx_course(ccx_key) as course:
-        prep_course_for_grading(course, request)
+    try:
+        submit_calculate_ccx_grades(request, ccx_key)
+        messages.success(request, _(
+            "The grades are being calculated. The grade report will be "
+            "listed below, and the gradebook updated, once they are done."))
+    except AlreadyRunningError:
+        messages.error(request, _(
+            "The grades are already being calculated. Check back later."))
 
-        enrolled_students = User.objects.filter(
-            courseenrollment__course_id=ccx_key,
-            courseenrollment__is_active=1
-        ).order_by('username').select_related("profile")
-        grades = iterate_grades_for(course, enrolled_students)
-
-        header = None
-        rows = []
-        for student, gradeset, __ in grades:
-            if gradeset:
-                # We were able to successfully grade this student for this
-                # course.
-                if not header:
-                    # Encode the header row in utf-8 encoding in case there are
-                    # unicode characters
-                    header = [section['label'].encode('utf-8')
-                              for section in gradeset[u'section_breakdown']]
-                    rows.append(["id", "email", "username", "grade"] + header)
-
-                percents = {
-                    section['label']: section.get('percent', 0.0)
-                    for section in gradeset[u'section_breakdown']
-                    if 'label' in section
-                }
-
-                row_percents = [percents.get(label, 0.0) for label in header]
-                rows.append([student.id, student.email, student.username,
-                             gradeset['percent']] + row_percents)
-
-        buf = StringIO()
-        writer = csv.writer(buf)
-        for row in rows:
-            writer.writerow(row)
-
-        return HttpResponse(buf.getvalue(), content_type='text/plain')
+    url = reverse('ccx_coach_dashboard', kwargs={'course_id': ccx_key})
+    return redirect(url)
@@ -121,6 +121,50 @@ def generate_user_certificates(student, course_key, course=None, insecure=False,
     return status
 
 
+def generate_certificates_for_students(students, course_key, course=None, xqueue=None, generation_mode='batch'):
+    """
+    Add add-cert requests for a batch of students into the xqueue.
+
+    This is the bulk counterpart of `generate_user_certificates`, used when
+    generating certificates for a whole course: the students are graded and
+    their certificate records written together, and the `edx.certificate.created`
+    event is emitted for every certificate that was created.
+
+    Args:
+        students (list of User)
+        course_key (CourseKey)
+
+    Keyword Arguments:
+        course (Course): Optionally provide the course object; if not provided
+            it will be loaded.
+        xqueue (XQueueCertInterface): Optionally provide the interface to use, so
+            that its connection to the queue can be shared across batches.
+        generation_mode - who has requested certificate generation.
+
+    Returns:
+        dict mapping each student's id to their new certificate status.
+    """
+    if xqueue is None:
+        xqueue = XQueueCertInterface()
+    if course is None:
+        course = modulestore().get_course(course_key, depth=0)
+    generate_pdf = not has_html_certificates_enabled(course_key, course)
+
+    statuses = {}
+    for student, status, cert in xqueue.add_certs_in_bulk(students, course_key, course=course,
+                                                          generate_pdf=generate_pdf):
+        statuses[student.id] = status
+        if status in [CertificateStatuses.generating, CertificateStatuses.downloadable]:
+            emit_certificate_event('created', student, course_key, course, {
+                'user_id': student.id,
+                'course_id': unicode(course_key),
+                'certificate_id': cert.verify_uuid,
+                'enrollment_mode': cert.mode,
+                'generation_mode': generation_mode
+            })
+    return statuses
+
+
 def regenerate_user_certificates(student, course_key, course=None,
                                  forced_grade=None, template_file=None, insecure=False):
     """
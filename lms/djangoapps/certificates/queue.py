@@ -2,6 +2,7 @@
 import json
 import random
 import logging
+from collections import defaultdict
 import lxml.html
 from lxml.etree import XMLSyntaxError, ParserError  # pylint:disable=no-name-in-module
 from uuid import uuid4
@@ -9,6 +10,8 @@ from uuid import uuid4
 from django.test.client import RequestFactory
 from django.conf import settings
 from django.core.urlresolvers import reverse
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_save
 from requests.auth import HTTPBasicAuth
 
 from courseware import grades
@@ -48,6 +51,52 @@ class XQueueAddToQueueError(Exception):
         )
 
 
+def _cert_mode_and_template(course_id, enrollment_mode, user_is_verified):
+    """
+    Return the (certificate mode, PDF template name) to use for a student
+    with the given enrollment mode and identity verification state.
+    """
+    mode_is_verified = (enrollment_mode == GeneratedCertificate.MODES.verified)
+    cert_mode = enrollment_mode
+    if mode_is_verified and user_is_verified:
+        template_pdf = "certificate-template-{id.org}-{id.course}-verified.pdf".format(id=course_id)
+    elif mode_is_verified and not user_is_verified:
+        template_pdf = "certificate-template-{id.org}-{id.course}.pdf".format(id=course_id)
+        cert_mode = GeneratedCertificate.MODES.honor
+    else:
+        # honor code and audit students
+        template_pdf = "certificate-template-{id.org}-{id.course}.pdf".format(id=course_id)
+    return cert_mode, template_pdf
+
+
+def _grade_contents(student, course_id, grade):
+    """
+    Return the grade range label from `grade` with any HTML stripped,
+    or None if the student has no grade label.
+    """
+    grade_contents = grade.get('grade', None)
+    try:
+        grade_contents = lxml.html.fromstring(grade_contents).text_content()
+    except (TypeError, XMLSyntaxError, ParserError) as exc:
+        LOGGER.info(
+            (
+                u"Could not retrieve grade for student %s "
+                u"in the course '%s' "
+                u"because an exception occurred while parsing the "
+                u"grade contents '%s' as HTML. "
+                u"The exception was: '%s'"
+            ),
+            student.id,
+            unicode(course_id),
+            grade_contents,
+            unicode(exc)
+        )
+
+        #   Despite blowing up the xml parser, bad values here are fine
+        grade_contents = None
+    return grade_contents
+
+
 class XQueueCertInterface(object):
     """
     XQueueCertificateInterface provides an
@@ -256,17 +305,8 @@ class XQueueCertInterface(object):
             is_whitelisted = self.whitelist.filter(user=student, course_id=course_id, whitelist=True).exists()
             grade = grades.grade(student, self.request, course)
             enrollment_mode, __ = CourseEnrollment.enrollment_mode_for_user(student, course_id)
-            mode_is_verified = (enrollment_mode == GeneratedCertificate.MODES.verified)
             user_is_verified = SoftwareSecurePhotoVerification.user_is_verified(student)
-            cert_mode = enrollment_mode
-            if mode_is_verified and user_is_verified:
-                template_pdf = "certificate-template-{id.org}-{id.course}-verified.pdf".format(id=course_id)
-            elif mode_is_verified and not user_is_verified:
-                template_pdf = "certificate-template-{id.org}-{id.course}.pdf".format(id=course_id)
-                cert_mode = GeneratedCertificate.MODES.honor
-            else:
-                # honor code and audit students
-                template_pdf = "certificate-template-{id.org}-{id.course}.pdf".format(id=course_id)
+            cert_mode, template_pdf = _cert_mode_and_template(course_id, enrollment_mode, user_is_verified)
             if forced_grade:
                 grade['grade'] = forced_grade
 
@@ -279,26 +319,7 @@ class XQueueCertInterface(object):
             cert.name = profile_name
             cert.download_url = ''
             # Strip HTML from grade range label
-            grade_contents = grade.get('grade', None)
-            try:
-                grade_contents = lxml.html.fromstring(grade_contents).text_content()
-            except (TypeError, XMLSyntaxError, ParserError) as exc:
-                LOGGER.info(
-                    (
-                        u"Could not retrieve grade for student %s "
-                        u"in the course '%s' "
-                        u"because an exception occurred while parsing the "
-                        u"grade contents '%s' as HTML. "
-                        u"The exception was: '%s'"
-                    ),
-                    student.id,
-                    unicode(course_id),
-                    grade_contents,
-                    unicode(exc)
-                )
-
-                #   Despite blowing up the xml parser, bad values here are fine
-                grade_contents = None
+            grade_contents = _grade_contents(student, course_id, grade)
 
             if is_whitelisted or grade_contents is not None:
 
@@ -397,6 +418,192 @@ class XQueueCertInterface(object):
 
         return new_status, cert
 
+    def add_certs_in_bulk(self, students, course_id, course=None, forced_grade=None, generate_pdf=True):
+        """
+        Request new certificates for a batch of students in a course.
+
+        This is the batch counterpart of `add_cert`.  The lookups that
+        `add_cert` makes for every student (existing certificate, whitelist,
+        restricted profile, profile name, enrollment mode and identity
+        verification) are made once for the whole batch, the students are
+        graded through `iterate_grades_for` against a single course object,
+        new `GeneratedCertificate` rows are written with one bulk insert, and
+        the XQueue requests are sent once the rows exist, reusing the HTTP
+        session of this interface.
+
+        Arguments:
+          students  - iterable of User objects
+          course_id - courseenrollment.course_id (CourseKey)
+          forced_grade - as for `add_cert`
+          generate_pdf - as for `add_cert`
+
+        Returns a list of (student, new_status, cert) tuples, in the order
+        the students were given.  `cert` is None for students whose
+        certificate is not in a state that allows generation.
+        """
+        valid_statuses = [
+            status.generating,
+            status.unavailable,
+            status.deleted,
+            status.error,
+            status.notpassing,
+            status.downloadable
+        ]
+
+        students = list(students)
+        user_ids = [student.id for student in students]
+        if course is None:
+            course = modulestore().get_course(course_id, depth=0)
+        course_name = course.display_name or unicode(course_id)
+
+        existing_certs = dict(
+            (cert.user_id, cert)
+            for cert in GeneratedCertificate.objects.filter(user__id__in=user_ids, course_id=course_id)
+        )
+        whitelisted_ids = set(self.whitelist.filter(
+            user__id__in=user_ids, course_id=course_id, whitelist=True
+        ).values_list('user_id', flat=True))
+        restricted_ids = set(self.restricted.filter(user__id__in=user_ids).values_list('user_id', flat=True))
+        profile_names = dict(UserProfile.objects.filter(user__id__in=user_ids).values_list('user_id', 'name'))
+        enrollment_modes = dict(CourseEnrollment.objects.filter(
+            user__id__in=user_ids, course_id=course_id
+        ).values_list('user_id', 'mode'))
+        verified_ids = SoftwareSecurePhotoVerification.verified_user_ids(user_ids)
+
+        results = {}
+        students_to_grade = []
+        for student in students:
+            cert = existing_certs.get(student.id)
+            cert_status = cert.status if cert is not None else status.unavailable
+            if cert_status in valid_statuses:
+                students_to_grade.append(student)
+            else:
+                LOGGER.warning(
+                    (
+                        u"Cannot create certificate generation task for user %s "
+                        u"in the course '%s'; "
+                        u"the certificate status '%s' is not one of %s."
+                    ),
+                    student.id,
+                    unicode(course_id),
+                    cert_status,
+                    unicode(valid_statuses)
+                )
+                results[student.id] = (cert_status, None)
+
+        new_certs = []
+        changed_certs = []
+        queue_requests = []
+        for student, grade, err_msg in grades.iterate_grades_for(course, students_to_grade):
+            cert = existing_certs.get(student.id)
+            if cert is None:
+                cert = GeneratedCertificate(user=student, course_id=course_id)
+                new_certs.append(cert)
+            else:
+                changed_certs.append(cert)
+
+            cert_mode, template_pdf = _cert_mode_and_template(
+                course_id, enrollment_modes.get(student.id), student.id in verified_ids
+            )
+            cert.mode = cert_mode
+            cert.name = profile_names.get(student.id, u'')
+            cert.download_url = ''
+
+            if err_msg:
+                # `iterate_grades_for` has already logged the exception.
+                new_status = status.error
+                cert.error_reason = err_msg[:512]
+            else:
+                if forced_grade:
+                    grade['grade'] = forced_grade
+                cert.grade = grade['percent']
+                grade_contents = _grade_contents(student, course_id, grade)
+
+                if student.id in whitelisted_ids or grade_contents is not None:
+                    if student.id in restricted_ids:
+                        new_status = status.restricted
+                    else:
+                        key = make_hashkey(random.random())
+                        cert.key = key
+                        if generate_pdf:
+                            new_status = status.generating
+                            queue_requests.append((cert, key, {
+                                'action': 'create',
+                                'username': student.username,
+                                'course_id': unicode(course_id),
+                                'course_name': course_name,
+                                'name': cert.name,
+                                'grade': grade_contents,
+                                'template_pdf': template_pdf,
+                            }))
+                        else:
+                            new_status = status.downloadable
+                            cert.verify_uuid = uuid4().hex
+                else:
+                    new_status = status.notpassing
+
+            cert.status = new_status
+            results[student.id] = (new_status, cert)
+
+        bulk_created_certs = new_certs
+        try:
+            with transaction.commit_on_success():
+                GeneratedCertificate.objects.bulk_create(new_certs)
+                for cert in changed_certs:
+                    cert.save()
+        except IntegrityError:
+            # Another process created the certificates of some of the students
+            # in the meantime, so write them one at a time, as `add_cert` does.
+            LOGGER.info(
+                u"Some certificates in '%s' were created concurrently; saving the batch one certificate at a time.",
+                unicode(course_id)
+            )
+            with transaction.commit_on_success():
+                for cert in new_certs:
+                    cert.id = GeneratedCertificate.objects.get_or_create(user=cert.user, course_id=course_id)[0].id
+                    cert.save()
+                for cert in changed_certs:
+                    cert.save()
+            bulk_created_certs = []
+
+        # `bulk_create` bypasses the model signals, so notify the
+        # receivers (course milestones, badges) ourselves.
+        for cert in bulk_created_certs:
+            post_save.send(sender=GeneratedCertificate, instance=cert, created=True, raw=False)
+
+        failed_user_ids = defaultdict(list)
+        for cert, key, contents in queue_requests:
+            try:
+                self._send_to_xqueue(contents, key)
+            except XQueueAddToQueueError as exc:
+                failed_user_ids[unicode(exc)].append(cert.user_id)
+                cert.status = ExampleCertificate.STATUS_ERROR
+                cert.error_reason = unicode(exc)
+                results[cert.user_id] = (cert.status, cert)
+                LOGGER.critical(
+                    (
+                        u"Could not add certificate task to XQueue.  "
+                        u"The course was '%s' and the student was '%s'."
+                        u"The certificate task status has been marked as 'error' "
+                        u"and can be re-submitted with a management command."
+                    ), course_id, cert.user_id
+                )
+
+        for error_reason, failed_ids in failed_user_ids.iteritems():
+            GeneratedCertificate.objects.filter(user__id__in=failed_ids, course_id=course_id).update(
+                status=ExampleCertificate.STATUS_ERROR,
+                error_reason=error_reason
+            )
+
+        LOGGER.info(
+            u"Processed certificates for %d students in '%s'; sent %d certificate grading tasks to the XQueue.",
+            len(students),
+            unicode(course_id),
+            len(queue_requests) - sum(len(failed_ids) for failed_ids in failed_user_ids.itervalues())
+        )
+
+        return [(student,) + results[student.id] for student in students]
+
     def add_example_cert(self, example_cert):
         """Add a task to create an example certificate.
 
@@ -22,6 +22,7 @@ from xmodule.modulestore.tests.factories import CourseFactory
 from capa.xqueue_interface import XQueueInterface
 
 from certificates.queue import XQueueCertInterface
+from certificates.tests.factories import GeneratedCertificateFactory
 from certificates.models import (
     ExampleCertificateSet,
     ExampleCertificate,
@@ -73,6 +74,64 @@ class XQueueCertInterfaceAddCertificateTest(ModuleStoreTestCase):
         self.assertEqual(certificate.status, CertificateStatuses.downloadable)
         self.assertIsNotNone(certificate.verify_uuid)
 
+    def test_add_certs_in_bulk(self):
+        failing_user = UserFactory.create()
+        CourseEnrollmentFactory(user=failing_user, course_id=self.course.id, is_active=True, mode="honor")
+        grades = {
+            self.user.id: {'grade': 'Pass', 'percent': 0.75},
+            failing_user.id: {'grade': None, 'percent': 0.1},
+        }
+
+        with patch('courseware.grades.grade', Mock(side_effect=lambda student, *args, **kwargs: grades[student.id])):
+            with patch.object(XQueueInterface, 'send_to_queue') as mock_send:
+                mock_send.return_value = (0, None)
+                results = self.xqueue.add_certs_in_bulk([self.user, failing_user], self.course.id)
+
+        # Only the passing student's certificate is sent to the queue
+        self.assertEqual(mock_send.call_count, 1)
+        self.assertEqual(
+            [(student, cert_status) for student, cert_status, __ in results],
+            [(self.user, CertificateStatuses.generating), (failing_user, CertificateStatuses.notpassing)]
+        )
+        self.assertEqual(
+            GeneratedCertificate.objects.get(user=self.user, course_id=self.course.id).status,
+            CertificateStatuses.generating
+        )
+        self.assertEqual(
+            GeneratedCertificate.objects.get(user=failing_user, course_id=self.course.id).status,
+            CertificateStatuses.notpassing
+        )
+
+    def test_add_certs_in_bulk_queue_error(self):
+        with patch('courseware.grades.grade', Mock(return_value={'grade': 'Pass', 'percent': 0.75})):
+            with patch.object(XQueueInterface, 'send_to_queue') as mock_send:
+                mock_send.return_value = (1, 'error')
+                results = self.xqueue.add_certs_in_bulk([self.user], self.course.id)
+
+        self.assertEqual(results[0][1], CertificateStatuses.error)
+        certificate = GeneratedCertificate.objects.get(user=self.user, course_id=self.course.id)
+        self.assertEqual(certificate.status, CertificateStatuses.error)
+        self.assertIn('error', certificate.error_reason)
+
+    def test_add_certs_in_bulk_created_concurrently(self):
+        def grade(student, *args, **kwargs):  # pylint: disable=unused-argument
+            """ Another process creates the student's certificate while they are graded """
+            GeneratedCertificateFactory.create(
+                user=student, course_id=self.course.id, status=CertificateStatuses.unavailable
+            )
+            return {'grade': 'Pass', 'percent': 0.75}
+
+        with patch('courseware.grades.grade', Mock(side_effect=grade)):
+            with patch.object(XQueueInterface, 'send_to_queue') as mock_send:
+                mock_send.return_value = (0, None)
+                results = self.xqueue.add_certs_in_bulk([self.user], self.course.id)
+
+        # The certificate created in the meantime is updated instead
+        self.assertEqual(results[0][1], CertificateStatuses.generating)
+        certificate = GeneratedCertificate.objects.get(user=self.user, course_id=self.course.id)
+        self.assertEqual(certificate.status, CertificateStatuses.generating)
+        self.assertEqual(certificate.id, results[0][2].id)
+
 
 @attr('shard_1')
 @override_settings(CERT_QUEUE='certificates')
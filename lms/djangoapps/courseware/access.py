@@ -17,6 +17,7 @@ import pytz
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.utils.timezone import UTC
+from lazy import lazy
 
 from opaque_keys.edx.keys import CourseKey, UsageKey
 
@@ -34,7 +35,7 @@ from xmodule.partitions.partitions import NoSuchUserPartitionError, NoSuchUserPa
 from xmodule.util.django import get_current_request_hostname
 
 from external_auth.models import ExternalAuthMap
-from courseware.masquerade import get_masquerade_role, is_masquerading_as_student
+from courseware.masquerade import get_course_masquerade, get_masquerade_role, is_masquerading_as_student
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from student import auth
 from student.models import CourseEnrollmentAllowed
@@ -52,6 +53,7 @@ from util.milestones_helpers import (
     any_unfulfilled_milestones,
 )
 from ccx_keys.locator import CCXLocator
+from request_cache import get_cache, get_request
 
 import dogstats_wrapper as dog_stats_api
 
@@ -67,6 +69,8 @@ DEBUG_ACCESS = False
 ACCESS_GRANTED = AccessResponse(True)
 ACCESS_DENIED = AccessResponse(False)
 
+ACCESS_CONTEXT_CACHE_NAME = 'courseware.access.contexts'
+
 log = logging.getLogger(__name__)
 
 
@@ -149,6 +153,72 @@ def has_access(user, action, obj, course_key=None):
                     .format(type(obj)))
 
 
+class CourseAccessContext(object):
+    """
+    What the access checks of a user's access to the blocks of a course need
+    to know about the user: their masquerade, their roles in the course,
+    whether they're a beta tester and their group in each user partition.
+
+    These are resolved the first time they are needed and then reused for
+    all the blocks checked within the request, see `get_access_context`.
+    """
+    def __init__(self, user, course_key):
+        self.user = user
+        self.course_key = course_key
+        self.masquerade = get_course_masquerade(user, course_key)
+        self.is_masquerading_as_student = is_masquerading_as_student(user, course_key)
+        self._access_to_course = {}
+        self._user_groups = {}
+
+    def has_access_to_course(self, access_level):
+        """
+        Returns whether the user has `access_level` ('staff' or
+        'instructor') access to the course, see `_has_access_to_course`.
+        """
+        if access_level not in self._access_to_course:
+            self._access_to_course[access_level] = _has_access_to_course(self.user, access_level, self.course_key)
+        return self._access_to_course[access_level]
+
+    @lazy
+    def is_beta_tester(self):
+        """
+        Whether the user is a beta tester of the course.
+        """
+        return CourseBetaTesterRole(self.course_key).has_user(self.user)
+
+    def get_group_for_partition(self, partition):
+        """
+        Returns the group of the user in the user partition `partition`.
+        """
+        if partition.id not in self._user_groups:
+            self._user_groups[partition.id] = partition.scheme.get_group_for_user(
+                self.course_key,
+                self.user,
+                partition,
+            )
+        return self._user_groups[partition.id]
+
+
+def get_access_context(user, course_key):
+    """
+    Returns the CourseAccessContext of `user` in the course `course_key`.
+
+    Within a request, the context is cached until the user's masquerade in
+    the course changes. Outside of a request (e.g. in a celery task or a
+    management command) the request cache is never cleared, so a new
+    context is returned every time.
+    """
+    if get_request() is None:
+        return CourseAccessContext(user, course_key)
+
+    contexts = get_cache(ACCESS_CONTEXT_CACHE_NAME)
+    cache_key = (user.id, course_key)
+    context = contexts.get(cache_key)
+    if context is None or context.user is not user or context.masquerade is not get_course_masquerade(user, course_key):
+        context = contexts[cache_key] = CourseAccessContext(user, course_key)
+    return context
+
+
 # ================ Implementation helpers ================================
 def _can_access_descriptor_with_start_date(user, descriptor, course_key):  # pylint: disable=invalid-name
     """
@@ -173,7 +243,7 @@ def _can_access_descriptor_with_start_date(user, descriptor, course_key):  # pyl
             ACCESS_GRANTED or a StartDateError.
     """
     start_dates_disabled = settings.FEATURES['DISABLE_START_DATES']
-    if start_dates_disabled and not is_masquerading_as_student(user, course_key):
+    if start_dates_disabled and not get_access_context(user, course_key).is_masquerading_as_student:
         return ACCESS_GRANTED
     else:
         now = datetime.now(UTC())
@@ -521,13 +591,10 @@ def _has_group_access(descriptor, user, course_key):
         return ACCESS_DENIED
 
     # look up the user's group for each partition
+    context = get_access_context(user, course_key)
     user_groups = {}
     for partition, groups in partition_groups:
-        user_groups[partition.id] = partition.scheme.get_group_for_user(
-            course_key,
-            user,
-            partition,
-        )
+        user_groups[partition.id] = context.get_group_for_partition(partition)
 
     # finally: check that the user has a satisfactory group assignment
     # for each partition.
@@ -724,7 +791,7 @@ def _adjust_start_date_for_beta_testers(user, descriptor, course_key=None):  # p
         # bail early if no beta testing is set up
         return descriptor.start
 
-    if CourseBetaTesterRole(course_key).has_user(user):
+    if get_access_context(user, course_key).is_beta_tester:
         debug("Adjust start time: user in beta role for %s", descriptor)
         delta = timedelta(descriptor.days_early_for_beta)
         effective = descriptor.start - delta
@@ -736,13 +803,13 @@ def _adjust_start_date_for_beta_testers(user, descriptor, course_key=None):  # p
 def _has_instructor_access_to_location(user, location, course_key=None):
     if course_key is None:
         course_key = location.course_key
-    return _has_access_to_course(user, 'instructor', course_key)
+    return get_access_context(user, course_key).has_access_to_course('instructor')
 
 
 def _has_staff_access_to_location(user, location, course_key=None):
     if course_key is None:
         course_key = location.course_key
-    return _has_access_to_course(user, 'staff', course_key)
+    return get_access_context(user, course_key).has_access_to_course('staff')
 
 
 def _has_access_to_course(user, access_level, course_key):
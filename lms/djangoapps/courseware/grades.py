@@ -1,16 +1,21 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
-from collections import defaultdict
+from collections import Counter, defaultdict
+from datetime import timedelta
 from functools import partial
+from itertools import chain
 import json
 import random
+import re
 import logging
 
 from contextlib import contextmanager
+import numpy
 from django.conf import settings
 from django.db import transaction
 from django.test.client import RequestFactory
 from django.core.cache import cache
+from django.utils import timezone
 
 import dogstats_wrapper as dog_stats_api
 
@@ -18,20 +23,26 @@ from courseware import courses
 from courseware.model_data import FieldDataCache, ScoresClient
 from student.models import anonymous_id_for_user
 from util.module_utils import yield_dynamic_descriptor_descendants
+from util.query import READ_REPLICA, read_replica_lag, use_read_replica_if_available
 from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from .models import StudentModule
+from .models import StudentModule, StudentModuleHistory
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from opaque_keys import InvalidKeyError
-from opaque_keys.edx.keys import CourseKey
-from openedx.core.djangoapps.signals.signals import GRADES_UPDATED
+from opaque_keys.edx.keys import CourseKey, UsageKey
+from openedx.core.djangoapps.content.course_structures.models import CourseStructure
+from openedx.core.djangoapps.signals.signals import BULK_GRADES_UPDATED, GRADES_UPDATED
 
 
 log = logging.getLogger("edx.courseware")
 
+# How many students `iterate_grades_for` grades before sending their grades
+# together in a BULK_GRADES_UPDATED signal.
+GRADES_UPDATED_CHUNK_SIZE = 100
+
 
 class MaxScoresCache(object):
     """
@@ -230,80 +241,334 @@ def answer_distributions(course_key):
     generate the report.
 
     This method will try to use a read-replica database if one is available.
+    See `AnswerDistribution` for the counting itself.
+    """
+    distribution = AnswerDistribution(course_key)
+    distribution.update()
+    return distribution.by_problem()
+
+
+# Number of StudentModule rows read per query when counting answers.
+ANSWER_DISTRIBUTION_CHUNK_SIZE = 1000
+
+# How many seconds before the start of an `AnswerDistribution.update` its
+# counts are saved as of, so that rows modified in the same second, in
+# transactions still running, or on app servers whose clocks are a little
+# behind aren't skipped by the next update.
+ANSWER_DISTRIBUTION_SETTLE_TIME = 5 * 60
+
+_STUDENT_ANSWERS_KEY = '"student_answers":'
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def _parse_student_answers(state):
+    """
+    Return the `student_answers` dict stored in the raw JSON `state` of a
+    problem, or an empty dict if there is none.
+
+    Capa state also holds the correct map and input state, which are at least
+    as large as the answers themselves, so when the key occurs exactly once we
+    decode only the value that follows it. (A quote inside a JSON string is
+    always escaped, so the key can't be matched from within an answer.)
+
+    Raises ValueError if the state can't be decoded.
     """
-    # dict: { module.module_state_key : (url_name, display_name) }
-    state_keys_to_problem_info = {}  # For caching, used by url_and_display_name
+    if not state:
+        return {}
+    if state.count(_STUDENT_ANSWERS_KEY) == 1:
+        start = state.index(_STUDENT_ANSWERS_KEY) + len(_STUDENT_ANSWERS_KEY)
+        raw_answers, __ = _JSON_DECODER.raw_decode(state, _JSON_WHITESPACE.match(state, start).end())
+    else:
+        raw_answers = json.loads(state).get("student_answers", {})
+    return raw_answers if isinstance(raw_answers, dict) else {}
 
-    def url_and_display_name(usage_key):
+
+class StaleAnswerDistribution(Exception):
+    """
+    Raised when an `AnswerDistribution` can't be brought up to date
+    incrementally, and has to be recounted from scratch.
+    """
+    pass
+
+
+class AnswerDistribution(object):
+    """
+    Counts of the answers students submitted to the problems of a course.
+
+    Submitted problem state is streamed from the database in primary key
+    ordered chunks, and only the `student_answers` of each row is decoded.
+    Counts are kept in a `Counter` per (problem, part), with problems
+    identified by the module_state_key as stored, so that keys are only parsed
+    and looked up in the course once per problem, in `by_problem`.
+
+    After a first `update`, `counts` and `module_count` are exact as of the
+    watermark `last_modified`, which is taken from the clock before reading
+    and held back by ANSWER_DISTRIBUTION_SETTLE_TIME (plus the replica lag),
+    so that every row modified by then has been committed and replicated. A
+    later `update` then only reads the rows modified since the watermark. The
+    contribution such a row made to the previous counts is taken back out
+    using the StudentModuleHistory entry that was current at the time.
+
+    Rows modified after the new watermark are counted in `pending_counts` by
+    the difference between their current state and their state at the
+    watermark, so that `by_problem` is up to date; these are not saved by
+    `to_json`, and are read again by the next `update`.
+    """
+
+    def __init__(self, course_key, counts=None, module_count=0, last_modified=None):
+        self.course_key = course_key
+        # { (module_state_key, problem part id): Counter(answer -> count) }
+        self.counts = defaultdict(Counter)
+        if counts:
+            self.counts.update(counts)
+        self.pending_counts = defaultdict(Counter)
+        self.module_count = module_count
+        self.last_modified = last_modified
+
+    def update(self, chunk_size=ANSWER_DISTRIBUTION_CHUNK_SIZE, progress_callback=None):
         """
-        For a given usage_key, return the problem's url and display_name.
-        Handle modulestore access and caching. This method ignores permissions.
+        Count the answers in every submitted problem modified since the last
+        update, or in all of them if this distribution has never been updated.
+
+        `progress_callback`, if given, is called with the number of rows read
+        after every chunk.
 
-        Raises:
-            InvalidKeyError: if the usage_key does not parse
-            ItemNotFoundError: if there is no content that corresponds
-                to this usage_key.
+        Raises StaleAnswerDistribution if the rows counted previously can't be
+        reconciled with the database (e.g. some have been deleted since, or
+        their history is missing). The counts are left half updated in that
+        case, so the caller should start over with a fresh AnswerDistribution.
+        """
+        since = self.last_modified
+        until = _answer_distribution_watermark()
+        if since is not None and (until is None or until < since):
+            until = since
+
+        submitted = StudentModule.all_submitted_problems_read_only(self.course_key)
+        if since is None:
+            changed = submitted
+        else:
+            changed = submitted.filter(modified__gt=since)
+        changed = changed.order_by('id').values_list('id', 'module_state_key', 'state', 'created', 'modified')
+
+        self.pending_counts.clear()
+        recounted = 0
+        counted = 0
+        last_id = 0
+        while True:
+            rows = list(changed.filter(id__gt=last_id)[:chunk_size])
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            previous_states = {} if since is None else self._states_at([row[0] for row in rows], since)
+            pending_ids = [row[0] for row in rows if until is None or row[4] > until]
+            settled_states = self._states_at(pending_ids, until) if pending_ids and until is not None else {}
+            for module_id, state_key, state, created, modified in rows:
+                if since is not None and created <= since:
+                    if module_id not in previous_states:
+                        raise StaleAnswerDistribution(
+                            u"No history for StudentModule id={} as of {}".format(module_id, since)
+                        )
+                    previous_state = previous_states[module_id]
+                    if previous_state is not _NOT_SUBMITTED:
+                        self._count(self.counts, module_id, state_key, previous_state, -1)
+                        recounted += 1
+                if until is not None and modified <= until:
+                    self._count(self.counts, module_id, state_key, state, 1)
+                    counted += 1
+                else:
+                    # Count the state the row had at the watermark, and the
+                    # change made to it since as pending.
+                    settled_state = settled_states.get(module_id, _NOT_SUBMITTED)
+                    if settled_state is not _NOT_SUBMITTED:
+                        self._count(self.counts, module_id, state_key, settled_state, 1)
+                        self._count(self.pending_counts, module_id, state_key, settled_state, -1)
+                        counted += 1
+                    self._count(self.pending_counts, module_id, state_key, state, 1)
+
+            if progress_callback is not None:
+                progress_callback(len(rows))
+
+        if since is not None:
+            unchanged = submitted.filter(modified__lte=since).count()
+            if unchanged + recounted != self.module_count:
+                raise StaleAnswerDistribution(
+                    u"Expected {} previously counted modules, found {}".format(
+                        self.module_count, unchanged + recounted
+                    )
+                )
+        self.module_count += counted - recounted
+        self.last_modified = until
+
+        # Drop the answers (and problem parts) whose counts went back to zero
+        for counts in (self.counts, self.pending_counts):
+            for key, counter in counts.items():
+                for answer in [answer for answer, count in counter.iteritems() if not count]:
+                    del counter[answer]
+                if not counter:
+                    del counts[key]
+
+    def _states_at(self, module_ids, when):
+        """
+        Return { module id: state } with the state each of `module_ids` had
+        at `when`, according to StudentModuleHistory. Modules that had not
+        been submitted by then map to `_NOT_SUBMITTED`, and modules with no
+        history as of `when` are left out.
+        """
+        history = use_read_replica_if_available(
+            StudentModuleHistory.objects.filter(student_module_id__in=module_ids, created__lte=when)
+        ).order_by('created', 'id').values_list('student_module', 'state', 'grade')
+
+        states = {}
+        for module_id, state, grade in history:
+            states[module_id] = _NOT_SUBMITTED if grade is None else state
+        return states
+
+    def _count(self, counts, module_id, state_key, state, delta):
+        """
+        Add `delta` to the count in `counts` of every answer in the raw
+        `state` of the StudentModule `module_id`, for the problem `state_key`.
         """
-        problem_store = modulestore()
-        if usage_key not in state_keys_to_problem_info:
-            problem = problem_store.get_item(usage_key)
-            problem_info = (problem.url_name, problem.display_name_with_default)
-            state_keys_to_problem_info[usage_key] = problem_info
-
-        return state_keys_to_problem_info[usage_key]
-
-    # Iterate through all problems submitted for this course in no particular
-    # order, and build up our answer_counts dict that we will eventually return
-    answer_counts = defaultdict(lambda: defaultdict(int))
-    for module in StudentModule.all_submitted_problems_read_only(course_key):
         try:
-            state_dict = json.loads(module.state) if module.state else {}
-            raw_answers = state_dict.get("student_answers", {})
+            raw_answers = _parse_student_answers(state)
         except ValueError:
             log.error(
                 u"Answer Distribution: Could not parse module state for StudentModule id=%s, course=%s",
-                module.id,
-                course_key,
+                module_id,
+                self.course_key,
             )
-            continue
+            return
+
+        # Each problem part has an ID that is derived from the
+        # module.module_state_key (with some suffix appended)
+        for problem_part_id, raw_answer in raw_answers.iteritems():
+            # Convert whatever raw answers we have (numbers, unicode, None, etc.)
+            # to be unicode values. Note that if we get a string, it's always
+            # unicode and not str -- state comes from the json decoder, and that
+            # always returns unicode for strings.
+            counts[(state_key, problem_part_id)][unicode(raw_answer)] += delta
+
+    def by_problem(self):
+        """
+        Return the counts in the form returned by `answer_distributions`:
+
+          (problem url_name, problem display_name, problem_id) -> {dict: answer -> count}
+
+        Answers to problems that no longer exist in the course are omitted.
+        """
+        counts = defaultdict(Counter)
+        for key, counter in chain(self.counts.iteritems(), self.pending_counts.iteritems()):
+            counts[key].update(counter)
+        problem_info = _problem_url_and_display_names(
+            self.course_key, set(state_key for state_key, __ in counts)
+        )
+        answer_counts = defaultdict(lambda: defaultdict(int))
+        for (state_key, problem_part_id), counter in counts.iteritems():
+            if state_key in problem_info:
+                url, display_name = problem_info[state_key]
+                for answer, count in counter.iteritems():
+                    if count:
+                        answer_counts[(url, display_name, problem_part_id)][answer] += count
+        return answer_counts
+
+    def to_json(self):
+        """
+        Serialize the counts as of `last_modified`, for storage between
+        incremental updates. Pending counts are left out.
+        """
+        return json.dumps([
+            [state_key, problem_part_id, dict(counter)]
+            for (state_key, problem_part_id), counter in self.counts.iteritems()
+        ])
+
+    @classmethod
+    def from_json(cls, course_key, counts_json, module_count, last_modified):
+        """
+        Recreate an AnswerDistribution from the output of `to_json` and the
+        `module_count` and `last_modified` it was saved with.
+        """
+        counts = {
+            (state_key, problem_part_id): Counter(answers)
+            for state_key, problem_part_id, answers in json.loads(counts_json)
+        }
+        return cls(course_key, counts, module_count, last_modified)
 
-        try:
-            url, display_name = url_and_display_name(module.module_state_key.map_into_course(course_key))
-            # Each problem part has an ID that is derived from the
-            # module.module_state_key (with some suffix appended)
-            for problem_part_id, raw_answer in raw_answers.items():
-                # Convert whatever raw answers we have (numbers, unicode, None, etc.)
-                # to be unicode values. Note that if we get a string, it's always
-                # unicode and not str -- state comes from the json decoder, and that
-                # always returns unicode for strings.
-                answer = unicode(raw_answer)
-                answer_counts[(url, display_name, problem_part_id)][answer] += 1
 
+# Marks a module in `AnswerDistribution._states_at` that had not been submitted
+_NOT_SUBMITTED = object()
+
+
+def _answer_distribution_watermark():
+    """
+    Return the time an `AnswerDistribution.update` starting now can count
+    every row as of: ANSWER_DISTRIBUTION_SETTLE_TIME before now, less the lag
+    of the read replica. Returns None if the replica lag is unknown.
+    """
+    lag = read_replica_lag() if READ_REPLICA in settings.DATABASES else 0
+    if lag is None:
+        return None
+    return timezone.now() - timedelta(seconds=ANSWER_DISTRIBUTION_SETTLE_TIME + lag)
+
+
+def _problem_url_and_display_names(course_key, state_keys):
+    """
+    Return { state key: (problem url_name, problem display_name) } for those
+    of the module_state_key strings `state_keys` whose problem still exists
+    in the course.
+
+    Names are read from the course's cached CourseStructure in one go; only
+    problems missing from it (e.g. because it is out of date) are loaded from
+    the modulestore. This ignores permissions.
+    """
+    try:
+        structure = CourseStructure.objects.get(course_id=course_key).structure
+    except CourseStructure.DoesNotExist:
+        structure = None
+    blocks = structure['blocks'] if structure else {}
+
+    problem_info = {}
+    for state_key in state_keys:
+        try:
+            usage_key = UsageKey.from_string(state_key).map_into_course(course_key)
+            block = blocks.get(unicode(usage_key))
+            if block is not None:
+                display_name = block['display_name']
+                if display_name is None:
+                    display_name = usage_key.name.replace('_', ' ')
+                problem_info[state_key] = (usage_key.name, display_name.replace('<', '&lt;').replace('>', '&gt;'))
+            else:
+                problem = modulestore().get_item(usage_key)
+                problem_info[state_key] = (problem.url_name, problem.display_name_with_default)
         except (ItemNotFoundError, InvalidKeyError):
             msg = (
-                "Answer Distribution: Item {} referenced in StudentModule {} " +
-                "for user {} in course {} not found; " +
+                "Answer Distribution: Item {} referenced in StudentModule entries " +
+                "in course {} not found; " +
                 "This can happen if a student answered a question that " +
-                "was later deleted from the course. This answer will be " +
+                "was later deleted from the course. These answers will be " +
                 "omitted from the answer distribution CSV."
             ).format(
-                module.module_state_key, module.id, module.student_id, course_key
+                state_key, course_key
             )
             log.warning(msg)
-            continue
-
-    return answer_counts
+    return problem_info
 
 
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False, field_data_cache=None, scores_client=None):
+def grade(student, request, course, keep_raw_scores=False, field_data_cache=None, scores_client=None,
+          send_signal=True):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
-    Send a signal to update the minimum grade requirement status.
+    Send a signal to update the minimum grade requirement status, unless
+    send_signal is False (when the caller sends the grades of many students
+    at once instead).
     """
     with manual_transaction():
         grade_summary = _grade(student, request, course, keep_raw_scores, field_data_cache, scores_client)
+        if not send_signal:
+            return grade_summary
+
         responses = GRADES_UPDATED.send_robust(
             sender=None,
             username=request.user.username,
@@ -497,6 +762,44 @@ def grade_for_percentage(grade_cutoffs, percentage):
     return letter_grade
 
 
+def grade_matrix(course, score_matrix):
+    """
+    Grades many students at once, given a graders.ScoreMatrix of their totaled
+    section scores, with the grader's vectorized grade_matrix.
+
+    Returns a dict with the same 'percent' (rounded) and 'grade' that grade()
+    returns for each student, as arrays in the students' order, and the
+    grader's 'grade_breakdown' if it has one.
+    """
+    course.set_grading_policy(course.grading_policy)
+    grade_summary = course.grader.grade_matrix(score_matrix)
+
+    # Round like grade() does. Python's round() rounds halfway cases away from
+    # zero, rather than to even like numpy.round.
+    percents = grade_summary['percent'] * 100 + 0.05
+    magnitudes = numpy.abs(percents)
+    rounded = numpy.floor(magnitudes)
+    rounded += magnitudes - rounded >= 0.5
+    grade_summary['percent'] = numpy.copysign(rounded, percents) / 100
+
+    grade_summary['grade'] = grades_for_percentages(course.grade_cutoffs, grade_summary['percent'])
+    return grade_summary
+
+
+def grades_for_percentages(grade_cutoffs, percentages):
+    """
+    Returns an array with the grade_for_percentage of each of the given percentages.
+    """
+    letter_grades = numpy.empty(len(percentages), dtype=object)
+
+    # Assign the lowest grades first, so that the highest grade reached wins.
+    descending_grades = sorted(grade_cutoffs, key=lambda x: grade_cutoffs[x], reverse=True)
+    for possible_grade in reversed(descending_grades):
+        letter_grades[percentages >= grade_cutoffs[possible_grade]] = possible_grade
+
+    return letter_grades
+
+
 @transaction.commit_manually
 def progress_summary(student, request, course, field_data_cache=None, scores_client=None):
     """
@@ -761,34 +1064,67 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
     - raw_scores: contains scores for every graded module
+
+    Rather than a GRADES_UPDATED signal for each student, a BULK_GRADES_UPDATED
+    signal is sent for every GRADES_UPDATED_CHUNK_SIZE students graded, so that
+    its receivers (e.g. the credit eligibility) can handle them in batches.
     """
     if isinstance(course_or_id, (basestring, CourseKey)):
         course = courses.get_course_by_id(course_or_id)
     else:
         course = course_or_id
 
-    for student in students:
-        with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
-            try:
-                request = _get_mock_request(student)
-                # Grading calls problem rendering, which calls masquerading,
-                # which checks session vars -- thus the empty session dict below.
-                # It's not pretty, but untangling that is currently beyond the
-                # scope of this feature.
-                request.session = {}
-                gradeset = grade(student, request, course, keep_raw_scores)
-                yield student, gradeset, ""
-            except Exception as exc:  # pylint: disable=broad-except
-                # Keep marching on even if this student couldn't be graded for
-                # some reason, but log it for future reference.
-                log.exception(
-                    'Cannot grade student %s (%s) in course %s because of exception: %s',
-                    student.username,
-                    student.id,
-                    course.id,
-                    exc.message
-                )
-                yield student, {}, exc.message
+    grade_summaries = {}
+    try:
+        for student in students:
+            with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
+                try:
+                    request = _get_mock_request(student)
+                    # Grading calls problem rendering, which calls masquerading,
+                    # which checks session vars -- thus the empty session dict below.
+                    # It's not pretty, but untangling that is currently beyond the
+                    # scope of this feature.
+                    request.session = {}
+                    gradeset = grade(student, request, course, keep_raw_scores, send_signal=False)
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Keep marching on even if this student couldn't be graded for
+                    # some reason, but log it for future reference.
+                    log.exception(
+                        'Cannot grade student %s (%s) in course %s because of exception: %s',
+                        student.username,
+                        student.id,
+                        course.id,
+                        exc.message
+                    )
+                    yield student, {}, exc.message
+                    continue
+
+            grade_summaries[student.username] = gradeset
+            if len(grade_summaries) >= GRADES_UPDATED_CHUNK_SIZE:
+                _send_bulk_grades_updated(course, grade_summaries)
+                grade_summaries = {}
+            yield student, gradeset, ""
+    finally:
+        # Also send the grades of the last chunk of students when the caller
+        # stops iterating early.
+        if grade_summaries:
+            _send_bulk_grades_updated(course, grade_summaries)
+
+
+def _send_bulk_grades_updated(course, grade_summaries):
+    """
+    Send the BULK_GRADES_UPDATED signal for a batch of students' grade
+    summaries, keyed by username.
+    """
+    responses = BULK_GRADES_UPDATED.send_robust(
+        sender=None,
+        grade_summaries=grade_summaries,
+        course_key=course.id,
+        deadline=course.end
+    )
+
+    for receiver, response in responses:
+        log.info('Signal fired when students grades are calculated. Receiver: %s. Response: %s', receiver, response)
 
 
 def _get_mock_request(student):
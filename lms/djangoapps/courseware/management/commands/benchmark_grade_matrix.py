@@ -0,0 +1,113 @@
+"""
+A Django command that compares the throughput of grading students one at a
+time with the course grader against grading them all at once from a score
+matrix, using random scores for the graded sections of a course.
+
+Both ways are checked to give the same percents and letter grades.
+"""
+from optparse import make_option
+import random
+from textwrap import dedent
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courseware.grades import grade_for_percentage, grade_matrix
+from xmodule.graders import Score, ScoreMatrix
+from xmodule.modulestore.django import modulestore
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the course grader against the vectorized grade_matrix, with
+    random scores for the graded sections of a course.
+    """
+    args = "<course_id>"
+    help = dedent(__doc__).strip()
+    option_list = BaseCommand.option_list + (
+        make_option('--students',
+                    action='store',
+                    type='int',
+                    default=10000,
+                    help='Number of students to grade'),
+        make_option('--seed',
+                    action='store',
+                    type='int',
+                    default=0,
+                    help='Seed for the random scores'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("course_id not specified")
+
+        try:
+            course_key = CourseKey.from_string(args[0])
+        except InvalidKeyError:
+            raise CommandError("Invalid course_id")
+
+        course = modulestore().get_course(course_key)
+        if course is None:
+            raise CommandError("Invalid course_id")
+
+        grade_sheets = self.random_grade_sheets(course, options['students'], random.Random(options['seed']))
+        course.set_grading_policy(course.grading_policy)
+        grader = course.grader
+
+        start = time.time()
+        grades = []
+        for grade_sheet in grade_sheets:
+            # The grading steps of courseware.grades.grade, without the breakdowns.
+            percent = round(grader.grade(grade_sheet)['percent'] * 100 + 0.05) / 100
+            grades.append((percent, grade_for_percentage(course.grade_cutoffs, percent)))
+        grade_time = time.time() - start
+
+        start = time.time()
+        score_matrix = ScoreMatrix.from_grade_sheets(grade_sheets)
+        build_time = time.time() - start
+
+        start = time.time()
+        graded = grade_matrix(course, score_matrix)
+        matrix_time = time.time() - start
+
+        if grades != zip(graded['percent'], graded['grade']):
+            raise CommandError("The score matrix was graded differently than the grade sheets")
+
+        lines = [
+            u"Graded {} students of {}.".format(len(grade_sheets), course_key),
+            self.throughput(u"grader.grade, per student", len(grade_sheets), grade_time),
+            self.throughput(u"ScoreMatrix.from_grade_sheets", len(grade_sheets), build_time),
+            self.throughput(u"grade_matrix", len(grade_sheets), matrix_time),
+        ]
+        return u'\n'.join(lines) + u'\n'
+
+    def random_grade_sheets(self, course, count, randomizer):
+        """
+        Returns count grade sheets with random scores for the course's graded
+        sections, some of which are left out as if the student had not
+        started them.
+        """
+        graded_sections = course.grading_context['graded_sections']
+        grade_sheets = []
+        for __ in range(count):
+            grade_sheet = {}
+            for section_format, sections in graded_sections.iteritems():
+                grade_sheet[section_format] = []
+                for section in sections:
+                    if randomizer.random() < 0.2:
+                        continue
+                    possible = randomizer.randint(1, 20)
+                    earned = randomizer.randint(0, possible)
+                    grade_sheet[section_format].append(
+                        Score(earned, possible, True, section['section_descriptor'].display_name_with_default, None)
+                    )
+            grade_sheets.append(grade_sheet)
+        return grade_sheets
+
+    def throughput(self, name, count, seconds):
+        """
+        Describes how many students per second were handled in the given time.
+        """
+        return u"{}: {:.3f}s, {:.0f} students/s".format(name, seconds, count / seconds if seconds else float('inf'))
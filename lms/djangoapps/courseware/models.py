@@ -17,9 +17,10 @@ import itertools
 
 from django.contrib.auth.models import User
 from django.conf import settings
-from django.db import models
+from django.db import connection, models, transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver, Signal
+from django.utils import timezone
 
 from model_utils.models import TimeStampedModel
 from student.models import user_by_anonymous_id
@@ -120,6 +121,11 @@ class StudentModule(CallStackMixin, models.Model):
     created = models.DateTimeField(auto_now_add=True, db_index=True)
     modified = models.DateTimeField(auto_now=True, db_index=True)
 
+    # Number of rows written by each statement of `save_states_in_bulk`.
+    # Each row takes three query parameters, which keeps us under the
+    # sqlite3 limit on parameters per query.
+    BULK_UPDATE_CHUNK_SIZE = 300
+
     @classmethod
     def all_submitted_problems_read_only(cls, course_id):
         """
@@ -137,6 +143,40 @@ class StudentModule(CallStackMixin, models.Model):
         else:
             return queryset
 
+    @classmethod
+    def save_states_in_bulk(cls, student_modules):
+        """
+        Write the `state` of each of the (already saved) `student_modules`
+        back to the database, setting their `modified` time to now.
+
+        All of the rows are written by a single UPDATE statement per chunk
+        of `BULK_UPDATE_CHUNK_SIZE` rows.  Unlike `save`, this does not send
+        the post_save signal, so callers that need history should write it
+        with `StudentModuleHistory.save_history_in_bulk`.
+        """
+        modified = timezone.now()
+        quote_name = connection.ops.quote_name
+        for student_modules_chunk in chunks(student_modules, cls.BULK_UPDATE_CHUNK_SIZE):
+            params = []
+            for student_module in student_modules_chunk:
+                student_module.modified = modified
+                params.extend([student_module.id, student_module.state])
+            params.append(cls._meta.get_field('modified').get_db_prep_save(modified, connection=connection))
+            params.extend(student_module.id for student_module in student_modules_chunk)
+
+            sql = (
+                u"UPDATE {table} SET {state} = CASE {id} {cases} END, {modified} = %s WHERE {id} IN ({ids})"
+            ).format(
+                table=quote_name(cls._meta.db_table),
+                state=quote_name(cls._meta.get_field('state').column),
+                modified=quote_name(cls._meta.get_field('modified').column),
+                id=quote_name(cls._meta.pk.column),
+                cases=u" ".join([u"WHEN %s THEN %s"] * len(student_modules_chunk)),
+                ids=u", ".join([u"%s"] * len(student_modules_chunk)),
+            )
+            connection.cursor().execute(sql, params)
+        transaction.commit_unless_managed()
+
     def __repr__(self):
         return 'StudentModule<%r>' % ({
             'course_id': self.course_id,
@@ -188,6 +228,28 @@ class StudentModuleHistory(CallStackMixin, models.Model):
                                                  max_grade=instance.max_grade)
             history_entry.save()
 
+    @classmethod
+    def save_history_in_bulk(cls, student_modules):
+        """
+        Create StudentModuleHistory entries for those of `student_modules`
+        whose module_type is one that we save, with a single bulk insert.
+
+        This is the bulk counterpart of `save_history`, for use with writes
+        that bypass the post_save signal.
+        """
+        cls.objects.bulk_create([
+            cls(
+                student_module=student_module,
+                version=None,
+                created=student_module.modified,
+                state=student_module.state,
+                grade=student_module.grade,
+                max_grade=student_module.max_grade
+            )
+            for student_module in student_modules
+            if student_module.module_type in cls.HISTORY_SAVING_TYPES
+        ])
+
 
 class XBlockFieldBase(models.Model):
     """
@@ -263,9 +325,67 @@ class OfflineComputedGrade(models.Model):
 
     gradeset = models.TextField(null=True, blank=True)		# grades, stored as JSON
 
+    # Number of rows written by each statement of `save_gradesets_in_bulk`.
+    # Each inserted row takes five query parameters, which keeps us under
+    # the sqlite3 limit on parameters per query.
+    BULK_UPDATE_CHUNK_SIZE = 100
+
     class Meta(object):  # pylint: disable=missing-docstring
         unique_together = (('user', 'course_id'), )
 
+    @classmethod
+    def save_gradesets_in_bulk(cls, course_id, gradesets):
+        """
+        Save the JSON encoded `gradesets` of the course, a dict keyed by user id.
+
+        For each chunk of `BULK_UPDATE_CHUNK_SIZE` users, the existing rows
+        are read by a single query, those whose gradeset changed are written
+        by a single UPDATE statement, and the missing ones are inserted by
+        `bulk_create`.  Rows whose gradeset didn't change aren't written.
+        """
+        updated = timezone.now()
+        quote_name = connection.ops.quote_name
+        for user_ids in chunks(gradesets, cls.BULK_UPDATE_CHUNK_SIZE):
+            existing = {
+                user_id: (grade_id, gradeset)
+                for grade_id, user_id, gradeset in cls.objects.filter(
+                    course_id=course_id, user__in=user_ids
+                ).values_list('id', 'user', 'gradeset')
+            }
+
+            changed = [
+                (existing[user_id][0], gradesets[user_id])
+                for user_id in user_ids
+                if user_id in existing and existing[user_id][1] != gradesets[user_id]
+            ]
+            if changed:
+                params = []
+                for grade_id, gradeset in changed:
+                    params.extend([grade_id, gradeset])
+                params.append(cls._meta.get_field('updated').get_db_prep_save(updated, connection=connection))
+                params.extend(grade_id for grade_id, __ in changed)
+
+                sql = (
+                    u"UPDATE {table} SET {gradeset} = CASE {id} {cases} END, {updated} = %s WHERE {id} IN ({ids})"
+                ).format(
+                    table=quote_name(cls._meta.db_table),
+                    gradeset=quote_name(cls._meta.get_field('gradeset').column),
+                    updated=quote_name(cls._meta.get_field('updated').column),
+                    id=quote_name(cls._meta.pk.column),
+                    cases=u" ".join([u"WHEN %s THEN %s"] * len(changed)),
+                    ids=u", ".join([u"%s"] * len(changed)),
+                )
+                connection.cursor().execute(sql, params)
+
+            missing = [
+                cls(user_id=user_id, course_id=course_id, gradeset=gradesets[user_id])
+                for user_id in user_ids
+                if user_id not in existing
+            ]
+            if missing:
+                cls.objects.bulk_create(missing)
+        transaction.commit_unless_managed()
+
     def __unicode__(self):
         return "[OfflineComputedGrade] %s: %s (%s) = %s" % (self.user, self.course_id, self.created, self.gradeset)
 
@@ -283,6 +403,9 @@ class OfflineComputedGradeLog(models.Model):
     created = models.DateTimeField(auto_now_add=True, null=True, db_index=True)
     seconds = models.IntegerField(default=0)  	# seconds elapsed for computation
     nstudents = models.IntegerField(default=0)
+    # The published version of the course the grades were computed against,
+    # if the modulestore versions courses.
+    course_version = models.CharField(max_length=255, null=True, blank=True)
 
     def __unicode__(self):
         return "[OCGLog] %s: %s" % (self.course_id.to_deprecated_string(), self.created)  # pylint: disable=no-member
@@ -25,6 +25,8 @@ from courseware.tests.factories import (
 )
 from courseware.tests.helpers import LoginEnrollmentTestCase
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from request_cache.middleware import RequestCache
+from student.roles import CourseBetaTesterRole
 from student.tests.factories import (
     AnonymousUserFactory,
     CourseEnrollmentAllowedFactory,
@@ -205,6 +207,36 @@ class AccessTestCase(LoginEnrollmentTestCase, ModuleStoreTestCase):
         self.assertTrue(bool(access._has_access_descriptor(
             self.beta_user, 'load', mock_unit, course_key=self.course.course_key)))
 
+    @patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
+    def test_access_context_cached_within_request(self):
+        mock_unit = Mock(user_partitions=[])
+        mock_unit._class_tags = {}
+        mock_unit.days_early_for_beta = 2
+        mock_unit.start = self.TOMORROW
+        mock_unit.visible_to_staff_only = False
+
+        RequestCache().process_request(Mock())
+        self.addCleanup(RequestCache.clear_request_cache)
+        with patch('courseware.access._has_access_to_course', wraps=access._has_access_to_course) as mock_access:
+            with patch.object(CourseBetaTesterRole, 'has_user', return_value=True) as mock_beta:
+                for __ in range(3):
+                    self.assertTrue(bool(access._has_access_descriptor(
+                        self.beta_user, 'load', mock_unit, course_key=self.course.course_key)))
+                    self.assertFalse(bool(access._has_access_descriptor(
+                        self.beta_user, 'staff', mock_unit, course_key=self.course.course_key)))
+        self.assertEqual(mock_access.call_count, 1)
+        self.assertEqual(mock_beta.call_count, 1)
+
+        # a masquerade resolves the context anew
+        self.course_staff.masquerade_settings = {
+            self.course.course_key: CourseMasquerade(self.course.course_key, role='student')
+        }
+        self.assertFalse(bool(access._has_access_descriptor(
+            self.course_staff, 'staff', mock_unit, course_key=self.course.course_key)))
+        self.course_staff.masquerade_settings = {}
+        self.assertTrue(bool(access._has_access_descriptor(
+            self.course_staff, 'staff', mock_unit, course_key=self.course.course_key)))
+
     @ddt.data(None, YESTERDAY, TOMORROW)
     @patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
     @patch('courseware.access.get_current_request_hostname', Mock(return_value='preview.localhost'))
@@ -6,18 +6,24 @@ from django.test import TestCase
 from django.test.client import RequestFactory
 
 from mock import patch, MagicMock
+import numpy
 from nose.plugins.attrib import attr
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from opaque_keys.edx.locator import CourseLocator, BlockUsageLocator
 
-from courseware.grades import field_data_cache_for_grading, grade, iterate_grades_for, MaxScoresCache, ProgressSummary
+from courseware.grades import (
+    field_data_cache_for_grading, grade, grade_for_percentage, grade_matrix, grades_for_percentages,
+    iterate_grades_for, MaxScoresCache, ProgressSummary
+)
+from openedx.core.djangoapps.signals.signals import BULK_GRADES_UPDATED, GRADES_UPDATED
 from student.tests.factories import UserFactory
 from student.models import CourseEnrollment
+from xmodule.graders import Score, ScoreMatrix
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 
-def _grade_with_errors(student, request, course, keep_raw_scores=False):
+def _grade_with_errors(student, request, course, keep_raw_scores=False, send_signal=True):
     """This fake grade method will throw exceptions for student3 and
     student4, but allow any other students to go through normal grading.
 
@@ -28,7 +34,7 @@ def _grade_with_errors(student, request, course, keep_raw_scores=False):
     if student.username in ['student3', 'student4']:
         raise Exception("I don't like {}".format(student.username))
 
-    return grade(student, request, course, keep_raw_scores=keep_raw_scores)
+    return grade(student, request, course, keep_raw_scores=keep_raw_scores, send_signal=send_signal)
 
 
 @attr('shard_1')
@@ -111,6 +117,31 @@ class TestGradeIteration(ModuleStoreTestCase):
         self.assertTrue(all_gradesets[student2])
         self.assertTrue(all_gradesets[student5])
 
+    @patch('courseware.grades.GRADES_UPDATED_CHUNK_SIZE', 2)
+    def test_grades_updated_in_bulk(self):
+        """The grades are sent in a BULK_GRADES_UPDATED signal for each chunk
+        of students, rather than in a GRADES_UPDATED signal for each student."""
+        grades_updated = []
+        bulk_grades_updated = []
+
+        def grades_receiver(username, **kwargs):  # pylint: disable=unused-argument, missing-docstring
+            grades_updated.append(username)
+
+        def bulk_grades_receiver(grade_summaries, **kwargs):  # pylint: disable=unused-argument, missing-docstring
+            bulk_grades_updated.append(sorted(grade_summaries))
+
+        GRADES_UPDATED.connect(grades_receiver)
+        self.addCleanup(GRADES_UPDATED.disconnect, grades_receiver)
+        BULK_GRADES_UPDATED.connect(bulk_grades_receiver)
+        self.addCleanup(BULK_GRADES_UPDATED.disconnect, bulk_grades_receiver)
+
+        self._gradesets_and_errors_for(self.course.id, self.students)
+        self.assertEqual(grades_updated, [])
+        self.assertEqual(
+            bulk_grades_updated,
+            [['student1', 'student2'], ['student3', 'student4'], ['student5']]
+        )
+
     ################################# Helpers #################################
     def _gradesets_and_errors_for(self, course_id, students):
         """Simple helper method to iterate through student grades and give us
@@ -128,6 +159,49 @@ class TestGradeIteration(ModuleStoreTestCase):
         return students_to_gradesets, students_to_errors
 
 
+@attr('shard_1')
+class TestGradeMatrix(ModuleStoreTestCase):
+    """
+    Test grading many students at once from a ScoreMatrix.
+    """
+    GRADE_CUTOFFS = {'A': 0.9, 'B': 0.8, 'C': 0.5}
+
+    def setUp(self):
+        super(TestGradeMatrix, self).setUp()
+        self.course = CourseFactory.create(grading_policy={
+            "GRADER": [
+                {"type": "Homework", "min_count": 4, "drop_count": 1, "short_label": "HW", "weight": 0.5},
+                {"type": "Final", "min_count": 1, "drop_count": 0, "weight": 0.5},
+            ],
+            "GRADE_CUTOFFS": self.GRADE_CUTOFFS,
+        })
+
+    def test_matches_grade(self):
+        grade_sheets = [{}]
+        for homework_earned in range(11):
+            for final_earned in (0, 7, 8, 9, 9.45, 10):
+                grade_sheets.append({
+                    'Homework': [
+                        Score(homework_earned, 10.0, True, 'hw{}'.format(index), None) for index in range(3)
+                    ],
+                    'Final': [Score(final_earned, 10.0, True, 'Final', None)],
+                })
+
+        graded = grade_matrix(self.course, ScoreMatrix.from_grade_sheets(grade_sheets))
+        for index, grade_sheet in enumerate(grade_sheets):
+            # This is how grade() goes from the grader's percent to the final grade.
+            percent = round(self.course.grader.grade(grade_sheet)['percent'] * 100 + 0.05) / 100
+            self.assertEqual(graded['percent'][index], percent)
+            self.assertEqual(graded['grade'][index], grade_for_percentage(self.GRADE_CUTOFFS, percent))
+
+    def test_grades_for_percentages(self):
+        percentages = [0, 0.49, 0.5, 0.79, 0.8, 0.899, 0.9, 1.2]
+        self.assertEqual(
+            list(grades_for_percentages(self.GRADE_CUTOFFS, numpy.array(percentages))),
+            [grade_for_percentage(self.GRADE_CUTOFFS, percentage) for percentage in percentages]
+        )
+
+
 class TestMaxScoresCache(ModuleStoreTestCase):
     """
     Tests for the MaxScoresCache
@@ -3,12 +3,15 @@ Black-box tests of the DjangoUserStateClient against the semantics
 defined in edx_user_state_client.
 """
 
+import json
 from collections import defaultdict
 from unittest import skip
 
 from django.test import TestCase
 
 from edx_user_state_client.tests import UserStateClientTestBase
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from courseware.models import StudentModule, StudentModuleHistory
 from courseware.user_state_client import DjangoXBlockUserStateClient
 from courseware.tests.factories import UserFactory
 
@@ -65,3 +68,43 @@ class TestDjangoUserStateClient(UserStateClientTestBase, TestCase):
     @skip("Not supported by DjangoXBlockUserStateClient")
     def test_iter_course_many_users(self):
         pass
+
+
+class TestDjangoUserStateClientSetMany(TestCase):
+    """
+    Tests of the batched writes made by DjangoXBlockUserStateClient.set_many.
+    """
+    def setUp(self):
+        super(TestDjangoUserStateClientSetMany, self).setUp()
+        self.user = UserFactory.create()
+        self.client = DjangoXBlockUserStateClient(self.user)
+        course_key = SlashSeparatedCourseKey('org', 'course', 'run')
+        self.block_keys = [course_key.make_usage_key('problem', 'problem_{}'.format(i)) for i in range(3)]
+
+    def test_set_many_batches_writes(self):
+        self.client.set_many(self.user.username, {self.block_keys[0]: {'a_field': 'a_value'}})
+
+        # Read the existing rows, update the existing row, insert the new
+        # rows, read back their ids and insert all of the history rows.
+        with self.assertNumQueries(5):
+            self.client.set_many(
+                self.user.username,
+                dict((block_key, {'b_field': 'b_value'}) for block_key in self.block_keys)
+            )
+
+        self.assertEqual(
+            json.loads(StudentModule.objects.get(module_state_key=self.block_keys[0]).state),
+            {'a_field': 'a_value', 'b_field': 'b_value'}
+        )
+        for block_key in self.block_keys[1:]:
+            self.assertEqual(
+                json.loads(StudentModule.objects.get(module_state_key=block_key).state),
+                {'b_field': 'b_value'}
+            )
+        self.assertEqual(
+            [
+                StudentModuleHistory.objects.filter(student_module__module_state_key=block_key).count()
+                for block_key in self.block_keys
+            ],
+            [2, 1, 1]
+        )
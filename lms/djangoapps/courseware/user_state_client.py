@@ -14,6 +14,7 @@ except ImportError:
 
 import dogstats_wrapper as dog_stats_api
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from xblock.fields import Scope, ScopeBase
 from courseware.models import StudentModule, StudentModuleHistory
 from edx_user_state_client.interface import XBlockUserStateClient, XBlockUserState
@@ -98,6 +99,67 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                 usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
                 yield (student_module, usage_key)
 
+    def _create_student_modules(self, student_modules, block_keys_to_state):
+        """
+        Insert the new `student_modules` with a single bulk insert.
+
+        If another process created one of the rows since we read them (so
+        that the bulk insert fails), fall back to creating or updating each
+        row individually, which also writes their history.
+
+        Returns the saved rows whose history still needs to be written.
+
+        Arguments:
+            student_modules (list of :class:`~StudentModule`): unsaved rows for a single user.
+            block_keys_to_state (dict): the state that was requested for each block.
+        """
+        if not student_modules:
+            return []
+
+        savepoint = transaction.savepoint()
+        try:
+            StudentModule.objects.bulk_create(student_modules)
+        except IntegrityError:
+            transaction.savepoint_rollback(savepoint)
+            for student_module in student_modules:
+                self._get_or_create_student_module(student_module, block_keys_to_state[student_module.module_state_key])
+            return []
+        transaction.savepoint_commit(savepoint)
+
+        if not any(
+                student_module.module_type in StudentModuleHistory.HISTORY_SAVING_TYPES
+                for student_module in student_modules
+        ):
+            return student_modules
+
+        # The bulk insert doesn't give us back primary keys, which history rows need.
+        return list(StudentModule.objects.chunked_filter(
+            'module_state_key__in',
+            [student_module.module_state_key for student_module in student_modules],
+            student=student_modules[0].student,
+            course_id__in=set(student_module.course_id for student_module in student_modules),
+        ))
+
+    def _get_or_create_student_module(self, student_module, state):
+        """
+        Save the unsaved `student_module`, merging the requested `state` into
+        the stored state if the row already exists.
+        """
+        stored_module, created = StudentModule.objects.get_or_create(
+            student=student_module.student,
+            course_id=student_module.course_id,
+            module_state_key=student_module.module_state_key,
+            defaults={
+                'state': student_module.state,
+                'module_type': student_module.module_type,
+            },
+        )
+        if not created:
+            current_state = {} if stored_module.state is None else json.loads(stored_module.state)
+            current_state.update(state)
+            stored_module.state = json.dumps(current_state)
+            stored_module.save(force_update=True)
+
     def _ddog_increment(self, evt_time, evt_name):
         """
         DataDog increment method.
@@ -183,14 +245,20 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                 are overlaid over the stored state. To delete fields, use
                 :meth:`delete` or :meth:`delete_many`.
             scope (Scope): The scope to load data from
+
+        The existing rows for all of the blocks are read with one query per
+        course, and all writes happen in one transaction: the merged state of
+        existing rows is written with a bulk update, new rows with a bulk
+        insert, and history rows with a bulk insert.
         """
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
 
-        # We do a find_or_create for every block (rather than re-using field objects
+        # We re-read the rows for every block (rather than re-using field objects
         # that were queried in get_many) so that if the score has
         # been changed by some other piece of the code, we don't overwrite
-        # that score.
+        # that score.  Only the state and modified time of existing rows are
+        # written back.
         if self.user is not None and self.user.username == username:
             user = self.user
         else:
@@ -198,20 +266,30 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
         evt_time = time()
 
+        # Index the rows both by their stored key and by the key mapped into
+        # the course, so that they can be found whichever form the caller used.
+        existing_modules = {}
+        for student_module, usage_key in self._get_student_modules(username, block_keys_to_state.keys()):
+            existing_modules[student_module.module_state_key] = student_module
+            existing_modules[usage_key] = student_module
+
+        updated_modules = []
+        new_modules = []
         for usage_key, state in block_keys_to_state.items():
-            student_module, created = StudentModule.objects.get_or_create(
-                student=user,
-                course_id=usage_key.course_key,
-                module_state_key=usage_key,
-                defaults={
-                    'state': json.dumps(state),
-                    'module_type': usage_key.block_type,
-                },
-            )
+            student_module = existing_modules.get(usage_key)
+            created = student_module is None
 
             num_fields_before = num_fields_after = num_new_fields_set = len(state)
             num_fields_updated = 0
-            if not created:
+            if created:
+                new_modules.append(StudentModule(
+                    student=user,
+                    course_id=usage_key.course_key,
+                    module_state_key=usage_key,
+                    state=json.dumps(state),
+                    module_type=usage_key.block_type,
+                ))
+            else:
                 if student_module.state is None:
                     current_state = {}
                 else:
@@ -220,10 +298,9 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                 current_state.update(state)
                 num_fields_after = len(current_state)
                 student_module.state = json.dumps(current_state)
-                # We just read this object, so we know that we can do an update
-                student_module.save(force_update=True)
+                updated_modules.append(student_module)
 
-            # The rest of this method exists only to submit DataDog events.
+            # The rest of this loop exists only to submit DataDog events.
             # Remove it once we're no longer interested in the data.
             #
             # Record whether a state row has been created or updated.
@@ -243,6 +320,12 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             num_fields_updated = max(0, len(state) - num_new_fields_set)
             self._ddog_histogram(evt_time, 'set_many.fields_updated', num_fields_updated)
 
+        with transaction.commit_on_success():
+            # We just read these objects, so we know that we can do an update
+            StudentModule.save_states_in_bulk(updated_modules)
+            created_modules = self._create_student_modules(new_modules, block_keys_to_state)
+            StudentModuleHistory.save_history_in_bulk(updated_modules + created_modules)
+
         # Event for the entire set_many call.
         self._ddog_histogram(evt_time, 'set_many.blks_updated', len(block_keys_to_state))
 
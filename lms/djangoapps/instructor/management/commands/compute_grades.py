@@ -3,6 +3,8 @@
 django management command: dump grades to csv files
 for use by batch processes
 """
+from optparse import make_option
+
 from instructor.offline_gradecalc import offline_grade_calculation
 from courseware.courses import get_course_by_id
 from opaque_keys import InvalidKeyError
@@ -14,10 +16,19 @@ from django.core.management.base import BaseCommand
 
 class Command(BaseCommand):
     help = "Compute grades for all students in a course, and store result in DB.\n"
-    help += "Usage: compute_grades course_id_or_dir \n"
+    help += "Usage: compute_grades [--incremental] course_id_or_dir \n"
     help += "   course_id_or_dir: either course_id or course_dir\n"
+    help += "   --incremental: only grade the students whose grades may have changed since the last run\n"
     help += 'Example course_id: MITx/8.01rq_MW/Classical_Mechanics_Reading_Questions_Fall_2012_MW_Section'
 
+    option_list = BaseCommand.option_list + (
+        make_option('--incremental',
+                    action='store_true',
+                    dest='incremental',
+                    default=False,
+                    help='Only grade the students whose grades may have changed since the last run'),
+    )
+
     def handle(self, *args, **options):
 
         print "args = ", args
@@ -47,4 +58,4 @@ class Command(BaseCommand):
         print "-----------------------------------------------------------------------------"
         print "Computing grades for {}".format(course_id)
 
-        offline_grade_calculation(course_key)
+        offline_grade_calculation(course_key, incremental=options['incremental'])
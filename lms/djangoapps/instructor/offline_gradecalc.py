@@ -9,17 +9,25 @@ The grades are stored in the OfflineComputedGrade table of the courseware model.
 import json
 import time
 
+from datetime import timedelta
 from json import JSONEncoder
 from courseware import grades, models
 from courseware.courses import get_course_by_id
 from django.contrib.auth.models import User
 from opaque_keys import OpaqueKey
 from opaque_keys.edx.keys import UsageKey
+from student.models import AnonymousUserId
+from submissions.models import Score as SubmissionScore
 from xmodule.graders import Score
+from xmodule.modulestore.django import modulestore
 
 from instructor.utils import DummyRequest
 
 
+# How many students' grades are saved at once.
+SAVE_BATCH_SIZE = 100
+
+
 class MyEncoder(JSONEncoder):
     """ JSON Encoder that can encode OpaqueKeys """
     def default(self, obj):  # pylint: disable=method-hidden
@@ -29,9 +37,13 @@ class MyEncoder(JSONEncoder):
         return JSONEncoder.default(self, obj)
 
 
-def offline_grade_calculation(course_key):
+def offline_grade_calculation(course_key, incremental=False):
     '''
     Compute grades for all students for a specified course, and save results to the DB.
+
+    If incremental is True, only the students whose grades may have changed since grades were
+    last computed are graded (see students_to_regrade).  Grades are saved SAVE_BATCH_SIZE
+    students at a time.
     '''
 
     tstart = time.time()
@@ -40,38 +52,112 @@ def offline_grade_calculation(course_key):
         courseenrollment__is_active=1
     ).prefetch_related("groups").order_by('username')
 
-    enc = MyEncoder()
-
     print "{} enrolled students".format(len(enrolled_students))
     course = get_course_by_id(course_key)
-
+    course_version = modulestore().get_structure_version(course_key)
+    if course_version is not None:
+        course_version = unicode(course_version)
+
+    if incremental:
+        student_ids = students_to_regrade(course_key, course_version)
+        if student_ids is None:
+            print "Grading all students"
+        else:
+            enrolled_students = [student for student in enrolled_students if student.id in student_ids]
+            print "Grading the {} students whose grades may have changed".format(len(enrolled_students))
+
+    gradesets = {}
     for student in enrolled_students:
         request = DummyRequest()
         request.user = student
         request.session = {}
 
         gradeset = grades.grade(student, request, course, keep_raw_scores=True)
-        # Convert Score namedtuples to dicts:
-        totaled_scores = gradeset['totaled_scores']
-        for section in totaled_scores:
-            totaled_scores[section] = [score._asdict() for score in totaled_scores[section]]
-        gradeset['raw_scores'] = [score._asdict() for score in gradeset['raw_scores']]
-        # Encode as JSON and save:
-        gradeset_str = enc.encode(gradeset)
-        ocg, _created = models.OfflineComputedGrade.objects.get_or_create(user=student, course_id=course_key)
-        ocg.gradeset = gradeset_str
-        ocg.save()
+        gradesets[student.id] = _encode_gradeset(gradeset)
+        if len(gradesets) >= SAVE_BATCH_SIZE:
+            models.OfflineComputedGrade.save_gradesets_in_bulk(course_key, gradesets)
+            gradesets = {}
         print "%s done" % student  	# print statement used because this is run by a management command
+    models.OfflineComputedGrade.save_gradesets_in_bulk(course_key, gradesets)
 
     tend = time.time()
     dt = tend - tstart
 
-    ocgl = models.OfflineComputedGradeLog(course_id=course_key, seconds=dt, nstudents=len(enrolled_students))
+    ocgl = models.OfflineComputedGradeLog(
+        course_id=course_key, seconds=dt, nstudents=len(enrolled_students), course_version=course_version
+    )
     ocgl.save()
     print ocgl
     print "All Done!"
 
 
+def students_to_regrade(course_key, course_version):
+    '''
+    Returns the ids of the students whose grades in the specified course may have changed since
+    grades were last computed, or None if every student's may have: when grades were never
+    computed, or the published version of the course changed or isn't known.
+
+    Those are the students who were never graded, and those whose StudentModules were modified
+    or who were scored through the submissions API since the last computation started.
+    '''
+    last_log = offline_grades_available(course_key)
+    if not last_log or course_version is None or last_log.course_version != course_version:
+        return None
+
+    # Whatever changed while the last computation was running may have been missed by it.
+    since = last_log.created - timedelta(seconds=last_log.seconds)
+
+    student_ids = set(
+        models.StudentModule.objects.filter(
+            course_id=course_key,
+            modified__gte=since
+        ).values_list('student_id', flat=True)
+    )
+    scored_anonymous_ids = SubmissionScore.objects.filter(
+        student_item__course_id=course_key.to_deprecated_string(),
+        created_at__gte=since
+    ).values('student_item__student_id')
+    student_ids.update(
+        AnonymousUserId.objects.filter(
+            anonymous_user_id__in=scored_anonymous_ids
+        ).values_list('user_id', flat=True)
+    )
+    student_ids.update(
+        User.objects.filter(
+            courseenrollment__course_id=course_key,
+            courseenrollment__is_active=1
+        ).exclude(
+            offlinecomputedgrade__course_id=course_key
+        ).values_list('id', flat=True)
+    )
+    return student_ids
+
+
+def save_offline_grade(student, course_key, gradeset):
+    '''
+    Save a gradeset computed by grades.grade with keep_raw_scores=True as the offline computed
+    grade of the student in the specified course.
+    '''
+    ocg, _created = models.OfflineComputedGrade.objects.get_or_create(user=student, course_id=course_key)
+    ocg.gradeset = _encode_gradeset(gradeset)
+    ocg.save()
+
+
+def _encode_gradeset(gradeset):
+    '''
+    Encode a gradeset computed by grades.grade with keep_raw_scores=True as JSON.
+    '''
+    encoded = dict(gradeset)
+    # Convert Score namedtuples to dicts:
+    encoded['totaled_scores'] = {
+        section: [score._asdict() for score in scores]
+        for section, scores in gradeset['totaled_scores'].iteritems()
+    }
+    encoded['raw_scores'] = [score._asdict() for score in gradeset['raw_scores']]
+    # Sort the keys, so that unchanged gradesets encode the same.
+    return MyEncoder(sort_keys=True).encode(encoded)
+
+
 def offline_grades_available(course_key):
     '''
     Returns False if no offline grades available for specified course.
@@ -100,7 +186,23 @@ def student_grades(student, request, course, keep_raw_scores=False, use_offline=
             msg='Error: no offline gradeset available for {}, {}'.format(student, course.id)
         )
 
-    gradeset = json.loads(ocg.gradeset)
+    return _decode_gradeset(ocg.gradeset)
+
+
+def offline_student_grades(students, course_key):
+    '''
+    Returns a dict mapping the ids of the given students to their offline computed gradesets for the
+    specified course. Students without an offline gradeset are left out.
+    '''
+    ocgs = models.OfflineComputedGrade.objects.filter(user__in=students, course_id=course_key)
+    return {ocg.user_id: _decode_gradeset(ocg.gradeset) for ocg in ocgs}
+
+
+def _decode_gradeset(gradeset_str):
+    '''
+    Decode a gradeset saved by save_offline_grade.
+    '''
+    gradeset = json.loads(gradeset_str)
     # Convert score dicts back to Score tuples:
 
     def score_from_dict(encoded):
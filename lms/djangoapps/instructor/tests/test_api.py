@@ -2696,6 +2696,22 @@ class TestInstructorAPILevelsDataDump(SharedModuleStoreTestCase, LoginEnrollment
         res_json = json.loads(response.content)
         self.assertEqual(res_json, expected_response)
 
+    def test_list_report_downloads_page(self):
+        url = reverse('list_report_downloads', kwargs={'course_id': self.course.id.to_deprecated_string()})
+        with patch('instructor_task.models.LocalFSReportStore.links_for') as mock_links_for:
+            mock_links_for.return_value = []
+            response = self.client.get(url, {'offset': 10, 'limit': 5})
+
+        self.assertEqual(response.status_code, 200)
+        __, kwargs = mock_links_for.call_args
+        self.assertEqual(kwargs, {'offset': 10, 'limit': 5})
+
+    @ddt.data({'offset': 'first'}, {'limit': -1})
+    def test_list_report_downloads_bad_page(self, params):
+        url = reverse('list_report_downloads', kwargs={'course_id': self.course.id.to_deprecated_string()})
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 400)
+
     @ddt.data(*REPORTS_DATA)
     @ddt.unpack
     @valid_problem_location
@@ -5,6 +5,7 @@ import json
 from mock import patch
 
 from courseware.models import OfflineComputedGrade
+from courseware.tests.factories import StudentModuleFactory
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory
 from xmodule.graders import Score
@@ -13,7 +14,7 @@ from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
 
-from ..offline_gradecalc import offline_grade_calculation, student_grades
+from ..offline_gradecalc import offline_grade_calculation, offline_student_grades, student_grades
 
 
 def mock_grade(_student, _request, course, **_kwargs):
@@ -105,3 +106,41 @@ class TestOfflineGradeCalc(ModuleStoreTestCase):
         with patch('courseware.grades.grade', side_effect=AssertionError('Should not re-grade')):
             result = student_grades(self.user, None, self.course, use_offline=True)
         self.assertEqual(result, mock_grade(self.user, None, self.course))
+
+    def test_offline_student_grades(self):
+        """ Test that offline_student_grades() returns the saved gradesets of the students who have one """
+        other_user = UserFactory.create()
+        self.assertEqual(offline_student_grades([self.user, other_user], self.course.id), {})
+        offline_grade_calculation(self.course.id)
+        self.assertEqual(
+            offline_student_grades([self.user, other_user], self.course.id),
+            {self.user.id: mock_grade(self.user, None, self.course)}
+        )
+
+    def test_incremental(self):
+        """ Test that an incremental calculation only grades the students whose grades may have changed """
+        other_user = UserFactory.create()
+        CourseEnrollment.enroll(other_user, self.course.id)
+        with patch('courseware.grades.grade', side_effect=mock_grade) as grade:
+            # Grades were never computed, so everybody is graded
+            offline_grade_calculation(self.course.id, incremental=True)
+            self.assertEqual(grade.call_count, 2)
+
+            grade.reset_mock()
+            offline_grade_calculation(self.course.id, incremental=True)
+            self.assertEqual(grade.call_count, 0)
+
+            StudentModuleFactory.create(student=self.user, course_id=self.course.id)
+            offline_grade_calculation(self.course.id, incremental=True)
+            self.assertEqual([args[0] for args, __ in grade.call_args_list], [self.user])
+
+        self.assertEqual(OfflineComputedGrade.objects.filter(course_id=self.course.id).count(), 2)
+
+    def test_incremental_course_published(self):
+        """ Test that everybody is graded once a new version of the course is published """
+        offline_grade_calculation(self.course.id)
+        with patch('instructor.offline_gradecalc.modulestore') as mock_modulestore:
+            mock_modulestore.return_value.get_structure_version.return_value = 'new version'
+            with patch('courseware.grades.grade', side_effect=mock_grade) as grade:
+                offline_grade_calculation(self.course.id, incremental=True)
+        self.assertEqual(grade.call_count, 1)
@@ -36,6 +36,7 @@ from util.file import (
     FileValidationException, UniversalNewlineIterator
 )
 from util.json_request import JsonResponse, JsonResponseBadRequest
+from util.query import route_reads_to_replica
 from instructor.views.instructor_task_helpers import extract_email_features, extract_task_features
 
 from microsite_configuration import microsite
@@ -955,6 +956,7 @@ def get_grading_config(request, course_id):
 @ensure_csrf_cookie
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
 @require_level('staff')
+@route_reads_to_replica()
 def get_sale_records(request, course_id, csv=False):  # pylint: disable=unused-argument, redefined-outer-name
     """
     return the summary of all sales records for a particular course
@@ -986,6 +988,7 @@ def get_sale_records(request, course_id, csv=False):  # pylint: disable=unused-a
 @ensure_csrf_cookie
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
 @require_level('staff')
+@route_reads_to_replica()
 def get_sale_order_records(request, course_id):  # pylint: disable=unused-argument, redefined-outer-name
     """
     return the summary of all sales records for a particular course
@@ -1092,6 +1095,7 @@ def re_validate_invoice(obj_invoice):
 @ensure_csrf_cookie
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
 @require_level('staff')
+@route_reads_to_replica()
 def get_students_features(request, course_id, csv=False):  # pylint: disable=redefined-outer-name
     """
     Respond with json which contains a summary of all enrolled students profile information.
@@ -1242,6 +1246,7 @@ def add_users_to_cohorts(request, course_id):
 @ensure_csrf_cookie
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
 @require_level('staff')
+@route_reads_to_replica()
 def get_coupon_codes(request, course_id):  # pylint: disable=unused-argument
     """
     Respond with csv which contains a summary of all Active Coupons.
@@ -2119,37 +2124,49 @@ def list_entrance_exam_instructor_tasks(request, course_id):  # pylint: disable=
 @ensure_csrf_cookie
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
 @require_level('staff')
-def list_report_downloads(_request, course_id):
+def list_report_downloads(request, course_id):
     """
     List grade CSV files that are available for download for this course.
-    """
-    course_id = SlashSeparatedCourseKey.from_deprecated_string(course_id)
-    report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
 
-    response_payload = {
-        'downloads': [
-            dict(name=name, url=url, link='<a href="{}">{}</a>'.format(url, name))
-            for name, url in report_store.links_for(course_id)
-        ]
-    }
-    return JsonResponse(response_payload)
+    Takes optional `offset` and `limit` query parameters to list a single
+    page of the files, newest first.
+    """
+    return _list_report_store_downloads(request, course_id, 'GRADES_DOWNLOAD')
 
 
 @ensure_csrf_cookie
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
 @require_level('staff')
 @require_finance_admin
-def list_financial_report_downloads(_request, course_id):
+def list_financial_report_downloads(request, course_id):
     """
     List grade CSV files that are available for download for this course.
+
+    Takes the same optional query parameters as `list_report_downloads`.
+    """
+    return _list_report_store_downloads(request, course_id, 'FINANCIAL_REPORTS')
+
+
+def _list_report_store_downloads(request, course_id, config_name):
+    """
+    Respond with the page of files in the `config_name` report store for
+    `course_id` requested by the `offset` and `limit` query parameters.
     """
     course_id = SlashSeparatedCourseKey.from_deprecated_string(course_id)
-    report_store = ReportStore.from_config(config_name='FINANCIAL_REPORTS')
+    report_store = ReportStore.from_config(config_name=config_name)
+
+    try:
+        offset = int(request.GET.get('offset', 0))
+        limit = int(request.GET['limit']) if 'limit' in request.GET else None
+    except ValueError:
+        offset = limit = -1
+    if offset < 0 or (limit is not None and limit < 0):
+        return HttpResponseBadRequest(_("The offset and limit must be positive integers."))
 
     response_payload = {
         'downloads': [
             dict(name=name, url=url, link='<a href="{}">{}</a>'.format(url, name))
-            for name, url in report_store.links_for(course_id)
+            for name, url in report_store.links_for(course_id, offset=offset, limit=limit)
         ]
     }
     return JsonResponse(response_payload)
@@ -2203,6 +2220,33 @@ def problem_grade_report(request, course_id):
         })
 
 
+@ensure_csrf_cookie
+@cache_control(no_cache=True, no_store=True, must_revalidate=True)
+@require_level('staff')
+def answer_distributions_csv(request, course_id):
+    """
+    Request a CSV showing the distribution of answers to every problem
+    students have submitted in the course.
+
+    Pass `incremental=true` to only count the answers submitted since the
+    report was last generated.
+    """
+    course_key = SlashSeparatedCourseKey.from_deprecated_string(course_id)
+    incremental = request.POST.get('incremental') in ['true', 'True', True]
+    try:
+        instructor_task.api.submit_answer_distributions_csv(request, course_key, incremental)
+        success_status = _("The answer distribution report is being created."
+                           " To view the status of the report, see Pending Instructor Tasks below.")
+        return JsonResponse({"status": success_status})
+    except AlreadyRunningError:
+        already_running_status = _("An answer distribution report is already being generated."
+                                   " To view the status of the report, see Pending Instructor Tasks below."
+                                   " You will be able to download the report when it is complete.")
+        return JsonResponse({
+            "status": already_running_status
+        })
+
+
 @ensure_csrf_cookie
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
 @require_level('staff')
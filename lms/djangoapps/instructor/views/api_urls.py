@@ -93,6 +93,8 @@ urlpatterns = patterns(
         'instructor.views.api.calculate_grades_csv', name="calculate_grades_csv"),
     url(r'problem_grade_report$',
         'instructor.views.api.problem_grade_report', name="problem_grade_report"),
+    url(r'answer_distributions_csv$',
+        'instructor.views.api.answer_distributions_csv', name="answer_distributions_csv"),
 
     # Financial Report downloads..
     url(r'^list_financial_report_downloads$',
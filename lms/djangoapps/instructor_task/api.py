@@ -21,6 +21,7 @@ from instructor_task.tasks import (
     calculate_problem_responses_csv,
     calculate_grades_csv,
     calculate_problem_grade_report,
+    calculate_answer_distributions_csv,
     calculate_students_features_csv,
     cohort_students,
     enrollment_report_features_csv,
@@ -368,6 +369,23 @@ def submit_problem_grade_report(request, course_key):
     return submit_task(request, task_type, task_class, course_key, task_input, task_key)
 
 
+def submit_answer_distributions_csv(request, course_key, incremental=False):
+    """
+    Submits a task to generate a CSV containing the distribution of answers
+    to every submitted problem in the course.
+
+    If `incremental` is True, the task only counts the answers submitted
+    since it last ran, when it can.
+
+    Raises AlreadyRunningError if said CSV is already being updated.
+    """
+    task_type = 'answer_distributions_csv'
+    task_class = calculate_answer_distributions_csv
+    task_input = {'incremental': incremental}
+    task_key = ""
+    return submit_task(request, task_type, task_class, course_key, task_input, task_key)
+
+
 def submit_calculate_students_features_csv(request, course_key, features):
     """
     Submits a task to generate a CSV containing student profile info.
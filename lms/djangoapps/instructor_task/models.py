@@ -14,6 +14,7 @@ ASSUMPTIONS: modules have unique IDs, even across different module_types
 """
 from cStringIO import StringIO
 from gzip import GzipFile
+from datetime import datetime
 from uuid import uuid4
 import csv
 import json
@@ -23,11 +24,14 @@ import urllib
 
 from boto.s3.connection import S3Connection
 from boto.s3.key import Key
+from boto.utils import parse_ts
+from pytz import UTC
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models, transaction
+from django.db import models, transaction, IntegrityError
 
+from util.models import CompressedTextField
 from xmodule_django.models import CourseKeyField
 
 
@@ -190,13 +194,54 @@ class InstructorTask(models.Model):
         return json.dumps({'message': 'Task revoked before running'})
 
 
+class AnswerDistributionSnapshot(models.Model):
+    """
+    The answer counts most recently computed for a course by the answer
+    distribution report task, so that the next run only needs to read the
+    StudentModule rows modified since.
+
+    `counts_json` stores the output of `AnswerDistribution.to_json`.
+    `module_count` is the number of StudentModule rows the counts cover.
+    `last_modified` is the time the counts are exact as of; rows modified
+    after it are read again by the next run.
+    """
+    course_id = CourseKeyField(max_length=255, unique=True)
+    counts_json = CompressedTextField(blank=True)
+    module_count = models.IntegerField(default=0)
+    last_modified = models.DateTimeField(null=True)
+    updated = models.DateTimeField(auto_now=True)
+
+
+class ReportFile(models.Model):
+    """
+    Index of the files a `ReportStore` holds for a course, so that listing
+    the available downloads doesn't require listing the storage itself.
+
+    `store` identifies the storage location (see `ReportStore.store_name`),
+    and `stored` is when the file was last written.
+    """
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('store', 'course_id', 'filename'),)
+
+    store = models.CharField(max_length=255)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    filename = models.CharField(max_length=255)
+    stored = models.DateTimeField(db_index=True)
+
+
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
     download. Should probably refactor later to create a ReportFile object that
     can simply be appended to for the sake of memory efficiency, rather than
     passing in the whole dataset. Doing that for now just because it's simpler.
+
+    Every file written is recorded in the `ReportFile` index, which
+    `links_for` reads instead of listing the underlying storage. Subclasses
+    set `store_name`, and implement `url_for` and `list_files`.
     """
+    store_name = None
+
     @classmethod
     def from_config(cls, config_name):
         """
@@ -218,6 +263,99 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def url_for(self, course_id, filename):
+        """
+        Return a URL from which the file `filename` for `course_id` can be
+        downloaded.
+        """
+        raise NotImplementedError
+
+    def list_files(self, course_id):
+        """
+        Return a list of `(filename, stored)` tuples for all the files in the
+        storage for `course_id`, where `stored` is an aware datetime.
+        """
+        raise NotImplementedError
+
+    def index_file(self, course_id, filename):
+        """
+        Record in the `ReportFile` index that `filename` was just stored for
+        `course_id`.
+        """
+        if not ReportFile.objects.filter(store=self.store_name, course_id=course_id).exists():
+            # Index the files stored before the index existed first, so that
+            # the course having index entries always means it was backfilled.
+            self._backfill_index(course_id)
+
+        now = datetime.now(UTC)
+        report_file, created = ReportFile.objects.get_or_create(
+            store=self.store_name,
+            course_id=course_id,
+            filename=filename,
+            defaults={'stored': now},
+        )
+        if not created:
+            report_file.stored = now
+            report_file.save()
+
+    def _backfill_index(self, course_id):
+        """
+        Record in the `ReportFile` index the files stored for `course_id`
+        before the index existed.
+        """
+        report_files = [
+            ReportFile(store=self.store_name, course_id=course_id, filename=filename, stored=stored)
+            for filename, stored in self.list_files(course_id)
+        ]
+        if not report_files:
+            return
+
+        savepoint = transaction.savepoint()
+        try:
+            ReportFile.objects.bulk_create(report_files)
+        except IntegrityError:
+            # Another process indexed some of the files at the same time, so
+            # only add the ones still missing.
+            transaction.savepoint_rollback(savepoint)
+            for report_file in report_files:
+                ReportFile.objects.get_or_create(
+                    store=report_file.store,
+                    course_id=report_file.course_id,
+                    filename=report_file.filename,
+                    defaults={'stored': report_file.stored},
+                )
+        else:
+            transaction.savepoint_commit(savepoint)
+
+    def _indexed_files(self, course_id):
+        """
+        Return a queryset of the `ReportFile` index for `course_id`, newest
+        first.
+
+        Courses whose files were all stored before the index existed are
+        indexed from the storage the first time they are listed or a file is
+        stored for them.
+        """
+        indexed_files = ReportFile.objects.filter(store=self.store_name, course_id=course_id)
+        if not indexed_files.exists():
+            self._backfill_index(course_id)
+        return indexed_files.order_by('-stored', '-id')
+
+    def links_for(self, course_id, offset=0, limit=None):
+        """
+        For a given `course_id`, return a list of `(filename, url)` tuples,
+        newest first. `url` can be plugged straight into an href.
+
+        Pass `offset` and `limit` to get a single page of the list. URLs are
+        only generated for the files in that page.
+        """
+        filenames = self._indexed_files(course_id).values_list('filename', flat=True)
+        if limit is None:
+            filenames = filenames[offset:]
+        else:
+            filenames = filenames[offset:offset + limit]
+        return [(filename, self.url_for(course_id, filename)) for filename in filenames]
+
 
 class S3ReportStore(ReportStore):
     """
@@ -233,6 +371,7 @@ class S3ReportStore(ReportStore):
     """
     def __init__(self, bucket_name, root_path):
         self.root_path = root_path
+        self.store_name = u"s3://{}/{}".format(bucket_name, root_path)
 
         conn = S3Connection(
             settings.AWS_ACCESS_KEY_ID,
@@ -309,6 +448,7 @@ class S3ReportStore(ReportStore):
                 "Content-Type": content_type,
             }
         )
+        self.index_file(course_id, filename)
 
     def store_rows(self, course_id, filename, rows):
         """
@@ -327,15 +467,21 @@ class S3ReportStore(ReportStore):
 
         self.store(course_id, filename, output_buffer)
 
-    def links_for(self, course_id):
+    def url_for(self, course_id, filename):
+        """
+        Return a signed URL for the S3 key of `filename`, good for five
+        minutes. Signing doesn't need a request to S3.
+        """
+        return self.key_for(course_id, filename).generate_url(expires_in=300)
+
+    def list_files(self, course_id):
         """
-        For a given `course_id`, return a list of `(filename, url)` tuples. `url`
-        can be plugged straight into an href
+        List the keys under the S3 prefix for `course_id`.
         """
         course_dir = self.key_for(course_id, '')
         return [
-            (key.key.split("/")[-1], key.generate_url(expires_in=300))
-            for key in sorted(self.bucket.list(prefix=course_dir.key), reverse=True, key=lambda k: k.last_modified)
+            (key.key.split("/")[-1], parse_ts(key.last_modified).replace(tzinfo=UTC))
+            for key in self.bucket.list(prefix=course_dir.key)
         ]
 
 
@@ -355,6 +501,7 @@ class LocalFSReportStore(ReportStore):
         will build a directory structure under this for each course.
         """
         self.root_path = root_path
+        self.store_name = u"file://{}".format(root_path)
         if not os.path.exists(root_path):
             os.makedirs(root_path)
 
@@ -390,6 +537,7 @@ class LocalFSReportStore(ReportStore):
 
         with open(full_path, "wb") as f:
             f.write(buff.getvalue())
+        self.index_file(course_id, filename)
 
     def store_rows(self, course_id, filename, rows):
         """
@@ -402,21 +550,22 @@ class LocalFSReportStore(ReportStore):
 
         self.store(course_id, filename, output_buffer)
 
-    def links_for(self, course_id):
+    def url_for(self, course_id, filename):
+        """
+        Return a `file://` URL for `filename`. Note that you'll need to copy
+        the URL and open it in a new browser window. Again, this class is
+        only meant for local development.
         """
-        For a given `course_id`, return a list of `(filename, url)` tuples. `url`
-        can be plugged straight into an href. Note that `LocalFSReportStore`
-        will generate `file://` type URLs, so you'll need to copy the URL and
-        open it in a new browser window. Again, this class is only meant for
-        local development.
+        return "file://" + urllib.quote(self.path_to(course_id, filename))
+
+    def list_files(self, course_id):
+        """
+        List the files in the directory for `course_id`.
         """
         course_dir = self.path_to(course_id, '')
         if not os.path.exists(course_dir):
             return []
-        files = [(filename, os.path.join(course_dir, filename)) for filename in os.listdir(course_dir)]
-        files.sort(key=lambda (filename, full_path): os.path.getmtime(full_path), reverse=True)
-
         return [
-            (filename, ("file://" + urllib.quote(full_path)))
-            for filename, full_path in files
+            (filename, datetime.fromtimestamp(os.path.getmtime(os.path.join(course_dir, filename)), UTC))
+            for filename in os.listdir(course_dir)
         ]
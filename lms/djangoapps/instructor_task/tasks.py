@@ -31,12 +31,14 @@ from instructor_task.tasks_helper import (
     run_main_task,
     BaseInstructorTask,
     perform_module_state_update,
+    perform_bulk_module_state_update,
     rescore_problem_module_state,
-    reset_attempts_module_state,
-    delete_problem_module_state,
+    reset_attempts_module_states,
+    delete_problem_module_states,
     upload_problem_responses_csv,
     upload_grades_csv,
     upload_problem_grade_report,
+    upload_answer_distributions_csv,
     upload_students_csv,
     cohort_students_and_upload,
     upload_enrollment_report,
@@ -98,8 +100,8 @@ def reset_problem_attempts(entry_id, xmodule_instance_args):
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('reset')
-    update_fcn = partial(reset_attempts_module_state, xmodule_instance_args)
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    update_fcn = partial(reset_attempts_module_states, xmodule_instance_args)
+    visit_fcn = partial(perform_bulk_module_state_update, update_fcn, None)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
@@ -120,8 +122,8 @@ def delete_problem_state(entry_id, xmodule_instance_args):
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('deleted')
-    update_fcn = partial(delete_problem_module_state, xmodule_instance_args)
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    update_fcn = partial(delete_problem_module_states, xmodule_instance_args)
+    visit_fcn = partial(perform_bulk_module_state_update, update_fcn, None)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
@@ -191,6 +193,23 @@ def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_answer_distributions_csv(entry_id, xmodule_instance_args):
+    """
+    Generate a CSV of the answers submitted to each problem in a course, and
+    push the results to an S3 bucket for download.
+    """
+    # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
+    action_name = ugettext_noop('counted')
+    TASK_LOG.info(
+        u"Task: %s, InstructorTask ID: %s, Task type: %s, Preparing for task execution",
+        xmodule_instance_args.get('task_id'), entry_id, action_name
+    )
+
+    task_fn = partial(upload_answer_distributions_csv, xmodule_instance_args)
+    return run_main_task(entry_id, task_fn, action_name)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
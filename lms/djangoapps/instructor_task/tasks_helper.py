@@ -32,6 +32,7 @@ from shoppingcart.models import (
 
 from track.views import task_track
 from util.file import course_filename_prefix_generator, UniversalNewlineIterator
+from util.query import route_reads_to_replica
 from xblock.runtime import KvsFieldData
 from xmodule.modulestore.django import modulestore
 from xmodule.split_test_module import get_split_user_partitions
@@ -39,12 +40,14 @@ from django.utils.translation import ugettext as _
 from certificates.models import (
     CertificateWhitelist,
     certificate_info_for_user,
-    CertificateStatuses
+    CertificateStatuses,
+    GeneratedCertificate,
 )
-from certificates.api import generate_user_certificates
+from certificates.api import generate_certificates_for_students
+from certificates.queue import XQueueCertInterface
 from courseware.courses import get_course_by_id, get_problems_in_section
-from courseware.grades import iterate_grades_for
-from courseware.models import StudentModule
+from courseware.grades import AnswerDistribution, StaleAnswerDistribution, iterate_grades_for
+from courseware.models import StudentModule, StudentModuleHistory, chunks
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
 from instructor_analytics.basic import (
@@ -54,13 +57,12 @@ from instructor_analytics.basic import (
     list_problem_responses
 )
 from instructor_analytics.csvs import format_dictlist
-from instructor_task.models import ReportStore, InstructorTask, PROGRESS
-from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
-from openedx.core.djangoapps.course_groups.cohorts import get_cohort
+from instructor_task.models import AnswerDistributionSnapshot, ReportStore, InstructorTask, PROGRESS
+from openedx.core.djangoapps.course_groups.cohorts import get_cohorts_for_users
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from opaque_keys.edx.keys import UsageKey
-from openedx.core.djangoapps.course_groups.cohorts import add_user_to_cohort, is_course_cohorted
+from openedx.core.djangoapps.course_groups.cohorts import add_users_to_cohorts, is_course_cohorted
 from student.models import CourseEnrollment, CourseAccessRole
 from verify_student.models import SoftwareSecurePhotoVerification
 
@@ -75,6 +77,15 @@ UPDATE_STATUS_SUCCEEDED = 'succeeded'
 UPDATE_STATUS_FAILED = 'failed'
 UPDATE_STATUS_SKIPPED = 'skipped'
 
+# number of students whose certificates are generated together
+CERTIFICATE_GENERATION_CHUNK_SIZE = 100
+# number of StudentModule rows that are updated together by bulk module state updates
+MODULE_STATE_UPDATE_CHUNK_SIZE = 1000
+# number of rows of a cohort upload that are applied together
+COHORT_ASSIGNMENT_CHUNK_SIZE = 1000
+# number of students whose cohorts and experiment groups are read together by grade reports
+EXPERIMENT_GROUPS_CHUNK_SIZE = 500
+
 # The setting name used for events when "settings" (account settings, preferences, profile information) change.
 REPORT_REQUESTED_EVENT_NAME = u'edx.instructor.report.requested'
 
@@ -327,6 +338,40 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
 
     """
     start_time = time()
+    modules_to_update, problems = _get_modules_to_update(course_id, task_input, filter_fcn)
+
+    task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
+    task_progress.update_task_state()
+
+    for module_to_update in modules_to_update:
+        task_progress.attempted += 1
+        module_descriptor = problems[unicode(module_to_update.module_state_key)]
+        # There is no try here:  if there's an error, we let it throw, and the task will
+        # be marked as FAILED, with a stack trace.
+        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
+            update_status = update_fcn(module_descriptor, module_to_update)
+            if update_status == UPDATE_STATUS_SUCCEEDED:
+                # If the update_fcn returns true, then it performed some kind of work.
+                # Logging of failures is left to the update_fcn itself.
+                task_progress.succeeded += 1
+            elif update_status == UPDATE_STATUS_FAILED:
+                task_progress.failed += 1
+            elif update_status == UPDATE_STATUS_SKIPPED:
+                task_progress.skipped += 1
+            else:
+                raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+
+    return task_progress.update_task_state()
+
+
+def _get_modules_to_update(course_id, task_input, filter_fcn):
+    """
+    Returns a (queryset, problems) tuple for a module state update task.
+
+    The queryset selects the StudentModule instances to update, as described in
+    `perform_module_state_update`, and `problems` maps the string form of each
+    problem's usage key to its descriptor.
+    """
     usage_keys = []
     problem_url = task_input.get('problem_url')
     entrance_exam_url = task_input.get('entrance_exam_url')
@@ -367,19 +412,54 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     if filter_fcn is not None:
         modules_to_update = filter_fcn(modules_to_update)
 
+    return modules_to_update, problems
+
+
+def _iterate_in_pk_chunks(queryset, chunk_size):
+    """
+    Yields the instances selected by `queryset` as lists of at most `chunk_size`
+    instances, in primary key order.
+
+    Each chunk is fetched with its own query that starts after the last primary key
+    of the previous chunk, so rows may be updated or deleted while iterating.
+    """
+    queryset = queryset.order_by('pk')
+    chunk = list(queryset[:chunk_size])
+    while chunk:
+        yield chunk
+        chunk = list(queryset.filter(pk__gt=chunk[-1].pk)[:chunk_size])
+
+
+def perform_bulk_module_state_update(bulk_update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
+    """
+    Performs generic update by visiting chunks of StudentModule instances with the bulk_update_fcn provided.
+
+    This is the bulk counterpart of `perform_module_state_update`, for updates that only need the
+    StudentModule rows themselves, and not an xmodule instance for each of them.  The StudentModule
+    instances are selected in the same way, and are read in primary key order in chunks of
+    `MODULE_STATE_UPDATE_CHUNK_SIZE`.
+
+    The `bulk_update_fcn` is called with each chunk, as a list of StudentModules, and returns a list with
+    one of the UPDATE_STATUS_* values for each of them.  Task progress is updated after every chunk.
+
+    The return value is the same dict of the task's results as for `perform_module_state_update`.
+    """
+    start_time = time()
+    modules_to_update, __ = _get_modules_to_update(course_id, task_input, filter_fcn)
+
     task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
     task_progress.update_task_state()
 
-    for module_to_update in modules_to_update:
-        task_progress.attempted += 1
-        module_descriptor = problems[unicode(module_to_update.module_state_key)]
+    for modules_chunk in _iterate_in_pk_chunks(modules_to_update.select_related('student'),
+                                               MODULE_STATE_UPDATE_CHUNK_SIZE):
+        task_progress.attempted += len(modules_chunk)
         # There is no try here:  if there's an error, we let it throw, and the task will
         # be marked as FAILED, with a stack trace.
-        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
-            update_status = update_fcn(module_descriptor, module_to_update)
+        action_tags = [u'action:{name}'.format(name=action_name)]
+        with dog_stats_api.timer('instructor_tasks.module.time.chunk', tags=action_tags):
+            update_statuses = bulk_update_fcn(modules_chunk)
+        for update_status in update_statuses:
             if update_status == UPDATE_STATUS_SUCCEEDED:
-                # If the update_fcn returns true, then it performed some kind of work.
-                # Logging of failures is left to the update_fcn itself.
                 task_progress.succeeded += 1
             elif update_status == UPDATE_STATUS_FAILED:
                 task_progress.failed += 1
@@ -387,6 +467,7 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
                 task_progress.skipped += 1
             else:
                 raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+        task_progress.update_task_state()
 
     return task_progress.update_task_state()
 
@@ -553,45 +634,65 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
 
 
 @transaction.autocommit
-def reset_attempts_module_state(xmodule_instance_args, _module_descriptor, student_module):
+def reset_attempts_module_states(xmodule_instance_args, student_modules):
     """
-    Resets problem attempts to zero for specified `student_module`.
+    Resets problem attempts to zero for each of `student_modules`.
+
+    For use with `perform_bulk_module_state_update`.  The reset modules are
+    written with a single bulk update and a single bulk insert of history, and
+    their tracking events are emitted once the chunk has been saved.
 
-    Returns a status of UPDATE_STATUS_SUCCEEDED if a problem has non-zero attempts
-    that are being reset, and UPDATE_STATUS_SKIPPED otherwise.
+    Returns a list with a status of UPDATE_STATUS_SUCCEEDED for each module with
+    non-zero attempts that are being reset, and UPDATE_STATUS_SKIPPED otherwise.
     """
-    update_status = UPDATE_STATUS_SKIPPED
-    problem_state = json.loads(student_module.state) if student_module.state else {}
-    if 'attempts' in problem_state:
-        old_number_of_attempts = problem_state["attempts"]
-        if old_number_of_attempts > 0:
-            problem_state["attempts"] = 0
-            # convert back to json and save
+    update_statuses = []
+    reset_modules = []
+    old_attempts = []
+    for student_module in student_modules:
+        problem_state = json.loads(student_module.state) if student_module.state else {}
+        if problem_state.get('attempts', 0) > 0:
+            old_attempts.append(problem_state['attempts'])
+            problem_state['attempts'] = 0
             student_module.state = json.dumps(problem_state)
-            student_module.save()
-            # get request-related tracking information from args passthrough,
-            # and supplement with task-specific information:
-            track_function = _get_track_function_for_task(student_module.student, xmodule_instance_args)
-            event_info = {"old_attempts": old_number_of_attempts, "new_attempts": 0}
-            track_function('problem_reset_attempts', event_info)
-            update_status = UPDATE_STATUS_SUCCEEDED
+            reset_modules.append(student_module)
+            update_statuses.append(UPDATE_STATUS_SUCCEEDED)
+        else:
+            update_statuses.append(UPDATE_STATUS_SKIPPED)
 
-    return update_status
+    with transaction.commit_on_success():
+        StudentModule.save_states_in_bulk(reset_modules)
+        StudentModuleHistory.save_history_in_bulk(reset_modules)
+
+    for student_module, old_number_of_attempts in zip(reset_modules, old_attempts):
+        # get request-related tracking information from args passthrough,
+        # and supplement with task-specific information:
+        track_function = _get_track_function_for_task(student_module.student, xmodule_instance_args)
+        event_info = {"old_attempts": old_number_of_attempts, "new_attempts": 0}
+        track_function('problem_reset_attempts', event_info)
+
+    return update_statuses
 
 
 @transaction.autocommit
-def delete_problem_module_state(xmodule_instance_args, _module_descriptor, student_module):
+def delete_problem_module_states(xmodule_instance_args, student_modules):
     """
-    Delete the StudentModule entry.
+    Delete the StudentModule entries for each of `student_modules`.
 
-    Always returns UPDATE_STATUS_SUCCEEDED, indicating success, if it doesn't raise an exception due to database error.
+    For use with `perform_bulk_module_state_update`: all of the entries are
+    deleted by a single queryset delete.
+
+    Always returns a status of UPDATE_STATUS_SUCCEEDED for each module, if it
+    doesn't raise an exception due to database error.
     """
-    student_module.delete()
-    # get request-related tracking information from args passthrough,
-    # and supplement with task-specific information:
-    track_function = _get_track_function_for_task(student_module.student, xmodule_instance_args)
-    track_function('problem_delete_state', {})
-    return UPDATE_STATUS_SUCCEEDED
+    with transaction.commit_on_success():
+        StudentModule.objects.filter(pk__in=[student_module.pk for student_module in student_modules]).delete()
+
+    for student_module in student_modules:
+        # get request-related tracking information from args passthrough,
+        # and supplement with task-specific information:
+        track_function = _get_track_function_for_task(student_module.student, xmodule_instance_args)
+        track_function('problem_delete_state', {})
+    return [UPDATE_STATUS_SUCCEEDED] * len(student_modules)
 
 
 def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD'):
@@ -651,6 +752,7 @@ def upload_exec_summary_to_store(data_dict, report_name, course_id, generated_at
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": report_name})
 
 
+@route_reads_to_replica()
 def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
     """
     For a given `course_id`, generate a grades CSV file for all students that
@@ -705,7 +807,30 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
         current_step,
         total_enrolled_students
     )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
+    # The cohorts and experiment groups of the students are read a chunk of
+    # students at a time, just before the students of the chunk are graded.
+    student_cohorts = {}
+    experiment_groups = {}
+
+    def students_with_groups():
+        """
+        Yield the enrolled students, loading the cohorts and experiment groups
+        of each chunk of them into `student_cohorts` and `experiment_groups`
+        first.
+        """
+        for students in chunks(enrolled_students, EXPERIMENT_GROUPS_CHUNK_SIZE):
+            student_cohorts.clear()
+            if course_is_cohorted:
+                student_cohorts.update(get_cohorts_for_users(course_id, [student.id for student in students]))
+            experiment_groups.clear()
+            for partition in experiment_partitions:
+                groups = partition.scheme.get_groups_for_users(course_id, students, partition)
+                for user_id, group in groups.iteritems():
+                    experiment_groups[(user_id, partition.id)] = group
+            for student in students:
+                yield student
+
+    for student, gradeset, err_msg in iterate_grades_for(course, students_with_groups()):
         # Periodically update task status (this is a cache write)
         if task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
@@ -741,12 +866,12 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
 
             cohorts_group_name = []
             if course_is_cohorted:
-                group = get_cohort(student, course_id, assign=False)
+                group = student_cohorts.get(student.id)
                 cohorts_group_name.append(group.name if group else '')
 
             group_configs_group_names = []
             for partition in experiment_partitions:
-                group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
+                group = experiment_groups.get((student.id, partition.id))
                 group_configs_group_names.append(group.name if group else '')
 
             enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
@@ -855,6 +980,7 @@ def _order_problems(blocks):
     return problems
 
 
+@route_reads_to_replica()
 def upload_problem_responses_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing
@@ -889,6 +1015,7 @@ def upload_problem_responses_csv(_xmodule_instance_args, _entry_id, course_id, t
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+@route_reads_to_replica()
 def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
     """
     Generate a CSV containing all students' problem grades within a given
@@ -963,6 +1090,81 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
     return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
 
 
+@route_reads_to_replica()
+def upload_answer_distributions_csv(_xmodule_instance_args, entry_id, course_id, task_input, action_name):
+    """
+    For a given `course_id`, generate a CSV file containing the distribution
+    of answers to every submitted problem, and store using a `ReportStore`.
+
+    If `task_input['incremental']` is set, the answer counts saved by the
+    previous run are brought up to date instead of being recounted, falling
+    back to a full count if they can't be. The counts are saved either way.
+    """
+    start_time = time()
+    start_date = datetime.now(UTC)
+
+    distribution = AnswerDistribution(course_id)
+    if task_input.get('incremental'):
+        try:
+            snapshot = AnswerDistributionSnapshot.objects.get(course_id=course_id)
+            distribution = AnswerDistribution.from_json(
+                course_id, snapshot.counts_json, snapshot.module_count, snapshot.last_modified
+            )
+        except AnswerDistributionSnapshot.DoesNotExist:
+            pass
+
+    def _submitted_problems_count(since):
+        """Return the number of submitted problems modified after `since`. """
+        submitted = StudentModule.all_submitted_problems_read_only(course_id)
+        if since is not None:
+            submitted = submitted.filter(modified__gt=since)
+        return submitted.count()
+
+    task_progress = TaskProgress(action_name, _submitted_problems_count(distribution.last_modified), start_time)
+    current_step = {'step': 'Counting Answers'}
+    task_progress.update_task_state(extra_meta=current_step)
+
+    def _count_rows(num_rows):
+        """Record progress after each chunk of problems has been counted. """
+        task_progress.attempted += num_rows
+        task_progress.succeeded += num_rows
+        task_progress.update_task_state(extra_meta=current_step)
+
+    try:
+        distribution.update(progress_callback=_count_rows)
+    except StaleAnswerDistribution as exc:
+        TASK_LOG.info(
+            u"Task: %s, course: %s, recounting answer distribution from scratch: %s",
+            entry_id, course_id, exc.message
+        )
+        distribution = AnswerDistribution(course_id)
+        task_progress.total = _submitted_problems_count(None)
+        task_progress.attempted = task_progress.succeeded = 0
+        distribution.update(progress_callback=_count_rows)
+
+    snapshot, __ = AnswerDistributionSnapshot.objects.get_or_create(course_id=course_id)
+    snapshot.counts_json = distribution.to_json()
+    snapshot.module_count = distribution.module_count
+    snapshot.last_modified = distribution.last_modified
+    snapshot.save()
+
+    rows = [['url_name', 'display name', 'answer id', 'answer', 'count']]
+    rows.extend(
+        [url_name, display_name, answer_id, answer, count]
+        for (url_name, display_name, answer_id), answers in sorted(distribution.by_problem().items())
+        for answer, count in answers.iteritems()
+    )
+
+    current_step = {'step': 'Uploading CSV'}
+    task_progress.update_task_state(extra_meta=current_step)
+
+    # Perform the upload
+    upload_csv_to_report_store(rows, 'answer_distribution', course_id, start_date)
+
+    return task_progress.update_task_state(extra_meta=current_step)
+
+
+@route_reads_to_replica()
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing profile
@@ -996,6 +1198,7 @@ def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+@route_reads_to_replica()
 def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing profile
@@ -1116,6 +1319,7 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+@route_reads_to_replica()
 def upload_may_enroll_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing
@@ -1231,6 +1435,7 @@ def get_executive_report(course_id):
     }
 
 
+@route_reads_to_replica()
 def upload_exec_summary_report(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=invalid-name
     """
     For a given `course_id`, generate a html report containing information,
@@ -1294,6 +1499,7 @@ def upload_exec_summary_report(_xmodule_instance_args, _entry_id, course_id, _ta
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+@route_reads_to_replica()
 def upload_proctored_exam_results_report(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=invalid-name
     """
     For a given `course_id`, generate a CSV file containing
@@ -1330,6 +1536,11 @@ def generate_students_certificates(
     """
     For a given `course_id`, generate certificates for all students
     that are enrolled.
+
+    Eligible students are processed in chunks of
+    `CERTIFICATE_GENERATION_CHUNK_SIZE`: each chunk is graded and has its
+    certificate records written and queued together, sharing one course
+    object and one connection to the XQueue.
     """
     start_time = time()
     enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
@@ -1338,27 +1549,27 @@ def generate_students_certificates(
     current_step = {'step': 'Calculating students already have certificates'}
     task_progress.update_task_state(extra_meta=current_step)
 
-    students_require_certs = students_require_certificate(course_id, enrolled_students)
+    student_ids_require_certs = students_require_certificate(course_id, enrolled_students)
 
-    task_progress.skipped = task_progress.total - len(students_require_certs)
+    task_progress.skipped = task_progress.total - len(student_ids_require_certs)
 
     current_step = {'step': 'Generating Certificates'}
     task_progress.update_task_state(extra_meta=current_step)
 
     course = modulestore().get_course(course_id, depth=0)
-    # Generate certificate for each student
-    for student in students_require_certs:
-        task_progress.attempted += 1
-        status = generate_user_certificates(
-            student,
-            course_id,
-            course=course
-        )
-
-        if status in [CertificateStatuses.generating, CertificateStatuses.downloadable]:
-            task_progress.succeeded += 1
-        else:
-            task_progress.failed += 1
+    xqueue = XQueueCertInterface()
+    # Generate certificates for each chunk of students
+    for student_ids in chunks(student_ids_require_certs, CERTIFICATE_GENERATION_CHUNK_SIZE):
+        students = User.objects.filter(id__in=student_ids)
+        statuses = generate_certificates_for_students(students, course_id, course=course, xqueue=xqueue)
+
+        task_progress.attempted += len(statuses)
+        for status in statuses.itervalues():
+            if status in [CertificateStatuses.generating, CertificateStatuses.downloadable]:
+                task_progress.succeeded += 1
+            else:
+                task_progress.failed += 1
+        task_progress.update_task_state(extra_meta=current_step)
 
     return task_progress.update_task_state(extra_meta=current_step)
 
@@ -1367,17 +1578,23 @@ def cohort_students_and_upload(_xmodule_instance_args, _entry_id, course_id, tas
     """
     Within a given course, cohort students in bulk, then upload the results
     using a `ReportStore`.
+
+    The file is read once, and its rows are applied in chunks of
+    `COHORT_ASSIGNMENT_CHUNK_SIZE` through `add_users_to_cohorts`, which
+    resolves users and applies membership changes with a handful of queries
+    per chunk.  Task progress is reported once per chunk.
     """
     start_time = time()
     start_date = datetime.now(UTC)
 
-    # Iterate through rows to get total assignments for task progress
     with DefaultStorage().open(task_input['file_name']) as f:
-        total_assignments = 0
-        for _line in unicodecsv.DictReader(UniversalNewlineIterator(f)):
-            total_assignments += 1
+        assignments = [
+            # Try to use the 'email' field to identify the user.  If it's not present, use 'username'.
+            (row.get('email') or row.get('username'), row.get('cohort') or '')
+            for row in unicodecsv.DictReader(UniversalNewlineIterator(f), encoding='utf-8')
+        ]
 
-    task_progress = TaskProgress(action_name, total_assignments, start_time)
+    task_progress = TaskProgress(action_name, len(assignments), start_time)
     current_step = {'step': 'Cohorting Students'}
     task_progress.update_task_state(extra_meta=current_step)
 
@@ -1387,47 +1604,48 @@ def cohort_students_and_upload(_xmodule_instance_args, _entry_id, course_id, tas
     # reference to the corresponding cohort object to prevent
     # redundant cohort queries.
     cohorts_status = {}
+    existing_cohorts = dict(
+        (cohort.name, cohort)
+        for cohort in CourseUserGroup.objects.filter(
+            course_id=course_id,
+            group_type=CourseUserGroup.COHORT,
+            name__in=set(cohort_name for __, cohort_name in assignments)
+        )
+    )
+    for __, cohort_name in assignments:
+        if cohort_name not in cohorts_status:
+            cohorts_status[cohort_name] = {
+                'Cohort Name': cohort_name,
+                'Students Added': 0,
+                'Students Not Found': set(),
+                'Exists': cohort_name in existing_cohorts,
+            }
+            if cohort_name in existing_cohorts:
+                cohorts_status[cohort_name]['cohort'] = existing_cohorts[cohort_name]
 
-    with DefaultStorage().open(task_input['file_name']) as f:
-        for row in unicodecsv.DictReader(UniversalNewlineIterator(f), encoding='utf-8'):
-            # Try to use the 'email' field to identify the user.  If it's not present, use 'username'.
-            username_or_email = row.get('email') or row.get('username')
-            cohort_name = row.get('cohort') or ''
-            task_progress.attempted += 1
-
-            if not cohorts_status.get(cohort_name):
-                cohorts_status[cohort_name] = {
-                    'Cohort Name': cohort_name,
-                    'Students Added': 0,
-                    'Students Not Found': set()
-                }
-                try:
-                    cohorts_status[cohort_name]['cohort'] = CourseUserGroup.objects.get(
-                        course_id=course_id,
-                        group_type=CourseUserGroup.COHORT,
-                        name=cohort_name
-                    )
-                    cohorts_status[cohort_name]["Exists"] = True
-                except CourseUserGroup.DoesNotExist:
-                    cohorts_status[cohort_name]["Exists"] = False
-
-            if not cohorts_status[cohort_name]['Exists']:
+    for chunk in chunks(assignments, COHORT_ASSIGNMENT_CHUNK_SIZE):
+        task_progress.attempted += len(chunk)
+
+        cohort_assignments = []
+        for username_or_email, cohort_name in chunk:
+            if not cohorts_status[cohort_name]['Exists'] or not username_or_email:
                 task_progress.failed += 1
-                continue
+            else:
+                cohort_assignments.append((username_or_email, cohorts_status[cohort_name]['cohort']))
 
-            try:
-                with transaction.commit_on_success():
-                    add_user_to_cohort(cohorts_status[cohort_name]['cohort'], username_or_email)
-                cohorts_status[cohort_name]['Students Added'] += 1
-                task_progress.succeeded += 1
-            except User.DoesNotExist:
-                cohorts_status[cohort_name]['Students Not Found'].add(username_or_email)
+        results = add_users_to_cohorts(course_id, cohort_assignments)
+        for (username_or_email, cohort), (user, added) in zip(cohort_assignments, results):
+            if user is None:
+                cohorts_status[cohort.name]['Students Not Found'].add(username_or_email)
                 task_progress.failed += 1
-            except ValueError:
-                # Raised when the user is already in the given cohort
+            elif added:
+                cohorts_status[cohort.name]['Students Added'] += 1
+                task_progress.succeeded += 1
+            else:
+                # The user is already in the given cohort
                 task_progress.skipped += 1
 
-            task_progress.update_task_state(extra_meta=current_step)
+        task_progress.update_task_state(extra_meta=current_step)
 
     current_step['step'] = 'Uploading CSV'
     task_progress.update_task_state(extra_meta=current_step)
@@ -1449,14 +1667,19 @@ def cohort_students_and_upload(_xmodule_instance_args, _entry_id, course_id, tas
 
 
 def students_require_certificate(course_id, enrolled_students):
-    """ Returns list of students where certificates needs to be generated.
+    """ Returns the ids of students where certificates needs to be generated.
     Removing those students who have their certificate already generated
     from total enrolled students for given course.
+
+    Only user ids are fetched, so that the full set of enrolled `User`
+    objects is never loaded into memory.
     :param course_id:
     :param enrolled_students:
     """
     # compute those students where certificates already generated
-    students_already_have_certs = User.objects.filter(
-        ~Q(generatedcertificate__status=CertificateStatuses.unavailable),
-        generatedcertificate__course_id=course_id)
-    return list(set(enrolled_students) - set(students_already_have_certs))
+    students_already_have_certs = GeneratedCertificate.objects.filter(
+        ~Q(status=CertificateStatuses.unavailable),
+        course_id=course_id
+    ).values_list('user_id', flat=True)
+    enrolled_student_ids = enrolled_students.values_list('id', flat=True)
+    return sorted(set(enrolled_student_ids) - set(students_already_have_certs))
@@ -6,9 +6,11 @@ from cStringIO import StringIO
 import mock
 import time
 from datetime import datetime
-from unittest import TestCase
 
-from instructor_task.models import LocalFSReportStore, S3ReportStore
+from boto.utils import ISO8601_MS
+from django.test import TestCase
+
+from instructor_task.models import LocalFSReportStore, S3ReportStore, ReportFile
 from instructor_task.tests.test_base import TestReportMixin
 from opaque_keys.edx.locator import CourseLocator
 
@@ -18,7 +20,7 @@ class MockKey(object):
     Mocking a boto S3 Key object.
     """
     def __init__(self, bucket):
-        self.last_modified = datetime.now()
+        self.last_modified = datetime.utcnow().strftime(ISO8601_MS)
         self.bucket = bucket
 
     def set_contents_from_string(self, contents, headers):  # pylint: disable=unused-argument
@@ -27,7 +29,7 @@ class MockKey(object):
 
     def generate_url(self, expires_in):  # pylint: disable=unused-argument
         """ Expected method on a Key object. """
-        return "http://fake-edx-s3.edx.org/"
+        return "http://fake-edx-s3.edx.org/" + self.key
 
 
 class MockBucket(object):
@@ -59,6 +61,7 @@ class ReportStoreTestMixin(object):
     Mixin for report store tests.
     """
     def setUp(self):
+        super(ReportStoreTestMixin, self).setUp()
         self.course_id = CourseLocator(org="testx", course="coursex", run="runx")
 
     def create_report_store(self):
@@ -84,6 +87,68 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_links_for_page(self):
+        """
+        Test that ReportStore.links_for() returns a single page of links, and
+        only generates the URLs of that page.
+        """
+        report_store = self.create_report_store()
+        for filename in ['first_file', 'second_file', 'third_file']:
+            report_store.store(self.course_id, filename, StringIO())
+
+        with mock.patch.object(report_store, 'url_for', wraps=report_store.url_for) as mock_url_for:
+            links = report_store.links_for(self.course_id, offset=1, limit=1)
+
+        self.assertEqual([link[0] for link in links], ['second_file'])
+        self.assertEqual(mock_url_for.call_count, 1)
+
+    def test_links_for_rewritten_file(self):
+        """
+        Test that storing a file again moves it to the top of the list, without
+        listing it twice.
+        """
+        report_store = self.create_report_store()
+        report_store.store(self.course_id, 'rewritten_file', StringIO())
+        report_store.store(self.course_id, 'other_file', StringIO())
+        time.sleep(1)  # Ensure we have a unique timestamp.
+        report_store.store(self.course_id, 'rewritten_file', StringIO())
+
+        self.assertEqual(
+            [link[0] for link in report_store.links_for(self.course_id)],
+            ['rewritten_file', 'other_file']
+        )
+
+    def test_links_for_unindexed_files(self):
+        """
+        Test that files stored before the index existed are indexed when they
+        are first listed, and that later listings don't list the storage.
+        """
+        report_store = self.create_report_store()
+        report_store.store(self.course_id, 'old_file', StringIO())
+        ReportFile.objects.all().delete()
+
+        with mock.patch.object(report_store, 'list_files', wraps=report_store.list_files) as mock_list_files:
+            self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['old_file'])
+            self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['old_file'])
+
+        self.assertEqual(mock_list_files.call_count, 1)
+
+    def test_unindexed_files_kept_by_new_file(self):
+        """
+        Test that storing the first file since the index existed also indexes
+        the files stored before it.
+        """
+        report_store = self.create_report_store()
+        report_store.store(self.course_id, 'old_file', StringIO())
+        ReportFile.objects.all().delete()
+        time.sleep(1)  # Ensure we have a unique timestamp.
+        report_store.store(self.course_id, 'new_file', StringIO())
+
+        self.assertEqual(
+            [link[0] for link in report_store.links_for(self.course_id)],
+            ['new_file', 'old_file']
+        )
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     """
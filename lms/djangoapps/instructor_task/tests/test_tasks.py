@@ -15,7 +15,7 @@ from celery.states import SUCCESS, FAILURE
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from opaque_keys.edx.locations import i4xEncoder
 
-from courseware.models import StudentModule
+from courseware.models import StudentModule, StudentModuleHistory
 from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 
@@ -345,6 +345,24 @@ class TestResetAttemptsInstructorTask(TestInstructorTasks):
         # check that entries were reset
         self._assert_num_attempts(students, 0)
 
+    @patch('instructor_task.tasks_helper.MODULE_STATE_UPDATE_CHUNK_SIZE', 3)
+    def test_reset_in_chunks(self):
+        input_state = json.dumps({'attempts': 3})
+        num_students = 10
+        students = self._create_students_with_state(num_students, input_state)
+        # give one student no attempts, so that it is skipped
+        StudentModule.objects.filter(student=students[0]).update(state=json.dumps({'attempts': 0}))
+        history = StudentModuleHistory.objects.filter(student_module__module_state_key=self.location)
+        num_history_entries = history.count()
+        self._test_run_with_task(
+            reset_problem_attempts, 'reset', num_students - 1, expected_num_skipped=1
+        )
+        self._assert_num_attempts(students, 0)
+        # progress is reported once per chunk, as well as at the start and end of the task
+        self.assertEquals(self.current_task.update_state.call_count, 6)
+        # history is written for every reset module
+        self.assertEquals(history.count(), num_history_entries + num_students - 1)
+
     def test_reset_with_zero_attempts(self):
         initial_attempts = 0
         input_state = json.dumps({'attempts': initial_attempts})
@@ -449,6 +467,15 @@ class TestDeleteStateInstructorTask(TestInstructorTasks):
                                           student=student,
                                           module_state_key=self.location)
 
+    @patch('instructor_task.tasks_helper.MODULE_STATE_UPDATE_CHUNK_SIZE', 3)
+    def test_delete_in_chunks(self):
+        num_students = 10
+        self._create_students_with_state(num_students)
+        self._test_run_with_task(delete_problem_state, 'deleted', num_students)
+        self.assertFalse(
+            StudentModule.objects.filter(course_id=self.course.id, module_state_key=self.location).exists()
+        )
+
 
 class TestCertificateGenerationnstructorTask(TestInstructorTasks):
     """Tests instructor task that generates student certificates."""
@@ -7,9 +7,11 @@ Tests that CSV grade report generation works with unicode emails.
 
 """
 import ddt
+import json
 from mock import Mock, patch
 import tempfile
 import unicodecsv
+from django.db import connection, reset_queries
 from django.core.urlresolvers import reverse
 from django.test.utils import override_settings
 
@@ -17,8 +19,11 @@ from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
 from certificates.models import CertificateStatuses
 from certificates.tests.factories import GeneratedCertificateFactory, CertificateWhitelistFactory
 from course_modes.models import CourseMode
+from courseware.models import StudentModule
 from courseware.tests.factories import InstructorFactory
-from instructor_task.tests.test_base import InstructorTaskCourseTestCase, TestReportMixin, InstructorTaskModuleTestCase
+from instructor_task.tests.test_base import (
+    InstructorTaskCourseTestCase, TestReportMixin, InstructorTaskModuleTestCase, OPTION_1, OPTION_2
+)
 from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitionGroup
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
 import openedx.core.djangoapps.user_api.course_tag.api as course_tag_api
@@ -30,12 +35,13 @@ from student.models import CourseEnrollment, CourseEnrollmentAllowed, ManualEnro
 from verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.partitions.partitions import Group, UserPartition
-from instructor_task.models import ReportStore
+from instructor_task.models import AnswerDistributionSnapshot, ReportStore
 from instructor_task.tasks_helper import (
     cohort_students_and_upload,
     upload_problem_responses_csv,
     upload_grades_csv,
     upload_problem_grade_report,
+    upload_answer_distributions_csv,
     upload_students_csv,
     upload_may_enroll_csv,
     upload_enrollment_report,
@@ -592,6 +598,111 @@ class TestProblemGradeReport(TestReportMixin, InstructorTaskModuleTestCase):
         ])
 
 
+@patch('courseware.grades.ANSWER_DISTRIBUTION_SETTLE_TIME', 0)
+class TestAnswerDistributionsReport(TestReportMixin, InstructorTaskModuleTestCase):
+    """
+    Test that the answer distribution CSV generation works, in full and
+    incrementally.
+    """
+    def setUp(self):
+        super(TestAnswerDistributionsReport, self).setUp()
+        self.initialize_course()
+        self.define_option_problem('Problem1')
+        self.student_1 = self.create_student(u'student_1')
+        self.student_2 = self.create_student(u'student_2')
+        self.submit_student_answer(self.student_1.username, 'Problem1', [OPTION_1, OPTION_2])
+        self.submit_student_answer(self.student_2.username, 'Problem1', [OPTION_1, OPTION_1])
+
+        html_id = self.problem_location('Problem1', self.course.id).html_id()
+        self.answer_id_1 = u'{}_2_1'.format(html_id)
+        self.answer_id_2 = u'{}_3_1'.format(html_id)
+
+    def _verify_counts(self, expected_counts):
+        """
+        Verify that the last answer distribution CSV has the expected
+        (answer id, answer, count) rows.
+        """
+        self.verify_rows_in_csv(
+            [
+                {'answer id': answer_id, 'answer': answer, 'count': unicode(count)}
+                for answer_id, answer, count in expected_counts
+            ],
+            verify_order=False,
+            ignore_other_columns=True
+        )
+
+    def _set_answer(self, student, answer_id, answer):
+        """
+        Change the answer `student` has recorded for `answer_id`.
+        """
+        student_module = StudentModule.objects.get(course_id=self.course.id, student=student)
+        state = json.loads(student_module.state)
+        state['student_answers'][answer_id] = answer
+        student_module.state = json.dumps(state)
+        student_module.save()
+
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_success(self, _get_current_task):
+        result = upload_answer_distributions_csv(None, None, self.course.id, {}, 'counted')
+        self.assertDictContainsSubset({'action_name': 'counted', 'attempted': 2, 'succeeded': 2, 'total': 2}, result)
+        self._verify_counts([
+            (self.answer_id_1, OPTION_1, 2),
+            (self.answer_id_2, OPTION_1, 1),
+            (self.answer_id_2, OPTION_2, 1),
+        ])
+
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_incremental(self, _get_current_task):
+        upload_answer_distributions_csv(None, None, self.course.id, {'incremental': True}, 'counted')
+        self.assertEqual(AnswerDistributionSnapshot.objects.get(course_id=self.course.id).module_count, 2)
+
+        # Only the changed row is read the second time around
+        self._set_answer(self.student_1, self.answer_id_2, OPTION_1)
+        result = upload_answer_distributions_csv(None, None, self.course.id, {'incremental': True}, 'counted')
+        self.assertDictContainsSubset({'attempted': 1, 'succeeded': 1, 'total': 1}, result)
+        self._verify_counts([
+            (self.answer_id_1, OPTION_1, 2),
+            (self.answer_id_2, OPTION_1, 2),
+        ])
+
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_incremental_after_delete(self, _get_current_task):
+        upload_answer_distributions_csv(None, None, self.course.id, {'incremental': True}, 'counted')
+
+        # Deleted rows can't be taken out of the saved counts, so they are recounted
+        StudentModule.objects.filter(course_id=self.course.id, student=self.student_2).delete()
+        result = upload_answer_distributions_csv(None, None, self.course.id, {'incremental': True}, 'counted')
+        self.assertDictContainsSubset({'attempted': 1, 'succeeded': 1, 'total': 1}, result)
+        self._verify_counts([
+            (self.answer_id_1, OPTION_1, 1),
+            (self.answer_id_2, OPTION_2, 1),
+        ])
+        self.assertEqual(AnswerDistributionSnapshot.objects.get(course_id=self.course.id).module_count, 1)
+
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_incremental_recent_changes(self, _get_current_task):
+        # Rows modified within the settle time are reported, but only saved once they have settled
+        with patch('courseware.grades.ANSWER_DISTRIBUTION_SETTLE_TIME', 60 * 60):
+            upload_answer_distributions_csv(None, None, self.course.id, {'incremental': True}, 'counted')
+            self.assertEqual(AnswerDistributionSnapshot.objects.get(course_id=self.course.id).module_count, 0)
+
+            self._set_answer(self.student_1, self.answer_id_2, OPTION_1)
+            result = upload_answer_distributions_csv(None, None, self.course.id, {'incremental': True}, 'counted')
+            self.assertDictContainsSubset({'attempted': 2, 'succeeded': 2, 'total': 2}, result)
+            self._verify_counts([
+                (self.answer_id_1, OPTION_1, 2),
+                (self.answer_id_2, OPTION_1, 2),
+            ])
+
+        result = upload_answer_distributions_csv(None, None, self.course.id, {'incremental': True}, 'counted')
+        self.assertDictContainsSubset({'attempted': 2, 'succeeded': 2, 'total': 2}, result)
+        self._verify_counts([
+            (self.answer_id_1, OPTION_1, 2),
+            (self.answer_id_2, OPTION_1, 2),
+        ])
+        self.assertEqual(AnswerDistributionSnapshot.objects.get(course_id=self.course.id).module_count, 2)
+
+
 class TestProblemReportSplitTestContent(TestReportMixin, TestConditionalContent, InstructorTaskModuleTestCase):
     """
     Test the problem report on a course that has split tests.
@@ -1192,6 +1303,31 @@ class TestCohortStudents(TestReportMixin, InstructorTaskCourseTestCase):
             verify_order=False
         )
 
+    @patch('instructor_task.tasks_helper.COHORT_ASSIGNMENT_CHUNK_SIZE', 1)
+    def test_rows_across_chunks(self):
+        """
+        Test that later rows for the same user see the changes made by
+        earlier chunks.
+        """
+        result = self._cohort_students_and_upload(
+            u'username,email,cohort\n'
+            u'student_1\xec,,Cohort 1\n'
+            u'student_1\xec,,Cohort 1\n'
+            u'student_1\xec,,Cohort 2\n'
+            u'Invalid,,Cohort 2'
+        )
+        self.assertDictContainsSubset(
+            {'total': 4, 'attempted': 4, 'succeeded': 2, 'skipped': 1, 'failed': 1}, result
+        )
+        self.assertEqual(list(self.cohort_2.users.all()), [self.student_1])
+        self.verify_rows_in_csv(
+            [
+                dict(zip(self.csv_header_row, ['Cohort 1', 'True', '1', ''])),
+                dict(zip(self.csv_header_row, ['Cohort 2', 'True', '1', 'Invalid'])),
+            ],
+            verify_order=False
+        )
+
 
 @ddt.ddt
 @patch('instructor_task.tasks_helper.DefaultStorage', new=MockDefaultStorage)
@@ -1331,6 +1467,7 @@ class TestGradeReportEnrollmentAndCertificateInfo(TestReportMixin, InstructorTas
         self._verify_csv_data(user.username, expected_output)
 
 
+@ddt.ddt
 @override_settings(CERT_QUEUE='test-queue')
 class TestCertificateGeneration(InstructorTaskModuleTestCase):
     """
@@ -1340,9 +1477,13 @@ class TestCertificateGeneration(InstructorTaskModuleTestCase):
         super(TestCertificateGeneration, self).setUp()
         self.initialize_course()
 
-    def test_certificate_generation_for_students(self):
+    @ddt.data((100, 1), (3, 3))
+    @ddt.unpack
+    def test_certificate_generation_for_students(self, chunk_size, num_certificate_writes):
         """
-        Verify that certificates generated for all eligible students enrolled in a course.
+        Verify that certificates generated for all eligible students enrolled in a course,
+        whether the students fit in a single chunk or are spread over several, and that the
+        certificates of each chunk are written by a single query.
         """
         # create 10 students
         students = [self.create_student(username='student_{}'.format(i), email='student_{}@example.com'.format(i))
@@ -1363,12 +1504,25 @@ class TestCertificateGeneration(InstructorTaskModuleTestCase):
 
         current_task = Mock()
         current_task.update_state = Mock()
-        with self.assertNumQueries(125):
+        with patch('instructor_task.tasks_helper.CERTIFICATE_GENERATION_CHUNK_SIZE', chunk_size):
             with patch('instructor_task.tasks_helper._get_current_task') as mock_current_task:
                 mock_current_task.return_value = current_task
                 with patch('capa.xqueue_interface.XQueueInterface.send_to_queue') as mock_queue:
                     mock_queue.return_value = (0, "Successfully queued")
-                    result = generate_students_certificates(None, None, self.course.id, None, 'certificates generated')
+                    connection.use_debug_cursor = True
+                    reset_queries()
+                    try:
+                        result = generate_students_certificates(
+                            None, None, self.course.id, None, 'certificates generated'
+                        )
+                    finally:
+                        connection.use_debug_cursor = None
+        self.assertEqual(mock_queue.call_count, 5)
+        certificate_writes = [
+            query['sql'] for query in connection.queries
+            if query['sql'].startswith(('INSERT', 'UPDATE')) and 'certificates_generatedcertificate' in query['sql']
+        ]
+        self.assertEqual(len(certificate_writes), num_certificate_writes)
         self.assertDictContainsSubset(
             {
                 'action_name': 'certificates generated',
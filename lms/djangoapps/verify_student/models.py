@@ -218,6 +218,22 @@ class PhotoVerification(StatusModel):
                              or cls._earliest_allowed_date())
         ).exists()
 
+    @classmethod
+    def verified_user_ids(cls, user_ids, earliest_allowed_date=None):
+        """
+        Return the subset of `user_ids` that have satisfactorily proved their
+        identity, using a single query.
+
+        This is the bulk counterpart of `user_is_verified`, for callers
+        (such as certificate generation) that process many users at once.
+        """
+        return set(cls.objects.filter(
+            user__id__in=user_ids,
+            status="approved",
+            created_at__gte=(earliest_allowed_date
+                             or cls._earliest_allowed_date())
+        ).values_list('user_id', flat=True))
+
     @classmethod
     def verification_valid_or_pending(cls, user, earliest_allowed_date=None, queryset=None):
         """
@@ -426,8 +426,10 @@ FILE_UPLOAD_STORAGE_BUCKET_NAME = ENV_TOKENS.get('FILE_UPLOAD_STORAGE_BUCKET_NAM
 FILE_UPLOAD_STORAGE_PREFIX = ENV_TOKENS.get('FILE_UPLOAD_STORAGE_PREFIX', FILE_UPLOAD_STORAGE_PREFIX)
 
 # If there is a database called 'read_replica', you can use the use_read_replica_if_available
-# function in util/query.py, which is useful for very large database reads
+# function or the route_reads_to_replica decorator in util/query.py, which are useful for
+# very large database reads
 DATABASES = AUTH_TOKENS['DATABASES']
+READ_REPLICA_MAX_LAG = ENV_TOKENS.get('READ_REPLICA_MAX_LAG', READ_REPLICA_MAX_LAG)
 
 XQUEUE_INTERFACE = AUTH_TOKENS['XQUEUE_INTERFACE']
 
@@ -452,6 +454,13 @@ DATADOG.update(ENV_TOKENS.get("DATADOG", {}))
 if 'DATADOG_API' in AUTH_TOKENS:
     DATADOG['api_key'] = AUTH_TOKENS['DATADOG_API']
 
+# Sampling and aggregation of model metrics and call stack tracking,
+# see monitoring.instrumentation
+MODEL_INSTRUMENTATION = ENV_TOKENS.get('MODEL_INSTRUMENTATION', {})
+
+# Load the templates precompiled by the compile_mako_templates management command at startup
+MAKO_PRELOAD_TEMPLATES = ENV_TOKENS.get('MAKO_PRELOAD_TEMPLATES', MAKO_PRELOAD_TEMPLATES)
+
 # Analytics dashboard server
 ANALYTICS_SERVER_URL = ENV_TOKENS.get("ANALYTICS_SERVER_URL")
 ANALYTICS_API_KEY = AUTH_TOKENS.get("ANALYTICS_API_KEY", "")
@@ -615,6 +624,7 @@ COURSE_ABOUT_VISIBILITY_PERMISSION = ENV_TOKENS.get(
 
 # Enrollment API Cache Timeout
 ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT = ENV_TOKENS.get('ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT', 60)
+COURSE_MODE_CACHE_TIMEOUT = ENV_TOKENS.get('COURSE_MODE_CACHE_TIMEOUT', COURSE_MODE_CACHE_TIMEOUT)
 
 # PDF RECEIPT/INVOICE OVERRIDES
 PDF_RECEIPT_TAX_ID = ENV_TOKENS.get('PDF_RECEIPT_TAX_ID', PDF_RECEIPT_TAX_ID)
@@ -702,6 +712,9 @@ LTI_AGGREGATE_SCORE_PASSBACK_DELAY = ENV_TOKENS.get(
 
 ##################### Credit Provider help link ####################
 CREDIT_HELP_LINK_URL = ENV_TOKENS.get('CREDIT_HELP_LINK_URL', CREDIT_HELP_LINK_URL)
+CREDIT_REQUIREMENTS_CACHE_TIMEOUT = ENV_TOKENS.get(
+    'CREDIT_REQUIREMENTS_CACHE_TIMEOUT', CREDIT_REQUIREMENTS_CACHE_TIMEOUT
+)
 
 #### JWT configuration ####
 JWT_ISSUER = ENV_TOKENS.get('JWT_ISSUER', JWT_ISSUER)
@@ -504,6 +504,9 @@ OAUTH_OIDC_USERINFO_HANDLERS = (
 # templates
 import tempfile
 MAKO_MODULE_DIR = os.path.join(tempfile.gettempdir(), 'mako_lms')
+# Whether to load all the templates precompiled by the compile_mako_templates
+# management command at startup
+MAKO_PRELOAD_TEMPLATES = False
 MAKO_TEMPLATES = {}
 MAKO_TEMPLATES['main'] = [PROJECT_ROOT / 'templates',
                           COMMON_ROOT / 'templates',
@@ -2176,6 +2179,23 @@ FINANCIAL_REPORTS = {
     'ROOT_PATH': '/tmp/edx-s3/financial_reports',
 }
 
+###################### Read Replica Routing ######################
+# Within util.query.route_reads_to_replica (used by report tasks and
+# analytics views), reads go to the 'read_replica' database if there is one
+DATABASE_ROUTERS = ['util.query.ReadReplicaRouter']
+
+# Fall back to the primary database when the replica is more than this many
+# seconds behind it. None disables the check.
+READ_REPLICA_MAX_LAG = 300
+
+# How often the replica lag is checked, in seconds
+READ_REPLICA_LAG_CHECK_INTERVAL = 30
+
+# Apps whose models are always read from the primary database. Grading within
+# a report task updates the credit requirement statuses and eligibility, which
+# must read back what it just wrote.
+READ_REPLICA_EXCLUDED_APPS = ('instructor_task', 'djcelery', 'credit')
+
 
 #### PASSWORD POLICY SETTINGS #####
 PASSWORD_MIN_LENGTH = 8
@@ -2477,6 +2497,11 @@ COURSE_ABOUT_VISIBILITY_PERMISSION = 'see_exists'
 # Enrollment API Cache Timeout
 ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT = 60
 
+# How long the modes of a course are cached, in seconds. The cached modes are
+# also invalidated when a mode of the course is saved or deleted. 0 disables
+# the cache.
+COURSE_MODE_CACHE_TIMEOUT = 10 * 60
+
 # for Student Notes we would like to avoid too frequent token refreshes (default is 30 seconds)
 if FEATURES['ENABLE_EDXNOTES']:
     OAUTH_ID_TOKEN_EXPIRATION = 60 * 60
@@ -2626,6 +2651,11 @@ CREDIT_PROVIDER_TIMESTAMP_EXPIRATION = 15 * 60
 # The Help link to the FAQ page about the credit
 CREDIT_HELP_LINK_URL = "#"
 
+# How long the credit requirements of a course are cached, in seconds. The
+# cached requirements are also invalidated when a requirement of the course is
+# changed. 0 disables the cache.
+CREDIT_REQUIREMENTS_CACHE_TIMEOUT = 10 * 60
+
 # Default domain for the e-mail address associated with users who are created
 # via the LTI Provider feature. Note that the generated e-mail addresses are
 # not expected to be active; this setting simply allows administrators to
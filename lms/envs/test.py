@@ -217,6 +217,12 @@ CACHES = {
     },
 }
 
+# The database is rolled back between tests without the signals that invalidate
+# the cached course modes and credit requirements, so only the tests of those
+# caches turn them on.
+COURSE_MODE_CACHE_TIMEOUT = 0
+CREDIT_REQUIREMENTS_CACHE_TIMEOUT = 0
+
 # Dummy secret key for dev
 SECRET_KEY = '85920908f28904ed733fe576320db18cabd7b6cd'
 
@@ -54,6 +54,11 @@ def run():
         set_runtime_service('credit', CreditService())
         set_runtime_service('instructor', InstructorService())
 
+    # Load the precompiled templates once all the template lookup directories,
+    # including those of themes and microsites, are known
+    if settings.MAKO_PRELOAD_TEMPLATES:
+        edxmako.paths.preload_templates()
+
 
 def add_mimetypes():
     """
@@ -38,9 +38,15 @@ FOR DISABLING TRACKING-
 1. Import following at appropriate location-
     from openedx.core.djangoapps.call_stack_manager import donottrack
 NOTE - You need to import function/class you do not want to track.
+
+SAMPLING-
+The MODEL_INSTRUMENTATION setting (see monitoring.instrumentation) limits tracking
+to a sample of calls (CALL_STACK_SAMPLE_RATE), to a subset of models (MODELS), and
+bounds the number of unique call stacks remembered per entity (MAX_CALL_STACKS).
 """
 
 import logging
+import random
 import traceback
 import re
 import collections
@@ -49,6 +55,8 @@ import types
 import inspect
 from django.db.models import Manager
 
+from monitoring.instrumentation import instrumentation_setting, is_model_instrumented
+
 log = logging.getLogger(__name__)
 
 # List of regular expressions acting as filters
@@ -58,69 +66,72 @@ REGULAR_EXPS = [re.compile(x) for x in ['^.*python2.7.*$', '^.*<exec_function>.*
 # List keeping track of entities not to be tracked
 HALT_TRACKING = []
 
-STACK_BOOK = collections.defaultdict(list)
-# Dictionary which stores call logs
-# {'EntityName' : ListOf<CallStacks>}
-# CallStacks is ListOf<Frame>
+STACK_BOOK = collections.defaultdict(set)
+# Dictionary which stores the hashes of logged call stacks
+# {'EntityName' : SetOf<hash(CallStack)>}
+# CallStack is TupleOf<Frame>
 # Frame is a tuple ('FilePath','LineNumber','Function Name', 'Context')
-# {"<class 'courseware.models.StudentModule'>" : [[(file, line number, function name, context),(---,---,---)],
-#                                                 [(file, line number, function name, context),(---,---,---)]]}
+# At most MODEL_INSTRUMENTATION['MAX_CALL_STACKS'] hashes are kept per entity.
+
+
+def _is_halted(entity_name):
+    """ Checks if tracking of the current entity is halted by a @donottrack decorator.
+
+    Arguments:
+        entity_name - Name of the current entity
+    Returns:
+        True if the entity is not to be tracked right now, False otherwise
+    """
+    if not HALT_TRACKING:
+        return False
+    # if top of HALT_TRACKING is None
+    if HALT_TRACKING[-1] is None:
+        return True
+    if inspect.isclass(entity_name):
+        return issubclass(entity_name, tuple(HALT_TRACKING[-1]))
+    return any((entity_name.__name__ == x.__name__ and entity_name.__module__ == x.__module__)
+               for x in tuple(HALT_TRACKING[-1]))
 
 
 def capture_call_stack(entity_name):
     """ Logs customised call stacks in global dictionary STACK_BOOK and logs it.
 
+    Only a CALL_STACK_SAMPLE_RATE fraction of the calls have their call stack
+    captured, and model classes not switched on in MODEL_INSTRUMENTATION['MODELS']
+    are not tracked at all.
+
     Arguments:
         entity_name - entity
     """
+    if _is_halted(entity_name):
+        return
+    if inspect.isclass(entity_name) and hasattr(entity_name, '_meta') and not is_model_instrumented(entity_name):
+        return
+    if random.random() >= instrumentation_setting('CALL_STACK_SAMPLE_RATE'):
+        return
+
     # Holds temporary callstack
-    # List with each element 4-tuple(filename, line number, function name, text)
+    # Tuple with each element 4-tuple(filename, line number, function name, text)
     # and filtered with respect to regular expressions
-    temp_call_stack = [frame for frame in traceback.extract_stack()
-                       if not any(reg.match(frame[0]) for reg in REGULAR_EXPS)]
+    temp_call_stack = tuple(frame for frame in traceback.extract_stack()
+                            if not any(reg.match(frame[0]) for reg in REGULAR_EXPS))
+    # if call stack is empty
+    if not temp_call_stack:
+        return
+
+    stack_hashes = STACK_BOOK[entity_name]
+    stack_hash = hash(temp_call_stack)
+    if stack_hash in stack_hashes or len(stack_hashes) >= instrumentation_setting('MAX_CALL_STACKS'):
+        return
+    stack_hashes.add(stack_hash)
 
     final_call_stack = "".join(traceback.format_list(temp_call_stack))
-
-    def _should_get_logged(entity_name):  # pylint: disable=
-        """ Checks if current call stack of current entity should be logged or not.
-
-        Arguments:
-            entity_name - Name of the current entity
-        Returns:
-            True if the current call stack is to logged, False otherwise
-        """
-        is_class_in_halt_tracking = bool(HALT_TRACKING and inspect.isclass(entity_name) and
-                                         issubclass(entity_name, tuple(HALT_TRACKING[-1])))
-
-        is_function_in_halt_tracking = bool(HALT_TRACKING and not inspect.isclass(entity_name) and
-                                            any((entity_name.__name__ == x.__name__ and
-                                                 entity_name.__module__ == x.__module__)
-                                                for x in tuple(HALT_TRACKING[-1])))
-
-        is_top_none = HALT_TRACKING and HALT_TRACKING[-1] is None
-        # if top of STACK_BOOK is None
-        if is_top_none:
-            return False
-        # if call stack is empty
-        if not temp_call_stack:
-            return False
-
-        if HALT_TRACKING:
-            if is_class_in_halt_tracking or is_function_in_halt_tracking:
-                return False
-            else:
-                return temp_call_stack not in STACK_BOOK[entity_name]
-        else:
-            return temp_call_stack not in STACK_BOOK[entity_name]
-
-    if _should_get_logged(entity_name):
-        STACK_BOOK[entity_name].append(temp_call_stack)
-        if inspect.isclass(entity_name):
-            log.info("Logging new call stack number %s for %s:\n %s", len(STACK_BOOK[entity_name]),
-                     entity_name, final_call_stack)
-        else:
-            log.info("Logging new call stack number %s for %s.%s:\n %s", len(STACK_BOOK[entity_name]),
-                     entity_name.__module__, entity_name.__name__, final_call_stack)
+    if inspect.isclass(entity_name):
+        log.info("Logging new call stack number %s for %s:\n %s", len(stack_hashes),
+                 entity_name, final_call_stack)
+    else:
+        log.info("Logging new call stack number %s for %s.%s:\n %s", len(stack_hashes),
+                 entity_name.__module__, entity_name.__name__, final_call_stack)
 
 
 class CallStackMixin(object):
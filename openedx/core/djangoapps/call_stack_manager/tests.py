@@ -5,6 +5,7 @@ import collections
 from mock import patch
 from django.db import models
 from django.test import TestCase
+from django.test.utils import override_settings
 
 from openedx.core.djangoapps.call_stack_manager import donottrack, CallStackManager, CallStackMixin, trackit
 from openedx.core.djangoapps.call_stack_manager import core
@@ -146,7 +147,7 @@ class TestingCallStackManager(TestCase):
     """
     def setUp(self):
         core.TRACK_FLAG = True
-        core.STACK_BOOK = collections.defaultdict(list)
+        core.STACK_BOOK = collections.defaultdict(set)
         core.HALT_TRACKING = []
         super(TestingCallStackManager, self).setUp()
 
@@ -304,3 +305,25 @@ class TestingCallStackManager(TestCase):
         temp = donottrack_function()
         self.assertEqual(temp, 42)
         self.assertEqual(len(log_capt.call_args_list), 0)
+
+    @override_settings(MODEL_INSTRUMENTATION={'CALL_STACK_SAMPLE_RATE': 0})
+    def test_sampled_out(self, log_capt):
+        """ Test that no call stack is captured with a sample rate of 0 """
+        ModelMixin(id_field=1).save()
+        self.assertEqual(len(log_capt.call_args_list), 0)
+
+    @override_settings(MODEL_INSTRUMENTATION={'MODELS': ['ModelMixinCallStckMngr']})
+    def test_model_not_instrumented(self, log_capt):
+        """ Test that only the models switched on in MODELS are tracked """
+        ModelMixin(id_field=1).save()
+        self.assertEqual(len(log_capt.call_args_list), 0)
+        ModelMixinCallStckMngr(id_field=1).save()
+        self.assertEqual(log_capt.call_args[0][2], ModelMixinCallStckMngr)
+
+    @override_settings(MODEL_INSTRUMENTATION={'MAX_CALL_STACKS': 1})
+    def test_max_call_stacks(self, log_capt):
+        """ Test that no more than MAX_CALL_STACKS unique call stacks are logged per entity """
+        ModelMixin(id_field=1).save()
+        ModelMixin(id_field=1).save()
+        self.assertEqual(len(log_capt.call_args_list), 1)
+        self.assertEqual(len(core.STACK_BOOK[ModelMixin]), 1)
@@ -5,9 +5,14 @@ forums, and to the cohort admin views.
 
 import logging
 import random
+import time
+from collections import defaultdict
+from uuid import uuid4
 
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db import transaction
-from django.db.models.signals import post_save, m2m_changed
+from django.db.models.signals import post_delete, post_save, m2m_changed
 from django.dispatch import receiver
 from django.http import Http404
 from django.utils.translation import ugettext as _
@@ -34,9 +39,21 @@ def _cohort_added(sender, **kwargs):
         )
 
 
+@receiver(post_save, sender=CourseUserGroup)
+@receiver(post_delete, sender=CourseUserGroup)
+def _cohort_changed(sender, **kwargs):
+    """Invalidates the cached cohort memberships of the course when one of its cohorts is saved or deleted"""
+    instance = kwargs["instance"]
+    if instance.group_type == CourseUserGroup.COHORT:
+        _invalidate_cohort_memberships(instance.course_id)
+
+
 @receiver(m2m_changed, sender=CourseUserGroup.users.through)
 def _cohort_membership_changed(sender, **kwargs):
-    """Emits a tracking log event each time cohort membership is modified"""
+    """
+    Emits a tracking log event each time cohort membership is modified, and
+    invalidates the cached cohort memberships of the courses of the cohorts.
+    """
     def get_event_iter(user_id_iter, cohort_iter):
         return (
             {"cohort_id": cohort.id, "cohort_name": cohort.name, "user_id": user_id}
@@ -59,9 +76,9 @@ def _cohort_membership_changed(sender, **kwargs):
     if reverse:
         user_id_iter = [instance.id]
         if action == "pre_clear":
-            cohort_iter = instance.course_groups.filter(group_type=CourseUserGroup.COHORT)
+            cohort_iter = list(instance.course_groups.filter(group_type=CourseUserGroup.COHORT))
         else:
-            cohort_iter = CourseUserGroup.objects.filter(pk__in=pk_set, group_type=CourseUserGroup.COHORT)
+            cohort_iter = list(CourseUserGroup.objects.filter(pk__in=pk_set, group_type=CourseUserGroup.COHORT))
     else:
         cohort_iter = [instance] if instance.group_type == CourseUserGroup.COHORT else []
         if action == "pre_clear":
@@ -69,6 +86,9 @@ def _cohort_membership_changed(sender, **kwargs):
         else:
             user_id_iter = pk_set
 
+    for course_key in set(cohort.course_id for cohort in cohort_iter):
+        _invalidate_cohort_memberships(course_key)
+
     for event in get_event_iter(user_id_iter, cohort_iter):
         tracker.emit(event_name, event)
 
@@ -204,6 +224,120 @@ def get_cohort(user, course_key, assign=True, use_cached=False):
     return request_cache.data.setdefault(cache_key, cohort)
 
 
+# The cohort memberships read by get_cohorts_for_users are cached per course,
+# under a version that is replaced whenever a cohort or cohort membership of
+# the course changes, which invalidates all the course's entries at once.
+COHORT_MEMBERSHIP_CACHE_TIMEOUT = 24 * 60 * 60
+
+# The version is replaced when a change is made, which may be before the
+# transaction making it commits. Until this many seconds after the latest
+# change, memberships read from the database may predate it, so they aren't
+# cached.
+COHORT_MEMBERSHIP_SETTLE_TIME = 5 * 60
+
+# Users without a cohort are cached with this id, since cache.get_many can't
+# tell a cached None from a miss.
+_NO_COHORT_ID = 0
+
+
+def _cohort_membership_version_key(course_key):
+    """
+    Returns the cache key of the version of the course's cached cohort memberships.
+    """
+    return u"cohorts.membership_version.{}".format(course_key)
+
+
+def _cohort_membership_version(course_key):
+    """
+    Returns a (version, changed) tuple for the course's cached cohort
+    memberships, where `changed` is when the version was last replaced (0 if
+    it hasn't been since it was cached), or None if the cache doesn't keep it
+    (e.g. it is a dummy cache).
+    """
+    version_key = _cohort_membership_version_key(course_key)
+    cache.add(version_key, (uuid4().hex, 0), COHORT_MEMBERSHIP_CACHE_TIMEOUT)
+    return cache.get(version_key)
+
+
+def _invalidate_cohort_memberships(course_key):
+    """
+    Invalidates all the cached cohort memberships of the course by giving them a new version.
+    """
+    cache.set(
+        _cohort_membership_version_key(course_key), (uuid4().hex, time.time()), COHORT_MEMBERSHIP_CACHE_TIMEOUT
+    )
+
+
+def get_cohorts_for_users(course_key, user_ids):
+    """
+    Returns a dict mapping each of the given user ids to the user's cohort in
+    the course, or to None if the user has no cohort or the course isn't
+    cohorted. Unlike get_cohort, users are never assigned to a cohort here.
+
+    The memberships are read from a cache kept per course, and those missing
+    from it are read with a single query, so callers with many users should
+    pass them in chunks. What is cached is always read from the primary
+    database, and only once the course's latest change is sure to have been
+    committed (see COHORT_MEMBERSHIP_SETTLE_TIME).
+
+    Arguments:
+        course_key: CourseKey
+        user_ids: iterable of user ids
+
+    Raises:
+       Http404 if the course doesn't exist.
+    """
+    user_ids = set(user_ids)
+    if not user_ids or not is_course_cohorted(course_key):
+        return dict.fromkeys(user_ids)
+
+    version_info = _cohort_membership_version(course_key)
+    version = version_info[0] if version_info else None
+    cacheable = version is not None and time.time() - version_info[1] >= COHORT_MEMBERSHIP_SETTLE_TIME
+    # Reads made for the cache don't go to a read replica, which may lag behind
+    database = 'default' if cacheable else None
+    membership_keys = dict(
+        (user_id, u"cohorts.membership.{}.{}.{}".format(course_key, version, user_id)) for user_id in user_ids
+    )
+    cohorts_key = u"cohorts.cohorts.{}.{}".format(course_key, version)
+    cached = cache.get_many(membership_keys.values() + [cohorts_key]) if version else {}
+
+    cohort_ids = {}
+    for user_id, membership_key in membership_keys.iteritems():
+        if membership_key in cached:
+            cohort_ids[user_id] = cached[membership_key]
+
+    missing_user_ids = user_ids.difference(cohort_ids)
+    if missing_user_ids:
+        memberships = dict(CourseUserGroup.users.through.objects.using(database).filter(
+            user__in=missing_user_ids,
+            courseusergroup__course_id=course_key,
+            courseusergroup__group_type=CourseUserGroup.COHORT,
+        ).values_list('user', 'courseusergroup'))
+        missing_cohort_ids = dict(
+            (user_id, memberships.get(user_id, _NO_COHORT_ID)) for user_id in missing_user_ids
+        )
+        cohort_ids.update(missing_cohort_ids)
+        if cacheable:
+            cache.set_many(
+                dict((membership_keys[user_id], cohort_id) for user_id, cohort_id in missing_cohort_ids.iteritems()),
+                COHORT_MEMBERSHIP_CACHE_TIMEOUT
+            )
+
+    cohorts_by_id = cached.get(cohorts_key)
+    if cohorts_by_id is None or not set(cohort_ids.itervalues()).issubset(cohorts_by_id.keys() + [_NO_COHORT_ID]):
+        cohorts_by_id = dict(
+            (cohort.id, cohort)
+            for cohort in CourseUserGroup.objects.using(database).filter(
+                course_id=course_key, group_type=CourseUserGroup.COHORT
+            )
+        )
+        if cacheable:
+            cache.set(cohorts_key, cohorts_by_id, COHORT_MEMBERSHIP_CACHE_TIMEOUT)
+
+    return dict((user_id, cohorts_by_id.get(cohort_id)) for user_id, cohort_id in cohort_ids.iteritems())
+
+
 def migrate_cohort_settings(course):
     """
     Migrate all the cohort settings associated with this course from modulestore to mysql.
@@ -374,6 +508,106 @@ def add_user_to_cohort(cohort, username_or_email):
     return (user, previous_cohort_name)
 
 
+def add_users_to_cohorts(course_key, assignments):
+    """
+    Add many users to cohorts in a course at once.
+
+    This is the bulk counterpart of `add_user_to_cohort`.  Users are looked
+    up with one query for emails and one for usernames, their current cohort
+    memberships are read with a single query, and the resulting changes are
+    applied with one remove and one add per cohort, so that the m2m_changed
+    signals are sent once per cohort rather than once per user.
+
+    Assignments are applied in order, so if a user appears more than once
+    the last assignment wins, as it would with repeated calls to
+    `add_user_to_cohort`.
+
+    Arguments:
+        course_key: CourseKey
+        assignments: list of (username_or_email, cohort) pairs, where cohort
+            is a CourseUserGroup in the course.  username_or_email is
+            treated as an email if it has '@'.
+
+    Returns:
+        A list with one (user, added) pair per assignment.  user is None if
+        no user could be found, and added is False if the user was already
+        present in the cohort.
+    """
+    identifiers = {'email': set(), 'username': set()}
+    for username_or_email, __ in assignments:
+        identifiers['email' if '@' in username_or_email else 'username'].add(username_or_email)
+
+    users_by_identifier = {}
+    for field_name, values in identifiers.iteritems():
+        if values:
+            for user in User.objects.filter(**{field_name + '__in': values}):
+                users_by_identifier[getattr(user, field_name)] = user
+    # The database may match identifiers case-insensitively, as `get` would.
+    users_by_lower_identifier = dict(
+        (identifier.lower(), user) for identifier, user in users_by_identifier.iteritems()
+    )
+
+    memberships = CourseUserGroup.users.through.objects.filter(
+        user__in=[user.id for user in users_by_identifier.itervalues()],
+        courseusergroup__course_id=course_key,
+        courseusergroup__group_type=CourseUserGroup.COHORT,
+    ).values_list('user', 'courseusergroup', 'courseusergroup__name')
+    original_cohort_ids = {}
+    cohort_names = {}
+    for user_id, cohort_id, cohort_name in memberships:
+        original_cohort_ids[user_id] = cohort_id
+        cohort_names[cohort_id] = cohort_name
+
+    cohorts_by_id = {}
+    current_cohort_ids = dict(original_cohort_ids)
+    results = []
+    for username_or_email, cohort in assignments:
+        user = (
+            users_by_identifier.get(username_or_email) or
+            users_by_lower_identifier.get(username_or_email.lower())
+        )
+        if user is None:
+            results.append((None, False))
+            continue
+
+        previous_cohort_id = current_cohort_ids.get(user.id)
+        if previous_cohort_id == cohort.id:
+            results.append((user, False))
+            continue
+
+        tracker.emit(
+            "edx.cohort.user_add_requested",
+            {
+                "user_id": user.id,
+                "cohort_id": cohort.id,
+                "cohort_name": cohort.name,
+                "previous_cohort_id": previous_cohort_id,
+                "previous_cohort_name": cohort_names.get(previous_cohort_id),
+            }
+        )
+        cohorts_by_id[cohort.id] = cohort
+        cohort_names[cohort.id] = cohort.name
+        current_cohort_ids[user.id] = cohort.id
+        results.append((user, True))
+
+    removals = defaultdict(set)
+    additions = defaultdict(set)
+    for user_id, cohort_id in current_cohort_ids.iteritems():
+        original_cohort_id = original_cohort_ids.get(user_id)
+        if original_cohort_id != cohort_id:
+            if original_cohort_id is not None:
+                removals[original_cohort_id].add(user_id)
+            additions[cohort_id].add(user_id)
+
+    with transaction.commit_on_success():
+        for cohort in CourseUserGroup.objects.in_bulk(removals.keys()).itervalues():
+            cohort.users.remove(*removals[cohort.id])
+        for cohort_id, user_ids in additions.iteritems():
+            cohorts_by_id[cohort_id].users.add(*user_ids)
+
+    return results
+
+
 def get_group_info_for_cohort(cohort, use_cached=False):
     """
     Get the ids of the group and partition to which this cohort has been linked
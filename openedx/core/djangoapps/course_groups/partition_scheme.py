@@ -10,7 +10,7 @@ from courseware.masquerade import (  # pylint: disable=import-error
 )
 from xmodule.partitions.partitions import NoSuchUserPartitionGroupError
 
-from .cohorts import get_cohort, get_group_info_for_cohort
+from .cohorts import get_cohort, get_cohorts_for_users, get_group_info_for_cohort
 
 
 log = logging.getLogger(__name__)
@@ -55,6 +55,28 @@ class CohortPartitionScheme(object):
             return None
 
         cohort = get_cohort(user, course_key, use_cached=use_cached)
+        return cls._get_group_for_cohort(cohort, user_partition, use_cached=use_cached)
+
+    @classmethod
+    def get_groups_for_users(cls, course_key, users, user_partition):
+        """
+        Returns a dict mapping the id of each of the specified users to the group of the partition
+        that their cohort is linked to, or None. Users are never assigned to a cohort here, and
+        their cohorts are read with cohorts.get_cohorts_for_users, so callers with many users
+        should pass them in chunks.
+        """
+        cohorts = get_cohorts_for_users(course_key, [user.id for user in users])
+        return {
+            user_id: cls._get_group_for_cohort(cohort, user_partition, use_cached=True)
+            for user_id, cohort in cohorts.iteritems()
+        }
+
+    @classmethod
+    def _get_group_for_cohort(cls, cohort, user_partition, use_cached=True):
+        """
+        Returns the group of the partition that the cohort is linked to, or None if there is no
+        cohort or (valid) cohort -> partition group mapping.
+        """
         if cohort is None:
             # student doesn't have a cohort
             return None
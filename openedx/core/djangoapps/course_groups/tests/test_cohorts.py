@@ -272,6 +272,83 @@ class TestCohorts(ModuleStoreTestCase):
             for __ in range(3):
                 cohorts.get_cohort(user, course.id, use_cached=use_cached)
 
+    def test_get_cohorts_for_users(self):
+        """
+        Make sure cohorts.get_cohorts_for_users() maps users to their cohorts
+        without assigning them, and sees changes to cohorts and memberships.
+        """
+        course = modulestore().get_course(self.toy_course_key)
+        cohort = CohortFactory(course_id=course.id, name="TestCohort")
+        other_cohort = CohortFactory(course_id=course.id, name="OtherCohort")
+        user = UserFactory(username="test", email="a@b.com")
+        other_user = UserFactory(username="test2", email="a2@b.com")
+        cohort.users.add(user)
+        user_ids = [user.id, other_user.id]
+
+        # The course isn't cohorted, so nobody has a cohort.
+        self.assertEqual(cohorts.get_cohorts_for_users(course.id, user_ids), {user.id: None, other_user.id: None})
+
+        config_course_cohorts(course, is_cohorted=True)
+        self.assertEqual(cohorts.get_cohorts_for_users(course.id, user_ids), {user.id: cohort, other_user.id: None})
+        self.assertEqual(cohorts.get_cohorts_for_users(course.id, []), {})
+
+        cohorts.add_user_to_cohort(other_cohort, user.username)
+        other_cohort.users.add(other_user)
+        self.assertEqual(
+            cohorts.get_cohorts_for_users(course.id, user_ids),
+            {user.id: other_cohort, other_user.id: other_cohort}
+        )
+
+        other_cohort.name = "RenamedCohort"
+        other_cohort.save()
+        self.assertEqual(cohorts.get_cohorts_for_users(course.id, [user.id])[user.id].name, "RenamedCohort")
+
+        other_user.course_groups.clear()
+        self.assertEqual(cohorts.get_cohorts_for_users(course.id, [other_user.id]), {other_user.id: None})
+
+    @patch.object(cohorts, 'COHORT_MEMBERSHIP_SETTLE_TIME', 0)
+    def test_get_cohorts_for_users_sql_queries(self):
+        """
+        Make sure cohorts.get_cohorts_for_users() reads all the memberships with
+        one query, and then from the cache until they change.
+        """
+        course = modulestore().get_course(self.toy_course_key)
+        config_course_cohorts(course, is_cohorted=True)
+        cohort = CohortFactory(course_id=course.id, name="TestCohort")
+        users = [UserFactory() for __ in range(5)]
+        cohort.users.add(*users[:3])
+        user_ids = [user.id for user in users]
+
+        # The cohort settings, the memberships and the cohorts.
+        with self.assertNumQueries(3):
+            cohorts.get_cohorts_for_users(course.id, user_ids)
+        # Only the cohort settings.
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                cohorts.get_cohorts_for_users(course.id, user_ids),
+                dict((user.id, cohort if user in users[:3] else None) for user in users)
+            )
+
+        cohort.users.remove(users[0])
+        with self.assertNumQueries(3):
+            self.assertIsNone(cohorts.get_cohorts_for_users(course.id, user_ids)[users[0].id])
+
+    def test_get_cohorts_for_users_not_cached_after_change(self):
+        """
+        Make sure cohorts.get_cohorts_for_users() doesn't cache memberships
+        read soon after a change, which may not have been committed yet.
+        """
+        course = modulestore().get_course(self.toy_course_key)
+        config_course_cohorts(course, is_cohorted=True)
+        cohort = CohortFactory(course_id=course.id, name="TestCohort")
+        user = UserFactory()
+        cohort.users.add(user)
+
+        for __ in range(2):
+            # The cohort settings, the memberships and the cohorts.
+            with self.assertNumQueries(3):
+                self.assertEqual(cohorts.get_cohorts_for_users(course.id, [user.id]), {user.id: cohort})
+
     def test_get_cohort_with_assign(self):
         """
         Make sure cohorts.get_cohort() returns None if no group is already
@@ -628,6 +705,58 @@ class TestCohorts(ModuleStoreTestCase):
             lambda: cohorts.add_user_to_cohort(first_cohort, "non_existent_username")
         )
 
+    @patch("openedx.core.djangoapps.course_groups.cohorts.tracker")
+    def test_add_users_to_cohorts(self, mock_tracker):
+        """
+        Make sure cohorts.add_users_to_cohorts() applies assignments in order,
+        moves users between cohorts and reports missing and unchanged users.
+        """
+        course = modulestore().get_course(self.toy_course_key)
+        first_cohort = CohortFactory(course_id=course.id, name="FirstCohort")
+        second_cohort = CohortFactory(course_id=course.id, name="SecondCohort")
+        moved_user = UserFactory(username="Moved", email="moved@b.com")
+        present_user = UserFactory(username="Present", email="present@b.com")
+        new_user = UserFactory(username="New", email="new@b.com")
+        first_cohort.users.add(moved_user, present_user)
+
+        results = cohorts.add_users_to_cohorts(
+            course.id,
+            [
+                ("moved@b.com", second_cohort),
+                ("Present", first_cohort),
+                ("non_existent_username", first_cohort),
+                ("New", first_cohort),
+                ("new@b.com", second_cohort),
+            ]
+        )
+
+        self.assertEqual(
+            results,
+            [(moved_user, True), (present_user, False), (None, False), (new_user, True), (new_user, True)]
+        )
+        self.assertEqual(set(first_cohort.users.all()), set([present_user]))
+        self.assertEqual(set(second_cohort.users.all()), set([moved_user, new_user]))
+        mock_tracker.emit.assert_any_call(
+            "edx.cohort.user_add_requested",
+            {
+                "user_id": moved_user.id,
+                "cohort_id": second_cohort.id,
+                "cohort_name": second_cohort.name,
+                "previous_cohort_id": first_cohort.id,
+                "previous_cohort_name": first_cohort.name,
+            }
+        )
+        mock_tracker.emit.assert_any_call(
+            "edx.cohort.user_add_requested",
+            {
+                "user_id": new_user.id,
+                "cohort_id": second_cohort.id,
+                "cohort_name": second_cohort.name,
+                "previous_cohort_id": first_cohort.id,
+                "previous_cohort_name": first_cohort.name,
+            }
+        )
+
     def test_get_course_cohort_settings(self):
         """
         Test that cohorts.get_course_cohort_settings is working as expected.
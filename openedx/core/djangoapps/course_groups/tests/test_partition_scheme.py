@@ -141,6 +141,29 @@ class TestCohortPartitionScheme(ModuleStoreTestCase):
         # scheme should now return nothing
         self.assert_student_in_group(None)
 
+    def test_get_groups_for_users(self):
+        """
+        Test that the CohortPartitionScheme returns the groups of many students
+        at once, without assigning them to cohorts.
+        """
+        first_cohort, second_cohort = [
+            CohortFactory(course_id=self.course_key) for _ in range(2)
+        ]
+        other_student, unassigned_student = UserFactory.create(), UserFactory.create()
+        add_user_to_cohort(first_cohort, self.student.username)
+        add_user_to_cohort(second_cohort, other_student.username)
+        link_cohort_to_partition_group(first_cohort, self.user_partition.id, self.groups[0].id)
+
+        self.assertEqual(
+            CohortPartitionScheme.get_groups_for_users(
+                self.course_key,
+                [self.student, other_student, unassigned_student],
+                self.user_partition
+            ),
+            {self.student.id: self.groups[0], other_student.id: None, unassigned_student.id: None}
+        )
+        self.assertFalse(unassigned_student.course_groups.exists())
+
     def test_student_lazily_assigned(self):
         """
         Test that the lazy assignment of students to cohorts works
@@ -5,6 +5,8 @@ whether a user has satisfied those requirements.
 
 import logging
 
+from django.utils import timezone
+
 from openedx.core.djangoapps.credit.exceptions import InvalidCreditRequirements, InvalidCreditCourse
 from openedx.core.djangoapps.credit.email_utils import send_credit_notifications
 from openedx.core.djangoapps.credit.models import (
@@ -227,15 +229,54 @@ def set_credit_requirement_status(username, course_key, req_namespace, req_name,
             )
 
     """
-    # Check if we're already eligible for credit.
-    # If so, short-circuit this process.
-    if CreditEligibility.is_user_eligible_for_credit(course_key, username):
+    set_credit_requirement_statuses(course_key, req_namespace, req_name, {username: (status, reason)})
+
+
+def set_credit_requirement_statuses(course_key, req_namespace, req_name, statuses):
+    """
+    Update the status of a requirement for many users.
+
+    This is the batch counterpart of `set_credit_requirement_status`, for
+    pipelines that grade or certify many users of a course at once.  The
+    requirements of the course, the users' eligibility and their existing
+    statuses are each read with a single query, and only the statuses that
+    change are written.  Users who satisfied all requirements are marked as
+    eligible for credit in the course.
+
+    Args:
+        course_key (CourseKey): Identifier for the course associated with the requirement.
+        req_namespace (str): Namespace of the requirement (e.g. "grade" or "reverification")
+        req_name (str): Name of the requirement (e.g. "grade" or the location of the ICRV XBlock)
+        statuses (dict): Maps the usernames of the users to (status, reason) tuples, where
+            status is either "satisfied" or "failed" and reason is a dict or None.
+
+    Example:
+        >>> set_credit_requirement_statuses(
+                CourseKey.from_string("course-v1-edX-DemoX-1T2015"),
+                "grade",
+                "grade",
+                {
+                    "staff": ("satisfied", {"final_grade": 0.95}),
+                    "bob": ("failed", {}),
+                }
+            )
+
+    """
+    # Skip the users who are already eligible for credit.
+    eligible_usernames = CreditEligibility.get_eligible_usernames(course_key, list(statuses))
+    if eligible_usernames:
         log.info(
             u'Skipping update of credit requirement with namespace "%s" '
-            u'and name "%s" because the user "%s" is already eligible for credit '
+            u'and name "%s" because the users %s are already eligible for credit '
             u'in the course "%s".',
-            req_namespace, req_name, username, course_key
+            req_namespace, req_name, u", ".join(u'"{}"'.format(username) for username in eligible_usernames),
+            course_key
+        )
+        statuses = dict(
+            (username, status) for username, status in statuses.iteritems()
+            if username not in eligible_usernames
         )
+    if not statuses:
         return
 
     # Retrieve all credit requirements for the course
@@ -262,28 +303,73 @@ def set_credit_requirement_status(username, course_key, req_namespace, req_name,
                 u'Could not update credit requirement in course "%s" '
                 u'with namespace "%s" and name "%s" '
                 u'because the requirement does not exist. '
-                u'The user "%s" should have had his/her status updated to "%s".'
+                u'The users %s should have had their statuses updated.'
             ),
-            unicode(course_key), req_namespace, req_name, username, status
+            unicode(course_key), req_namespace, req_name,
+            u", ".join(
+                u'"{}" to "{}"'.format(username, status) for username, (status, __) in statuses.iteritems()
+            )
         )
         return
 
-    # Update the requirement status
-    CreditRequirementStatus.add_or_update_requirement_status(
-        username, req_to_update, status=status, reason=reason
-    )
+    # Update the requirement statuses
+    CreditRequirementStatus.add_or_update_requirement_statuses(req_to_update, statuses)
 
-    # If we're marking this requirement as "satisfied", there's a chance
-    # that the user has met all eligibility requirements.
-    if status == "satisfied":
-        is_eligible, eligibility_record_created = CreditEligibility.update_eligibility(reqs, username, course_key)
-        if eligibility_record_created and is_eligible:
+    # The users whose requirement is marked as "satisfied" may now
+    # have met all eligibility requirements.
+    satisfied_usernames = [
+        username for username, (status, __) in statuses.iteritems()
+        if status == "satisfied"
+    ]
+    if satisfied_usernames:
+        for username in CreditEligibility.update_eligibilities(reqs, satisfied_usernames, course_key):
             try:
                 send_credit_notifications(username, course_key)
             except Exception:  # pylint: disable=broad-except
                 log.error("Error sending email")
 
 
+def set_grade_requirement_statuses(course_key, grades, deadline=None):
+    """
+    Update the minimum grade requirement status of many users.
+
+    Users whose grade is at least the minimum grade of the course's "grade"
+    requirement satisfy it.  Once the deadline has passed, users with a lower
+    grade fail it.  Nothing is updated if the course isn't a credit course or
+    has no minimum grade requirement.
+
+    Args:
+        course_key (CourseKey): Identifier of the course.
+        grades (dict): Maps the usernames of the users to their final grade
+            (the "percent" calculated by the course grader).
+
+    Keyword Arguments:
+        deadline (datetime): Course end date or None.
+
+    """
+    if not is_credit_course(course_key):
+        return
+
+    requirements = CreditRequirement.get_course_requirements(course_key, namespace="grade")
+    if not requirements:
+        return
+    criteria = requirements[0].criteria
+    if not criteria:
+        return
+
+    min_grade = criteria.get('min_grade')
+    deadline_passed = deadline is not None and deadline < timezone.now()
+    statuses = {}
+    for username, percent in grades.iteritems():
+        if percent >= min_grade:
+            statuses[username] = ("satisfied", {'final_grade': percent})
+        elif deadline_passed:
+            statuses[username] = ("failed", {})
+
+    if statuses:
+        set_credit_requirement_statuses(course_key, 'grade', 'grade', statuses)
+
+
 # pylint: disable=invalid-name
 def remove_credit_requirement_status(username, course_key, req_namespace, req_name):
     """
@@ -312,7 +398,9 @@ def remove_credit_requirement_status(username, course_key, req_namespace, req_na
     """
 
     # Find the requirement we're trying to remove
-    req_to_remove = CreditRequirement.get_course_requirements(course_key, namespace=req_namespace, name=req_name)
+    req_to_remove = next(iter(
+        CreditRequirement.get_course_requirements(course_key, namespace=req_namespace, name=req_name)
+    ), None)
 
     # If we can't find the requirement, then the most likely explanation
     # is that there was a lag removing the credit requirements after the course
@@ -382,10 +470,10 @@ def get_credit_requirement_status(course_key, username, namespace=None, name=Non
     """
     requirements = CreditRequirement.get_course_requirements(course_key, namespace=namespace, name=name)
     requirement_statuses = CreditRequirementStatus.get_statuses(requirements, username)
-    requirement_statuses = dict((o.requirement, o) for o in requirement_statuses)
+    requirement_statuses = dict((o.requirement_id, o) for o in requirement_statuses)
     statuses = []
     for requirement in requirements:
-        requirement_status = requirement_statuses.get(requirement)
+        requirement_status = requirement_statuses.get(requirement.id)
         statuses.append({
             "namespace": requirement.namespace,
             "name": requirement.name,
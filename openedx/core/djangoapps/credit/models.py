@@ -263,9 +263,15 @@ class CreditCourse(models.Model):
 
 @receiver(models.signals.post_save, sender=CreditCourse)
 @receiver(models.signals.post_delete, sender=CreditCourse)
-def invalidate_credit_courses_cache(sender, **kwargs):   # pylint: disable=unused-argument
-    """Invalidate the cache of credit courses. """
-    cache.delete(CreditCourse.CREDIT_COURSES_CACHE_KEY)
+def invalidate_credit_courses_cache(sender, instance, **kwargs):   # pylint: disable=unused-argument
+    """
+    Invalidate the cache of credit courses, and that of the requirements of
+    the course (which are deleted along with it).
+    """
+    cache.delete_many([
+        CreditCourse.CREDIT_COURSES_CACHE_KEY,
+        CreditRequirement.cache_key_name(instance.course_key),
+    ])
 
 
 class CreditRequirement(TimeStampedModel):
@@ -330,11 +336,22 @@ class CreditRequirement(TimeStampedModel):
 
         return credit_requirement, created
 
+    @classmethod
+    def cache_key_name(cls, course_key):
+        """
+        Return the name of the key under which the requirements of a course are cached.
+        """
+        return u"credit.requirements.{course_key}".format(course_key=course_key)
+
     @classmethod
     def get_course_requirements(cls, course_key, namespace=None, name=None):
         """
         Get credit requirements of a given course.
 
+        The active requirements of the course are cached for
+        CREDIT_REQUIREMENTS_CACHE_TIMEOUT seconds, or until a requirement of
+        the course is changed, and filtered by namespace and name from there.
+
         Args:
             course_key (CourseKey): The identifier for a course
 
@@ -343,17 +360,22 @@ class CreditRequirement(TimeStampedModel):
             name (str): Optionally filter credit requirements by name.
 
         Returns:
-            QuerySet of CreditRequirement model
+            list of CreditRequirement
 
         """
-        # order credit requirements according to their appearance in courseware
-        requirements = CreditRequirement.objects.filter(course__course_key=course_key, active=True)
+        cache_timeout = getattr(settings, 'CREDIT_REQUIREMENTS_CACHE_TIMEOUT', 0)
+        requirements = cache.get(cls.cache_key_name(course_key)) if cache_timeout else None
+        if requirements is None:
+            # order credit requirements according to their appearance in courseware
+            requirements = list(cls.objects.filter(course__course_key=course_key, active=True))
+            if cache_timeout:
+                cache.set(cls.cache_key_name(course_key), requirements, cache_timeout)
 
         if namespace is not None:
-            requirements = requirements.filter(namespace=namespace)
+            requirements = [requirement for requirement in requirements if requirement.namespace == namespace]
 
         if name is not None:
-            requirements = requirements.filter(name=name)
+            requirements = [requirement for requirement in requirements if requirement.name == name]
 
         return requirements
 
@@ -368,7 +390,11 @@ class CreditRequirement(TimeStampedModel):
         Returns:
             None
         """
-        cls.objects.filter(id__in=requirement_ids).update(active=False)
+        requirements = cls.objects.filter(id__in=requirement_ids)
+        # `update` doesn't send the signals that invalidate the cached requirements
+        course_keys = set(requirements.values_list('course__course_key', flat=True))
+        requirements.update(active=False)
+        cache.delete_many([cls.cache_key_name(course_key) for course_key in course_keys])
 
     @classmethod
     def get_course_requirement(cls, course_key, namespace, name):
@@ -392,6 +418,24 @@ class CreditRequirement(TimeStampedModel):
             return None
 
 
+@receiver(models.signals.post_save, sender=CreditRequirement)
+@receiver(models.signals.post_delete, sender=CreditRequirement)
+def invalidate_credit_requirements_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the cache of the requirements of the course of a requirement.
+
+    When the course itself is deleted, its requirements are deleted first and
+    their post_delete signals sent once the course row is gone, so the course
+    can't be loaded here; `invalidate_credit_courses_cache` clears the cache
+    then.
+    """
+    try:
+        course_key = instance.course.course_key
+    except CreditCourse.DoesNotExist:
+        return
+    cache.delete(CreditRequirement.cache_key_name(course_key))
+
+
 class CreditRequirementStatus(TimeStampedModel):
     """
     This model represents the status of each requirement.
@@ -467,6 +511,36 @@ class CreditRequirementStatus(TimeStampedModel):
             requirement_status.reason = reason if reason else {}
             requirement_status.save()
 
+    @classmethod
+    @transaction.commit_on_success
+    def add_or_update_requirement_statuses(cls, requirement, statuses):
+        """
+        Add or update the statuses of a credit requirement for many users.
+
+        The existing statuses of the users are read with a single query, and
+        only those that change are saved, so that grading a course again
+        doesn't rewrite (and add to the history of) the statuses that stay
+        the same.
+
+        Args:
+            requirement(CreditRequirement): 'CreditRequirement' object
+            statuses(dict): Maps the usernames of the users to (status, reason) tuples
+
+        """
+        existing_statuses = dict(
+            (requirement_status.username, requirement_status)
+            for requirement_status in cls.objects.filter(requirement=requirement, username__in=list(statuses))
+        )
+        for username, (status, reason) in statuses.iteritems():
+            reason = reason if reason else {}
+            requirement_status = existing_statuses.get(username)
+            if requirement_status is None:
+                cls.objects.create(username=username, requirement=requirement, status=status, reason=reason)
+            elif requirement_status.status != status or requirement_status.reason != reason:
+                requirement_status.status = status
+                requirement_status.reason = reason
+                requirement_status.save()
+
     @classmethod
     @transaction.commit_on_success
     def remove_requirement_status(cls, username, requirement):
@@ -533,7 +607,7 @@ class CreditEligibility(TimeStampedModel):
         # a status for a particular requirement.
         status_by_req = defaultdict(lambda: False)
         for status in CreditRequirementStatus.get_statuses(requirements, username):
-            status_by_req[status.requirement.id] = status.status
+            status_by_req[status.requirement_id] = status.status
 
         is_eligible = all(status_by_req[req.id] == "satisfied" for req in requirements)
 
@@ -550,6 +624,67 @@ class CreditEligibility(TimeStampedModel):
         else:
             return is_eligible, False
 
+    @classmethod
+    def update_eligibilities(cls, requirements, usernames, course_key):
+        """
+        Update the credit eligibility of many users for a course.
+
+        This is the batch counterpart of `update_eligibility`: the statuses
+        of all the users are read with a single query.
+
+        Arguments:
+            requirements (list): `CreditRequirement`s to check.
+            usernames (list): Identifiers of the users being updated.
+            course_key (CourseKey): Identifier of the course.
+
+        Returns:
+            set of the usernames of the users who became eligible
+        """
+        requirement_ids = set(requirement.id for requirement in requirements)
+        satisfied_by_user = defaultdict(set)
+        for username, requirement_id in CreditRequirementStatus.objects.filter(
+                requirement__in=requirements, username__in=usernames, status="satisfied"
+        ).values_list('username', 'requirement_id'):
+            satisfied_by_user[username].add(requirement_id)
+
+        eligible_usernames = [
+            username for username in usernames
+            if satisfied_by_user[username] >= requirement_ids
+        ]
+        if not eligible_usernames:
+            return set()
+
+        # If we're eligible, then mark the user as being eligible for credit,
+        # unless a (possibly expired) eligibility record already exists.
+        course = CreditCourse.objects.get(course_key=course_key)
+        created_usernames = set()
+        for username in eligible_usernames:
+            try:
+                CreditEligibility.objects.create(username=username, course=course)
+                created_usernames.add(username)
+            except IntegrityError:
+                pass
+        return created_usernames
+
+    @classmethod
+    def get_eligible_usernames(cls, course_key, usernames):
+        """
+        Find which of the given users are eligible for the provided credit course.
+
+        Args:
+            course_key(CourseKey): The course identifier
+            usernames(list): The usernames of the users
+
+        Returns:
+            set of the usernames of the eligible users
+        """
+        return set(cls.objects.filter(
+            course__course_key=course_key,
+            course__enabled=True,
+            username__in=usernames,
+            deadline__gt=datetime.datetime.now(pytz.UTC),
+        ).values_list('username', flat=True))
+
     @classmethod
     def get_user_eligibilities(cls, username):
         """
@@ -5,10 +5,9 @@ This file contains receivers of course publication signals.
 import logging
 
 from django.dispatch import receiver
-from django.utils import timezone
 from opaque_keys.edx.keys import CourseKey
 
-from openedx.core.djangoapps.signals.signals import GRADES_UPDATED
+from openedx.core.djangoapps.signals.signals import BULK_GRADES_UPDATED, GRADES_UPDATED
 from openedx.core.djangoapps.credit.verification_access import update_verification_partitions
 from xmodule.modulestore.django import SignalHandler
 
@@ -74,19 +73,31 @@ def listen_for_grade_calculation(sender, username, grade_summary, course_key, de
     from openedx.core.djangoapps.credit import api
 
     course_id = CourseKey.from_string(unicode(course_key))
-    is_credit = api.is_credit_course(course_id)
-    if is_credit:
-        requirements = api.get_credit_requirements(course_id, namespace='grade')
-        if requirements:
-            criteria = requirements[0].get('criteria')
-            if criteria:
-                min_grade = criteria.get('min_grade')
-                if grade_summary['percent'] >= min_grade:
-                    reason_dict = {'final_grade': grade_summary['percent']}
-                    api.set_credit_requirement_status(
-                        username, course_id, 'grade', 'grade', status="satisfied", reason=reason_dict
-                    )
-                elif deadline and deadline < timezone.now():
-                    api.set_credit_requirement_status(
-                        username, course_id, 'grade', 'grade', status="failed", reason={}
-                    )
+    api.set_grade_requirement_statuses(course_id, {username: grade_summary['percent']}, deadline)
+
+
+@receiver(BULK_GRADES_UPDATED)
+def listen_for_bulk_grade_calculation(sender, grade_summaries, course_key, deadline, **kwargs):  # pylint: disable=unused-argument
+    """Receive the 'BULK_GRADES_UPDATED' signal and update the minimum grade
+    requirement statuses of a batch of users at once.
+
+    Args:
+        sender: None
+        grade_summaries(dict): Maps usernames to the output of the course grader
+        course_key(CourseKey): The key for the course
+        deadline(datetime): Course end date or None
+
+    Kwargs:
+        kwargs : None
+
+    """
+    # This needs to be imported here to avoid a circular dependency
+    # that can cause syncdb to fail.
+    from openedx.core.djangoapps.credit import api
+
+    course_id = CourseKey.from_string(unicode(course_key))
+    api.set_grade_requirement_statuses(
+        course_id,
+        dict((username, grade_summary['percent']) for username, grade_summary in grade_summaries.iteritems()),
+        deadline
+    )
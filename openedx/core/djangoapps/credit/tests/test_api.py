@@ -404,7 +404,7 @@ class CreditRequirementApiTests(CreditApiTestBase):
         user = UserFactory.create(username=self.USER_INFO['username'], password=self.USER_INFO['password'])
 
         # Satisfy one of the requirements, but not the other
-        with self.assertNumQueries(7):
+        with self.assertNumQueries(6):
             api.set_credit_requirement_status(
                 user.username,
                 self.course_key,
@@ -416,7 +416,7 @@ class CreditRequirementApiTests(CreditApiTestBase):
         self.assertFalse(api.is_user_eligible_for_credit("bob", self.course_key))
 
         # Satisfy the other requirement
-        with self.assertNumQueries(11):
+        with self.assertNumQueries(9):
             api.set_credit_requirement_status(
                 "bob",
                 self.course_key,
@@ -456,7 +456,7 @@ class CreditRequirementApiTests(CreditApiTestBase):
         # Delete the eligibility entries and satisfy the user's eligibility
         # requirement again to trigger eligibility notification
         CreditEligibility.objects.all().delete()
-        with self.assertNumQueries(12):
+        with self.assertNumQueries(7):
             api.set_credit_requirement_status(
                 "bob",
                 self.course_key,
@@ -532,6 +532,66 @@ class CreditRequirementApiTests(CreditApiTestBase):
         self.assertEqual(len(req_status), 1)
         self.assertEqual(req_status[0]["status"], None)
 
+    def test_set_credit_requirement_statuses(self):
+        credit_course = self.add_credit_course()
+        requirements = [
+            {
+                "namespace": "grade",
+                "name": "grade",
+                "display_name": "Grade",
+                "criteria": {
+                    "min_grade": 0.8
+                },
+            },
+            {
+                "namespace": "reverification",
+                "name": "i4x://edX/DemoX/edx-reverification-block/assessment_uuid",
+                "display_name": "Assessment 1",
+                "criteria": {},
+            }
+        ]
+        api.set_credit_requirements(self.course_key, requirements)
+
+        # The statuses of users who are already eligible aren't updated
+        CreditEligibility.objects.create(username="carol", course=credit_course)
+
+        api.set_credit_requirement_statuses(
+            self.course_key,
+            requirements[1]["namespace"],
+            requirements[1]["name"],
+            {"bob": ("satisfied", None), "alice": ("satisfied", None), "carol": ("failed", None)}
+        )
+        api.set_credit_requirement_statuses(
+            self.course_key,
+            "grade",
+            "grade",
+            {"bob": ("satisfied", {"final_grade": 0.95}), "alice": ("failed", {"final_grade": 0.5})}
+        )
+
+        for username, grade_status, reverification_status in [
+                ("bob", "satisfied", "satisfied"),
+                ("alice", "failed", "satisfied"),
+                ("carol", None, None),
+        ]:
+            req_status = api.get_credit_requirement_status(self.course_key, username)
+            self.assertEqual([status["status"] for status in req_status], [grade_status, reverification_status])
+
+        # Only the user who satisfied all the requirements became eligible
+        self.assertTrue(api.is_user_eligible_for_credit("bob", self.course_key))
+        self.assertFalse(api.is_user_eligible_for_credit("alice", self.course_key))
+
+        # Statuses that don't change aren't saved again
+        history_count = CreditRequirementStatus.history.count()
+        api.set_credit_requirement_statuses(
+            self.course_key, "grade", "grade", {"alice": ("failed", {"final_grade": 0.5})}
+        )
+        self.assertEqual(CreditRequirementStatus.history.count(), history_count)
+
+    def test_set_credit_requirement_statuses_req_not_configured(self):
+        self.add_credit_course()
+        api.set_credit_requirement_statuses(self.course_key, "grade", "grade", {"bob": ("satisfied", None)})
+        self.assertFalse(CreditRequirementStatus.objects.exists())
+
 
 @ddt.ddt
 class CreditProviderIntegrationApiTests(CreditApiTestBase):
@@ -4,7 +4,9 @@ Tests for credit course models.
 """
 
 import ddt
+from django.core.cache import cache
 from django.test import TestCase
+from django.test.utils import override_settings
 
 from opaque_keys.edx.keys import CourseKey
 
@@ -75,6 +77,62 @@ class CreditEligibilityModelTests(TestCase):
         requirements = CreditRequirement.get_course_requirements(self.course_key, namespace="grade")
         self.assertEqual(len(requirements), 1)
 
+    @override_settings(CREDIT_REQUIREMENTS_CACHE_TIMEOUT=600)
+    def test_course_requirements_cached(self):
+        cache.clear()
+        credit_course = self.add_credit_course()
+        requirement = {
+            "namespace": "grade",
+            "name": "grade",
+            "display_name": "Grade",
+            "criteria": {
+                "min_grade": 0.8
+            },
+        }
+        grade_req, __ = CreditRequirement.add_or_update_course_requirement(credit_course, requirement, 0)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(CreditRequirement.get_course_requirements(self.course_key), [grade_req])
+        with self.assertNumQueries(0):
+            self.assertEqual(CreditRequirement.get_course_requirements(self.course_key), [grade_req])
+            self.assertEqual(CreditRequirement.get_course_requirements(self.course_key, namespace="grade"), [grade_req])
+            self.assertEqual(CreditRequirement.get_course_requirements(self.course_key, name="other"), [])
+
+        # Changing the requirements of the course invalidates the cache
+        requirement = {
+            "namespace": "reverification",
+            "name": "i4x://edX/DemoX/edx-reverification-block/assessment_uuid",
+            "display_name": "Assessment 1",
+            "criteria": {},
+        }
+        CreditRequirement.add_or_update_course_requirement(credit_course, requirement, 1)
+        self.assertEqual(len(CreditRequirement.get_course_requirements(self.course_key)), 2)
+
+        CreditRequirement.disable_credit_requirements([grade_req.id])
+        requirements = CreditRequirement.get_course_requirements(self.course_key)
+        self.assertEqual([req.namespace for req in requirements], ["reverification"])
+
+    @override_settings(CREDIT_REQUIREMENTS_CACHE_TIMEOUT=600)
+    def test_delete_credit_course_with_requirements(self):
+        cache.clear()
+        credit_course = self.add_credit_course()
+        requirement = {
+            "namespace": "grade",
+            "name": "grade",
+            "display_name": "Grade",
+            "criteria": {
+                "min_grade": 0.8
+            },
+        }
+        CreditRequirement.add_or_update_course_requirement(credit_course, requirement, 0)
+        self.assertEqual(len(CreditRequirement.get_course_requirements(self.course_key)), 1)
+
+        # The requirements are deleted along with the course, and no longer cached
+        credit_course.delete()
+        self.assertFalse(CreditCourse.objects.filter(course_key=self.course_key).exists())
+        self.assertFalse(CreditRequirement.objects.exists())
+        self.assertEqual(CreditRequirement.get_course_requirements(self.course_key), [])
+
     def add_credit_course(self):
         """ Add the course as a credit
 
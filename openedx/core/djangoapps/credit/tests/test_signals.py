@@ -15,7 +15,7 @@ from openedx.core.djangoapps.credit.api import (
 )
 
 from openedx.core.djangoapps.credit.models import CreditCourse, CreditProvider
-from openedx.core.djangoapps.credit.signals import listen_for_grade_calculation
+from openedx.core.djangoapps.credit.signals import listen_for_bulk_grade_calculation, listen_for_grade_calculation
 from student.tests.factories import UserFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
@@ -99,3 +99,18 @@ class TestMinGradedRequirementStatus(ModuleStoreTestCase):
         listen_for_grade_calculation(None, self.user.username, {'percent': 0.22}, self.course.id, self.EXPIRED_DUE_DATE)
         req_status = get_credit_requirement_status(self.course.id, self.request.user.username, 'grade', 'grade')
         self.assertEqual(req_status[0]["status"], 'failed')
+
+    def test_min_grade_requirement_bulk(self):
+        """Test updating the requirement status of many users at once."""
+        failing_user = UserFactory()
+        pending_user = UserFactory()
+        grade_summaries = {
+            self.user.username: {'percent': 0.6},
+            failing_user.username: {'percent': 0.22},
+        }
+
+        listen_for_bulk_grade_calculation(None, grade_summaries, self.course.id, self.EXPIRED_DUE_DATE)
+        listen_for_bulk_grade_calculation(None, {pending_user.username: {'percent': 0.4}}, self.course.id, None)
+        for user, status in [(self.user, 'satisfied'), (failing_user, 'failed'), (pending_user, None)]:
+            req_status = get_credit_requirement_status(self.course.id, user.username, 'grade', 'grade')
+            self.assertEqual(req_status[0]["status"], status)
@@ -7,3 +7,8 @@ from django.dispatch import Signal
 
 # Signal that fires when a user is graded (in lms/courseware/grades.py)
 GRADES_UPDATED = Signal(providing_args=["username", "grade_summary", "course_key", "deadline"])
+
+# Signal that fires when a batch of users of a course is graded (in
+# lms/courseware/grades.py:iterate_grades_for), instead of GRADES_UPDATED for
+# each of them. `grade_summaries` maps the usernames to their grade summaries.
+BULK_GRADES_UPDATED = Signal(providing_args=["grade_summaries", "course_key", "deadline"])
@@ -7,6 +7,7 @@ Stores global metadata using the UserPreference model, and per-course metadata u
 UserCourseTag model.
 """
 
+from .. import user_context
 from ..models import UserCourseTag
 
 # Scopes
@@ -15,10 +16,42 @@ from ..models import UserCourseTag
 COURSE_SCOPE = 'course'
 
 
+def get_course_tags(user, course_id):
+    """
+    Gets all of the user's course tags in the specified course_id. They are read from the
+    user's cached context, along with the rest of their course tags (see user_api.user_context).
+
+    Args:
+        user: the User object for the course tags
+        course_id: course identifier (string)
+
+    Returns:
+        dict of key: string value
+    """
+    return user_context.get_course_tags(user, course_id)
+
+
+def get_course_tags_for_users(users, course_id):
+    """
+    Gets all of the course tags of each of the users in the specified course_id. They are read
+    from the users' cached contexts, as get_course_tags does, and those missing from the cache
+    are read for all of the users at once.
+
+    Args:
+        users: the User objects for the course tags. Callers with many users should pass them
+            in chunks of a few hundred, to keep the queries small.
+        course_id: course identifier (string)
+
+    Returns:
+        dict mapping the id of each user to a dict of key: string value
+    """
+    return user_context.get_course_tags_for_users(users, course_id)
+
+
 def get_course_tag(user, course_id, key):
     """
     Gets the value of the user's course tag for the specified key in the specified
-    course_id.
+    course_id. All of the user's course tags are loaded by get_course_tags.
 
     Args:
         user: the User object for the course tag
@@ -28,15 +61,7 @@ def get_course_tag(user, course_id, key):
     Returns:
         string value, or None if there is no value saved
     """
-    try:
-        record = UserCourseTag.objects.get(
-            user=user,
-            course_id=course_id,
-            key=key)
-
-        return record.value
-    except UserCourseTag.DoesNotExist:
-        return None
+    return get_course_tags(user, course_id).get(key)
 
 
 def set_course_tag(user, course_id, key, value):
@@ -64,4 +89,5 @@ def set_course_tag(user, course_id, key, value):
         key=key)
 
     record.value = value
+    # Saving the tag invalidates the user's cached context
     record.save()
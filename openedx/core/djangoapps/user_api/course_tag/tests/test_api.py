@@ -2,8 +2,11 @@
 Test the user course tag API.
 """
 from django.test import TestCase
+from mock import Mock, patch
 
+from request_cache.middleware import RequestCache
 from student.tests.factories import UserFactory
+from openedx.core.djangoapps.user_api import user_context
 from openedx.core.djangoapps.user_api.course_tag import api as course_tag_api
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
@@ -34,3 +37,49 @@ class TestCourseTagAPI(TestCase):
         course_tag_api.set_course_tag(self.user, self.course_id, self.test_key, test_value)
         tag = course_tag_api.get_course_tag(self.user, self.course_id, self.test_key)
         self.assertEqual(tag, test_value)
+
+    @patch.object(user_context, 'USER_CONTEXT_SETTLE_TIME', 0)
+    def test_get_course_tags_for_users(self):
+        other_user = UserFactory.create()
+        course_tag_api.set_course_tag(self.user, self.course_id, self.test_key, 'value')
+        course_tag_api.set_course_tag(self.user, self.course_id, 'other_key', 'other_value')
+        expected_tags = {
+            self.user.id: {self.test_key: 'value', 'other_key': 'other_value'},
+            other_user.id: {},
+        }
+        with self.assertNumQueries(2):
+            tags = course_tag_api.get_course_tags_for_users([self.user, other_user], self.course_id)
+        self.assertEqual(tags, expected_tags)
+
+        # the tags are cached along with the rest of the users' contexts
+        with self.assertNumQueries(0):
+            tags = course_tag_api.get_course_tags_for_users([self.user, other_user], self.course_id)
+            self.assertEqual(tags, expected_tags)
+            self.assertIsNone(course_tag_api.get_course_tag(other_user, self.course_id, self.test_key))
+
+        # setting a tag invalidates the cached context
+        course_tag_api.set_course_tag(self.user, self.course_id, self.test_key, 'value2')
+        self.assertEqual(
+            course_tag_api.get_course_tags_for_users([self.user], self.course_id)[self.user.id][self.test_key],
+            'value2'
+        )
+
+    @patch('openedx.core.djangoapps.user_api.user_context.get_request', Mock(return_value=Mock()))
+    def test_course_tags_memoized_in_request(self):
+        self.addCleanup(RequestCache.clear_request_cache)
+        course_tag_api.set_course_tag(self.user, self.course_id, self.test_key, 'value')
+
+        with self.assertNumQueries(2):
+            self.assertEqual(course_tag_api.get_course_tag(self.user, self.course_id, self.test_key), 'value')
+            self.assertIsNone(course_tag_api.get_course_tag(self.user, self.course_id, 'other_key'))
+
+        # setting a tag drops the memoized tags
+        course_tag_api.set_course_tag(self.user, self.course_id, self.test_key, 'value2')
+        self.assertEqual(course_tag_api.get_course_tag(self.user, self.course_id, self.test_key), 'value2')
+
+        # tags memoized in the request aren't read again in bulk
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                course_tag_api.get_course_tags_for_users([self.user], self.course_id),
+                {self.user.id: {self.test_key: 'value2'}}
+            )
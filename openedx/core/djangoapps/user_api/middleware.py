@@ -9,7 +9,7 @@ from opaque_keys.edx.keys import CourseKey
 
 from track.contexts import COURSE_REGEX
 
-from .models import UserCourseTag
+from .user_context import get_course_tags
 
 
 class UserTagsEventContextMiddleware(object):
@@ -35,15 +35,7 @@ class UserTagsEventContextMiddleware(object):
         if course_id:
             context['course_id'] = course_id
 
-            if request.user.is_authenticated():
-                context['course_user_tags'] = dict(
-                    UserCourseTag.objects.filter(
-                        user=request.user.pk,
-                        course_id=course_key,
-                    ).values_list('key', 'value')
-                )
-            else:
-                context['course_user_tags'] = {}
+            context['course_user_tags'] = get_course_tags(request.user, course_key)
 
         tracker.get_tracker().enter_context(
             self.CONTEXT_NAME,
@@ -1,10 +1,15 @@
+import time
+from uuid import uuid4
+
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.validators import RegexValidator
 from django.db import models
 from django.db.models.signals import post_delete, pre_save, post_save
 from django.dispatch import receiver
 from model_utils.models import TimeStampedModel
 
+from request_cache import get_cache
 from util.model_utils import get_changed_fields_dict, emit_setting_changed_event
 from xmodule_django.models import CourseKeyField
 
@@ -15,6 +20,7 @@ from xmodule_django.models import CourseKeyField
 # certain models.  For now we will leave the models in "student" and
 # create an alias in "user_api".
 from student.models import UserProfile, Registration, PendingEmailChange  # pylint: disable=unused-import
+from student.models import UserStanding
 
 
 class UserPreference(models.Model):
@@ -111,3 +117,45 @@ class UserOrgTag(TimeStampedModel):
     class Meta(object):
         """ Meta class for defining unique constraints. """
         unique_together = ("user", "org", "key")
+
+
+# Names of the request caches in which user_api.user_context memoizes the
+# context and the account status of users, keyed by user id.
+USER_CONTEXT_CACHE_KEY = u"user_api.user_context"
+ACCOUNT_STATUS_CACHE_KEY = u"user_api.account_status"
+
+# The cached user contexts of a user are stored under a version that is
+# replaced whenever one of their rows changes. The version outlives the
+# contexts cached under it; see user_api.user_context.
+USER_CONTEXT_VERSION_CACHE_TIMEOUT = 60 * 60
+
+
+def user_context_version_cache_key(user_id):
+    """
+    Return the cache key of the version of the cached user context of the
+    user with id `user_id`.
+    """
+    return u"user_api.user_context_version.{}".format(user_id)
+
+
+@receiver(post_save, sender=UserPreference)
+@receiver(post_delete, sender=UserPreference)
+@receiver(post_save, sender=UserCourseTag)
+@receiver(post_delete, sender=UserCourseTag)
+@receiver(post_save, sender=UserStanding)
+@receiver(post_delete, sender=UserStanding)
+def invalidate_user_context_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the cached user context of the user whose standing,
+    preference or course tag has changed. The account standing isn't cached
+    beyond the request, so changes to it only drop the request's copy.
+    """
+    if sender is UserStanding:
+        get_cache(ACCOUNT_STATUS_CACHE_KEY).pop(instance.user_id, None)
+    else:
+        cache.set(
+            user_context_version_cache_key(instance.user_id),
+            (uuid4().hex, time.time()),
+            USER_CONTEXT_VERSION_CACHE_TIMEOUT
+        )
+        get_cache(USER_CONTEXT_CACHE_KEY).pop(instance.user_id, None)
@@ -24,22 +24,7 @@ class RandomUserPartitionScheme(object):
         """
         partition_key = cls.key_for_partition(user_partition)
         group_id = course_tag_api.get_course_tag(user, course_key, partition_key)
-
-        group = None
-        if group_id is not None:
-            # attempt to look up the presently assigned group
-            try:
-                group = user_partition.get_group(int(group_id))
-            except NoSuchUserPartitionGroupError:
-                # jsa: we can turn off warnings here if this is an expected case.
-                log.warn(
-                    "group not found in RandomUserPartitionScheme: %r",
-                    {
-                        "requested_partition_id": user_partition.id,
-                        "requested_group_id": group_id,
-                    },
-                    exc_info=True
-                )
+        group = cls._get_assigned_group(user_partition, group_id)
 
         if group is None and assign:
             if not user_partition.groups:
@@ -71,6 +56,44 @@ class RandomUserPartitionScheme(object):
 
         return group
 
+    @classmethod
+    def get_groups_for_users(cls, course_key, users, user_partition):
+        """
+        Returns a dict mapping the id of each of the specified users to the group of the partition
+        to which they are assigned, or None if they haven't been assigned yet. Users are never
+        assigned here, and the course tags of all of them are read by a single query, so callers
+        with many users should pass them in chunks.
+        """
+        partition_key = cls.key_for_partition(user_partition)
+        return {
+            user_id: cls._get_assigned_group(user_partition, tags.get(partition_key))
+            for user_id, tags in course_tag_api.get_course_tags_for_users(users, course_key).iteritems()
+        }
+
+    @classmethod
+    def _get_assigned_group(cls, user_partition, group_id):
+        """
+        Returns the group of the partition with the `group_id` saved in a user's course tag, or
+        None if no group id was saved or there is no such group.
+        """
+        if group_id is None:
+            return None
+
+        # attempt to look up the presently assigned group
+        try:
+            return user_partition.get_group(int(group_id))
+        except NoSuchUserPartitionGroupError:
+            # jsa: we can turn off warnings here if this is an expected case.
+            log.warn(
+                "group not found in RandomUserPartitionScheme: %r",
+                {
+                    "requested_partition_id": user_partition.id,
+                    "requested_group_id": group_id,
+                },
+                exc_info=True
+            )
+            return None
+
     @classmethod
     def key_for_partition(cls, user_partition):
         """
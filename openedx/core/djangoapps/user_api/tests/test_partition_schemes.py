@@ -26,6 +26,10 @@ class MemoryCourseTagAPI(object):
         """Gets the value of ``key``"""
         self._tags[course_id][key] = value
 
+    def get_course_tags_for_users(self, users, course_id):
+        """Gets the tags of each of ``users``"""
+        return {user.id: dict(self._tags[course_id]) for user in users}
+
 
 class TestRandomUserPartitionScheme(PartitionTestCase):
     """
@@ -74,6 +78,17 @@ class TestRandomUserPartitionScheme(PartitionTestCase):
 
         self.assertIsNotNone(group)
 
+    def test_get_groups_for_users(self):
+        self.assertEqual(
+            RandomUserPartitionScheme.get_groups_for_users(self.MOCK_COURSE_ID, [self.user], self.user_partition),
+            {self.user.id: None}
+        )
+        group = RandomUserPartitionScheme.get_group_for_user(self.MOCK_COURSE_ID, self.user, self.user_partition)
+        self.assertEqual(
+            RandomUserPartitionScheme.get_groups_for_users(self.MOCK_COURSE_ID, [self.user], self.user_partition),
+            {self.user.id: group}
+        )
+
     def test_empty_partition(self):
         empty_partition = UserPartition(
             self.TEST_ID,
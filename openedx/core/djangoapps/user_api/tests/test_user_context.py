@@ -0,0 +1,103 @@
+"""
+Tests for the cached per-user context read by middleware.
+"""
+from django.core.cache import cache
+from django.test import TestCase
+from mock import patch
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+
+from student.models import UserStanding
+from student.tests.factories import AnonymousUserFactory, UserFactory, UserStandingFactory
+
+from ..tests.factories import UserPreferenceFactory, UserCourseTagFactory
+from ..models import UserPreference
+from .. import user_context
+from ..user_context import get_account_status, get_course_tags, get_preference, get_user_context
+
+
+@patch.object(user_context, 'USER_CONTEXT_SETTLE_TIME', 0)
+class UserContextTest(TestCase):
+    """
+    Test that the user context is cached, and invalidated when its rows change.
+    """
+    def setUp(self):
+        super(UserContextTest, self).setUp()
+        cache.clear()
+        self.user = UserFactory.create()
+        self.course_key = SlashSeparatedCourseKey('org', 'course', 'run')
+
+    def test_empty(self):
+        self.assertEqual(
+            get_user_context(self.user),
+            {'account_status': None, 'preferences': {}, 'course_tags': {}}
+        )
+
+    def test_anonymous(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                get_user_context(AnonymousUserFactory()),
+                {'account_status': None, 'preferences': {}, 'course_tags': {}}
+            )
+
+    def test_cached(self):
+        UserPreferenceFactory.create(user=self.user, key='pref-lang', value='eo')
+        UserCourseTagFactory.create(user=self.user, course_id=self.course_key, key='tag', value='value')
+        UserStandingFactory.create(user=self.user, account_status=UserStanding.ACCOUNT_DISABLED, changed_by=self.user)
+
+        with self.assertNumQueries(3):
+            get_user_context(self.user)
+        # Only the account standing is read again
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                get_user_context(self.user),
+                {
+                    'account_status': UserStanding.ACCOUNT_DISABLED,
+                    'preferences': {'pref-lang': 'eo'},
+                    'course_tags': {unicode(self.course_key): {'tag': 'value'}},
+                }
+            )
+        self.assertEqual(get_preference(self.user, 'pref-lang'), 'eo')
+        self.assertIsNone(get_preference(self.user, 'dark-lang'))
+        self.assertEqual(get_course_tags(self.user, self.course_key), {'tag': 'value'})
+        self.assertEqual(get_course_tags(self.user, SlashSeparatedCourseKey('other', 'course', 'run')), {})
+        self.assertEqual(get_account_status(self.user), UserStanding.ACCOUNT_DISABLED)
+
+    def test_not_cached_after_change(self):
+        with patch.object(user_context, 'USER_CONTEXT_SETTLE_TIME', 60):
+            get_user_context(self.user)
+            UserPreferenceFactory.create(user=self.user, key='pref-lang', value='eo')
+            # The change may not have been committed yet, so what is read isn't cached
+            for __ in range(2):
+                with self.assertNumQueries(2):
+                    self.assertEqual(get_preference(self.user, 'pref-lang'), 'eo')
+
+    def test_account_status_not_cached(self):
+        standing = UserStandingFactory.create(
+            user=self.user, account_status=UserStanding.ACCOUNT_ENABLED, changed_by=self.user
+        )
+        self.assertEqual(get_account_status(self.user), UserStanding.ACCOUNT_ENABLED)
+        # Even changes that don't go through the model are seen right away
+        UserStanding.objects.filter(id=standing.id).update(account_status=UserStanding.ACCOUNT_DISABLED)
+        self.assertEqual(get_account_status(self.user), UserStanding.ACCOUNT_DISABLED)
+
+    def test_invalidated_by_preference(self):
+        self.assertIsNone(get_preference(self.user, 'pref-lang'))
+        UserPreferenceFactory.create(user=self.user, key='pref-lang', value='eo')
+        self.assertEqual(get_preference(self.user, 'pref-lang'), 'eo')
+        UserPreference.objects.get(user=self.user, key='pref-lang').delete()
+        self.assertIsNone(get_preference(self.user, 'pref-lang'))
+
+    def test_invalidated_by_course_tag(self):
+        self.assertEqual(get_course_tags(self.user, self.course_key), {})
+        UserCourseTagFactory.create(user=self.user, course_id=self.course_key, key='tag', value='value')
+        self.assertEqual(get_course_tags(self.user, self.course_key), {'tag': 'value'})
+
+    def test_invalidated_by_standing(self):
+        self.assertIsNone(get_account_status(self.user))
+        standing = UserStandingFactory.create(
+            user=self.user, account_status=UserStanding.ACCOUNT_DISABLED, changed_by=self.user
+        )
+        self.assertEqual(get_account_status(self.user), UserStanding.ACCOUNT_DISABLED)
+        standing.account_status = UserStanding.ACCOUNT_ENABLED
+        standing.save()
+        self.assertEqual(get_account_status(self.user), UserStanding.ACCOUNT_ENABLED)
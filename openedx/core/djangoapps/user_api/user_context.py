@@ -0,0 +1,196 @@
+"""
+The per-user data that middleware reads on every request: the user's account
+standing, their preferences (such as their language and dark language
+preview) and their course tags.
+
+The preferences and course tags are loaded together the first time they are
+needed, and cached under a version that is replaced whenever one of the
+underlying UserPreference or UserCourseTag rows is saved or deleted. The
+account standing is read from the database on every request, so that a
+disabled account loses access right away. Within a request, all of it is only
+read once.
+
+The course tags of many users can also be read together, for e.g. the
+partition schemes; see `get_course_tags_for_users`.
+"""
+import time
+from uuid import uuid4
+
+from django.core.cache import cache
+
+from request_cache import get_cache, get_request
+from student.models import UserStanding
+
+from .models import (
+    UserCourseTag, UserPreference, ACCOUNT_STATUS_CACHE_KEY, USER_CONTEXT_CACHE_KEY,
+    USER_CONTEXT_VERSION_CACHE_TIMEOUT, user_context_version_cache_key
+)
+
+# The cached context is also invalidated by changes to its rows, so this only
+# bounds how long changes made without going through the models can go unseen.
+USER_CONTEXT_CACHE_TIMEOUT = 15 * 60
+
+# The version is replaced when a change is made, which may be before the
+# transaction making it commits. Until this many seconds after the latest
+# change, the context read from the database may predate it, so it isn't
+# cached.
+USER_CONTEXT_SETTLE_TIME = 5 * 60
+
+
+def _user_context_versions(user_ids):
+    """
+    Return { user id: (version, changed) } for the cached contexts of the
+    users with ids `user_ids`, where `changed` is when the version was last
+    replaced (0 if it hasn't been since it was cached). Users whose version
+    the cache doesn't keep (e.g. it is a dummy cache) are left out.
+    """
+    version_keys = dict((user_id, user_context_version_cache_key(user_id)) for user_id in user_ids)
+    cached = cache.get_many(version_keys.values())
+    versions = {}
+    for user_id, version_key in version_keys.iteritems():
+        if version_key not in cached:
+            cache.add(version_key, (uuid4().hex, 0), USER_CONTEXT_VERSION_CACHE_TIMEOUT)
+            cached[version_key] = cache.get(version_key)
+        if cached[version_key] is not None:
+            versions[user_id] = cached[version_key]
+    return versions
+
+
+def _get_contexts(user_ids):
+    """
+    Return { user id: context } with the preferences and course tags of each
+    of the users with ids `user_ids`:
+
+        'preferences': { preference key: value }
+        'course_tags': { course id string: { tag key: value } }
+
+    Contexts missing from the cache are read by two queries for all of the
+    users, so callers with many users should pass them in chunks.
+    """
+    versions = _user_context_versions(user_ids)
+    cache_keys = dict(
+        (user_id, u"user_api.user_context.{}.{}".format(user_id, version))
+        for user_id, (version, __) in versions.iteritems()
+    )
+    cached = cache.get_many(cache_keys.values()) if cache_keys else {}
+    contexts = dict(
+        (user_id, cached[cache_key]) for user_id, cache_key in cache_keys.iteritems() if cache_key in cached
+    )
+
+    missing_user_ids = [user_id for user_id in user_ids if user_id not in contexts]
+    if missing_user_ids:
+        now = time.time()
+        cacheable = [
+            user_id for user_id in missing_user_ids
+            if user_id in versions and now - versions[user_id][1] >= USER_CONTEXT_SETTLE_TIME
+        ]
+        # Reads made for the cache don't go to a read replica, which may lag behind
+        database = 'default' if cacheable else None
+        missing_contexts = dict(
+            (user_id, {'preferences': {}, 'course_tags': {}}) for user_id in missing_user_ids
+        )
+        tags = UserCourseTag.objects.using(database).filter(
+            user__in=missing_user_ids
+        ).values_list('user', 'course_id', 'key', 'value')
+        for user_id, course_id, key, value in tags:
+            missing_contexts[user_id]['course_tags'].setdefault(unicode(course_id), {})[key] = value
+        preferences = UserPreference.objects.using(database).filter(
+            user__in=missing_user_ids
+        ).values_list('user', 'key', 'value')
+        for user_id, key, value in preferences:
+            missing_contexts[user_id]['preferences'][key] = value
+        if cacheable:
+            cache.set_many(
+                dict((cache_keys[user_id], missing_contexts[user_id]) for user_id in cacheable),
+                USER_CONTEXT_CACHE_TIMEOUT
+            )
+        contexts.update(missing_contexts)
+    return contexts
+
+
+def _request_cache(name):
+    """
+    Return the request cache `name`. Outside of a request (e.g. in a celery
+    worker) the request cache is never cleared, so a throwaway dict is
+    returned instead.
+    """
+    return get_cache(name) if get_request() is not None else {}
+
+
+def _get_context(user):
+    """
+    Return the preferences and course tags of `user`, as `_get_contexts`
+    does, memoized for the rest of the request.
+    """
+    if not user.is_authenticated():
+        return {'preferences': {}, 'course_tags': {}}
+
+    request_cache = _request_cache(USER_CONTEXT_CACHE_KEY)
+    if user.id not in request_cache:
+        request_cache[user.id] = _get_contexts([user.id])[user.id]
+    return request_cache[user.id]
+
+
+def get_user_context(user):
+    """
+    Return the context of `user`, a dict with:
+
+        'account_status': the UserStanding account status, or None
+        'preferences': { preference key: value }
+        'course_tags': { course id string: { tag key: value } }
+
+    Anonymous users have an empty context.
+    """
+    return dict(_get_context(user), account_status=get_account_status(user))
+
+
+def get_account_status(user):
+    """
+    Return the UserStanding account status of `user`, or None if they have
+    no standing recorded. It is read from the database once per request.
+    """
+    if not user.is_authenticated():
+        return None
+
+    request_cache = _request_cache(ACCOUNT_STATUS_CACHE_KEY)
+    if user.id not in request_cache:
+        account_statuses = UserStanding.objects.filter(user=user.id).values_list('account_status', flat=True)
+        request_cache[user.id] = account_statuses[0] if account_statuses else None
+    return request_cache[user.id]
+
+
+def get_preference(user, preference_key):
+    """
+    Return the value of the preference `preference_key` of `user`, or None
+    if it is not set.
+
+    Like UserPreference.get_value, this does no authorization.
+    """
+    return _get_context(user)['preferences'].get(preference_key)
+
+
+def get_course_tags(user, course_key):
+    """
+    Return { tag key: value } with all the course tags of `user` in the
+    course `course_key`.
+    """
+    return dict(_get_context(user)['course_tags'].get(unicode(course_key), {}))
+
+
+def get_course_tags_for_users(users, course_key):
+    """
+    Return { user id: { tag key: value } } with all the course tags of each
+    of `users` in the course `course_key`. Those not memoized in the request
+    are read from the cache, or from the database for all of the users at
+    once, as `_get_contexts` does.
+    """
+    request_cache = _request_cache(USER_CONTEXT_CACHE_KEY)
+    user_ids = set(user.id for user in users)
+    contexts = dict((user_id, request_cache[user_id]) for user_id in user_ids if user_id in request_cache)
+    missing_user_ids = user_ids.difference(contexts)
+    if missing_user_ids:
+        contexts.update(_get_contexts(missing_user_ids))
+    return dict(
+        (user_id, dict(context['course_tags'].get(unicode(course_key), {})))
+        for user_id, context in contexts.iteritems()
+    )